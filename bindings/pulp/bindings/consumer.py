@@ -1,5 +1,6 @@
 from pulp.bindings.base import PulpAPI
 from pulp.bindings.search import SearchAPI
+from pulp.common.util import profile_hash
 
 
 # Default for update APIs to differentiate between None and not updating the value
@@ -170,7 +171,9 @@ class ProfilesAPI(PulpAPI):
 
     def send(self, id, content_type, profile):
         path = self.BASE_PATH % id
-        data = {'content_type': content_type, 'profile': profile}
+        data = {'content_type': content_type,
+                'profile': profile,
+                'upload_hash': profile_hash(profile)}
         return self.server.POST(path, data)
 
 
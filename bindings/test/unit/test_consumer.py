@@ -2,7 +2,8 @@ import unittest
 
 import mock
 
-from pulp.bindings.consumer import ConsumerSearchAPI
+from pulp.bindings.consumer import ConsumerSearchAPI, ProfilesAPI
+from pulp.common.util import profile_hash
 
 
 class TestConsumerSearchAPI(unittest.TestCase):
@@ -10,3 +11,15 @@ class TestConsumerSearchAPI(unittest.TestCase):
         api = ConsumerSearchAPI(mock.MagicMock())
         self.assertTrue(api.PATH is not None)
         self.assertTrue(len(api.PATH) > 0)
+
+
+class TestProfilesAPI(unittest.TestCase):
+    def test_send(self):
+        api = ProfilesAPI(mock.MagicMock())
+        profile = [{'name': 'zsh'}]
+
+        response = api.send('consumer-1', 'rpm', profile)
+
+        expected = {'content_type': 'rpm', 'profile': profile, 'upload_hash': profile_hash(profile)}
+        api.server.POST.assert_called_once_with('/v2/consumers/consumer-1/profiles/', expected)
+        self.assertTrue(response is api.server.POST.return_value)
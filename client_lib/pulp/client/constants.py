@@ -1 +1,4 @@
 USER_CONFIG_DIR = '~/.pulp/'
+
+# Name of the file in USER_CONFIG_DIR that caches which extensions provide each section, by role
+EXTENSIONS_MANIFEST_FILENAME = 'extensions_%s.json'
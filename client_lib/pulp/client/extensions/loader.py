@@ -8,9 +8,11 @@ then uses it to instantiate the extension components.
 
 import copy
 from gettext import gettext as _
+import json
 import logging
 import os
 import sys
+import tempfile
 
 import pkg_resources
 
@@ -30,6 +32,13 @@ _ENTRY_POINTS = 'entry points'
 # name of the entry point
 ENTRY_POINT_EXTENSIONS = 'pulp.extensions.%s'
 
+# Bumped whenever the structure of the command manifest changes
+MANIFEST_VERSION = 1
+
+# Prefixes of the IDs of extensions in the command manifest
+_PACK_ID = 'pack:%s'
+_ENTRY_POINT_ID = 'entry point:%s'
+
 
 class ExtensionLoaderException(Exception):
     """ Base class for all loading-related exceptions. """
@@ -80,7 +89,7 @@ class InvalidExtensionConfig(ExtensionLoaderException):
     pass
 
 
-def load_extensions(extensions_dir, context, role):
+def load_extensions(extensions_dir, context, role, section_name=None, manifest_filename=None):
     """
     @param extensions_dir: directory in which to find extension packs
     @type  extensions_dir: str
@@ -91,6 +100,14 @@ def load_extensions(extensions_dir, context, role):
     This way we can load the modules and entry points for a given priority at
     the same time.
 
+    When a manifest_filename is given, the root level sections and commands
+    contributed by each extension are recorded in a command manifest after
+    all of the extensions are loaded. If the manifest is current, which is
+    determined by the modification times of the extension files, and it
+    contains section_name, only the extensions that contribute to that
+    section or command (and those that do not contribute to any) are loaded.
+    Otherwise all extensions are loaded and the manifest is rewritten.
+
     @param context: pre-populated context the extensions should be given to
                     interact with the client
     @type  context: pulp.client.extensions.core.ClientContext
@@ -98,12 +115,33 @@ def load_extensions(extensions_dir, context, role):
     @param role:    name of a role, either "admin" or "consumer", so we know
                     which extensions to load
     @type  role:    str
+
+    @param section_name: name of the root level section or command that will
+                         be run; None if every extension is needed
+    @type  section_name: str
+
+    @param manifest_filename: full path to the command manifest; None to
+                              always load every extension
+    @type  manifest_filename: str
     """
 
     # Validation
     if not os.access(extensions_dir, os.F_OK | os.R_OK):
         raise InvalidExtensionsDirectory(extensions_dir)
 
+    entry_points = list(pkg_resources.iter_entry_points(ENTRY_POINT_EXTENSIONS % role))
+
+    # The manifest is only rewritten (and the CLI structure only inspected) when it is stale
+    fingerprint = None
+    if manifest_filename is not None and context.cli is not None:
+        fingerprint = _fingerprint(extensions_dir, entry_points)
+        manifest = _read_manifest(manifest_filename)
+        if manifest is not None and manifest['fingerprint'] == fingerprint:
+            if section_name in manifest['sections']:
+                _load_from_manifest(extensions_dir, context, entry_points, manifest, section_name)
+                return
+            fingerprint = None
+
     # identify modules and sort them
     try:
         unsorted_modules = _load_pack_modules(extensions_dir)
@@ -112,13 +150,19 @@ def load_extensions(extensions_dir, context, role):
         raise LoadFailed([e.pack_name]), None, sys.exc_info()[2]
 
     # find extensions from entry points and add them to the sorted structure
-    for extension in pkg_resources.iter_entry_points(ENTRY_POINT_EXTENSIONS % role):
+    for extension in entry_points:
         priority = getattr(extension, PRIORITY_VAR, DEFAULT_PRIORITY)
         sorted_extensions.setdefault(priority, {}).setdefault(_ENTRY_POINTS, []).append(extension)
 
+    # IDs of the extensions in load order, and the root level names each contributes to
+    extension_ids = []
+    contributions = {}
+
     error_packs = []
     for priority in sorted(sorted_extensions.keys()):
         for module in sorted_extensions[priority].get(_MODULES, []):
+            extension_id = _PACK_ID % module.__name__
+            structure = _cli_structure(context.cli) if fingerprint is not None else None
             try:
                 _load_pack(extensions_dir, module, context)
             except ExtensionLoaderException, e:
@@ -126,12 +170,179 @@ def load_extensions(extensions_dir, context, role):
                 # the cause will be logged by _load_pack. This method should
                 # continue to load extensions so all of the errors are logged.
                 error_packs.append(module.__name__)
+            if structure is not None:
+                extension_ids.append(extension_id)
+                contributions[extension_id] = _changed_names(structure,
+                                                             _cli_structure(context.cli))
         for entry_point in sorted_extensions[priority].get(_ENTRY_POINTS, []):
+            extension_id = _ENTRY_POINT_ID % entry_point
+            structure = _cli_structure(context.cli) if fingerprint is not None else None
             entry_point.load()(context)
+            if structure is not None:
+                extension_ids.append(extension_id)
+                contributions[extension_id] = _changed_names(structure,
+                                                             _cli_structure(context.cli))
 
     if len(error_packs) > 0:
         raise LoadFailed(error_packs)
 
+    if fingerprint is not None:
+        _write_manifest(manifest_filename, fingerprint, extension_ids, contributions)
+
+
+def _load_from_manifest(extensions_dir, context, entry_points, manifest, section_name):
+    """
+    Loads only the extensions the command manifest lists for the given root
+    level section or command, along with the extensions that do not contribute
+    to any, in the order in which they were originally loaded.
+
+    @raises LoadFailed: if any of the extensions fail to load
+    """
+    needed = set(manifest['sections'][section_name]) | set(manifest['unowned'])
+    entry_points = dict((_ENTRY_POINT_ID % e, e) for e in entry_points)
+
+    if extensions_dir not in sys.path:
+        sys.path.append(extensions_dir)
+
+    error_packs = []
+    for extension_id in manifest['extensions']:
+        if extension_id not in needed:
+            continue
+        if extension_id in entry_points:
+            entry_points[extension_id].load()(context)
+            continue
+        pack = extension_id[len(_PACK_ID % ''):]
+        try:
+            module = __import__(pack)
+        except Exception:
+            _logger.exception(_('Could not load extension pack [%(p)s]' % {'p': pack}))
+            error_packs.append(pack)
+            continue
+        try:
+            _load_pack(extensions_dir, module, context)
+        except ExtensionLoaderException:
+            error_packs.append(pack)
+
+    if len(error_packs) > 0:
+        raise LoadFailed(error_packs)
+
+
+def _fingerprint(extensions_dir, entry_points):
+    """
+    Builds a value that changes whenever an extension is added, removed or
+    modified. It is made up of the modification time of every file in the
+    extension packs and of the module of every entry point.
+
+    @return: list of [name, modification time] pairs
+    @rtype:  list
+    """
+    fingerprint = [[extensions_dir, os.stat(extensions_dir).st_mtime]]
+    for dir_path, dir_names, file_names in os.walk(extensions_dir):
+        dir_names.sort()
+        for name in sorted(file_names):
+            if name.endswith('.pyc') or name.endswith('.pyo'):
+                continue
+            path = os.path.join(dir_path, name)
+            fingerprint.append([path, os.stat(path).st_mtime])
+
+    for entry_point in entry_points:
+        mtime = None
+        if entry_point.dist is not None and entry_point.dist.location:
+            module_path = os.path.join(entry_point.dist.location,
+                                       *entry_point.module_name.split('.'))
+            for path in (module_path + '.py', os.path.join(module_path, '__init__.py')):
+                if os.path.exists(path):
+                    mtime = os.stat(path).st_mtime
+                    break
+            name = '%s %s' % (entry_point, entry_point.dist)
+        else:
+            name = str(entry_point)
+        fingerprint.append([name, mtime])
+
+    return fingerprint
+
+
+def _cli_structure(cli):
+    """
+    Captures the structure of the CLI so the root level sections and commands
+    an extension adds or changes can be determined.
+
+    @return: set of (root level name, path, object ID, number of options)
+    @rtype:  set
+    """
+    structure = set()
+
+    def walk(section, root_name, path):
+        for name, command in section.commands.items():
+            structure.add((root_name or name, path + (name,), id(command),
+                           len(command.all_options())))
+        for name, subsection in section.subsections.items():
+            structure.add((root_name or name, path + (name,), id(subsection), None))
+            walk(subsection, root_name or name, path + (name,))
+
+    walk(cli.root_section, None, ())
+    return structure
+
+
+def _changed_names(before, after):
+    """
+    @return: sorted list of the root level names whose structure differs
+    @rtype:  list
+    """
+    return sorted(set(entry[0] for entry in before ^ after))
+
+
+def _read_manifest(manifest_filename):
+    """
+    @return: the command manifest, or None if it does not exist or is unusable
+    @rtype:  dict
+    """
+    try:
+        with open(manifest_filename) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (IOError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return None
+    for key in ('fingerprint', 'extensions', 'sections', 'unowned'):
+        if key not in manifest:
+            return None
+    return manifest
+
+
+def _write_manifest(manifest_filename, fingerprint, extension_ids, contributions):
+    """
+    Writes the command manifest, mapping each root level section and command to
+    the extensions that contribute to it. The file is replaced atomically so a
+    concurrent client never reads a partial manifest. Failures are logged and
+    otherwise ignored since the manifest is only an optimization.
+    """
+    sections = {}
+    unowned = []
+    for extension_id in extension_ids:
+        names = contributions[extension_id]
+        if not names:
+            unowned.append(extension_id)
+        for name in names:
+            sections.setdefault(name, []).append(extension_id)
+
+    manifest = {'version': MANIFEST_VERSION,
+                'fingerprint': fingerprint,
+                'extensions': extension_ids,
+                'sections': sections,
+                'unowned': unowned}
+    temp_filename = None
+    try:
+        fd, temp_filename = tempfile.mkstemp(dir=os.path.dirname(manifest_filename))
+        with os.fdopen(fd, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.rename(temp_filename, manifest_filename)
+    except (IOError, OSError):
+        _logger.exception(_('Could not write the extension manifest [%(m)s]' %
+                            {'m': manifest_filename}))
+        if temp_filename is not None and os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
 
 def _load_pack_modules(extensions_dir):
     """
@@ -98,8 +98,17 @@ def main(config, exception_handler_class=ExceptionHandler):
     extensions_dir = os.path.expanduser(extensions_dir)
 
     role = config['client']['role']
+
+    # Only the extensions providing the section being run need to be loaded, unless the whole
+    # CLI is going to be displayed
+    section_name = None
+    if args and not options.print_map:
+        section_name = args[0]
+    manifest_filename = os.path.join(os.path.expanduser(constants.USER_CONFIG_DIR),
+                                     constants.EXTENSIONS_MANIFEST_FILENAME % role)
     try:
-        extensions_loader.load_extensions(extensions_dir, context, role)
+        extensions_loader.load_extensions(extensions_dir, context, role, section_name,
+                                          manifest_filename)
     except extensions_loader.LoadFailed, e:
         prompt.write(
             _('The following extensions failed to load: %(f)s' % {'f': ', '.join(e.failed_packs)}))
@@ -1,5 +1,8 @@
+import json
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 import mock
@@ -192,3 +195,115 @@ class ExtensionLoaderTests(unittest.TestCase):
         def foo():
             pass
         self.assertEqual(getattr(foo, loader.PRIORITY_VAR), loader.DEFAULT_PRIORITY)
+
+
+class ExtensionManifestTests(unittest.TestCase):
+
+    def setUp(self):
+        super(ExtensionManifestTests, self).setUp()
+        self.working_dir = tempfile.mkdtemp()
+        self.manifest_filename = os.path.join(self.working_dir, 'extensions_admin.json')
+
+    def tearDown(self):
+        super(ExtensionManifestTests, self).tearDown()
+        shutil.rmtree(self.working_dir)
+
+    def _context(self):
+        prompt = PulpPrompt()
+        return ClientContext(None, None, None, prompt, None, cli=PulpCli(prompt))
+
+    def _load(self, section_name, extensions_dir=VALID_SET):
+        context = self._context()
+        loader.load_extensions(extensions_dir, context, 'admin', section_name,
+                               self.manifest_filename)
+        return sorted(context.cli.root_section.subsections.keys())
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_full_load_writes_manifest(self, mock_entry):
+        sections = self._load(None)
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+        with open(self.manifest_filename) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(manifest['version'], loader.MANIFEST_VERSION)
+        self.assertEqual(manifest['extensions'], ['pack:ext3', 'pack:ext1', 'pack:ext4',
+                                                  'pack:ext2'])
+        self.assertEqual(manifest['sections'], {'section-1': ['pack:ext1'],
+                                                'section-2': ['pack:ext2'],
+                                                'section-3': ['pack:ext3']})
+        self.assertEqual(manifest['unowned'], ['pack:ext4'])
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_load_from_manifest(self, mock_entry):
+        self._load(None)
+
+        with mock.patch('pulp.client.extensions.loader._load_pack_modules') as mock_modules:
+            sections = self._load('section-2')
+
+        self.assertEqual(sections, ['section-2'])
+        self.assertFalse(mock_modules.called)
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_unknown_section_loads_all(self, mock_entry):
+        self._load(None)
+        os.utime(self.manifest_filename, (1000, 1000))
+
+        sections = self._load('unknown')
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+        # the manifest is current, so it is not rewritten
+        self.assertEqual(os.stat(self.manifest_filename).st_mtime, 1000)
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_stale_manifest_loads_all(self, mock_entry):
+        self._load(None)
+        with open(self.manifest_filename) as manifest_file:
+            manifest = json.load(manifest_file)
+        manifest['fingerprint'][1][1] -= 10
+        with open(self.manifest_filename, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        sections = self._load('section-2')
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+        with open(self.manifest_filename) as manifest_file:
+            self.assertEqual(json.load(manifest_file)['fingerprint'],
+                             loader._fingerprint(VALID_SET, []))
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_corrupt_manifest_loads_all(self, mock_entry):
+        with open(self.manifest_filename, 'w') as manifest_file:
+            manifest_file.write('{"version": ')
+
+        sections = self._load('section-2')
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_failed_load_does_not_write_manifest(self, mock_entry):
+        self.assertRaises(loader.LoadFailed, self._load, None, PARTIAL_FAIL_SET)
+
+        self.assertFalse(os.path.exists(self.manifest_filename))
+
+    @mock.patch('pkg_resources.iter_entry_points', autospec=True)
+    def test_entry_point_contributions(self, mock_iter):
+        def add_command(context):
+            context.cli.root_section.find_subsection('section-1').create_command(
+                'extra', 'Extra', lambda: None)
+
+        entry_point = decorator.priority(loader.DEFAULT_PRIORITY + 10)(mock.MagicMock(dist=None))
+        entry_point.__str__.return_value = 'extra = extra.pulp_cli:initialize'
+        entry_point.load.return_value = add_command
+        mock_iter.return_value = [entry_point]
+        self._load(None)
+
+        with open(self.manifest_filename) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(manifest['sections']['section-1'],
+                         ['pack:ext1', 'entry point:extra = extra.pulp_cli:initialize'])
+
+        entry_point.load.reset_mock()
+        sections = self._load('section-1')
+
+        self.assertEqual(sections, ['section-1'])
+        self.assertEqual(entry_point.load.call_count, 1)
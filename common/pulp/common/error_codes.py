@@ -127,6 +127,9 @@ PLP0049 = Error(
     _('Worker terminated abnormally while processing task %(task_id)s.  '
       'Check the logs for details'),
     ['task_id'])
+PLP0050 = Error("PLP0050", _("The repository %(repo_id)s cannot be created until the content of "
+                             "the deleted repository with the same ID has been removed."),
+                ['repo_id'])
 
 # Create a section for general validation errors (PLP1000 - PLP2999)
 # Validation problems should be reported with a general PLP1000 error with a more specific
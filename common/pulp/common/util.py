@@ -1,3 +1,8 @@
+import hashlib
+
+from pulp.common.compat import json
+
+
 def encode_unicode(path):
     """
     Check if given path is a unicode and if yes, return utf-8 encoded path
@@ -39,3 +44,18 @@ def partial(func, *args, **kwds):
     Python 2.4 doesn't provide functools so provide our own version of the partial method
     """
     return lambda *fargs, **fkwds: func(*(args + fargs), **dict(kwds, **fkwds))
+
+
+def profile_hash(profile):
+    """
+    Calculate the hash of a unit profile. The profile is serialized to JSON without whitespace and
+    with sorted dictionary keys so that equal profiles always have the same hash. Consumers use it
+    to identify the profiles they upload so that unchanged profiles need not be stored again.
+
+    :param profile: The profile structure to hash.
+    :type  profile: object
+    :return: The hex digest of the SHA-256 hash of the profile.
+    :rtype:  str
+    """
+    serialized_profile = json.dumps(profile, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(serialized_profile).hexdigest()
@@ -52,3 +52,18 @@ class TestPartial(unittest.TestCase):
         result_kwargs.update(kwargs)
         result_kwargs.update(additional_kwargs)
         base_func.assert_called_once_with(*result_args, **result_kwargs)
+
+
+class TestProfileHash(unittest.TestCase):
+
+    def test_key_order(self):
+        self.assertEqual(util.profile_hash({'name': 'zsh', 'version': '1.0'}),
+                         util.profile_hash({'version': '1.0', 'name': 'zsh'}))
+
+    def test_different_profiles(self):
+        self.assertNotEqual(util.profile_hash([{'name': 'zsh'}]),
+                            util.profile_hash([{'name': 'bash'}]))
+
+    def test_digest(self):
+        self.assertEqual(util.profile_hash([]),
+                         '4f53cda18c2baa0c0354bb5f9a3ecbe5ed12ab4d8e11ba873c2f11161202b945')
@@ -191,6 +191,7 @@ def install():
 
     # configure the mock instances. By default, have the plugins indicate configurations are valid
     MOCK_IMPORTER.validate_config.return_value = True, None
+    MOCK_IMPORTER.can_copy_associations.return_value = False
     MOCK_IMPORTER.sync_repo.return_value = SyncReport(True, 10, 5, 1, 'Summary of the sync',
                                                       'Details of the sync')
 
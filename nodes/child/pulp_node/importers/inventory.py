@@ -1,56 +1,99 @@
+import json
+
+from hashlib import sha1
+
 from pulp_node import constants
 
 
-class UniqueKey(object):
+def unit_key_digest(unit):
     """
-    A unique unit key consisting of a unit's type_id & unit_key.
+    Get a compact digest of a unit's type_id & unit_key.
     The unit key is sorted to ensure consistency.
-    :ivar uid: The unique ID.
-    :type uid: A tuple of: (type_id, unit_key)
+    :param unit: A content unit.
+    :type unit: dict
+    :return: The (binary) SHA1 digest.
+    :rtype: str
+    """
+    type_id = unit['type_id']
+    unit_key = sorted(unit['unit_key'].items())
+    return sha1(json.dumps([type_id, unit_key])).digest()
+
+
+class InventoryEntry(object):
+    """
+    A compact entry in the unit inventory.
+    Only what is needed to compare the parent and child inventories is kept in memory.
+    The full unit is fetched using the reference only when needed.
+    :ivar type_id: The unit type ID.
+    :type type_id: str
+    :ivar last_updated: The unit last updated timestamp.
+    :type last_updated: float
+    :ivar ref: A reference to the unit.  For parent units, this is a
+        pulp_node.manifest.UnitRef.  For child units, this is the unit ID.
     """
 
-    def __init__(self, unit):
+    __slots__ = ('type_id', 'last_updated', 'ref')
+
+    def __init__(self, type_id, last_updated, ref):
         """
-        :param unit: A content unit.
-        :type unit: dict
+        :param type_id: The unit type ID.
+        :type type_id: str
+        :param last_updated: The unit last updated timestamp.
+        :type last_updated: float
+        :param ref: A reference to the unit.
         """
-        type_id = unit['type_id']
-        unit_key = tuple(sorted(unit['unit_key'].items()))
-        self.uid = (type_id, unit_key)
+        self.type_id = type_id
+        self.last_updated = last_updated
+        self.ref = ref
 
-    def __hash__(self):
-        return hash(self.uid)
 
-    def __eq__(self, other):
-        return self.uid == other.uid
+class FetchedUnits(object):
+    """
+    A sized collection of parent units that are fetched using the
+    reference only while being iterated.
+    """
+
+    def __init__(self, entries):
+        """
+        :param entries: A list of parent inventory entries.
+        :type entries: list
+        """
+        self.entries = entries
 
-    def __ne__(self, other):
-        return self.uid != other.uid
+    def __iter__(self):
+        for entry in self.entries:
+            yield entry.ref.fetch(), entry.ref
+
+    def __len__(self):
+        return len(self.entries)
 
 
 class UnitInventory(object):
     """
     The unit inventory contains both the parent and child inventory
     of content units associated with a specific repository.  Each is contained
-    within a dictionary keyed by {UnitKey} to ensure uniqueness.
+    within a dictionary of InventoryEntry keyed by unit key digest to ensure
+    uniqueness.
     """
 
     @staticmethod
     def _import_parent_units(units):
         _units = {}
         for unit, ref in units:
-            unit.pop('metadata', None)
-            key = UniqueKey(unit)
-            _units[key] = (unit, ref)
+            key = unit_key_digest(unit)
+            last_updated = unit.get(constants.LAST_UPDATED, 0)
+            type_id = intern(str(unit['type_id']))
+            _units[key] = InventoryEntry(type_id, last_updated, ref)
         return _units
 
     @staticmethod
     def _import_child_units(units):
         _units = {}
         for unit in units:
-            unit.pop('metadata', None)
-            key = UniqueKey(unit)
-            _units[key] = unit
+            key = unit_key_digest(unit)
+            last_updated = unit.get(constants.LAST_UPDATED, 0)
+            type_id = intern(str(unit['type_id']))
+            _units[key] = InventoryEntry(type_id, last_updated, unit['unit_id'])
         return _units
 
     def __init__(self, base_URL, parent_units, child_units):
@@ -69,33 +112,33 @@ class UnitInventory(object):
         """
         Listing of units contained in the parent inventory
         but not contained in the child inventory.
-        :return: List of (unit, ref).
-        :rtype: list
+        :return: Collection of (unit, ref).  Units are fetched during iteration.
+        :rtype: FetchedUnits
         """
-        return [r for k, r in self.parent_units.items() if k not in self.child_units]
+        entries = [e for k, e in self.parent_units.iteritems() if k not in self.child_units]
+        return FetchedUnits(entries)
 
     def units_on_child_only(self):
         """
         Listing of units contained in the child inventory
         but not contained in the parent inventory.
-        :return: List of units that need to be purged.
+        :return: List of (type_id, unit_id) for units that need to be purged.
         :rtype: list
         """
-        return [u for k, u in self.child_units.items() if k not in self.parent_units]
+        return [(e.type_id, e.ref) for k, e in self.child_units.iteritems()
+                if k not in self.parent_units]
 
     def updated_units(self):
         """
         Listing of units updated on the parent.
-        :return: List of (unit, ref).
-        :rtype: list
+        :return: Collection of (unit, ref).  Units are fetched during iteration.
+        :rtype: FetchedUnits
         """
         updated = []
-        for key, (unit, ref) in self.parent_units.items():
-            child_unit = self.child_units.get(key)
-            if child_unit is None:
+        for key, entry in self.parent_units.iteritems():
+            child_entry = self.child_units.get(key)
+            if child_entry is None:
                 continue
-            parent_last_updated = unit.get(constants.LAST_UPDATED, 0)
-            child_last_updated = child_unit.get(constants.LAST_UPDATED, 0)
-            if parent_last_updated > child_last_updated:
-                updated.append((unit, ref))
-        return updated
+            if entry.last_updated > child_entry.last_updated:
+                updated.append(entry)
+        return FetchedUnits(updated)
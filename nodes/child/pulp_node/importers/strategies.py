@@ -162,7 +162,7 @@ class ImporterStrategy(object):
         # fetch child units
         try:
             conduit = NodesConduit()
-            child_units = conduit.get_units(request.repo_id)
+            child_units = conduit.get_unit_keys(request.repo_id)
         except NodeError:
             raise
         except Exception:
@@ -248,7 +248,7 @@ class ImporterStrategy(object):
             self._reset_storage_path(unit)
             if not self._needs_download(unit):
                 # unit has no file associated
-                self.add_unit(request, unit_ref.fetch())
+                self.add_unit(request, unit)
                 continue
             unit_url, destination = self._url_and_destination(unit_inventory.base_URL, unit)
             _request = listener.create_request(unit_url, destination, unit, unit_ref)
@@ -279,7 +279,6 @@ class ImporterStrategy(object):
                 _request = listener.create_request(unit_url, destination, unit, unit_ref)
                 download_list.append(_request)
             else:
-                unit = unit_ref.fetch()
                 self.add_unit(request, unit)
         if not download_list:
             return
@@ -345,21 +344,21 @@ class ImporterStrategy(object):
         :param unit_inventory: The inventory of both parent and child content units.
         :type unit_inventory: UnitInventory
         """
-        for unit in unit_inventory.units_on_child_only():
+        for type_id, unit_id in unit_inventory.units_on_child_only():
             if request.cancelled():
                 return
             try:
                 _unit = AssociatedUnit(
-                    type_id=unit['type_id'],
-                    unit_key=unit['unit_key'],
+                    type_id=type_id,
+                    unit_key={},
                     metadata={},
                     storage_path=None,
                     created=None,
                     updated=None)
-                _unit.id = unit['unit_id']
+                _unit.id = unit_id
                 request.conduit.remove_unit(_unit)
             except Exception:
-                _log.exception(unit['unit_id'])
+                _log.exception(unit_id)
                 request.summary.errors.append(DeleteUnitError(request.repo_id))
 
 
@@ -16,16 +16,48 @@ class NodesConduit(object):
         :return: unit iterator
         :rtype: UnitsIterator
         """
+        associations, unit_ids = NodesConduit._associations(repo_id)
+        return UnitsIterator(associations, unit_ids)
+
+    @staticmethod
+    def get_unit_keys(repo_id):
+        """
+        Get the identity of all units associated with a repository.
+        Only the unit key and last updated fields are read from the DB so
+        the returned units have empty metadata and no storage path.  Used to
+        build the child unit inventory without loading the unit metadata.
+        :param repo_id: The repository ID used to query the units.
+        :type repo_id: str
+        :return: unit iterator
+        :rtype: UnitsIterator
+        """
+        associations, unit_ids = NodesConduit._associations(repo_id, ('unit_id', 'unit_type_id'))
+        fields = {}
+        for type_id in unit_ids:
+            fields[type_id] = list(get_unit_key_fields_for_type(type_id)) + ['_last_updated']
+        return UnitsIterator(associations, unit_ids, fields)
+
+    @staticmethod
+    def _associations(repo_id, fields=None):
+        """
+        Get the associations for a repository and the associated unit IDs grouped by type.
+        :param repo_id: The repository ID used to query the associations.
+        :type repo_id: str
+        :param fields: An optional list of association fields to be read.
+        :type fields: iterable
+        :return: tuple of: (associations keyed by unit_id, unit_ids keyed by type_id)
+        :rtype: tuple
+        """
         unit_ids = {}
         associations = {}
         collection = RepoContentUnit.get_collection()
-        for association in collection.find({'repo_id': repo_id}):
+        for association in collection.find({'repo_id': repo_id}, projection=fields):
             unit_id = association['unit_id']
             type_id = association['unit_type_id']
             associations[unit_id] = association
             id_list = unit_ids.setdefault(type_id, [])
             id_list.append(unit_id)
-        return UnitsIterator(associations, unit_ids)
+        return associations, unit_ids
 
 
 class UnitsIterator(object):
@@ -67,23 +99,27 @@ class UnitsIterator(object):
             metadata=unit)
 
     @staticmethod
-    def open_cursors(unit_ids):
+    def open_cursors(unit_ids, fields=None):
         """
         Get a generator of unit cursors.
 
         :param unit_ids: A dictionary of unit_ids keyed by type_id.
         :type unit_ids: dict
+        :param fields: An optional dictionary of unit fields to be read keyed by type_id.
+            When not specified, all fields are read.
+        :type fields: dict
         :return: A list of open cursors.
         :rtype: generator
         """
+        fields = fields or {}
         for type_id, id_list in unit_ids.items():
             for page in paginate(id_list):
                 query = {'_id': {'$in': page}}
                 collection = type_units_collection(type_id)
-                cursor = collection.find(query)
+                cursor = collection.find(query, projection=fields.get(type_id))
                 yield cursor
 
-    def get_units(self, associations, unit_ids):
+    def get_units(self, associations, unit_ids, fields=None):
         """
         Get units generator.
 
@@ -91,24 +127,28 @@ class UnitsIterator(object):
         :type associations: dict
         :param unit_ids: A dictionary of unit_ids keyed by type_id.
         :type unit_ids: dict
+        :param fields: An optional dictionary of unit fields to be read keyed by type_id.
+        :type fields: dict
         :return: A composite association and unit.
         :rtype: generator
         """
-        for cursor in UnitsIterator.open_cursors(unit_ids):
+        for cursor in UnitsIterator.open_cursors(unit_ids, fields):
             for unit in cursor:
                 unit_id = unit['_id']
                 association = associations[unit_id]
                 yield self.associated_unit(association, unit)
 
-    def __init__(self, associations, unit_ids):
+    def __init__(self, associations, unit_ids, fields=None):
         """
         :param associations: A dictionary of unit associates keyed by type_id.
         :type associations: dict
         :param unit_ids: A dictionary of unit_ids keyed by type_id.
         :type unit_ids: dict
+        :param fields: An optional dictionary of unit fields to be read keyed by type_id.
+        :type fields: dict
         """
         self.length = len(associations)
-        self.unit_generator = self.get_units(associations, unit_ids)
+        self.unit_generator = self.get_units(associations, unit_ids, fields)
 
     def next(self):
         return self.unit_generator.next()
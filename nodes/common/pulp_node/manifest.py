@@ -422,6 +422,8 @@ class UnitRef(object):
     :type length: int
     """
 
+    __slots__ = ('path', 'offset', 'length')
+
     def __init__(self, path, offset, length):
         """
         :param path: The absolute path to the units file.
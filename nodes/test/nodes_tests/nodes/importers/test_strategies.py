@@ -23,3 +23,44 @@ class TestAddUnits(TestCase):
 
         # validation
         self.assertEqual(fake_request.summary.sources, fake_download())
+
+    @patch('pulp_node.importers.strategies.ContentContainer')
+    @patch('pulp_node.importers.strategies.ImporterStrategy.add_unit')
+    def test_add_units_without_file(self, fake_add_unit, fake_container):
+        unit = {'type_id': 'T', 'unit_key': {}, 'metadata': {}, 'storage_path': None}
+        unit_ref = Mock()
+
+        fake_request = Mock()
+        fake_request.cancelled.return_value = False
+
+        fake_inventory = Mock()
+        fake_inventory.units_on_parent_only.return_value = [(unit, unit_ref)]
+
+        # test
+        strategy = ImporterStrategy()
+        strategy._add_units(fake_request, fake_inventory)
+
+        # validation
+        fake_add_unit.assert_called_once_with(fake_request, unit)
+        self.assertFalse(unit_ref.fetch.called)
+
+
+class TestUpdateUnits(TestCase):
+
+    @patch('pulp_node.importers.strategies.ImporterStrategy.add_unit')
+    def test_update_units_without_file(self, fake_add_unit):
+        unit = {'type_id': 'T', 'unit_key': {}, 'metadata': {}, 'storage_path': None}
+        unit_ref = Mock()
+
+        fake_request = Mock()
+
+        fake_inventory = Mock()
+        fake_inventory.updated_units.return_value = [(unit, unit_ref)]
+
+        # test
+        strategy = ImporterStrategy()
+        strategy._update_units(fake_request, fake_inventory)
+
+        # validation
+        fake_add_unit.assert_called_once_with(fake_request, unit)
+        self.assertFalse(unit_ref.fetch.called)
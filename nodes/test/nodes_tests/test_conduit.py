@@ -117,3 +117,22 @@ class QueryTests(ServerTests):
             self.assertEqual(unit_key['N'], n)
             self.assertEqual(u['storage_path'], create_storage_path(unit_id))
             n += 1
+
+    def test_query_unit_keys(self):
+        num_units = 5
+        units_created = populate(num_units)
+        conduit = NodesConduit()
+        units = conduit.get_unit_keys(REPO_ID)
+        self.assertEqual(len(units), len(units_created))
+        unit_list = list(units)
+        n = 0
+        for u in sorted(unit_list, key=itemgetter('unit_id')):
+            unit_id = u['unit_id']
+            type_id = u['type_id']
+            self.assertTrue(type_id in ALL_TYPES)
+            self.assertEqual(create_unit_id(type_id, n), unit_id)
+            unit_key = u['unit_key']
+            self.assertEqual(unit_key['N'], n)
+            self.assertEqual(u['storage_path'], None)
+            self.assertEqual(u['metadata'], {})
+            n += 1
@@ -167,7 +167,7 @@ class TestBase(TestCase):
         self.assertEqual(len(request.summary.errors), 1)
         self.assertEqual(request.summary.errors[0].error_id, error.DeleteUnitError.ERROR_ID)
 
-    @patch('pulp_node.conduit.NodesConduit.get_units', side_effect=ValueError())
+    @patch('pulp_node.conduit.NodesConduit.get_unit_keys', side_effect=ValueError())
     def test_get_child_units_exception(self, *unused):
         # Setup
         request = self.request()
@@ -175,7 +175,7 @@ class TestBase(TestCase):
         strategy = strategies.ImporterStrategy()
         self.assertRaises(error.GetChildUnitsError, strategy._unit_inventory, request)
 
-    @patch('pulp_node.conduit.NodesConduit.get_units', return_value=[])
+    @patch('pulp_node.conduit.NodesConduit.get_unit_keys', return_value=[])
     @patch('pulp_node.manifest.RemoteManifest.fetch', side_effect=ValueError())
     def test_get_parent_units_exception(self, *unused):
         # Setup
@@ -184,7 +184,7 @@ class TestBase(TestCase):
         strategy = strategies.ImporterStrategy()
         self.assertRaises(error.GetParentUnitsError, strategy._unit_inventory, request)
 
-    @patch('pulp_node.conduit.NodesConduit.get_units', return_value=[])
+    @patch('pulp_node.conduit.NodesConduit.get_unit_keys', return_value=[])
     @patch('pulp_node.manifest.RemoteManifest.fetch', side_effect=MANIFEST_ERROR)
     def test_get_parent_units_manifest_error(self, *unused):
         # Setup
@@ -257,6 +257,30 @@ class TestBase(TestCase):
         unit = {constants.STORAGE_PATH: path, constants.FILE_SIZE: size + 1}
         self.assertTrue(strategy._needs_download(unit))
 
+    def test_inventory(self):
+        # Setup
+        parent_units = [
+            dict(type_id='T', unit_key={'a': 1, 'b': 2}, last_updated=1),
+            dict(type_id='T', unit_key={'a': 2, 'b': 2}, last_updated=2),
+            dict(type_id='T', unit_key={'a': 3, 'b': 2}, last_updated=1),
+        ]
+        child_units = [
+            dict(unit_id='u1', type_id='T', unit_key={'b': 2, 'a': 1}, last_updated=1),
+            dict(unit_id='u2', type_id='T', unit_key={'b': 2, 'a': 2}, last_updated=1),
+            dict(unit_id='u4', type_id='T', unit_key={'b': 2, 'a': 4}, last_updated=1),
+        ]
+        manifest = TestManifest(parent_units)
+        # Test
+        inventory = UnitInventory(BASE_URL, manifest.get_units(), child_units)
+        # Verify
+        parent_only = inventory.units_on_parent_only()
+        self.assertEqual(len(parent_only), 1)
+        self.assertEqual([u for u, r in parent_only], [parent_units[2]])
+        updated = inventory.updated_units()
+        self.assertEqual(len(updated), 1)
+        self.assertEqual([u for u, r in updated], [parent_units[1]])
+        self.assertEqual(inventory.units_on_child_only(), [('T', 'u4')])
+
     def test_strategy_factory(self):
         for name, strategy in strategies.STRATEGIES.items():
             self.assertEqual(strategies.find_strategy(name), strategy)
@@ -0,0 +1,695 @@
+#!/usr/bin/env python2
+"""
+Reproducible benchmarks of the Pulp server's hot paths.
+
+The benchmarks run in-process against a local MongoDB. A dedicated database is dropped and seeded
+with synthetic repositories, units and consumers generated from a fixed random seed, so two runs
+with the same parameters work on the same data. Each benchmark is run a number of times after
+warm-up runs, and its state is restored before each run outside of the measurement. For every
+run the wall time, the CPU time, and the number and duration of the MongoDB commands are
+recorded, using the same collector as the task metrics.
+
+The results are written as JSON, and two result files can be compared:
+
+    ./pulp_benchmark.py run --output 2.13.json
+    ./pulp_benchmark.py compare 2.12.json 2.13.json
+
+See the README in this directory for the details.
+"""
+from __future__ import division
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pulp.server.webservices.settings')
+
+import django  # noqa
+import mongoengine  # noqa
+
+from pulp.common import dateutils  # noqa
+from pulp.plugins.loader import api as plugin_api  # noqa
+from pulp.plugins.profiler import Profiler  # noqa
+from pulp.plugins.types import database as types_db  # noqa
+from pulp.plugins.types.model import TypeDefinition  # noqa
+from pulp.plugins.util.misc import paginate  # noqa
+from pulp.plugins.util.publish_step import (AtomicDirectoryPublishStep, PluginStep,  # noqa
+                                            UnitModelPluginStep)
+from pulp.server import config, metrics  # noqa
+from pulp.server.controllers import repository as repo_controller  # noqa
+from pulp.server.db import connection, manage, model  # noqa
+from pulp.server.db.model.consumer import (Bind, Consumer, ConsumerApplicability,  # noqa
+                                           RepoProfileApplicability, UnitProfile)
+from pulp.server.db.model.criteria import Criteria  # noqa
+from pulp.server.managers import factory  # noqa
+from pulp.server.managers.consumer.applicability import ApplicabilityRegenerationManager  # noqa
+from pulp.server.managers.content.orphan import OrphanManager  # noqa
+from pulp.server.webservices.views.content import ContentUnitSearch  # noqa
+from pulp.server.webservices.views.repositories import RepoSearch, RepoUnitSearch  # noqa
+
+
+# The version of the format of the results file.
+RESULTS_FORMAT = 1
+
+# The type of the synthetic units.
+UNIT_TYPE = 'benchmark_unit'
+
+# The distributor type recorded in the bindings and publishes.
+DISTRIBUTOR_TYPE = 'benchmark_distributor'
+
+# The repository that unit association benchmarks copy to.
+DESTINATION_REPO_ID = 'benchmark-destination'
+
+# The number of documents inserted at a time while seeding.
+INSERT_BATCH_SIZE = 1000
+
+
+class BenchmarkUnit(model.ContentUnit):
+    """
+    A synthetic unit. Versions of a unit with the same name are newer when they are higher.
+    """
+    name = mongoengine.StringField(required=True)
+    version = mongoengine.IntField(required=True)
+
+    unit_key_fields = ('name', 'version')
+    _content_type_id = mongoengine.StringField(required=True, default=UNIT_TYPE)
+
+    meta = {'collection': 'units_%s' % UNIT_TYPE,
+            'allow_inheritance': False}
+
+
+class BenchmarkProfiler(Profiler):
+    """
+    Finds the units of a repository that are newer versions of the units installed on a consumer.
+    The profile of a consumer is a list of {'name': <name>, 'version': <version>} dicts.
+    """
+
+    @classmethod
+    def metadata(cls):
+        return {'id': 'benchmark_profiler',
+                'display_name': 'Benchmark Profiler',
+                'types': [UNIT_TYPE]}
+
+    def calculate_applicable_units(self, unit_profile, bound_repo_id, config, conduit):
+        installed = dict((unit['name'], unit['version']) for unit in unit_profile)
+        applicable = []
+        unit_ids = repo_controller.get_associated_unit_ids(bound_repo_id, UNIT_TYPE)
+        for page in paginate(unit_ids, INSERT_BATCH_SIZE):
+            units = BenchmarkUnit.objects(id__in=list(page)).only('id', 'name', 'version')
+            for unit in units.as_pymongo():
+                if unit['version'] > installed.get(unit['name'], unit['version']):
+                    applicable.append(unit['_id'])
+        return {UNIT_TYPE: applicable}
+
+
+def _repo_id(index):
+    """
+    :return: The id of a seeded repository.
+    :rtype:  str
+    """
+    return 'benchmark-repo-%d' % index
+
+
+def _insert(collection, documents):
+    """
+    Insert documents in batches.
+
+    :param collection: The collection.
+    :type  collection: pymongo.collection.Collection
+    :param documents: The documents.
+    :type  documents: iterable of dict
+    """
+    for page in paginate(documents, INSERT_BATCH_SIZE):
+        collection.insert_many(list(page), ordered=False)
+
+
+def initialize(database):
+    """
+    Connect to the benchmark database and register the synthetic unit type and profiler.
+
+    :param database: The name of the database.
+    :type  database: str
+    :raises ValueError: if the database is the one configured for Pulp
+    """
+    if database == config.config.get('database', 'name'):
+        raise ValueError('Refusing to seed the database that is configured for Pulp: %s'
+                         % database)
+    config.config.set('database', 'name', database)
+    connection.initialize(name=database)
+    django.setup()
+    factory.initialize()
+    plugin_api.initialize(validate=False)
+    plugin_api._MANAGER.unit_models[UNIT_TYPE] = BenchmarkUnit
+    if not plugin_api._MANAGER.profilers.has_plugin('benchmark_profiler'):
+        plugin_api._MANAGER.profilers.add_plugin('benchmark_profiler', BenchmarkProfiler, {},
+                                                 types=[UNIT_TYPE])
+
+
+def seed(options):
+    """
+    Drop the benchmark database and seed it.
+
+    Every unit that is not an orphan is associated with the same number of repositories. Each
+    consumer is bound to some of the repositories and has one of a fixed number of profiles, so
+    that, as in a real deployment, many consumers share their profiles.
+
+    :param options: The parsed command line options.
+    :type  options: argparse.Namespace
+    :return: Facts about the seeded data that the benchmarks rely on.
+    :rtype:  dict
+    """
+    rng = random.Random(options.seed)
+    database = connection.get_database()
+    database.client.drop_database(database.name)
+
+    manage.ensure_database_indexes()
+    types_db.update_database([TypeDefinition(UNIT_TYPE, 'Benchmark Unit', 'Synthetic unit',
+                                             list(BenchmarkUnit.unit_key_fields), [], [])])
+    BenchmarkUnit.ensure_indexes()
+
+    # units
+    last_updated = dateutils.now_utc_timestamp()
+    unit_ids = ['%032x' % rng.getrandbits(128) for i in xrange(options.units)]
+    units = ({'_id': unit_id, '_content_type_id': UNIT_TYPE,
+              'name': 'unit-%d' % (i // options.versions), 'version': i % options.versions,
+              '_last_updated': last_updated, 'pulp_user_metadata': {},
+              '_storage_path': '/var/lib/pulp/content/units/%s/%s' % (UNIT_TYPE, unit_id)}
+             for i, unit_id in enumerate(unit_ids))
+    _insert(BenchmarkUnit._get_collection(), units)
+
+    # repositories and their associations
+    orphan_count = int(options.units * options.orphans)
+    orphans = set(rng.sample(xrange(options.units), orphan_count))
+    associated = [unit_id for i, unit_id in enumerate(unit_ids) if i not in orphans]
+    overlap = min(options.overlap, options.repos)
+    now = dateutils.format_iso8601_utc_timestamp(dateutils.now_utc_timestamp())
+    associations = ({'repo_id': _repo_id((position + offset) % options.repos),
+                     'unit_id': unit_id, 'unit_type_id': UNIT_TYPE, 'created': now,
+                     'updated': now, '_ns': 'repo_content_units'}
+                    for position, unit_id in enumerate(associated) for offset in xrange(overlap))
+    _insert(model.RepositoryContentUnit._get_collection(), associations)
+    repo_ids = [_repo_id(i) for i in xrange(options.repos)] + [DESTINATION_REPO_ID]
+    for repo_id in repo_ids:
+        repo = model.Repository(repo_id=repo_id, display_name=repo_id)
+        repo.save()
+        repo_controller.rebuild_content_unit_counts(repo)
+
+    # consumers
+    profiles = []
+    for i in xrange(options.profiles):
+        names = rng.sample(xrange(options.units // options.versions), options.profile_size)
+        profiles.append([{'name': 'unit-%d' % name, 'version': rng.randrange(options.versions)}
+                         for name in sorted(names)])
+    consumers, unit_profiles, bindings = [], [], []
+    for i in xrange(options.consumers):
+        consumer_id = 'benchmark-consumer-%d' % i
+        consumers.append(dict(Consumer(consumer_id, consumer_id)))
+        profile = profiles[rng.randrange(len(profiles))]
+        unit_profiles.append(dict(UnitProfile(consumer_id, UNIT_TYPE, profile)))
+        for repo_index in rng.sample(xrange(options.repos), min(options.binds, options.repos)):
+            bindings.append(dict(Bind(consumer_id, _repo_id(repo_index), DISTRIBUTOR_TYPE,
+                                      False, {})))
+    _insert(Consumer.get_collection(), consumers)
+    _insert(UnitProfile.get_collection(), unit_profiles)
+    _insert(Bind.get_collection(), bindings)
+
+    return {'orphans': orphan_count,
+            'associations': len(associated) * overlap,
+            'source_repo_units': model.RepositoryContentUnit.objects(
+                repo_id=_repo_id(0)).count()}
+
+
+class Benchmark(object):
+    """
+    A benchmark of a hot path. Subclasses implement run(), and setup() when the state that run()
+    changes must be restored before the next run.
+
+    :cvar name: Identifies the benchmark in the results.
+    :type name: str
+    :cvar description: What the benchmark measures.
+    :type description: str
+    """
+    name = None
+    description = None
+
+    def __init__(self, options, facts):
+        """
+        :param options: The parsed command line options.
+        :type  options: argparse.Namespace
+        :param facts: Facts about the seeded data, as returned by seed().
+        :type  facts: dict
+        """
+        self.options = options
+        self.facts = facts
+
+    def setup(self):
+        """
+        Prepare for a run. This is not measured.
+        """
+        pass
+
+    def run(self):
+        """
+        Run the measured operation.
+
+        :return: The number of items that were processed.
+        :rtype:  int
+        """
+        raise NotImplementedError()
+
+
+class _AssociationBenchmark(Benchmark):
+    """
+    The units of the first seeded repository are associated with an empty repository.
+    """
+
+    def setup(self):
+        model.RepositoryContentUnit.objects(repo_id=DESTINATION_REPO_ID).delete()
+        self.source = model.Repository.objects.get(repo_id=_repo_id(0))
+        self.destination = model.Repository.objects.get(repo_id=DESTINATION_REPO_ID)
+        repo_controller.rebuild_content_unit_counts(self.destination)
+
+
+class BulkAssociation(_AssociationBenchmark):
+    name = 'unit_association_bulk'
+    description = 'Copy the associations of a repository with bulk writes'
+
+    def run(self):
+        return len(repo_controller.copy_repo_content_units(self.source, self.destination))
+
+
+class SingleAssociation(_AssociationBenchmark):
+    name = 'unit_association_single'
+    description = 'Associate the units of a repository one at a time'
+
+    def run(self):
+        unit_ids = list(repo_controller.get_associated_unit_ids(self.source.repo_id, UNIT_TYPE))
+        count = 0
+        for unit in BenchmarkUnit.objects(id__in=unit_ids):
+            repo_controller.associate_single_unit(self.destination, unit)
+            count += 1
+        return count
+
+
+class OrphanDetection(Benchmark):
+    name = 'orphan_detection'
+    description = 'Find the units that are not associated with any repository'
+
+    def run(self):
+        count = sum(1 for unit in OrphanManager.generate_orphans_by_type(UNIT_TYPE))
+        if count != self.facts['orphans']:
+            raise RuntimeError('Found %d orphans instead of %d' % (count, self.facts['orphans']))
+        return count
+
+
+class ConsumerApplicabilityGeneration(Benchmark):
+    name = 'applicability_consumers'
+    description = 'Generate the applicability of all consumers when none exists'
+
+    def setup(self):
+        RepoProfileApplicability.get_collection().delete_many({})
+        ConsumerApplicability.get_collection().delete_many({})
+
+    def run(self):
+        ApplicabilityRegenerationManager.regenerate_applicability_for_consumers(
+            Criteria(filters={}).as_dict())
+        return self.options.consumers
+
+
+class RepoApplicabilityRegeneration(Benchmark):
+    name = 'applicability_repos'
+    description = 'Regenerate the existing applicability of all repositories'
+
+    def setup(self):
+        if not RepoProfileApplicability.get_collection().count():
+            ApplicabilityRegenerationManager.regenerate_applicability_for_consumers(
+                Criteria(filters={}).as_dict())
+
+    def run(self):
+        ApplicabilityRegenerationManager.regenerate_applicability_for_repos(
+            Criteria(filters={}).as_dict())
+        return RepoProfileApplicability.get_collection().count()
+
+
+class _SearchBenchmark(Benchmark):
+    """
+    A search is answered by its view, without the authentication, and the whole response body
+    is read.
+
+    :cvar view: The search view.
+    :type view: pulp.server.webservices.views.search.SearchView
+    """
+    view = None
+
+    def search(self, query, options, **kwargs):
+        """
+        :return: The number of results.
+        :rtype:  int
+        """
+        response = self.view._routed_response(query, options, **kwargs)
+        if response.streaming:
+            body = ''.join(response.streaming_content)
+        else:
+            body = response.content
+        return len(json.loads(body))
+
+
+class SearchUnits(_SearchBenchmark):
+    name = 'search_units'
+    description = 'Search all units, including their repositories'
+    view = ContentUnitSearch
+
+    def run(self):
+        return self.search({}, {'include_repos': True}, type_id=UNIT_TYPE)
+
+
+class SearchRepoUnits(_SearchBenchmark):
+    name = 'search_repo_units'
+    description = 'Search the units of a repository'
+    view = RepoUnitSearch
+
+    def run(self):
+        return self.search({'type_ids': [UNIT_TYPE]}, {}, repo_id=_repo_id(0))
+
+
+class SearchRepos(_SearchBenchmark):
+    name = 'search_repos'
+    description = 'Search all repositories with their details'
+    view = RepoSearch
+
+    def run(self):
+        return self.search({}, {'details': True})
+
+
+class _LinkUnitsStep(UnitModelPluginStep):
+    """
+    Links each unit of the repository into the working directory and lists it, as a publish of
+    units and their metadata does.
+    """
+
+    def __init__(self, content_dir):
+        super(_LinkUnitsStep, self).__init__('benchmark_link_units', [BenchmarkUnit])
+        self.content_dir = content_dir
+        self.listing = None
+
+    def initialize(self):
+        self.listing = open(os.path.join(self.content_dir, 'listing'), 'w')
+
+    def process_main(self, item=None):
+        file_name = '%s-%d' % (item.name, item.version)
+        os.symlink(item._storage_path, os.path.join(self.content_dir, file_name))
+        self.listing.write('%s %s\n' % (item.id, file_name))
+
+    def finalize(self):
+        if self.listing is not None:
+            self.listing.close()
+
+
+class Publish(Benchmark):
+    name = 'publish_steps'
+    description = 'Publish a repository through the plugin step framework'
+
+    def setup(self):
+        self.working_dir = tempfile.mkdtemp(dir=self.options.work_dir)
+        self.content_dir = os.path.join(self.working_dir, 'content')
+        os.mkdir(self.content_dir)
+        self.repo = model.Repository.objects.get(repo_id=_repo_id(0)).to_transfer_repo()
+
+    def run(self):
+        # progress reporting is disabled, since it needs a task to report to
+        root = PluginStep('benchmark_publish', repo=self.repo, working_dir=self.working_dir,
+                          plugin_type=DISTRIBUTOR_TYPE, disable_reporting=True)
+        link_step = _LinkUnitsStep(self.content_dir)
+        root.add_child(link_step)
+        publish_dir = os.path.join(self.options.work_dir, 'published')
+        root.add_child(AtomicDirectoryPublishStep(
+            self.content_dir, [('/', os.path.join(publish_dir, self.repo.id))],
+            os.path.join(publish_dir, 'master')))
+        root.process_lifecycle()
+        shutil.rmtree(self.working_dir, ignore_errors=True)
+        return link_step.get_total()
+
+
+BENCHMARKS = (BulkAssociation, SingleAssociation, OrphanDetection,
+              ConsumerApplicabilityGeneration, RepoApplicabilityRegeneration,
+              SearchUnits, SearchRepoUnits, SearchRepos, Publish)
+
+
+def _median(values):
+    """
+    :return: The median of the values.
+    :rtype:  float
+    """
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def measure(benchmark, repeat, warmup):
+    """
+    Run a benchmark and summarize its runs.
+
+    :param benchmark: The benchmark.
+    :type  benchmark: Benchmark
+    :param repeat: The number of measured runs.
+    :type  repeat: int
+    :param warmup: The number of runs before the measured runs.
+    :type  warmup: int
+    :return: The summary of the measured runs.
+    :rtype:  dict
+    """
+    samples = []
+    for i in xrange(warmup + repeat):
+        benchmark.setup()
+        gc.collect()
+        metrics.start()
+        try:
+            items = benchmark.run()
+        finally:
+            sample = metrics.stop()
+        if i >= warmup:
+            del sample['bytes_downloaded'], sample['bytes_written']
+            sample['items'] = items
+            samples.append(sample)
+
+    wall_times = [s['wall_time'] for s in samples]
+    mean = sum(wall_times) / len(wall_times)
+    median = _median(wall_times)
+    items = samples[-1]['items']
+    return {
+        'description': benchmark.description,
+        'items': items,
+        'wall_time': {
+            'min': min(wall_times),
+            'median': median,
+            'mean': mean,
+            'max': max(wall_times),
+            'stdev': math.sqrt(sum((t - mean) ** 2 for t in wall_times) / len(wall_times)),
+        },
+        'cpu_time': _median([s['cpu_time'] for s in samples]),
+        'mongo_operations': _median([s['mongo_operations'] for s in samples]),
+        'mongo_time': _median([s['mongo_time'] for s in samples]),
+        'items_per_second': items / median if median else None,
+        'samples': samples,
+    }
+
+
+def _revision():
+    """
+    :return: The git description of the source tree, or None if it is not a git checkout.
+    :rtype:  str or None
+    """
+    try:
+        output = subprocess.check_output(['git', 'describe', '--always', '--dirty'],
+                                         cwd=os.path.dirname(os.path.abspath(__file__)),
+                                         stderr=open(os.devnull, 'w'))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.strip()
+
+
+def _environment():
+    """
+    :return: The versions and machine that the results were produced with.
+    :rtype:  dict
+    """
+    try:
+        import pkg_resources
+        pulp_version = pkg_resources.get_distribution('pulp-server').version
+    except Exception:
+        pulp_version = None
+    return {
+        'pulp_version': pulp_version,
+        'revision': _revision(),
+        'mongodb_version': connection.get_database().client.server_info()['version'],
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpus': os.sysconf('SC_NPROCESSORS_ONLN'),
+    }
+
+
+PARAMETERS = ('seed', 'repos', 'units', 'versions', 'orphans', 'overlap', 'consumers',
+              'profiles', 'profile_size', 'binds', 'repeat', 'warmup')
+
+
+def run(options):
+    """
+    Seed the database, run the selected benchmarks and write the results.
+
+    :param options: The parsed command line options.
+    :type  options: argparse.Namespace
+    :return: The exit code.
+    :rtype:  int
+    """
+    initialize(options.database)
+    benchmarks = [b for b in BENCHMARKS if not options.only or b.name in options.only]
+
+    sys.stderr.write('Seeding %s\n' % options.database)
+    started = time.time()
+    facts = seed(options)
+    sys.stderr.write('Seeded in %.1fs\n' % (time.time() - started))
+
+    options.work_dir = tempfile.mkdtemp(prefix='pulp-benchmark-')
+    results = {}
+    try:
+        for benchmark_class in benchmarks:
+            benchmark = benchmark_class(options, facts)
+            result = measure(benchmark, options.repeat, options.warmup)
+            results[benchmark.name] = result
+            sys.stderr.write('%-26s %10.4fs median %12.1f items/s\n' % (
+                benchmark.name, result['wall_time']['median'], result['items_per_second'] or 0))
+    finally:
+        shutil.rmtree(options.work_dir, ignore_errors=True)
+
+    document = {
+        'format': RESULTS_FORMAT,
+        'id': str(uuid.uuid4()),
+        'created': dateutils.format_iso8601_datetime(dateutils.now_utc_datetime_with_tzinfo()),
+        'environment': _environment(),
+        'parameters': dict((name, getattr(options, name)) for name in PARAMETERS),
+        'results': results,
+    }
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(document, output, indent=2, sort_keys=True)
+    else:
+        json.dump(document, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    return 0
+
+
+def compare(options):
+    """
+    Compare the median wall times of two results files.
+
+    :param options: The parsed command line options.
+    :type  options: argparse.Namespace
+    :return: 1 if a benchmark is slower than the baseline by more than the threshold, else 0.
+    :rtype:  int
+    """
+    with open(options.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(options.current) as current_file:
+        current = json.load(current_file)
+
+    for document in (baseline, current):
+        if document.get('format') != RESULTS_FORMAT:
+            sys.stderr.write('Unsupported results format: %s\n' % document.get('format'))
+            return 2
+    if baseline['parameters'] != current['parameters']:
+        print 'Warning: the results were produced with different parameters'
+
+    regressions = []
+    print '%-26s %12s %12s %9s' % ('benchmark', 'baseline', 'current', 'change')
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        before = baseline['results'][name]['wall_time']['median']
+        after = current['results'][name]['wall_time']['median']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > options.threshold:
+            regressions.append(name)
+            flag = ' REGRESSION'
+        print '%-26s %11.4fs %11.4fs %+8.1f%%%s' % (name, before, after, change * 100, flag)
+    return 1 if regressions else 0
+
+
+def parse_args(argv):
+    """
+    :param argv: The command line arguments.
+    :type  argv: list
+    :return: The parsed options.
+    :rtype:  argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of the Pulp server.')
+    subparsers = parser.add_subparsers()
+
+    run_parser = subparsers.add_parser('run', help='seed a database and run the benchmarks')
+    run_parser.set_defaults(func=run)
+    run_parser.add_argument('--database', default='pulp_benchmark',
+                            help='the database that is dropped and seeded (%(default)s)')
+    run_parser.add_argument('--output', help='the results file; stdout when not given')
+    run_parser.add_argument('--only', action='append', choices=[b.name for b in BENCHMARKS],
+                            help='run only this benchmark; may be repeated')
+    run_parser.add_argument('--seed', type=int, default=0,
+                            help='the seed of the synthetic data (%(default)s)')
+    run_parser.add_argument('--repos', type=int, default=20,
+                            help='the number of repositories (%(default)s)')
+    run_parser.add_argument('--units', type=int, default=20000,
+                            help='the number of units (%(default)s)')
+    run_parser.add_argument('--versions', type=int, default=5,
+                            help='the number of versions of each unit name (%(default)s)')
+    run_parser.add_argument('--orphans', type=float, default=0.1,
+                            help='the fraction of the units that are orphans (%(default)s)')
+    run_parser.add_argument('--overlap', type=int, default=2,
+                            help='the number of repositories each unit is in (%(default)s)')
+    run_parser.add_argument('--consumers', type=int, default=1000,
+                            help='the number of consumers (%(default)s)')
+    run_parser.add_argument('--profiles', type=int, default=50,
+                            help='the number of distinct consumer profiles (%(default)s)')
+    run_parser.add_argument('--profile-size', type=int, default=200,
+                            help='the number of units installed on a consumer (%(default)s)')
+    run_parser.add_argument('--binds', type=int, default=2,
+                            help='the number of repositories each consumer is bound to '
+                                 '(%(default)s)')
+    run_parser.add_argument('--repeat', type=int, default=5,
+                            help='the number of measured runs of each benchmark (%(default)s)')
+    run_parser.add_argument('--warmup', type=int, default=1,
+                            help='the number of runs before the measured runs (%(default)s)')
+
+    compare_parser = subparsers.add_parser('compare', help='compare two results files')
+    compare_parser.set_defaults(func=compare)
+    compare_parser.add_argument('baseline', help='the results to compare against')
+    compare_parser.add_argument('current', help='the results to compare')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='the slowdown that is reported as a regression, as a '
+                                     'fraction of the baseline (%(default)s)')
+
+    options = parser.parse_args(argv)
+    if options.func is run:
+        if options.profile_size > options.units // options.versions:
+            parser.error('--profile-size cannot exceed the number of unit names')
+        if options.repeat < 1:
+            parser.error('--repeat must be at least 1')
+    return options
+
+
+def main(argv=None):
+    options = parse_args(sys.argv[1:] if argv is None else argv)
+    return options.func(options)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
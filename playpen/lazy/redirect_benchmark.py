@@ -0,0 +1,82 @@
+"""
+Benchmark the signing and validation of lazy redirect URLs.
+
+Measures the number of redirects per second the content application can sign
+and the number of redirect URLs per second the streamer can validate for:
+
+  rsa         - RSA signing of every redirect (the historical behavior).
+  rsa-cached  - RSA signing with the SignedURLCache.
+  hmac        - HMAC signing using a SharedKey.
+  hmac-cached - HMAC signing using a SharedKey with the SignedURLCache.
+
+The number of distinct paths and clients determines the cache hit ratio.
+
+Usage:
+  python redirect_benchmark.py [-n requests] [-p paths] [-c clients]
+"""
+
+from optparse import OptionParser
+from time import time
+
+from M2Crypto import RSA
+
+from pulp.server.lazy import SharedKey, SignedURL, SignedURLCache, URL
+
+
+REDIRECT = 'https://streamer.example.com:443/streamer/var/lib/pulp/content/units/%d.rpm'
+
+
+def requests(count, paths, clients):
+    """
+    Generate (url, remote_ip) for the simulated requests.
+    """
+    for n in xrange(count):
+        url = URL(REDIRECT % (n % paths))
+        remote_ip = '10.0.%d.%d' % ((n % clients) // 256, (n % clients) % 256)
+        yield url, remote_ip
+
+
+def sign(count, paths, clients, key, cache=None):
+    signed = []
+    started = time()
+    for url, remote_ip in requests(count, paths, clients):
+        if cache is None:
+            signed.append((url.sign(key, remote_ip=remote_ip), remote_ip))
+        else:
+            signed.append((cache.sign(url, key, remote_ip=remote_ip), remote_ip))
+    return signed, count / (time() - started)
+
+
+def validate(signed, key):
+    started = time()
+    for url, remote_ip in signed:
+        SignedURL(str(url)).validate(key, remote_ip=remote_ip)
+    return len(signed) / (time() - started)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n', '--requests', type='int', default=5000)
+    parser.add_option('-p', '--paths', type='int', default=100)
+    parser.add_option('-c', '--clients', type='int', default=10)
+    options, args = parser.parse_args()
+
+    private = RSA.gen_key(2048, 65537, lambda *unused: None)
+    shared = SharedKey('0123456789abcdef0123456789abcdef')
+    modes = (
+        ('rsa', private, private, None),
+        ('rsa-cached', private, private, SignedURLCache(10000)),
+        ('hmac', shared, shared, None),
+        ('hmac-cached', shared, shared, SignedURLCache(10000)),
+    )
+
+    print '%-12s %14s %14s' % ('mode', 'signed/sec', 'validated/sec')
+    for name, signing_key, validation_key, cache in modes:
+        signed, sign_rate = sign(
+            options.requests, options.paths, options.clients, signing_key, cache)
+        validate_rate = validate(signed, validation_key)
+        print '%-12s %14.0f %14.0f' % (name, sign_rate, validate_rate)
+
+
+if __name__ == '__main__':
+    main()
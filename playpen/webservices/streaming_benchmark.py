@@ -0,0 +1,97 @@
+"""
+Benchmark buffered and streaming JSON responses for large result sets.
+
+Each mode runs in a forked process so that its peak RSS can be measured
+independently. For each mode the time-to-first-byte (the time until the first
+chunk of the response body is available), the total time to write the body and
+the peak RSS of the process are reported:
+
+  buffered  - every result is collected in a list and serialized with a single
+              json.dumps (generate_json_response_with_pulp_encoder).
+  streaming - results are serialized one at a time as the body is written
+              (generate_streaming_json_response_with_pulp_encoder).
+
+Results are generated in memory to simulate a database cursor, so no database
+is needed.
+
+Usage:
+  python streaming_benchmark.py [-n results] [-s size]
+"""
+
+import os
+import resource
+from datetime import datetime
+from optparse import OptionParser
+from time import time
+
+from django.conf import settings
+
+settings.configure()
+
+from pulp.server.webservices.views.util import (  # noqa
+    generate_json_response_with_pulp_encoder, generate_streaming_json_response_with_pulp_encoder)
+
+
+def cursor(count, size):
+    """
+    Generate unit-like documents, as a database cursor would.
+    """
+    for n in xrange(count):
+        yield {
+            '_id': '%032x' % n,
+            'name': 'package-%d' % n,
+            'version': '1.0.%d' % n,
+            'description': 'x' * size,
+            '_last_updated': datetime.utcnow(),
+        }
+
+
+def buffered(count, size):
+    started = time()
+    response = generate_json_response_with_pulp_encoder(list(cursor(count, size)))
+    chunks = iter(response)
+    next(chunks)
+    first = time() - started
+    for chunk in chunks:
+        pass
+    return first, time() - started
+
+
+def streaming(count, size):
+    started = time()
+    response = generate_streaming_json_response_with_pulp_encoder(cursor(count, size))
+    chunks = iter(response.streaming_content)
+    next(chunks)
+    first = time() - started
+    for chunk in chunks:
+        pass
+    return first, time() - started
+
+
+def run(name, mode, count, size):
+    """
+    Run a mode in a child process and print its results.
+    """
+    pid = os.fork()
+    if pid == 0:
+        first, total = mode(count, size)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        print '%-10s %12.3f %12.3f %14.1f' % (name, first, total, peak)
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n', '--results', type='int', default=100000)
+    parser.add_option('-s', '--size', type='int', default=1024,
+                      help='the size in bytes of each result\'s description')
+    options, args = parser.parse_args()
+
+    print '%-10s %12s %12s %14s' % ('mode', 'ttfb (s)', 'total (s)', 'peak rss (MB)')
+    for name, mode in (('buffered', buffered), ('streaming', streaming)):
+        run(name, mode, options.results, options.size)
+
+
+if __name__ == '__main__':
+    main()
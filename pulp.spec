@@ -359,7 +359,7 @@ Requires: python-%{name}-common = %{pulp_version}
 Requires: python-%{name}-repoauth = %{pulp_version}
 Requires: python-blinker
 Requires: python-celery >= 3.1.0
-Requires: python-pymongo >= 3.0.0
+Requires: python-pymongo >= 3.4.0
 Requires: python-mongoengine >= 0.10.0
 Requires: python-setuptools
 Requires: python-oauth2 >= 1.5.211
@@ -286,6 +286,34 @@ class Importer(object):
         """
         raise NotImplementedError()
 
+    def can_copy_associations(self, source_repo, dest_repo, config):
+        """
+        Indicates whether copying units into the given repository only requires the
+        units to be associated with it. If so, and all of the units are mongoengine
+        units, Pulp associates the units selected from the source repository with
+        the destination repository itself, and import_units is not called. This is
+        much faster than importing a large number of units.
+
+        Importers that resolve dependencies, create new units or otherwise act on the
+        copied units should only return True when the configuration of the copy
+        does not require any of that.
+
+        :param source_repo: metadata describing the repository containing the
+               units to import
+        :type  source_repo: pulp.plugins.model.Repository
+
+        :param dest_repo: metadata describing the repository to import units
+               into
+        :type  dest_repo: pulp.plugins.model.Repository
+
+        :param config: plugin configuration
+        :type  config: pulp.plugins.config.PluginCallConfiguration
+
+        :return: True if Pulp may associate the units itself
+        :rtype:  bool
+        """
+        return False
+
     def remove_units(self, repo, units, config):
         """
         Removes content units from the given repository.
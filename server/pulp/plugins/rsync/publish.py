@@ -1,14 +1,13 @@
 from gettext import gettext as _
+from multiprocessing.pool import ThreadPool
 import logging
 import os
-import time
 import uuid
-import shutil
 
-import kobo.shortcuts
 import mongoengine
 
 from pulp.common import dateutils
+from pulp.plugins.rsync.transport import SSHTransport
 from pulp.plugins.util.publish_step import PublishStep
 from pulp.server.config import config as pulp_config
 from pulp.server.exceptions import PulpCodedException
@@ -20,6 +19,9 @@ ASSOCIATED_UNIT_DATE_KEYWORD = "created"
 START_DATE_KEYWORD = 'start_date'
 END_DATE_KEYWORD = 'end_date'
 
+# The number of files each concurrent rsync stream of a step transfers at least.
+MIN_FILES_PER_STREAM = 1000
+
 _logger = logging.getLogger(__name__)
 
 
@@ -61,10 +63,39 @@ class RSyncPublishStep(PublishStep):
         self.src_directory = src_directory
         self.dest_directory = dest_directory
         self.links = links
+        self._transport = None
+
+    def get_transport(self):
+        """
+        Returns the ssh transport used to reach the remote server. The steps of a Publisher share
+        the transport of the Publisher. A step that is not part of a Publisher opens a transport
+        of its own, which is closed when the step is finalized.
+
+        :return: the transport
+        :rtype: pulp.plugins.rsync.transport.SSHTransport
+        """
+        parent = self.parent
+        while parent is not None:
+            if isinstance(parent, Publisher):
+                return parent.get_transport()
+            parent = parent.parent
+        if self._transport is None:
+            self._transport = SSHTransport.from_config(self.get_config())
+            self._transport.open()
+        return self._transport
+
+    def finalize(self):
+        """
+        Close the transport opened by this step, if any.
+        """
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
 
     def remote_mkdir(self, path):
         """
         Creates path on remote server. The path is rooted in distributor's remote_root directory.
+        Nothing is done when the transport already created the path.
 
         :param path: path to create on remote server
         :type path: str
@@ -73,21 +104,12 @@ class RSyncPublishStep(PublishStep):
                   to create remote directory)
         :rtype: tuple
         """
-        tmpdir = os.path.join(self.get_working_dir(), '.tmp')
-        os.makedirs(os.path.join(tmpdir, path.lstrip("/")))
-        args = ['rsync', '-avr', '-f+ */']
-        args.extend(self.make_authentication())
-        args.append("%s/" % tmpdir)
-        args.append(self.make_destination(path).replace(str(path), ""))
-        _logger.debug("remote mkdir: %s" % args)
-        is_ok, output = self.call(args, include_args_in_output=True)
-        _logger.debug("remote mkdir out: %s" % output)
-        shutil.rmtree(tmpdir)
-        return is_ok, output
+        return self.get_transport().mkdirs([path], self.get_working_dir())
 
     def make_ssh_cmd(self, args=None):
         """
         Returns a list of arguments needed to form an ssh command for connecting to remote server.
+        The command uses the shared connection of the transport.
 
         :param args:list of extra args to append to the standard ssh command
         :type args: list
@@ -95,20 +117,7 @@ class RSyncPublishStep(PublishStep):
         :return: list of arguments for ssh portion of command
         :rtype: list
         """
-        user = self.get_config().flatten()["remote"]['ssh_user']
-        # -e 'ssh -l ssh_user -i ssh_identity_file'
-        # use shared ssh connection for other threads
-        cmd = ['ssh', '-l', user]
-        key = self.get_config().flatten()["remote"]['ssh_identity_file']
-        cmd += ['-i', key,
-                '-o', 'StrictHostKeyChecking no',
-                '-o', 'UserKnownHostsFile /dev/null',
-                '-S', '/tmp/rsync_distributor-%r@%h:%p',
-                '-o', 'ControlMaster auto',
-                '-o', 'ControlPersist 10']
-        if args:
-            cmd += args
-        return cmd
+        return self.get_transport().ssh_args(args)
 
     def make_authentication(self):
         """
@@ -119,14 +128,7 @@ class RSyncPublishStep(PublishStep):
                                                     '/ssh_identity_file', 'hostname']
         :rtype: list
         """
-        ssh_parts = []
-        for arg in self.make_ssh_cmd():
-            if " " in arg:
-                ssh_parts.append('"%s"' % arg)
-            else:
-                ssh_parts.append(arg)
-
-        return ['-e', " ".join(ssh_parts)]
+        return self.get_transport().rsh()
 
     def make_full_path(self, relative_path):
         """
@@ -158,7 +160,7 @@ class RSyncPublishStep(PublishStep):
 
     def call(self, args, include_args_in_output=True):
         """
-        A wrapper around kobo.shortcuts.run. If ssh_exchange_identification or
+        Runs a command using the transport. If ssh_exchange_identification or
         max-concurrent-connections exceptions are thrown by ssh, up to 10 retries follows.
 
         :param args: list of args for rsync
@@ -169,14 +171,7 @@ class RSyncPublishStep(PublishStep):
         :return: (boolean indicating success or failure, output from rsync command)
         :rtype: tuple of boolean and string
         """
-        for t in xrange(10):
-            rv, out = kobo.shortcuts.run(cmd=args, can_fail=True)
-            possible_known_exceptions = \
-                ("ssh_exchange_identification:" in out) or ("max-concurrent-connections=25" in out)
-            if not (rv and possible_known_exceptions):
-                break
-            _logger.info(_("Connections limit reached, trying once again in thirty seconds."))
-            time.sleep(30)
+        rv, out = self.get_transport().run(args)
         if include_args_in_output:
             message = "%s\n%s" % (args, out)
         else:
@@ -217,10 +212,28 @@ class RSyncPublishStep(PublishStep):
         args.append(self.make_destination(dest_prefix))
         return args
 
+    def split_file_list(self):
+        """
+        Split the files into the lists transferred by concurrent rsync streams. Each stream
+        transfers at least MIN_FILES_PER_STREAM files. A single stream is used when deleting,
+        since rsync then needs to see the whole directory.
+
+        :return: list of lists of paths relative to src_directory
+        :rtype: list
+        """
+        files = sorted(self.file_list)
+        if self.delete:
+            return [files]
+        streams = min(self.get_transport().max_streams, len(files) / MIN_FILES_PER_STREAM)
+        streams = max(streams, 1)
+        size = -(-len(files) / streams)
+        return [files[i:i + size] for i in xrange(0, len(files), size)] or [files]
+
     def rsync(self):
         """
         This method formulates the rsync command based on parameters passed in to the __init__ and
-        then executes it.
+        then executes it. Large file lists are transferred by concurrent rsync streams over the
+        shared connection.
 
         :return: (boolean indicating success or failure, str made up of stdout and stderr
                   generated by rsync command)
@@ -232,8 +245,12 @@ class RSyncPublishStep(PublishStep):
             os.makedirs(self.src_directory)
 
         output = ""
-        list_of_files = os.path.join(self.get_working_dir(), str(uuid.uuid4()))
-        open(list_of_files, 'w').write("\n".join(sorted(self.file_list)))
+        rsync_args = []
+        for files in self.split_file_list():
+            list_of_files = os.path.join(self.get_working_dir(), str(uuid.uuid4()))
+            open(list_of_files, 'w').write("\n".join(files))
+            rsync_args.append(self.make_rsync_args(list_of_files, self.src_directory,
+                                                   self.dest_directory, self.exclude))
 
         # copy files here, not symlinks
         (is_successful, this_output) = self.remote_mkdir(self.dest_directory)
@@ -242,15 +259,22 @@ class RSyncPublishStep(PublishStep):
             _logger.error(_("Cannot create directory %(directory)s: %(output)s") % params)
             return (is_successful, this_output)
         output += this_output
-        rsync_args = self.make_rsync_args(list_of_files, self.src_directory,
-                                          self.dest_directory, self.exclude)
-        (is_successful, this_output) = self.call(rsync_args)
-        _logger.info(this_output)
-        if not is_successful:
-            _logger.error(this_output)
-            return (is_successful, this_output)
-        output += this_output
-        return (is_successful, output)
+        if len(rsync_args) == 1:
+            results = [self.call(rsync_args[0])]
+        else:
+            pool = ThreadPool(len(rsync_args))
+            try:
+                results = pool.map(self.call, rsync_args)
+            finally:
+                pool.close()
+                pool.join()
+        for (is_successful, this_output) in results:
+            _logger.info(this_output)
+            if not is_successful:
+                _logger.error(this_output)
+                return (is_successful, this_output)
+            output += this_output
+        return (True, output)
 
     def process_main(self):
         """
@@ -324,9 +348,57 @@ class Publisher(PublishStep):
         self.symlink_list = []
         self.content_unit_file_list = []
         self.symlink_src = os.path.join(self.get_working_dir(), '.relative/')
+        self._transport = None
 
         self._add_necesary_steps(date_filter=date_filter, config=config)
 
+    def get_transport(self):
+        """
+        Returns the ssh transport shared by the rsync steps of this publish. The transport
+        connects when it is first requested, and then creates the remote destination
+        directories of all of the rsync steps with a single command.
+
+        :return: the transport
+        :rtype: pulp.plugins.rsync.transport.SSHTransport
+        """
+        if self._transport is None:
+            self._transport = SSHTransport.from_config(self.get_config())
+            self._transport.open()
+            paths = [step.dest_directory for step in self._rsync_steps(self)]
+            is_ok, output = self._transport.mkdirs(paths, self.get_working_dir())
+            if not is_ok:
+                # each step creates its destination when it runs
+                _logger.debug("remote mkdir failed: %s" % output)
+        return self._transport
+
+    @classmethod
+    def _rsync_steps(cls, step):
+        """
+        Generates the rsync steps below a step.
+
+        :param step: the step
+        :type step: pulp.plugins.util.publish_step.Step
+        """
+        for child in step.children:
+            if isinstance(child, RSyncPublishStep):
+                yield child
+            for descendant in cls._rsync_steps(child):
+                yield descendant
+
+    def process_lifecycle(self):
+        """
+        Process the publish, closing the transport when it is done.
+
+        :return: report describing the publish
+        :rtype:  pulp.plugins.model.PublishReport
+        """
+        try:
+            return super(Publisher, self).process_lifecycle()
+        finally:
+            if self._transport is not None:
+                self._transport.close()
+                self._transport = None
+
     def is_fastforward(self):
         """
         This method checks whether this publish should be a fastforward publish.
@@ -0,0 +1,249 @@
+"""
+The ssh transport used by the rsync publish steps.
+
+A publish connects to the remote server once, by starting an ssh ControlMaster whose control
+socket is private to the publish. The rsync and ssh commands of the publish are multiplexed over
+that connection rather than each making its own, and the number of commands running at the same
+time is bounded. The ssh executable can be replaced, such as by a stub in tests.
+"""
+from gettext import gettext as _
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+import kobo.shortcuts
+
+
+_logger = logging.getLogger(__name__)
+
+
+# The ssh executable.
+SSH = 'ssh'
+
+# The number of seconds the ControlMaster is kept after the last command when the publish fails
+# to close it.
+MASTER_PERSIST = 60
+
+# The number of commands that may use the connection at the same time. sshd allows 10 sessions per
+# connection by default.
+MAX_STREAMS = 4
+
+# The number of times a command is retried when the server refuses the connection.
+RETRIES = 10
+
+# The number of seconds between those retries.
+RETRY_DELAY = 30
+
+
+class SSHTransport(object):
+    """
+    A persistent ssh connection to the remote server of a publish.
+
+    :ivar user: The remote user.
+    :type user: str
+    :ivar host: The remote host.
+    :type host: str
+    :ivar identity_file: The path to the ssh private key.
+    :type identity_file: str
+    :ivar root: The remote directory that destinations are relative to.
+    :type root: str
+    :ivar ssh: The ssh executable.
+    :type ssh: str
+    :ivar max_streams: The number of commands that may run at the same time.
+    :type max_streams: int
+    :ivar created: The relative paths of the remote directories created by mkdirs().
+    :type created: set
+    """
+
+    def __init__(self, user, host, identity_file, root, ssh=SSH, max_streams=MAX_STREAMS):
+        """
+        :param user: The remote user.
+        :type user: str
+        :param host: The remote host.
+        :type host: str
+        :param identity_file: The path to the ssh private key.
+        :type identity_file: str
+        :param root: The remote directory that destinations are relative to.
+        :type root: str
+        :param ssh: The ssh executable.
+        :type ssh: str
+        :param max_streams: The number of commands that may run at the same time.
+        :type max_streams: int
+        """
+        self.user = user
+        self.host = host
+        self.identity_file = identity_file
+        self.root = root
+        self.ssh = ssh
+        self.max_streams = max_streams
+        self.created = set()
+        self._control_dir = None
+        self._master = False
+        self._streams = threading.BoundedSemaphore(max_streams)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create the transport for the remote server of a distributor.
+
+        :param config: distributor configuration
+        :type config: pulp.plugins.config.PluginCallConfiguration
+        :return: The transport.
+        :rtype: SSHTransport
+        """
+        remote = config.flatten()['remote']
+        return cls(remote['ssh_user'], remote['host'], remote['ssh_identity_file'],
+                   remote['root'])
+
+    @property
+    def control_path(self):
+        """
+        The path to the control socket of the connection. ssh expands the tokens.
+
+        :rtype: str
+        """
+        if self._control_dir is None:
+            self._control_dir = tempfile.mkdtemp(prefix='pulp-rsync-')
+        return os.path.join(self._control_dir, '%r@%h:%p')
+
+    def ssh_args(self, args=None):
+        """
+        Returns the arguments of an ssh command that uses the connection. When the ControlMaster
+        is not running, the command connects on its own and shares that connection for a short
+        time.
+
+        :param args: extra args to append to the standard ssh command
+        :type args: list
+        :return: The ssh command.
+        :rtype: list
+        """
+        cmd = [self.ssh, '-l', self.user,
+               '-i', self.identity_file,
+               '-o', 'StrictHostKeyChecking no',
+               '-o', 'UserKnownHostsFile /dev/null',
+               '-S', self.control_path,
+               '-o', 'ControlMaster auto',
+               '-o', 'ControlPersist 10']
+        if args:
+            cmd += args
+        return cmd
+
+    def rsh(self):
+        """
+        Returns the rsync arguments that make it use the connection.
+
+        :return: e.g., ['-e', 'ssh -l ssh_user -i /ssh_identity_file ...']
+        :rtype: list
+        """
+        ssh_parts = []
+        for arg in self.ssh_args():
+            if " " in arg:
+                ssh_parts.append('"%s"' % arg)
+            else:
+                ssh_parts.append(arg)
+        return ['-e', " ".join(ssh_parts)]
+
+    def destination(self, relative_path):
+        """
+        :param relative_path: path relative to the remote root
+        :type relative_path: str
+        :return: The rsync destination of the path, e.g. user@host:/root/path
+        :rtype: str
+        """
+        return '%s@%s:%s' % (self.user, self.host, os.path.join(self.root, relative_path))
+
+    def run(self, args):
+        """
+        Run a command that uses the connection, waiting while the maximum number of commands are
+        running. If ssh_exchange_identification or max-concurrent-connections errors are reported,
+        the command is retried.
+
+        :param args: The command.
+        :type args: list
+        :return: (return code, output of the command)
+        :rtype: tuple
+        """
+        with self._streams:
+            for t in xrange(RETRIES):
+                rv, out = kobo.shortcuts.run(cmd=args, can_fail=True)
+                possible_known_exceptions = \
+                    ("ssh_exchange_identification:" in out) or \
+                    ("max-concurrent-connections=25" in out)
+                if not (rv and possible_known_exceptions):
+                    break
+                _logger.info(_("Connections limit reached, trying once again in thirty seconds."))
+                time.sleep(RETRY_DELAY)
+        return rv, out
+
+    def open(self):
+        """
+        Start the ControlMaster. Failing to start it is not fatal, since the commands are then
+        able to connect on their own.
+
+        :return: True if the ControlMaster is running.
+        :rtype: bool
+        """
+        if self._master:
+            return True
+        args = self.ssh_args(['-o', 'ControlMaster yes',
+                              '-o', 'ControlPersist %d' % MASTER_PERSIST,
+                              '-f', '-N', self.host])
+        rv, out = self.run(args)
+        if rv:
+            _logger.warning(_('Could not open a shared connection to %(h)s: %(o)s') %
+                            {'h': self.host, 'o': out})
+            return False
+        self._master = True
+        return True
+
+    def close(self):
+        """
+        Stop the ControlMaster and remove its control socket.
+        """
+        if self._master:
+            args = [self.ssh, '-S', self.control_path, '-O', 'exit', '-l', self.user, self.host]
+            rv, out = kobo.shortcuts.run(cmd=args, can_fail=True)
+            if rv:
+                _logger.debug('closing the shared connection to %s: %s' % (self.host, out))
+            self._master = False
+        if self._control_dir is not None:
+            shutil.rmtree(self._control_dir, ignore_errors=True)
+            self._control_dir = None
+
+    def mkdirs(self, paths, working_dir):
+        """
+        Create directories on the remote server with a single rsync command. Directories already
+        created by the transport are skipped.
+
+        :param paths: paths relative to the remote root
+        :type paths: iterable
+        :param working_dir: a local directory in which the directory tree is staged
+        :type working_dir: str
+        :return: (True if the command succeeded, the command and its output)
+        :rtype: tuple
+        """
+        paths = set(str(path).strip('/') for path in paths) - self.created
+        if not paths:
+            return True, ''
+        tmpdir = os.path.join(working_dir, '.tmp-%s' % uuid.uuid4())
+        os.makedirs(tmpdir)
+        try:
+            for path in paths:
+                if not os.path.isdir(os.path.join(tmpdir, path)):
+                    os.makedirs(os.path.join(tmpdir, path))
+            args = ['rsync', '-avr', '-f+ */']
+            args.extend(self.rsh())
+            args.append("%s/" % tmpdir)
+            args.append(self.destination(''))
+            _logger.debug("remote mkdir: %s" % args)
+            rv, out = self.run(args)
+            _logger.debug("remote mkdir out: %s" % out)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        if rv == 0:
+            self.created.update(paths)
+        return rv == 0, "%s\n%s" % (args, out)
@@ -2,18 +2,29 @@
 Responsible for the storage and retrieval of content types in the database.
 This module covers both the ContentType collection itself as well as any
 type-specific collections that exist to suit the type needs.
+
+The type definitions are read through a registry that keeps them in memory. The registry
+compares the version of the stored definitions with the one it loaded at most once every
+REFRESH_INTERVAL seconds, and re-reads the definitions only when the version changed.
 """
 
+import copy
 import logging
+import threading
+import time
 
 from pymongo import ASCENDING
 
 from pulp.server.db import connection
+from pulp.server.db.model import ContentTypesVersion
 from pulp.server.db.model.content import ContentType
 
 
 TYPE_COLLECTION_PREFIX = 'units_'
 
+# The number of seconds between checks of the version of the stored type definitions.
+REFRESH_INTERVAL = 10
+
 _logger = logging.getLogger(__name__)
 
 
@@ -48,6 +59,67 @@ class MissingDefinitions(Exception):
         return 'MissingDefinitions [%s]' % ', '.join(self.missing_type_ids)
 
 
+class TypeRegistry(object):
+    """
+    In-memory copy of the type definitions stored in the database.
+
+    :ivar refresh_interval: The number of seconds between checks of the stored version.
+    :type refresh_interval: int
+    """
+
+    def __init__(self, refresh_interval=REFRESH_INTERVAL):
+        """
+        :param refresh_interval: The number of seconds between checks of the stored version.
+        :type  refresh_interval: int
+        """
+        self.refresh_interval = refresh_interval
+        self._definitions = None
+        self._version = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    def definitions(self):
+        """
+        Get the type definitions, reading them from the database when they have not been loaded
+        or the stored version changed. The definitions must not be modified.
+
+        :return: type definitions (mongo SON objects) keyed by type ID
+        :rtype:  dict
+        """
+        now = time.time()
+        with self._lock:
+            if self._definitions is not None and now - self._checked < self.refresh_interval:
+                return self._definitions
+            # read the version before the definitions so that changes made while loading are
+            # noticed by the next check
+            version = ContentTypesVersion.get_version()
+            if self._definitions is None or version != self._version:
+                collection = ContentType.get_collection()
+                self._definitions = dict((d['id'], d) for d in collection.find())
+                self._version = version
+            self._checked = now
+            return self._definitions
+
+    def invalidate(self):
+        """
+        Discard the loaded definitions so that they are read again on next use.
+        """
+        with self._lock:
+            self._definitions = None
+
+
+# The registry of this process.
+registry = TypeRegistry()
+
+
+def changed():
+    """
+    Record that the stored type definitions changed so that every process reads them again.
+    """
+    ContentTypesVersion.change()
+    registry.invalidate()
+
+
 def update_database(definitions, error_on_missing_definitions=False, drop_indices=False,
                     create_indexes=True):
     """
@@ -67,6 +139,9 @@ def update_database(definitions, error_on_missing_definitions=False, drop_indice
 
     all_type_ids = [d.id for d in definitions]
 
+    # make sure the existing types are read from the database
+    registry.invalidate()
+
     _logger.info('Updating the database with types [%s]' % ', '.join(all_type_ids))
 
     # Get a list of all type collections now so we can figure out which
@@ -144,6 +219,7 @@ def clean():
     # Purge the types collection of all entries
     type_collection = ContentType.get_collection()
     type_collection.remove()
+    changed()
 
 
 def type_units_collection(type_id):
@@ -167,12 +243,7 @@ def all_type_ids():
              if there are no IDs in the database
     @rtype:  list of str
     """
-
-    collection = ContentType.get_collection()
-    type_id_son = list(collection.find(projection={'id': 1}))
-    type_ids = [t['id'] for t in type_id_son]
-
-    return type_ids
+    return list(registry.definitions())
 
 
 def all_type_collection_names():
@@ -181,14 +252,7 @@ def all_type_collection_names():
     @rtype:  list of str
     """
 
-    collection = ContentType.get_collection()
-    type_ids = list(collection.find(projection={'id': 1}))
-
-    type_collection_names = []
-    for id in type_ids:
-        type_collection_names.append(unit_collection_name(id['id']))
-
-    return type_collection_names
+    return [unit_collection_name(type_id) for type_id in registry.definitions()]
 
 
 def all_type_definitions():
@@ -197,9 +261,7 @@ def all_type_definitions():
     @rtype:  list of dict
     """
 
-    coll = ContentType.get_collection()
-    types = list(coll.find())
-    return types
+    return [copy.deepcopy(type_def) for type_def in registry.definitions().values()]
 
 
 def type_definition(type_id):
@@ -210,9 +272,10 @@ def type_definition(type_id):
     @return: corresponding type definition, None if not found
     @rtype: SON or None
     """
-    collection = ContentType.get_collection()
-    type_ = collection.find_one({'id': type_id})
-    return type_
+    type_ = registry.definitions().get(type_id)
+    if type_ is None:
+        return None
+    return copy.deepcopy(type_)
 
 
 def unit_collection_name(type_id):
@@ -239,11 +302,10 @@ def type_units_unit_key(type_id):
              content type collection
     @rtype: list of str or None
     """
-    collection = ContentType.get_collection()
-    type_def = collection.find_one({'id': type_id})
+    type_def = registry.definitions().get(type_id)
     if type_def is None:
         return None
-    return type_def['unit_key']
+    return list(type_def['unit_key'])
 
 
 def _create_or_update_type(type_def):
@@ -275,6 +337,7 @@ def _create_or_update_type(type_def):
         content_type._id = existing_type['_id']
     # XXX this still causes a potential race condition when 2 users are updating the same type
     content_type_collection.save(content_type)
+    changed()
 
 
 def _update_indexes(type_def, unique):
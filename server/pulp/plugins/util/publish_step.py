@@ -23,6 +23,7 @@ from pulp.server.controllers import repository as repo_controller
 from pulp.server.db.model.criteria import Criteria, UnitAssociationCriteria
 from pulp.server.exceptions import PulpCodedTaskFailedException
 from pulp.server.controllers import units as units_controller
+from pulp.server import metrics
 from nectar import listener
 from nectar.downloaders.local import LocalFileDownloader
 from nectar.downloaders.threaded import HTTPThreadedDownloader
@@ -222,6 +223,7 @@ class Step(object):
             return
 
         self.state = reporting_constants.STATE_RUNNING
+        started = time.time()
 
         try:
             try:
@@ -280,6 +282,8 @@ class Step(object):
                     pass
                 parent = parent.parent
             raise
+        finally:
+            metrics.add_step(self.step_id, time.time() - started)
 
         self.state = reporting_constants.STATE_COMPLETE
 
@@ -1157,9 +1161,10 @@ class DownloadStep(PluginStep, listener.DownloadEventListener):
         This is the callback that we will get from the downloader library when any individual
         download succeeds. Bump the successes counter and report progress.
 
-        :param report: report (passed in from nectar but currently not used)
+        :param report: report of the completed download
         :type  report: nectar.report.DownloadReport
         """
+        metrics.add_bytes_downloaded(report.bytes_downloaded)
         self.progress_successes += 1
         self.report_progress()
 
@@ -1197,7 +1202,7 @@ class SaveUnitsStep(PluginStep):
     """
 
     def finalize(self):
-        repo_controller.rebuild_content_unit_counts(self.get_repo().repo_obj)
+        repo_controller.update_content_unit_counts(self.get_repo().repo_obj)
 
 
 class GetLocalUnitsStep(SaveUnitsStep):
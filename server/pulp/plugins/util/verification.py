@@ -1,8 +1,13 @@
 """
 Functions for verifying files.
 """
+from multiprocessing.pool import ThreadPool
 
-from pulp.server.util import calculate_checksums
+from pulp.server.util import calculate_checksums, calculate_file_checksums, InvalidChecksumType
+
+
+# The number of files verify_checksums() hashes at the same time.
+DEFAULT_WORKERS = 4
 
 
 class VerificationException(ValueError):
@@ -56,3 +61,52 @@ def verify_checksum(file_object, checksum_type, checksum_value):
 
     if calculated_sum != checksum_value:
         raise VerificationException(calculated_sum)
+
+
+def _verify_file(item):
+    """
+    Verify the checksums of a file.
+
+    :param item: (the absolute path to the file, dict of checksum types to expected values)
+    :type  item: tuple
+
+    :return: (the path, None or the exception raised verifying it)
+    :rtype:  tuple
+    """
+    path, expected = item
+    try:
+        calculated = calculate_file_checksums(path, expected.keys())
+    except (InvalidChecksumType, IOError, OSError), e:
+        return path, e
+    mismatched = dict((checksum_type, value) for checksum_type, value in calculated.items()
+                      if value != expected[checksum_type])
+    if mismatched:
+        return path, VerificationException(mismatched)
+    return path, None
+
+
+def verify_checksums(files, workers=DEFAULT_WORKERS):
+    """
+    Verify the checksums of a batch of stored files. Each file is read once to calculate all of
+    its checksums, and the files are hashed by a pool of threads.
+
+    :param files: iterable of (the absolute path to a file, dict of checksum types to the
+                  expected checksum values)
+    :type  files: iterable
+    :param workers: the number of files hashed at the same time
+    :type  workers: int
+
+    :return: dict of the paths that failed verification to the exception describing the failure.
+             A VerificationException is given the calculated checksums that did not match.
+    :rtype:  dict
+    """
+    failures = {}
+    pool = ThreadPool(workers)
+    try:
+        for path, error in pool.imap_unordered(_verify_file, files):
+            if error is not None:
+                failures[path] = error
+    finally:
+        pool.close()
+        pool.join()
+    return failures
@@ -9,6 +9,9 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import os
+from threading import RLock
+
 from M2Crypto import RSA, BIO
 from gofer.messaging.auth import ValidationFailed
 
@@ -18,6 +21,93 @@ from pulp.server.exceptions import MissingResource
 from pulp.common.config import parse_bool
 
 
+# The maximum number of cached consumer public keys.
+MAX_KEYS = 10000
+
+
+class KeyStore(object):
+    """
+    A thread-safe cache of the parsed RSA keys used for message authentication.
+    The server key is reloaded when the key file changes. A consumer key is only
+    served while the consumer's stored PEM is the one it was parsed from, so the
+    keys of consumers that were updated or deleted by other processes are never used.
+    """
+
+    def __init__(self):
+        self._server_key = None
+        self._consumer_keys = {}
+        self._lock = RLock()
+
+    def server_key(self):
+        """
+        Get the server's private RSA key.
+        :return: The server's private RSA key.
+        :rtype: RSA.RSA
+        """
+        path = pulp_conf.get('authentication', 'rsa_key')
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        with self._lock:
+            if self._server_key is not None and self._server_key[:2] == (path, mtime):
+                return self._server_key[2]
+        with open(path) as fp:
+            pem = fp.read()
+        bfr = BIO.MemoryBuffer(pem)
+        key = RSA.load_key_bio(bfr)
+        with self._lock:
+            self._server_key = (path, mtime, key)
+        return key
+
+    def consumer_key(self, consumer_id):
+        """
+        Get the consumer's public RSA key.
+        The PEM is read from the consumer on every call, which is a single indexed
+        lookup; only the parsing of the key is cached.
+        :param consumer_id: The consumer ID.
+        :type consumer_id: str
+        :return: The consumer's public RSA key.
+        :rtype: RSA.RSA
+        :raise MissingResource: when the consumer does not exist.
+        """
+        rsa_pub = 'rsa_pub'
+        manager = managers.consumer_manager()
+        consumer = manager.get_consumer(consumer_id, fields=[rsa_pub])
+        pem = consumer[rsa_pub]
+        with self._lock:
+            cached = self._consumer_keys.get(consumer_id)
+            if cached is not None and cached[0] == pem:
+                return cached[1]
+        bfr = BIO.MemoryBuffer(str(pem))
+        key = RSA.load_pub_key_bio(bfr)
+        with self._lock:
+            if len(self._consumer_keys) >= MAX_KEYS:
+                self._consumer_keys.clear()
+            self._consumer_keys[consumer_id] = (pem, key)
+        return key
+
+    def invalidate(self, consumer_id):
+        """
+        Discard the cached public key of a consumer.
+        :param consumer_id: The consumer ID.
+        :type consumer_id: str
+        """
+        with self._lock:
+            self._consumer_keys.pop(consumer_id, None)
+
+    def clear(self):
+        """
+        Discard all cached keys.
+        """
+        with self._lock:
+            self._server_key = None
+            self._consumer_keys.clear()
+
+
+key_store = KeyStore()
+
+
 class Authenticator(object):
     """
     Provides message authentication using RSA keys.
@@ -37,11 +127,7 @@ class Authenticator(object):
         """
         Load the private key.
         """
-        path = pulp_conf.get('authentication', 'rsa_key')
-        with open(path) as fp:
-            pem = fp.read()
-            bfr = BIO.MemoryBuffer(pem)
-            self.rsa_key = RSA.load_key_bio(bfr)
+        self.rsa_key = key_store.server_key()
 
     @staticmethod
     def get_key(consumer_id):
@@ -50,12 +136,7 @@ class Authenticator(object):
         :return: The consumer's public RSA key.
         :rtype: RSA.RSA
         """
-        rsa_pub = 'rsa_pub'
-        manager = managers.consumer_manager()
-        consumer = manager.get_consumer(consumer_id, fields=[rsa_pub])
-        pem = consumer[rsa_pub]
-        bfr = BIO.MemoryBuffer(str(pem))
-        return RSA.load_pub_key_bio(bfr)
+        return key_store.consumer_key(consumer_id)
 
     def sign(self, digest):
         """
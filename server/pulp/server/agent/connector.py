@@ -1,8 +1,21 @@
-from gofer.messaging import Connector
+from threading import RLock
+from time import time
+
+from gofer.messaging import Connector, Queue
 
 from pulp.server.config import config
 
 
+# The number of seconds an agent queue declared by this process is assumed to exist.
+QUEUE_TTL = 300
+
+# The maximum number of agent queues remembered as declared.
+MAX_QUEUES = 10000
+
+_declared = {}
+_lock = RLock()
+
+
 def get_url():
     """
     This constructs a gofer 2.x URL and is intended to maintain
@@ -26,3 +39,41 @@ def add_connector():
     connector.ssl.ca_certificate = config.get('messaging', 'cacert')
     connector.ssl.client_certificate = config.get('messaging', 'clientcert')
     connector.add()
+
+
+def declare_queue(name, url):
+    """
+    Declare an agent queue, adding the gofer connector as needed.  Queues declared
+    by this process in the last QUEUE_TTL seconds are not declared again.
+
+    :param name: The queue name.
+    :type name: str
+    :param url: The broker URL.
+    :type url: str
+    """
+    key = (name, url)
+    now = time()
+    with _lock:
+        if _declared.get(key, 0) > now:
+            return
+    add_connector()
+    queue = Queue(name, url)
+    queue.declare()
+    with _lock:
+        if len(_declared) >= MAX_QUEUES:
+            _declared.clear()
+        _declared[key] = now + QUEUE_TTL
+
+
+def forget_queue(name, url):
+    """
+    Forget that an agent queue was declared, so that it is declared again
+    when next used.  Called when the queue is deleted.
+
+    :param name: The queue name.
+    :type name: str
+    :param url: The broker URL.
+    :type url: str
+    """
+    with _lock:
+        _declared.pop((name, url), None)
@@ -11,10 +11,8 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from gofer.messaging import Queue
-
 from pulp.server.agent.auth import Authenticator
-from pulp.server.agent.connector import add_connector, get_url
+from pulp.server.agent.connector import declare_queue, get_url
 from pulp.server.agent.direct.services import ReplyHandler
 
 
@@ -67,13 +65,12 @@ class Context(object):
         Enter the context.
           1. add the configured gofer connector.
           2. declare the agent queue.
+        Both are skipped when the queue was recently declared by this process.
 
         :return: self
         :rtype: Context
         """
-        add_connector()
-        queue = Queue(self.address, self.url)
-        queue.declare()
+        declare_queue(self.address, self.url)
         return self
 
     def __exit__(self, *args):
@@ -21,7 +21,7 @@ from logging import getLogger
 from gofer.proxy import Agent
 from gofer.messaging import Queue, NotFound
 
-from pulp.server.agent.connector import add_connector
+from pulp.server.agent.connector import add_connector, forget_queue
 
 
 log = getLogger(__name__)
@@ -96,6 +96,7 @@ class PulpAgent(object):
         except NotFound:
             # queue may not exist
             pass
+        forget_queue(name, url)
 
 
 # --- Agent Capabilities -----------------------------------------------------
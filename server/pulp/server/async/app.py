@@ -106,19 +106,15 @@ class HeartbeatStep(bootsteps.StartStopStep):
 
     def _record_heartbeat(self, worker):
         """
-        This method creates or updates the worker record
+        This method creates or updates the worker record. It is the only write of a heartbeat,
+        since the ResourceManagerLock held by a resource manager is considered held for as long
+        as the worker record of its holder is alive.
 
         :param worker: The worker instance
         :type  worker: celery.apps.worker.Worker
         """
-        name = worker.hostname
         # Update the worker record timestamp and handle logging new workers
-        worker_watcher.handle_worker_heartbeat(name)
-
-        # If the worker is a resource manager, update the associated ResourceManagerLock timestamp
-        if name.startswith(constants.RESOURCE_MANAGER_WORKER_NAME):
-            ResourceManagerLock.objects(name=name).update_one(set__timestamp=datetime.utcnow(),
-                                                              upsert=False)
+        worker_watcher.handle_worker_heartbeat(worker.hostname)
 
 
 celery.steps['worker'].add(HeartbeatStep)
@@ -200,7 +196,10 @@ def get_resource_manager_lock(name):
 
     If the lock cannot be acquired immediately, it will wait until the
     currently active instance becomes unavailable, at which point the worker
-    cleanup routine will clear the lock for us to acquire. A worker record will
+    cleanup routine will clear the lock for us to acquire. The lock is also
+    cleared here once it is older than the timeout and the worker record of its
+    holder has stopped receiving heartbeats, in case the cleanup routine is not
+    running. A worker record will
     be created so that the waiting resource manager will appear in the Status
     API. This worker record will be cleaned up through the regular worker
     shutdown routine.
@@ -220,7 +219,13 @@ def get_resource_manager_lock(name):
         now = dateutils.ensure_tz(datetime.utcnow())
         old_timestamp = now - timedelta(seconds=constants.PULP_PROCESS_TIMEOUT_INTERVAL)
 
-        ResourceManagerLock.objects(timestamp__lte=old_timestamp).delete()
+        # The lock of a resource manager whose heartbeats have stopped is stale. Locks acquired
+        # within the timeout are kept, since their holder may have registered after the live
+        # resource managers were read.
+        live_managers = Worker.objects(name__startswith=constants.RESOURCE_MANAGER_WORKER_NAME,
+                                       last_heartbeat__gt=old_timestamp).distinct('name')
+        ResourceManagerLock.objects(name__nin=live_managers,
+                                    timestamp__lte=old_timestamp).delete()
 
         # Create / update the worker record so that Pulp knows we exist
         Worker.objects(name=name).update_one(set__last_heartbeat=datetime.utcnow(),
@@ -17,7 +17,7 @@ from pulp.server.async.tasks import _delete_worker
 from pulp.server.db import connection as db_connection
 from pulp.server.db.connection import UnsafeRetry
 from pulp.server.db.model.dispatch import ScheduledCall, ScheduleEntry
-from pulp.server.db.model import Worker, CeleryBeatLock
+from pulp.server.db.model import Worker, CeleryBeatLock, ScheduleVersion
 from pulp.server.managers.schedule import utils
 
 # The import below is not used in this module, but it needs to be kept here. This module is the
@@ -40,43 +40,53 @@ class CeleryProcessTimeoutMonitor(threading.Thread):
     """
     def run(self):
         """
-        The thread entry point. Sleep for the heartbeat interval, then call check_celery_processes()
+        The thread entry point. Sleep until the next check is due, then call
+        check_celery_processes()
 
         This method has a try/except block around check_celery_processes() to add durability to
         this background thread.
         """
         _logger.info(_('Worker Timeout Monitor Started'))
+        delay = constants.PULP_PROCESS_HEARTBEAT_INTERVAL
         while True:
-            time.sleep(constants.PULP_PROCESS_HEARTBEAT_INTERVAL)
+            time.sleep(delay)
             try:
-                self.check_celery_processes()
+                delay = self.check_celery_processes()
             except Exception as e:
                 _logger.error(e)
+                delay = constants.PULP_PROCESS_HEARTBEAT_INTERVAL
 
     def check_celery_processes(self):
         """
         Look for missing Celery processes, log and cleanup as needed.
 
-        To find a missing Celery process, filter the Workers model for entries older than
-        utcnow() - WORKER_TIMEOUT_SECONDS. The heartbeat times are stored in native UTC, so this is
-        a comparable datetime. For each missing worker found, call _delete_worker() synchronously
-        for cleanup.
+        To find a missing Celery process, query the Workers model by its indexed last heartbeat
+        for entries older than utcnow() - WORKER_TIMEOUT_SECONDS. The heartbeat times are stored
+        in native UTC, so this is a comparable datetime. For each missing worker found, call
+        _delete_worker() synchronously for cleanup.
+
+        The same query also returns the workers whose heartbeat will be too old before the next
+        check is due, and the next check is scheduled for when the first of them does, so that a
+        worker that stops sending heartbeats is removed as soon as it times out.
 
         This method also checks that at least one resource_manager and one scheduler process is
         present. If there are zero of either, log at the error level that Pulp will not operate
         correctly.
+
+        :return: The number of seconds until the next check is due.
+        :rtype:  float
         """
         msg = _('Checking if pulp_workers, pulp_celerybeat, or pulp_resource_manager processes '
                 'are missing for more than %d seconds') % constants.PULP_PROCESS_TIMEOUT_INTERVAL
         _logger.debug(msg)
         now = ensure_tz(datetime.utcnow())
         oldest_heartbeat_time = now - timedelta(seconds=constants.PULP_PROCESS_TIMEOUT_INTERVAL)
-        worker_list = Worker.objects.all()
-        worker_count = 0
-        resource_manager_count = 0
-        scheduler_count = 0
+        next_oldest_heartbeat_time = oldest_heartbeat_time + timedelta(
+            seconds=constants.PULP_PROCESS_HEARTBEAT_INTERVAL)
+        delay = constants.PULP_PROCESS_HEARTBEAT_INTERVAL
 
-        for worker in worker_list:
+        expiring = Worker.objects(last_heartbeat__lt=next_oldest_heartbeat_time)
+        for worker in expiring.only('name', 'last_heartbeat'):
             if worker.last_heartbeat < oldest_heartbeat_time:
                 msg = _("Worker '%s' has gone missing, removing from list of workers") % worker.name
                 _logger.error(msg)
@@ -85,12 +95,16 @@ class CeleryProcessTimeoutMonitor(threading.Thread):
                     worker.delete()
                 else:
                     _delete_worker(worker.name)
-            elif worker.name.startswith(constants.SCHEDULER_WORKER_NAME):
-                scheduler_count = scheduler_count + 1
-            elif worker.name.startswith(constants.RESOURCE_MANAGER_WORKER_NAME):
-                resource_manager_count = resource_manager_count + 1
             else:
-                worker_count = worker_count + 1
+                # check again just after the heartbeat of this worker becomes too old
+                expires = (worker.last_heartbeat - oldest_heartbeat_time).total_seconds()
+                delay = min(delay, expires + 1)
+
+        online = Worker.objects(last_heartbeat__gte=oldest_heartbeat_time)
+        scheduler_count = online.filter(name__startswith=constants.SCHEDULER_WORKER_NAME).count()
+        resource_manager_count = online.filter(
+            name__startswith=constants.RESOURCE_MANAGER_WORKER_NAME).count()
+        worker_count = online.count() - scheduler_count - resource_manager_count
 
         if resource_manager_count == 0:
             msg = _("There are 0 pulp_resource_manager processes running. Pulp will not operate "
@@ -107,6 +121,7 @@ class CeleryProcessTimeoutMonitor(threading.Thread):
                 "pulp_celerybeat processes, and %(resource_manager)d "
                 "pulp_resource_manager processes") % output_dict
         _logger.debug(msg)
+        return delay
 
 
 class Scheduler(beat.Scheduler):
@@ -143,6 +158,10 @@ class Scheduler(beat.Scheduler):
         and should create the necessary pulp helper threads using spawn_pulp_monitor_threads().
         """
         self._schedule = None
+        self._schedule_version = None
+        self._db_schedule_ids = set()
+        self._ignored_schedule_ids = set()
+        self._most_recent_timestamp = 0
         self._loaded_from_db_count = 0
         self._first_lock_acq_check = True
 
@@ -256,45 +275,91 @@ class Scheduler(beat.Scheduler):
         for key, value in self.app.conf.CELERYBEAT_SCHEDULE.iteritems():
             self._schedule[key] = beat.ScheduleEntry(**dict(value, name=key))
 
-        # include a "0" as the default in case there are no schedules to load
-        update_timestamps = [0]
+        # read the version before the schedules so that changes made while loading are
+        # picked up by the next schedule_changed check
+        self._schedule_version = ScheduleVersion.get_version()
+
+        self._most_recent_timestamp = 0
+        self._db_schedule_ids = set()
+        self._ignored_schedule_ids = set()
 
         _logger.debug(_('loading schedules from DB'))
-        ignored_db_count = 0
-        self._loaded_from_db_count = 0
-        for call in itertools.imap(ScheduledCall.from_db, utils.get_enabled()):
+        self._apply_calls(itertools.imap(ScheduledCall.from_db, utils.get_enabled()))
+
+        _logger.debug(_('loaded %(count)d schedules') % {'count': self._loaded_from_db_count})
+
+    def update_schedule(self):
+        """
+        Apply the schedule changes made in the database since the schedule was last loaded.
+
+        Rather than rebuilding the whole "_schedule" dictionary, only the entries for
+        schedules that have been added, updated, disabled or deleted are changed.
+        """
+        self._schedule_version = ScheduleVersion.get_version()
+
+        enabled_ids = utils.get_enabled_ids()
+        removed_ids = self._db_schedule_ids - enabled_ids
+        for schedule_id in removed_ids:
+            self._schedule.pop(schedule_id, None)
+        self._db_schedule_ids -= removed_ids
+        self._ignored_schedule_ids &= enabled_ids
+
+        calls = itertools.imap(ScheduledCall.from_db,
+                               utils.get_updated_since(self._most_recent_timestamp))
+        changed = self._apply_calls(calls)
+
+        # schedules enabled with a timestamp older than the most recent one
+        missing_ids = enabled_ids - self._db_schedule_ids - self._ignored_schedule_ids - changed
+        if missing_ids:
+            changed |= self._apply_calls(utils.get(list(missing_ids)))
+
+        _logger.debug(_('%(changed)d schedules changed, %(removed)d schedules removed') %
+                      {'changed': len(changed), 'removed': len(removed_ids)})
+
+    def _apply_calls(self, calls):
+        """
+        Add or replace the schedule entries for the given scheduled calls.
+
+        Calls with no remaining runs are removed from the schedule.
+
+        :param calls:   iterable of scheduled calls
+        :type  calls:   iterable of pulp.server.db.model.dispatch.ScheduledCall
+
+        :return:        set of the IDs of the calls that were applied
+        :rtype:         set
+        """
+        applied = set()
+        for call in calls:
+            applied.add(call.id)
             if call.remaining_runs == 0:
                 _logger.debug(
                     _('ignoring schedule with 0 remaining runs: %(id)s') % {'id': call.id})
-                ignored_db_count += 1
+                self._schedule.pop(call.id, None)
+                self._db_schedule_ids.discard(call.id)
+                self._ignored_schedule_ids.add(call.id)
             else:
                 self._schedule[call.id] = call.as_schedule_entry()
-                update_timestamps.append(call.last_updated)
-                self._loaded_from_db_count += 1
-
-        _logger.debug(_('loaded %(count)d schedules') % {'count': self._loaded_from_db_count})
-
-        self._most_recent_timestamp = max(update_timestamps)
+                self._db_schedule_ids.add(call.id)
+                self._ignored_schedule_ids.discard(call.id)
+            self._most_recent_timestamp = max(self._most_recent_timestamp, call.last_updated)
+        self._loaded_from_db_count = len(self._db_schedule_ids)
+        return applied
 
     @property
     @UnsafeRetry.retry_decorator()
     def schedule_changed(self):
         """
-        Looks at the update timestamps in the database to determine if there
-        are new or modified schedules.
+        Looks at the schedule version in the database to determine if there
+        are new, modified or removed schedules.
 
-        Indexing should make this very fast.
+        The version is a single document looked up by its ID, so this is very fast.
 
-        :return:    True iff the set of enabled scheduled calls has changed
+        :return:    True iff the set of scheduled calls has changed
                     in the database.
         :rtype:     bool
         """
-        if utils.get_enabled().count() != self._loaded_from_db_count:
-            logging.debug(_('number of enabled schedules has changed'))
-            return True
-
-        if utils.get_updated_since(self._most_recent_timestamp).count() > 0:
-            logging.debug(_('one or more enabled schedules has been updated'))
+        if ScheduleVersion.get_version() != self._schedule_version:
+            logging.debug(_('one or more schedules has changed'))
             return True
 
         return False
@@ -311,7 +376,7 @@ class Scheduler(beat.Scheduler):
             return self.get_schedule()
 
         if self.schedule_changed:
-            self.setup_schedule()
+            self.update_schedule()
 
         return self._schedule
 
@@ -1,4 +1,5 @@
 import cProfile
+from contextlib import contextmanager
 from datetime import datetime
 import errno
 from gettext import gettext as _
@@ -19,8 +20,10 @@ from mongoengine.queryset import DoesNotExist
 
 from pulp.common.constants import RESOURCE_MANAGER_WORKER_NAME, SCHEDULER_WORKER_NAME
 from pulp.common import constants, dateutils, tags
+from pulp.plugins.util.misc import paginate
 from pulp.server.async.celery_instance import celery, RESOURCE_MANAGER_QUEUE, \
     DEDICATED_QUEUE_EXCHANGE
+from pulp.server import metrics
 from pulp.server.exceptions import PulpException, MissingResource, \
     NoWorkers, PulpCodedException, error_codes
 from pulp.server.config import config
@@ -34,6 +37,9 @@ from pulp.server.managers.schedule import utils
 controller = control.Control(app=celery)
 _logger = logging.getLogger(__name__)
 
+# The number of calls whose TaskStatus documents are inserted together by apply_async_many.
+BULK_DISPATCH_BATCH_SIZE = 1000
+
 
 class PulpTask(CeleryTask):
     """
@@ -176,6 +182,16 @@ def _is_worker(worker_name):
     return True
 
 
+def get_worker_count():
+    """
+    Return the number of online workers that can be assigned work.
+
+    :return: the number of online workers, not counting the scheduler and resource manager
+    :rtype:  int
+    """
+    return len(filter(_is_worker, (worker['name'] for worker in Worker.objects.get_online())))
+
+
 def get_worker_for_reservation(resource_id):
     """
     Return the Worker instance that is associated with a reservation of type resource_id. If
@@ -425,6 +441,42 @@ class ReservedTaskMixin(object):
         return AsyncResult(inner_task_id)
 
 
+def _routing_key(options):
+    """
+    Get the routing key a task will be published with.
+
+    :param options: The options passed to apply_async
+    :type  options: dict
+    :return:        The routing key in options, or celery's default routing key
+    :rtype:         basestring
+    """
+    if celery_version.startswith('4'):
+        return options.get('routing_key',
+                           defaults.NAMESPACES['task']['default_routing_key'].default)
+    return options.get('routing_key',
+                       defaults.NAMESPACES['CELERY']['DEFAULT_ROUTING_KEY'].default)
+
+
+@contextmanager
+def _producer(app):
+    """
+    Acquire a producer that messages can be published with, unless tasks are run eagerly, in
+    which case nothing is published and None is provided.
+
+    :param app: The celery application
+    :type  app: celery.Celery
+    """
+    if celery_version.startswith('4'):
+        eager = app.conf.task_always_eager
+    else:
+        eager = app.conf.CELERY_ALWAYS_EAGER
+    if eager:
+        yield None
+    else:
+        with app.producer_or_acquire() as producer:
+            yield producer
+
+
 class Task(PulpTask, ReservedTaskMixin):
     """
     This is a custom Pulp subclass of the PulpTask class. It allows us to inject some custom
@@ -451,12 +503,7 @@ class Task(PulpTask, ReservedTaskMixin):
         :return:            An AsyncResult instance as returned by Celery's apply_async
         :rtype:             celery.result.AsyncResult
         """
-        if celery_version.startswith('4'):
-            routing_key = kwargs.get('routing_key',
-                                     defaults.NAMESPACES['task']['default_routing_key'].default)
-        else:
-            routing_key = kwargs.get('routing_key',
-                                     defaults.NAMESPACES['CELERY']['DEFAULT_ROUTING_KEY'].default)
+        routing_key = _routing_key(kwargs)
         tag_list = kwargs.pop('tags', [])
         group_id = kwargs.pop('group_id', None)
         async_result = super(Task, self).apply_async(*args, **kwargs)
@@ -473,6 +520,46 @@ class Task(PulpTask, ReservedTaskMixin):
         task_status.save_with_set_on_insert(fields_to_set_on_insert=['state', 'start_time'])
         return async_result
 
+    def apply_async_many(self, args_list, **kwargs):
+        """
+        Dispatch many calls of this task at once. This accepts the same keyword parameters as
+        apply_async, which are applied to every call.
+
+        The TaskStatus documents are created with one bulk insert for every
+        BULK_DISPATCH_BATCH_SIZE calls, before the messages for those calls are published. As the
+        documents exist before any of the calls can run, they are inserted rather than upserted.
+        All of the messages are published using a single producer.
+
+        :param args_list: The positional arguments of each call
+        :type  args_list: iterable of tuple
+        :return:          An AsyncResult for each call, in the order of args_list
+        :rtype:           list of celery.result.AsyncResult
+        """
+        routing_key = _routing_key(kwargs)
+        tag_list = kwargs.pop('tags', [])
+        group_id = kwargs.pop('group_id', None)
+        async_results = []
+        with _producer(self.app) as producer:
+            for page in paginate(args_list, BULK_DISPATCH_BATCH_SIZE):
+                calls = []
+                task_statuses = []
+                for args in page:
+                    task_status = TaskStatus(
+                        task_id=str(uuid.uuid4()), task_type=self.name,
+                        state=constants.CALL_WAITING_STATE, worker_name=routing_key,
+                        tags=tag_list, group_id=group_id)
+                    task_status.validate()
+                    task_statuses.append(task_status.to_mongo())
+                    calls.append((task_status.task_id, args))
+                TaskStatus._get_collection().insert_many(task_statuses, ordered=False)
+
+                for task_id, args in calls:
+                    async_result = super(Task, self).apply_async(
+                        args, task_id=task_id, producer=producer, **kwargs)
+                    async_result.tags = tag_list
+                    async_results.append(async_result)
+        return async_results
+
     def __call__(self, *args, **kwargs):
         """
         This overrides PulpTask's __call__() method. We use this method
@@ -496,6 +583,7 @@ class Task(PulpTask, ReservedTaskMixin):
             # above.
             TaskStatus.objects(task_id=self.request.id).update_one(
                 set__state=constants.CALL_RUNNING_STATE, set__start_time=start_time, upsert=True)
+            metrics.start()
         # Run the actual task
         _logger.debug("Running task : [%s]" % self.request.id)
 
@@ -524,11 +612,14 @@ class Task(PulpTask, ReservedTaskMixin):
                              % {'id': kwargs['scheduled_call_id']})
                 utils.reset_failure_count(kwargs['scheduled_call_id'])
         if not self.request.called_directly:
+            task_metrics = metrics.stop()
             now = datetime.now(dateutils.utc_tz())
             finish_time = dateutils.format_iso8601_datetime(now)
             task_status = TaskStatus.objects.get(task_id=task_id)
             task_status['finish_time'] = finish_time
             task_status['result'] = retval
+            if task_metrics is not None:
+                task_status['metrics'] = task_metrics
 
             # Only set the state to finished if it's not already in a complete state. This is
             # important for when the task has been canceled, so we don't move the task from canceled
@@ -577,11 +668,14 @@ class Task(PulpTask, ReservedTaskMixin):
         if kwargs.get('scheduled_call_id') is not None:
             utils.increment_failure_count(kwargs['scheduled_call_id'])
         if not self.request.called_directly:
+            task_metrics = metrics.stop()
             now = datetime.now(dateutils.utc_tz())
             finish_time = dateutils.format_iso8601_datetime(now)
             task_status = TaskStatus.objects.get(task_id=task_id)
             task_status['state'] = constants.CALL_ERROR_STATE
             task_status['finish_time'] = finish_time
+            if task_metrics is not None:
+                task_status['metrics'] = task_metrics
             task_status['traceback'] = einfo.traceback
             if not isinstance(exc, PulpException):
                 exc = PulpException(str(exc))
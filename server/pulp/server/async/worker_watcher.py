@@ -28,25 +28,24 @@ def handle_worker_heartbeat(worker_name):
     """
     This is a generic function for updating worker heartbeat records.
 
-    Existing Worker objects are searched for one to update. If an existing one is found, it is
-    updated. Otherwise a new Worker entry is created. Logging at the info level is also done.
+    The Worker entry is updated, or created if it does not exist, with a single upsert that
+    returns the entry as it was before the heartbeat. Logging at the info level is done when
+    there was no entry, which means that the worker is new.
 
     :param worker_name: The hostname of the worker
     :type  worker_name: basestring
     """
-    existing_worker = Worker.objects(name=worker_name).first()
-
-    if not existing_worker:
-        msg = _("New worker '%s' discovered") % worker_name
-        _logger.info(msg)
-
     timestamp = datetime.utcnow()
     msg = _("Worker heartbeat from '{name}' at time {timestamp}").format(timestamp=timestamp,
                                                                          name=worker_name)
     _logger.debug(msg)
 
-    Worker.objects(name=worker_name).update_one(set__last_heartbeat=timestamp,
-                                                upsert=True)
+    existing_worker = Worker.objects(name=worker_name).only('name').modify(
+        set__last_heartbeat=timestamp, upsert=True)
+
+    if existing_worker is None:
+        msg = _("New worker '%s' discovered") % worker_name
+        _logger.info(msg)
 
 
 def handle_worker_offline(worker_name):
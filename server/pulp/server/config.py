@@ -57,6 +57,8 @@ _default_values = {
     },
     'data_reaping': {
         'reaper_interval': '0.25',
+        'reaper_batch_size': '1000',
+        'reaper_batch_delay': '0.1',
         'consumer_history': '60',
         'repo_sync_history': '60',
         'repo_publish_history': '60',
@@ -76,6 +78,8 @@ _default_values = {
         'ca_path': DEFAULT_CA_PATH,
         'unsafe_autoretry': 'false',
         'write_concern': 'majority',
+        'secondary_reads': 'false',
+        'max_staleness': '90',
     },
     'email': {
         'host': 'localhost',
@@ -136,7 +140,13 @@ _default_values = {
         'redirect_path': '/streamer/',
         'https_retrieval': 'true',
         'download_interval': '30',
-        'download_concurrency': '5'
+        'download_concurrency': '5',
+        'redirect_cache_size': '10000',
+        'shared_key': '',
+    },
+    'content': {
+        'path_cache_size': '10000',
+        'path_cache_ttl': '30',
     },
     'profiling': {
         'enabled': 'false',
@@ -5,7 +5,10 @@ import tempfile
 
 from hashlib import sha256
 
+from pulp.plugins.util.verification import VerificationException
+from pulp.server import metrics
 from pulp.server.config import config
+from pulp.server.util import copy_with_checksums
 
 
 def mkdir(path):
@@ -105,12 +108,14 @@ class FileStorage(ContentStorage):
             digest[0:2],
             digest[2:])
 
-    def put(self, unit, path, location=None):
+    def put(self, unit, path, location=None, checksums=None):
         """
         Put the content defined by the content unit into storage.
         The file at the specified *path* is transferred into storage:
-         - Copy file to the temporary file at its final directory.
+         - Copy file to the temporary file at its final directory. The checksums to verify, if
+           any, are calculated as the file is copied.
          - If possible, verify size of the file to make sure that file is not corrupted.
+         - Verify the checksums.
          - Do atomic rename.
 
         :param unit: The content unit to be stored.
@@ -120,6 +125,12 @@ class FileStorage(ContentStorage):
         :param location: The (optional) location within the path
             where the content is to be stored.
         :type location: str
+        :param checksums: The (optional) expected checksums of the file, keyed by checksum type.
+        :type checksums: dict
+
+        :raises InvalidChecksumType: if a checksum type is not supported.
+        :raises VerificationException: if the size or a checksum of the file is not the one
+            expected.
         """
         destination = unit.storage_path
         if location:
@@ -131,13 +142,24 @@ class FileStorage(ContentStorage):
         # going to use.
         os.close(fd)
 
-        shutil.copy(path, temp_destination)
-
         try:
-            unit.verify_size(temp_destination)
-        except AttributeError:
-            # verify_size method is not implemented for the unit
-            pass
+            if checksums:
+                calculated = copy_with_checksums(path, temp_destination, checksums.keys())
+            else:
+                shutil.copy(path, temp_destination)
+            metrics.add_file_written(temp_destination)
+
+            try:
+                unit.verify_size(temp_destination)
+            except AttributeError:
+                # verify_size method is not implemented for the unit
+                pass
+
+            if checksums:
+                mismatched = dict((checksum_type, value) for checksum_type, value in
+                                  calculated.items() if value != checksums[checksum_type])
+                if mismatched:
+                    raise VerificationException(mismatched)
         except:
             os.remove(temp_destination)
             raise
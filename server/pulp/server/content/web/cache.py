@@ -0,0 +1,177 @@
+"""
+Caching of the path metadata and directory indexes used by the content application.
+
+Published content only changes when something is published or a distributor is removed, both of
+which update the modification time of the publish marker file. Cached entries are discarded when
+the marker changes and expire after a short time regardless, so that changes which are not
+publishes (such as orphaned content being removed) are eventually noticed.
+"""
+from collections import OrderedDict
+from gettext import gettext as _
+import logging
+import os
+from threading import RLock
+from time import time
+
+from pulp.server.config import config as pulp_conf
+
+
+logger = logging.getLogger(__name__)
+
+# The name of the publish marker file in the storage directory.
+PUBLISH_MARKER = '.last_publish'
+
+
+def publish_marker_path():
+    """
+    Get the path to the publish marker file.
+
+    :return: The absolute path to the publish marker.
+    :rtype: str
+    """
+    return os.path.join(pulp_conf.get('server', 'storage_dir'), PUBLISH_MARKER)
+
+
+def touch_publish_marker():
+    """
+    Update the modification time of the publish marker file, creating it as needed, so that the
+    content application discards its cached path metadata. Failures are logged and otherwise
+    ignored since content is still served correctly once the cached entries expire.
+    """
+    path = publish_marker_path()
+    try:
+        with open(path, 'a'):
+            os.utime(path, None)
+    except (IOError, OSError):
+        logger.exception(_('Could not update the publish marker {path}.').format(path=path))
+
+
+class PathMetadata(object):
+    """
+    The metadata of a requested path.
+
+    :ivar path: The fully qualified *real* path.
+    :type path: str
+    :ivar is_dir: The path is a directory.
+    :type is_dir: bool
+    :ivar readable: The file may be read by the content application.
+    :type readable: bool
+    :ivar content_type: The content type of the file.
+    :type content_type: str
+    :ivar index: The rendered directory index.
+    :type index: str
+    """
+
+    __slots__ = ('path', 'is_dir', 'readable', 'content_type', 'index')
+
+    def __init__(self, path, is_dir=False, readable=False, content_type=None):
+        """
+        :param path: The fully qualified *real* path.
+        :type path: str
+        :param is_dir: The path is a directory.
+        :type is_dir: bool
+        :param readable: The file may be read by the content application.
+        :type readable: bool
+        :param content_type: The content type of the file.
+        :type content_type: str
+        """
+        self.path = path
+        self.is_dir = is_dir
+        self.readable = readable
+        self.content_type = content_type
+        self.index = None
+
+
+class PathCache(object):
+    """
+    A bounded, thread-safe cache of PathMetadata keyed by requested path.
+
+    :ivar max_entries: The maximum number of cached paths.
+    :type max_entries: int
+    :ivar ttl: The number of seconds an entry is kept.
+    :type ttl: int
+    :ivar marker: The absolute path to the publish marker.
+    :type marker: str
+    """
+
+    def __init__(self, max_entries, ttl, marker):
+        """
+        :param max_entries: The maximum number of cached paths.
+        :type max_entries: int
+        :param ttl: The number of seconds an entry is kept.
+        :type ttl: int
+        :param marker: The absolute path to the publish marker.
+        :type marker: str
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.marker = marker
+        self._entries = OrderedDict()
+        self._marker_mtime = None
+        self._lock = RLock()
+
+    def _marker_changed(self):
+        """
+        Determine whether the publish marker changed since last checked.
+
+        :return: True if the marker changed.
+        :rtype: bool
+        """
+        try:
+            mtime = os.stat(self.marker).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._marker_mtime:
+            return False
+        self._marker_mtime = mtime
+        return True
+
+    def get(self, key):
+        """
+        Get the cached metadata for a requested path.
+
+        :param key: The requested path.
+        :type key: str
+        :return: The cached metadata or None.
+        :rtype: PathMetadata
+        """
+        if self.max_entries <= 0:
+            return None
+        now = time()
+        with self._lock:
+            if self._marker_changed():
+                self._entries.clear()
+                return None
+            cached = self._entries.pop(key, None)
+            if cached is None:
+                return None
+            metadata, expires = cached
+            if expires <= now:
+                return None
+            # keep the most recently used entries last
+            self._entries[key] = cached
+            return metadata
+
+    def set(self, key, metadata):
+        """
+        Cache the metadata for a requested path.
+
+        :param key: The requested path.
+        :type key: str
+        :param metadata: The metadata.
+        :type metadata: PathMetadata
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[key] = (metadata, time() + self.ttl)
+
+    def clear(self):
+        """
+        Discard all cached metadata.
+        """
+        with self._lock:
+            self._entries.clear()
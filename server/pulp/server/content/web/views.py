@@ -10,7 +10,8 @@ from django.views.generic import View
 
 from pulp.repoauth.wsgi import allow_access
 from pulp.server.config import config as pulp_conf
-from pulp.server.lazy import URL, Key
+from pulp.server.content.web.cache import PathCache, PathMetadata, publish_marker_path
+from pulp.server.lazy import URL, Key, SharedKey, SignedURLCache
 
 
 logger = logging.getLogger(__name__)
@@ -27,10 +28,66 @@ class ContentView(View):
     """
     The content delivery view provides content.
 
-    :ivar key: The public RSA key used for URL signing.
-    :type key: M2Crypto.RSA.RSA
+    :ivar key: The private RSA key or the shared key used for URL signing.
+    :type key: M2Crypto.RSA.RSA or pulp.server.lazy.SharedKey
     """
 
+    # The cache of signed redirect URLs shared by all views in the process.
+    _redirect_cache = None
+
+    # The cache of path metadata and directory indexes shared by all views in the process.
+    _path_cache = None
+
+    @staticmethod
+    def redirect_cache():
+        """
+        Get the process-wide cache of signed redirect URLs.
+        The cache is created on first use.
+
+        :return: The redirect cache.
+        :rtype: pulp.server.lazy.SignedURLCache
+        """
+        if ContentView._redirect_cache is None:
+            max_entries = int(pulp_conf.get('lazy', 'redirect_cache_size'))
+            ContentView._redirect_cache = SignedURLCache(max_entries)
+        return ContentView._redirect_cache
+
+    @staticmethod
+    def path_cache():
+        """
+        Get the process-wide cache of path metadata and directory indexes.
+        The cache is created on first use.
+
+        :return: The path cache.
+        :rtype: pulp.server.content.web.cache.PathCache
+        """
+        if ContentView._path_cache is None:
+            max_entries = int(pulp_conf.get('content', 'path_cache_size'))
+            ttl = int(pulp_conf.get('content', 'path_cache_ttl'))
+            ContentView._path_cache = PathCache(max_entries, ttl, publish_marker_path())
+        return ContentView._path_cache
+
+    @staticmethod
+    def file_metadata(path):
+        """
+        Get the metadata needed to send the file at the given path.
+
+        :param path: The fully qualified *real* path to the requested content.
+        :type path: str
+        :return: The file metadata.
+        :rtype: pulp.server.content.web.cache.PathMetadata
+        """
+        readable = os.access(path, os.R_OK)
+        content_type = None
+        if readable:
+            content_type = mimetypes_noencoding.guess_type(path)[0]
+            # If the content type can't be detected by mimetypes, send it as arbitrary
+            # binary data. See https://tools.ietf.org/html/rfc2046#section-4.5.1 for
+            # more information.
+            if content_type is None:
+                content_type = 'application/octet-stream'
+        return PathMetadata(path, readable=readable, content_type=content_type)
+
     @staticmethod
     def urljoin(scheme, host, port, base, path, query):
         """
@@ -71,23 +128,21 @@ class ContentView(View):
         return ''.join(url)
 
     @staticmethod
-    def x_send(path):
+    def x_send(path, metadata=None):
         """
         Add the X-SENDFILE header to the returned reply causing Apache to send the file content.
 
         :param path: The fully qualified *real* path to the requested content.
         :type path: str
+        :param metadata: The (cached) metadata of the file. Determined when not specified.
+        :type metadata: pulp.server.content.web.cache.PathMetadata
         :return: An HTTP response.
         :rtype: django.http.HttpResponse
         """
-        if os.access(path, os.R_OK):
-            content_type = mimetypes_noencoding.guess_type(path)[0]
-            # If the content type can't be detected by mimetypes, send it as arbitrary
-            # binary data. See https://tools.ietf.org/html/rfc2046#section-4.5.1 for
-            # more information.
-            if content_type is None:
-                content_type = 'application/octet-stream'
-            reply = HttpResponse(content_type=content_type)
+        if metadata is None:
+            metadata = ContentView.file_metadata(path)
+        if metadata.readable:
+            reply = HttpResponse(content_type=metadata.content_type)
             reply['X-SENDFILE'] = path
         else:
             reply = HttpResponseForbidden()
@@ -100,8 +155,8 @@ class ContentView(View):
 
         :param request: The WSGI request object.
         :type request: django.core.handlers.wsgi.WSGIRequest
-        :param key: A private RSA key.
-        :type key: RSA.RSA
+        :param key: A private RSA key or a shared key.
+        :type key: RSA.RSA or pulp.server.lazy.SharedKey
         :return: A redirect or not-found reply.
         :rtype: django.http.HttpResponse
         """
@@ -125,12 +180,16 @@ class ContentView(View):
             query)
 
         url = URL(redirect)
-        signed = url.sign(key, remote_ip=remote_ip)
+        signed = ContentView.redirect_cache().sign(url, key, remote_ip=remote_ip)
         return HttpResponseRedirect(str(signed))
 
     def __init__(self, **kwargs):
         super(ContentView, self).__init__(**kwargs)
-        self.key = Key.load(pulp_conf.get('authentication', 'rsa_key'))
+        shared_key = pulp_conf.get('lazy', 'shared_key')
+        if shared_key:
+            self.key = SharedKey.load(shared_key)
+        else:
+            self.key = Key.load(pulp_conf.get('authentication', 'rsa_key'))
         # Make sure all requested paths fall under these sub-directories, otherwise
         # we might find ourselves serving private keys to all and sundry.
         local_storage = pulp_conf.get('server', 'storage_dir')
@@ -150,7 +209,12 @@ class ContentView(View):
         :rtype: django.http.HttpResponse
         """
         host = request.get_host()
-        path = os.path.realpath(request.path_info)
+        path_cache = self.path_cache()
+        metadata = path_cache.get(request.path_info)
+        if metadata is not None:
+            path = metadata.path
+        else:
+            path = os.path.realpath(request.path_info)
 
         # Check authorization if http isn't being used. This environ variable must
         # be available in all implementations so it is not dependant on Apache httpd:
@@ -168,22 +232,33 @@ class ContentView(View):
                           'a Pulp content path.').format(host=host, path=path))
             return HttpResponseForbidden()
 
-        # Immediately 404 if the symbolic link doesn't even exist
-        if not os.path.lexists(request.path_info):
-            logger.debug(_('Symbolic link to {path} does not exist.').format(path=path))
-            raise Http404
+        if metadata is None:
+            # Immediately 404 if the symbolic link doesn't even exist
+            if not os.path.lexists(request.path_info):
+                logger.debug(_('Symbolic link to {path} does not exist.').format(path=path))
+                raise Http404
 
-        if os.path.isdir(path):
-            logger.debug(_('Rendering directory index for {path}.').format(path=path))
-            return self.directory_index(path)
+            if os.path.isdir(path):
+                metadata = PathMetadata(path, is_dir=True)
+            elif os.path.exists(path):
+                # Already downloaded
+                metadata = self.file_metadata(path)
+            else:
+                # Not downloaded yet, so not cached; it may be downloaded at any time
+                logger.debug(_('Redirecting request for {path}.').format(path=path))
+                return self.redirect(request, self.key)
+            path_cache.set(request.path_info, metadata)
 
-        # Already downloaded
-        if os.path.exists(path):
-            logger.debug(_('Serving {path} with mod_xsendfile.').format(path=path))
-            return self.x_send(path)
+        if metadata.is_dir:
+            if metadata.index is None:
+                logger.debug(_('Rendering directory index for {path}.').format(path=path))
+                reply = self.directory_index(path)
+                metadata.index = reply.content
+                return reply
+            return HttpResponse(metadata.index)
 
-        logger.debug(_('Redirecting request for {path}.').format(path=path))
-        return self.redirect(request, self.key)
+        logger.debug(_('Serving {path} with mod_xsendfile.').format(path=path))
+        return self.x_send(path, metadata)
 
     @staticmethod
     def directory_index(path):
@@ -86,6 +86,43 @@ def unbind(consumer_id, repo_id, distributor_id, options):
     return response
 
 
+def unbind_many(bindings, options):
+    """
+    Unbind many consumers.
+    This is the bulk equivalent of unbind() and follows the same itinerary.  The
+    bindings that require agent notification are marked deleted using a single
+    update and the agents are notified.  The remaining bindings are deleted
+    immediately using a single operation.
+
+    :param bindings: A list of binding documents.
+    :type bindings: list
+    :param options: Unbind options passed to the agent handler.
+    :type options: dict
+    :returns TaskResult containing the unbound bindings & any spawned tasks.
+    :rtype: TaskResult
+    """
+    bind_manager = managers.consumer_bind_manager()
+    notified = [b for b in bindings if b['notify_agent']]
+    silent = [b for b in bindings if not b['notify_agent']]
+
+    response = TaskResult(result=list(bindings))
+
+    if notified:
+        # Unbind the consumers from the repos on the server
+        bind_manager.unbind_many(notified)
+        # Notify the agents to remove the bindings.
+        # The agent notification handler will delete the bindings from the server
+        agent_manager = managers.consumer_agent_manager()
+        for task in agent_manager.unbind_many(notified, options):
+            # we only want the task's ID, not the full task
+            response.spawned_tasks.append({'task_id': task['task_id']})
+
+    # Since there was no agent notification, perform the delete immediately
+    bind_manager.delete_many(silent)
+
+    return response
+
+
 def force_unbind(consumer_id, repo_id, distributor_id, options):
     """
     Get the unbind itinerary.
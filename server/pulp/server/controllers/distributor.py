@@ -12,6 +12,7 @@ from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api
 from pulp.server import exceptions
 from pulp.server.async.tasks import Task, TaskResult
+from pulp.server.content.web import cache as content_cache
 from pulp.server.db import model
 from pulp.server.managers import factory as managers
 
@@ -129,8 +130,10 @@ def delete(repo_id, dist_id):
     dist_instance, plugin_config = plugin_api.get_distributor_by_id(distributor.distributor_type_id)
 
     call_config = PluginCallConfiguration(plugin_config, distributor.config)
-    repo = model.Repository.objects.get_repo_or_missing_resource(repo_id)
+    # this is also how a repository being deleted removes its distributors
+    repo = model.Repository.objects.get_repo_or_missing_resource(repo_id, include_deleted=True)
     dist_instance.distributor_removed(repo.to_transfer_repo(), call_config)
+    content_cache.touch_publish_marker()
     distributor.delete()
 
     unbind_errors = []
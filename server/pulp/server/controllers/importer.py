@@ -185,7 +185,8 @@ def remove_importer(repo_id):
     :param repo_id: identifies the repo
     :type  repo_id: str
     """
-    repo_obj = model.Repository.objects.get_repo_or_missing_resource(repo_id)
+    # this is also how a repository being deleted removes its importer
+    repo_obj = model.Repository.objects.get_repo_or_missing_resource(repo_id, include_deleted=True)
     repo_importer = model.Importer.objects.get_or_404(repo_id=repo_id)
 
     # remove schedules
@@ -1,9 +1,12 @@
+from contextlib import contextmanager
 from gettext import gettext as _
+from datetime import timedelta
 from itertools import chain
 import copy
 import logging
 import os
 import sys
+import threading
 import time
 from urlparse import urlunsplit
 import uuid
@@ -15,8 +18,9 @@ from nectar.config import DownloaderConfig
 from nectar.request import DownloadRequest
 from nectar.downloaders.threaded import HTTPThreadedDownloader
 from nectar.listener import DownloadEventListener
+from pymongo import UpdateOne
 
-from pulp.common import dateutils, error_codes, tags
+from pulp.common import constants, dateutils, error_codes, tags
 from pulp.common.config import parse_bool, Unparsable
 from pulp.common.plugins import reporting_constants, importer_constants
 from pulp.common.tags import resource_tag, RESOURCE_REPOSITORY_TYPE, action_tag
@@ -26,8 +30,9 @@ from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api
 from pulp.plugins.loader import exceptions as plugin_exceptions
 from pulp.plugins.model import SyncReport
+from pulp.plugins.util import verification
 from pulp.plugins.util.misc import paginate
-from pulp.plugins.util.verification import VerificationException, verify_checksum
+from pulp.plugins.util.verification import VerificationException
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.async.tasks import (PulpTask, register_sigterm_handler, Task, TaskResult,
                                      get_current_task_id)
@@ -35,6 +40,7 @@ from pulp.server.config import config as pulp_conf
 from pulp.server.constants import PULP_STREAM_REQUEST_HEADER
 from pulp.server.content.sources.constants import MAX_CONCURRENT, HEADERS, SSL_VALIDATION
 from pulp.server.content.storage import mkdir
+from pulp.server.content.web import cache as content_cache
 from pulp.server.controllers import consumer as consumer_controller
 from pulp.server.controllers import distributor as dist_controller
 from pulp.server.controllers import importer as importer_controller
@@ -45,7 +51,7 @@ from pulp.server.exceptions import PulpCodedTaskException
 from pulp.server.lazy import URL, Key
 from pulp.server.managers import factory as manager_factory
 from pulp.server.managers.repo import _common as common_utils
-from pulp.server.util import InvalidChecksumType
+from pulp.server.util import calculate_file_checksums, InvalidChecksumType
 
 
 _logger = logging.getLogger(__name__)
@@ -57,6 +63,29 @@ TYPE_ID = 'type_id'
 UNIT_FILES = 'unit_files'
 REQUEST = 'request'
 
+# Content unit associations of deleted repositories are removed in batches
+# with a short pause between batches so the database is not monopolized.
+PURGE_BATCH_SIZE = 1000
+PURGE_BATCH_DELAY = 0.1  # seconds
+
+# Consumers bound to deleted repositories are unbound in batches.
+UNBIND_BATCH_SIZE = 100
+
+# The deletion of a repository is resumed if it is marked as deleted, no delete or purge task is
+# pending for it, and it was marked at least this long ago.
+DELETION_RESUME_DELAY = 60  # seconds
+
+# The number of units whose stored files are verified as one batch by download_repo().
+VERIFY_PAGE_SIZE = 100
+
+# Units copied between repositories are associated in batches.
+COPY_BATCH_SIZE = 1000
+
+# The changes to repository unit counts accumulated by the task executing in this process, keyed
+# by repo_id, or None when they are not being accumulated. See track_unit_counts().
+_unit_count_deltas = None
+_unit_count_lock = threading.Lock()
+
 
 def get_associated_unit_ids(repo_id, unit_type, repo_content_unit_q=None):
     """
@@ -297,10 +326,23 @@ def rebuild_content_unit_counts(repository):
     :param repository: The repository to update
     :type repository: pulp.server.db.model.Repository
     """
+    repository.content_unit_counts = _count_units(repository.repo_id)
+    repository.save()
+
+
+def _count_units(repo_id):
+    """
+    Count the units of each type associated with a repository.
+
+    :param repo_id: identifies the repo
+    :type  repo_id: str
+    :return: The number of units keyed by unit type.
+    :rtype:  dict
+    """
     db = connection.get_database()
 
     pipeline = [
-        {'$match': {'repo_id': repository.repo_id}},
+        {'$match': {'repo_id': repo_id}},
         {'$group': {'_id': '$unit_type_id', 'sum': {'$sum': 1}}}]
     q = db.command('aggregate', 'repo_content_units', pipeline=pipeline)
 
@@ -308,9 +350,203 @@ def rebuild_content_unit_counts(repository):
     counts = {}
     for result in q['result']:
         counts[result['_id']] = result['sum']
+    return counts
 
-    repository.content_unit_counts = counts
-    repository.save()
+
+def begin_unit_count_tracking():
+    """
+    Start accumulating the changes to the unit counts of repositories made by this process.
+    While changes are accumulated, associate_single_unit(), disassociate_units(),
+    update_unit_count(), update_last_unit_added() and update_last_unit_removed() do not update
+    repositories. Instead, the changes are applied by update_content_unit_counts() or
+    end_unit_count_tracking().
+
+    Tasks that associate or disassociate many units, such as a sync or a copy, use this instead
+    of rebuilding the unit counts of the repository when they are done.
+
+    :return: True if tracking was started, False if changes were already being accumulated.
+    :rtype:  bool
+    """
+    global _unit_count_deltas
+    with _unit_count_lock:
+        if _unit_count_deltas is not None:
+            return False
+        _unit_count_deltas = {}
+    return True
+
+
+def end_unit_count_tracking(repository):
+    """
+    Stop accumulating the changes to unit counts and apply the accumulated changes. The counts of
+    the given repository are brought up to date even if no changes were accumulated for it.
+
+    :param repository: The repository the task operated on.
+    :type  repository: pulp.server.db.model.Repository
+    """
+    global _unit_count_deltas
+    with _unit_count_lock:
+        deltas, _unit_count_deltas = _unit_count_deltas, None
+    if deltas is None:
+        rebuild_content_unit_counts(repository)
+        return
+    _update_unit_counts(repository, deltas.pop(repository.repo_id, None))
+    for repo_id, delta in deltas.iteritems():
+        _apply_unit_count_delta(repo_id, delta)
+
+
+@contextmanager
+def track_unit_counts(repository):
+    """
+    Accumulate the changes to the unit counts of repositories made by this process while the
+    context is active, and apply them when it exits. See begin_unit_count_tracking().
+
+    :param repository: The repository the task operates on.
+    :type  repository: pulp.server.db.model.Repository
+    """
+    started = begin_unit_count_tracking()
+    try:
+        yield
+    finally:
+        if started:
+            end_unit_count_tracking(repository)
+        else:
+            update_content_unit_counts(repository)
+
+
+def update_content_unit_counts(repository):
+    """
+    Bring the content_unit_counts field on a Repository up to date. When unit count changes are
+    being accumulated, the changes to the repository are applied. Otherwise the counts are
+    rebuilt.
+
+    :param repository: The repository to update
+    :type  repository: pulp.server.db.model.Repository
+    """
+    with _unit_count_lock:
+        deltas = _unit_count_deltas
+        if deltas is not None:
+            delta = deltas.pop(repository.repo_id, None)
+    if deltas is None:
+        rebuild_content_unit_counts(repository)
+    else:
+        _update_unit_counts(repository, delta)
+
+
+def _update_unit_counts(repository, delta):
+    """
+    Apply the changes accumulated for a repository and refresh the repository object.
+
+    :param repository: The repository to update
+    :type  repository: pulp.server.db.model.Repository
+    :param delta: The accumulated changes, or None if there were none.
+    :type  delta: dict
+    """
+    updated = _apply_unit_count_delta(repository.repo_id, delta or _new_unit_count_delta())
+    if updated is not None:
+        repository.content_unit_counts = updated.content_unit_counts
+        repository.last_unit_added = updated.last_unit_added
+        repository.last_unit_removed = updated.last_unit_removed
+
+
+def _new_unit_count_delta():
+    """
+    :return: The changes accumulated for a repository, with no changes.
+    :rtype:  dict
+    """
+    return {'counts': {}, 'added': False, 'removed': False, 'untracked': False}
+
+
+def _record_unit_count_change(repo_id, unit_type_id=None, count=0, added=False, removed=False,
+                              untracked=False):
+    """
+    Record a change to the units of a repository, if changes are being accumulated.
+
+    :param repo_id: identifies the repo
+    :type  repo_id: str
+    :param unit_type_id: identifies the unit type whose count changed
+    :type  unit_type_id: str
+    :param count: amount by which the count changed
+    :type  count: int
+    :param added: units were added
+    :type  added: bool
+    :param removed: units were removed
+    :type  removed: bool
+    :param untracked: the units were changed by a write whose effect is not known, so the counts
+                      must be checked against the associations when the changes are applied
+    :type  untracked: bool
+    :return: True if the change was recorded, False if changes are not being accumulated.
+    :rtype:  bool
+    """
+    with _unit_count_lock:
+        deltas = _unit_count_deltas
+        if deltas is None:
+            return False
+        delta = deltas.setdefault(repo_id, _new_unit_count_delta())
+        if count:
+            delta['counts'][unit_type_id] = delta['counts'].get(unit_type_id, 0) + count
+        delta['added'] = delta['added'] or added
+        delta['removed'] = delta['removed'] or removed
+        delta['untracked'] = delta['untracked'] or untracked
+    return True
+
+
+def _apply_unit_count_delta(repo_id, delta):
+    """
+    Apply accumulated changes to a repository using a single atomic update. If units were
+    changed by a write whose effect is not known, the unit counts are then compared against the
+    number of units associated with the repository and are rebuilt if they have drifted.
+
+    :param repo_id: identifies the repo
+    :type  repo_id: str
+    :param delta: The accumulated changes.
+    :type  delta: dict
+    :return: The updated repository with only its ID, count and timestamp fields loaded, or None if
+             the repository does not exist.
+    :rtype:  pulp.server.db.model.Repository
+    """
+    update = {}
+    for unit_type_id, count in delta['counts'].iteritems():
+        if count:
+            update['inc__content_unit_counts__%s' % unit_type_id] = count
+    now = dateutils.now_utc_datetime_with_tzinfo()
+    if delta['added']:
+        update['set__last_unit_added'] = now
+    if delta['removed']:
+        update['set__last_unit_removed'] = now
+
+    qs = model.Repository.objects(repo_id=repo_id)
+    if update:
+        qs.update_one(**update)
+    repository = qs.only('repo_id', 'content_unit_counts', 'last_unit_added',
+                         'last_unit_removed').first()
+    if repository is None:
+        return None
+
+    unit_count = None
+    if delta['untracked']:
+        unit_count = model.RepositoryContentUnit.objects(repo_id=repo_id).count()
+    _check_unit_counts(repository, unit_count)
+    return repository
+
+
+def _check_unit_counts(repository, unit_count=None):
+    """
+    Rebuild the unit counts of a repository if any of them is negative or, when the number of
+    units associated with the repository is known, if they do not add up to it.
+
+    :param repository: The repository, with its content_unit_counts field loaded.
+    :type  repository: pulp.server.db.model.Repository
+    :param unit_count: The number of units associated with the repository, or None if unknown.
+    :type  unit_count: int
+    """
+    counts = repository.content_unit_counts
+    if any(count < 0 for count in counts.itervalues()) or \
+            (unit_count is not None and sum(counts.itervalues()) != unit_count):
+        repo_id = repository.repo_id
+        _logger.debug(_('Rebuilding the unit counts of repository [%(r)s]') % {'r': repo_id})
+        repository.content_unit_counts = _count_units(repo_id)
+        model.Repository.objects(repo_id=repo_id).update_one(
+            set__content_unit_counts=repository.content_unit_counts)
 
 
 def associate_single_unit(repository, unit):
@@ -328,10 +564,16 @@ def associate_single_unit(repository, unit):
         repo_id=repository.repo_id,
         unit_id=unit.id,
         unit_type_id=unit._content_type_id)
-    qs.update_one(
+    result = qs.update_one(
         set_on_insert__created=formatted_datetime,
         set__updated=formatted_datetime,
-        upsert=True)
+        upsert=True,
+        full_result=True)
+    # the result is None if the write was not acknowledged, which leaves the counts to be checked
+    if result is None:
+        _record_unit_count_change(repository.repo_id, untracked=True)
+    elif not result.get('updatedExisting'):
+        _record_unit_count_change(repository.repo_id, unit._content_type_id, 1, added=True)
 
 
 def disassociate_units(repository, unit_iterable):
@@ -344,10 +586,69 @@ def disassociate_units(repository, unit_iterable):
     :type unit_iterable: iterable of pulp.server.db.model.ContentUnit
     """
     for unit_group in paginate(unit_iterable):
-        unit_id_list = [unit.id for unit in unit_group]
-        qs = model.RepositoryContentUnit.objects(
-            repo_id=repository.repo_id, unit_id__in=unit_id_list)
-        qs.delete()
+        unit_id_lists = {}
+        for unit in unit_group:
+            unit_id_lists.setdefault(unit._content_type_id, []).append(unit.id)
+        for unit_type_id, unit_id_list in unit_id_lists.iteritems():
+            qs = model.RepositoryContentUnit.objects(
+                repo_id=repository.repo_id, unit_type_id=unit_type_id, unit_id__in=unit_id_list)
+            count = qs.delete()
+            if count:
+                _record_unit_count_change(repository.repo_id, unit_type_id, -count, removed=True)
+
+
+def copy_repo_content_units(source_repo, dest_repo, repo_content_unit_q=None, units_q=None):
+    """
+    Associate the units of a repository with another repository, without loading the units.
+
+    The associations of the source repository and the ids and unit keys of the matching units
+    are read in batches. The associations of the destination repository are then created with
+    bulk upserts, so units that are already associated with the destination repository only have
+    the updated timestamp of their association refreshed. Only mongoengine unit types are
+    supported.
+
+    :param source_repo: The repository to copy the units from.
+    :type  source_repo: pulp.server.db.model.Repository
+    :param dest_repo: The repository to associate the units with.
+    :type  dest_repo: pulp.server.db.model.Repository
+    :param repo_content_unit_q: Any query filters to apply to the RepoContentUnits.
+    :type  repo_content_unit_q: mongoengine.Q
+    :param units_q: Any query filters to apply to the ContentUnits.
+    :type  units_q: mongoengine.Q
+    :return: The identity information (type ID and unit key) of the associated units.
+    :rtype:  list of dict
+    """
+    qs = model.RepositoryContentUnit.objects(q_obj=repo_content_unit_q,
+                                             repo_id=source_repo.repo_id)
+    type_map = {}
+    for association in qs.only('unit_id', 'unit_type_id').as_pymongo():
+        type_map.setdefault(association['unit_type_id'], []).append(association['unit_id'])
+
+    collection = model.RepositoryContentUnit._get_collection()
+    unit_ids = []
+    for unit_type_id, id_list in type_map.iteritems():
+        _model = plugin_api.get_unit_model_by_id(unit_type_id)
+        key_fields = [(name, _model._fields[name].db_field) for name in _model.unit_key_fields]
+        for id_page in paginate(id_list, COPY_BATCH_SIZE):
+            units = _model.objects(q_obj=units_q, __raw__={'_id': {'$in': list(id_page)}})
+            now = dateutils.format_iso8601_utc_timestamp(dateutils.now_utc_timestamp())
+            requests = []
+            for unit in units.only('id', *_model.unit_key_fields).as_pymongo():
+                requests.append(UpdateOne(
+                    {'repo_id': dest_repo.repo_id, 'unit_type_id': unit_type_id,
+                     'unit_id': unit['_id']},
+                    {'$setOnInsert': {'created': now, '_ns': 'repo_content_units'},
+                     '$set': {'updated': now}},
+                    upsert=True))
+                unit_key = dict((name, unit.get(db_field)) for name, db_field in key_fields)
+                unit_ids.append({'type_id': unit_type_id, 'unit_key': unit_key})
+            if not requests:
+                continue
+            result = collection.bulk_write(requests, ordered=False)
+            if result.upserted_count:
+                _record_unit_count_change(dest_repo.repo_id, unit_type_id,
+                                          result.upserted_count, added=True)
+    return unit_ids
 
 
 def create_repo(repo_id, display_name=None, description=None, notes=None, importer_type_id=None,
@@ -382,6 +683,8 @@ def create_repo(repo_id, display_name=None, description=None, notes=None, import
     :type  distributor_list: list or tuple
 
     :raises DuplicateResource: if there is already a repo with the requested ID
+    :raises PulpCodedConflictException: if the content of a deleted repo with the requested ID
+                                        is still being removed
     :raises InvalidValue: if any of the fields are invalid
 
     :return: created repository object
@@ -394,6 +697,12 @@ def create_repo(repo_id, display_name=None, description=None, notes=None, import
     if not all(isinstance(distributor, dict) for distributor in distributor_list or []):
         raise pulp_exceptions.InvalidValue(['distributor_list'])
 
+    if model.DeletedRepository.objects(repo_id=repo_id).first() is not None:
+        # the ID is free again once the deletion finishes, which it may not do by itself if it
+        # was interrupted
+        resume_deletions(repo_id)
+        raise pulp_exceptions.PulpCodedConflictException(error_codes.PLP0050, repo_id=repo_id)
+
     # Note: the repo must be saved before the importer and distributor controllers can be called
     #       because the first thing that they do is validate that the repo exists.
     repo = model.Repository(repo_id=repo_id, display_name=display_name, description=description,
@@ -435,7 +744,9 @@ def create_repo(repo_id, display_name=None, description=None, notes=None, import
 
 def queue_delete(repo_id):
     """
-    Dispatch the task to delete the specified repository.
+    Dispatch the task to delete the specified repository. The repository is marked as deleted
+    before the task is dispatched, so that it is no longer found by lookups and searches, and can
+    no longer be synced or published, while the task waits for the repository's reservation.
 
     :param repo_id: id of the repository to delete
     :type  repo_id: str
@@ -443,6 +754,7 @@ def queue_delete(repo_id):
     :return: A TaskResult with the details of any errors or spawned tasks
     :rtype:  pulp.server.async.tasks.TaskResult
     """
+    model.DeletedRepository(repo_id=repo_id).save()
     task_tags = [
         tags.resource_tag(tags.RESOURCE_REPOSITORY_TYPE, repo_id),
         tags.action_tag('delete')
@@ -486,6 +798,11 @@ def delete(repo_id):
     """
     Delete a repository and inform other affected collections.
 
+    The repository is marked as deleted by queue_delete() when the task is dispatched, so it is
+    already hidden from the API.  The repository document is removed as soon as the importer and
+    distributors have been informed.  The content unit associations are removed in throttled
+    batches by a separate task and bound consumers are unbound in batches.
+
     :param repo_id: id of the repository to delete.
     :type  repo_id: str
 
@@ -523,9 +840,14 @@ def delete(repo_id):
             error_tuples.append(e)
 
     # Database Updates
-    repo = model.Repository.objects.get_repo_or_missing_resource(repo_id)
+    repo = model.Repository.objects.get_repo_or_missing_resource(repo_id, include_deleted=True)
+    # The content unit associations are removed in the background. Until they all are, the
+    # marker keeps a repository with the same ID from being created with the old content.
+    model.DeletedRepository(repo_id=repo_id).save()
     repo.delete()
 
+    additional_tasks = [queue_purge_associations(repo_id)]
+
     try:
         # Remove all importers and distributors from the repo. This is likely already done by the
         # calls to other methods in this manager, but in case those failed we still want to attempt
@@ -534,7 +856,6 @@ def delete(repo_id):
         model.Importer.objects(repo_id=repo_id).delete()
         RepoSyncResult.get_collection().remove({'repo_id': repo_id})
         RepoPublishResult.get_collection().remove({'repo_id': repo_id})
-        RepoContentUnit.get_collection().remove({'repo_id': repo_id})
     except Exception, e:
         msg = _('Error updating one or more database collections while removing repo [%(r)s]')
         msg = msg % {'r': repo_id}
@@ -550,18 +871,15 @@ def delete(repo_id):
         pe.child_exceptions = error_tuples
         raise pe
 
-    # append unbind itineraries foreach bound consumer
+    # unbind all bound consumers in batches
     options = {}
     consumer_bind_manager = manager_factory.consumer_bind_manager()
 
-    additional_tasks = []
     errors = []
-    for bind in consumer_bind_manager.find_by_repo(repo_id):
+    for bindings in paginate(consumer_bind_manager.find_by_repo(repo_id), UNBIND_BATCH_SIZE):
         try:
-            report = consumer_controller.unbind(bind['consumer_id'], bind['repo_id'],
-                                                bind['distributor_id'], options)
-            if report:
-                additional_tasks.extend(report.spawned_tasks)
+            report = consumer_controller.unbind_many(bindings, options)
+            additional_tasks.extend(report.spawned_tasks)
         except Exception, e:
             errors.append(e)
 
@@ -573,6 +891,150 @@ def delete(repo_id):
     return TaskResult(error=error, spawned_tasks=additional_tasks)
 
 
+def queue_purge_associations(repo_id):
+    """
+    Dispatch the task to remove the content unit associations of a deleted repository.
+
+    :param repo_id: id of the deleted repository
+    :type  repo_id: str
+
+    :return: The async result of the dispatched task
+    :rtype:  celery.result.AsyncResult
+    """
+    task_tags = [
+        tags.resource_tag(tags.RESOURCE_REPOSITORY_TYPE, repo_id),
+        tags.action_tag('purge_associations')
+    ]
+    async_result = purge_associations.apply_async_with_reservation(
+        tags.RESOURCE_REPOSITORY_TYPE, repo_id,
+        [repo_id], tags=task_tags)
+    return async_result
+
+
+def resume_deletions(repo_id=None):
+    """
+    Dispatch the tasks needed to finish the deletions of repositories that were interrupted, for
+    example because the delete or purge task failed or its worker was lost. A deletion is
+    interrupted when the repository is marked as deleted but no delete or purge task is pending
+    for it. The repository is deleted again if its document still exists. Otherwise, the removal
+    of its content unit associations is dispatched again.
+
+    :param repo_id: id of the repository whose deletion is resumed, None for all repositories
+    :type  repo_id: str
+
+    :return: The async results of the dispatched tasks
+    :rtype:  list of celery.result.AsyncResult
+    """
+    marked_before = dateutils.now_utc_datetime_with_tzinfo() - \
+        timedelta(seconds=DELETION_RESUME_DELAY)
+    markers = model.DeletedRepository.objects(deleted__lte=marked_before)
+    if repo_id is not None:
+        markers = markers.filter(repo_id=repo_id)
+    async_results = []
+    for marker in markers:
+        if _deletion_pending(marker.repo_id):
+            continue
+        _logger.info(_('Resuming the deletion of repository [%(r)s]') % {'r': marker.repo_id})
+        if model.Repository.objects(repo_id=marker.repo_id).count():
+            async_results.append(queue_delete(marker.repo_id))
+        else:
+            async_results.append(queue_purge_associations(marker.repo_id))
+    return async_results
+
+
+def _deletion_pending(repo_id):
+    """
+    :param repo_id: id of a repository
+    :type  repo_id: str
+    :return: True if a delete or purge task of the repository is waiting or running
+    :rtype:  bool
+    """
+    actions = set([tags.action_tag('delete'), tags.action_tag('purge_associations')])
+    pending = model.TaskStatus.objects(
+        tags=tags.resource_tag(tags.RESOURCE_REPOSITORY_TYPE, repo_id),
+        state__in=constants.CALL_INCOMPLETE_STATES)
+    return any(actions.intersection(task.tags) for task in pending.only('tags'))
+
+
+@celery.task(base=Task, name='pulp.server.tasks.repository.purge_associations')
+def purge_associations(repo_id):
+    """
+    Remove all content unit associations for the specified (deleted) repository.
+
+    The associations are removed in batches of PURGE_BATCH_SIZE with a pause of
+    PURGE_BATCH_DELAY seconds between batches.  Progress is reported on the task.
+    Once they are all removed, a repository with the same ID may be created again.
+
+    :param repo_id: id of the deleted repository.
+    :type  repo_id: str
+
+    :return: The number of associations removed.
+    :rtype:  int
+    """
+    collection = RepoContentUnit.get_collection()
+    query = {'repo_id': repo_id}
+    progress = PurgeProgress(get_current_task_id(), collection.find(query).count())
+    progress.report()
+    while True:
+        batch = collection.find(query, projection={'_id': 1}).limit(PURGE_BATCH_SIZE)
+        association_ids = [association['_id'] for association in batch]
+        if not association_ids:
+            break
+        collection.remove({'_id': {'$in': association_ids}})
+        progress.removed += len(association_ids)
+        progress.report()
+        time.sleep(PURGE_BATCH_DELAY)
+    model.DeletedRepository.objects(repo_id=repo_id).delete()
+    progress.state = reporting_constants.STATE_COMPLETE
+    progress.report()
+    return progress.removed
+
+
+class PurgeProgress(object):
+    """
+    Reports the progress of removing the content unit associations of a deleted repository.
+
+    :ivar task_id: The ID of the task being reported on.
+    :type task_id: str
+    :ivar total: The total number of associations to be removed.
+    :type total: int
+    :ivar removed: The number of associations removed.
+    :type removed: int
+    :ivar state: The state of the step.
+    :type state: str
+    """
+
+    STEP_ID = 'purge_associations'
+
+    def __init__(self, task_id, total):
+        """
+        :param task_id: The ID of the task being reported on.
+        :type  task_id: str
+        :param total: The total number of associations to be removed.
+        :type  total: int
+        """
+        self.task_id = task_id
+        self.total = total
+        self.removed = 0
+        self.state = reporting_constants.STATE_RUNNING
+
+    def report(self):
+        """
+        Report the current progress on the task status.
+        """
+        if self.task_id is None:
+            return
+        progress = {
+            reporting_constants.PROGRESS_STEP_TYPE_KEY: self.STEP_ID,
+            reporting_constants.PROGRESS_STATE_KEY: self.state,
+            reporting_constants.PROGRESS_NUM_PROCESSED_KEY: self.removed,
+            reporting_constants.PROGRESS_ITEMS_TOTAL_KEY: max(self.total, self.removed),
+            reporting_constants.PROGRESS_DESCRIPTION_KEY: _('Removing content unit associations'),
+        }
+        qs = model.TaskStatus.objects.filter(task_id=self.task_id)
+        qs.update_one(set__progress_report={self.STEP_ID: [progress]})
+
+
 def update_repo_and_plugins(repo, repo_delta, importer_config, distributor_configs):
     """
     Update a repository and its related collections.
@@ -649,7 +1111,7 @@ def update_unit_count(repo_id, unit_type_id, delta):
     :raises pulp_exceptions.PulpExecutionException: if there is an error in the update
     """
     atomic_inc_key = 'inc__content_unit_counts__{unit_type_id}'.format(unit_type_id=unit_type_id)
-    if delta:
+    if delta and not _record_unit_count_change(repo_id, unit_type_id, delta):
         try:
             model.Repository.objects(repo_id=repo_id).update_one(**{atomic_inc_key: delta})
         except OperationError:
@@ -664,9 +1126,11 @@ def update_last_unit_added(repo_id):
     :param repo_id: identifies the repo
     :type  repo_id: str
     """
-    repo_obj = model.Repository.objects.get_repo_or_missing_resource(repo_id)
-    repo_obj.last_unit_added = dateutils.now_utc_datetime_with_tzinfo()
-    repo_obj.save()
+    if _record_unit_count_change(repo_id, added=True):
+        return
+    now = dateutils.now_utc_datetime_with_tzinfo()
+    if not model.Repository.objects(repo_id=repo_id).update_one(set__last_unit_added=now):
+        raise pulp_exceptions.MissingResource(repository=repo_id)
 
 
 def update_last_unit_removed(repo_id):
@@ -676,9 +1140,11 @@ def update_last_unit_removed(repo_id):
     :param repo_id: identifies the repo
     :type  repo_id: str
     """
-    repo_obj = model.Repository.objects.get_repo_or_missing_resource(repo_id)
-    repo_obj.last_unit_removed = dateutils.now_utc_datetime_with_tzinfo()
-    repo_obj.save()
+    if _record_unit_count_change(repo_id, removed=True):
+        return
+    now = dateutils.now_utc_datetime_with_tzinfo()
+    if not model.Repository.objects(repo_id=repo_id).update_one(set__last_unit_removed=now):
+        raise pulp_exceptions.MissingResource(repository=repo_id)
 
 
 @celery.task(base=PulpTask, name='pulp.server.tasks.repository.sync_with_auto_publish')
@@ -755,65 +1221,73 @@ def sync(repo_id, sync_config_override=None, scheduled_call_id=None):
     sync_start_timestamp = _now_timestamp()
     sync_result = None
 
-    try:
-        # Replace the Importer's sync_repo() method with our register_sigterm_handler decorator,
-        # which will set up cancel_sync_repo() as the target for the signal handler
-        sync_repo = register_sigterm_handler(importer.sync_repo, importer.cancel_sync_repo)
-        sync_report = sync_repo(transfer_repo, conduit, call_config)
+    # Accumulate the changes to the unit counts made during the sync
+    with track_unit_counts(repo_obj):
+        try:
+            # Replace the Importer's sync_repo() method with our register_sigterm_handler
+            # decorator, which will set up cancel_sync_repo() as the target for the signal handler
+            sync_repo = register_sigterm_handler(importer.sync_repo, importer.cancel_sync_repo)
+            sync_report = sync_repo(transfer_repo, conduit, call_config)
 
-    except Exception, e:
-        sync_end_timestamp = _now_timestamp()
-        sync_result = RepoSyncResult.error_result(
-            repo_obj.repo_id, repo_importer['id'], repo_importer['importer_type_id'],
-            sync_start_timestamp, sync_end_timestamp, e, sys.exc_info()[2])
-        raise
+        except Exception, e:
+            sync_end_timestamp = _now_timestamp()
+            sync_result = RepoSyncResult.error_result(
+                repo_obj.repo_id, repo_importer['id'], repo_importer['importer_type_id'],
+                sync_start_timestamp, sync_end_timestamp, e, sys.exc_info()[2])
+            raise
 
-    else:
-        # Need to be safe here in case the plugin is incorrect in its return
-        if isinstance(sync_report, SyncReport):
-            summary = sync_report.summary
-            details = sync_report.details
+        else:
+            # Need to be safe here in case the plugin is incorrect in its return
+            if isinstance(sync_report, SyncReport):
+                summary = sync_report.summary
+                details = sync_report.details
+
+                if sync_report.canceled_flag:
+                    # need to leave this in case cancel_sync_repo() was not called from parent
+                    result_code = RepoSyncResult.RESULT_CANCELED
+                elif sync_report.success_flag:
+                    result_code = RepoSyncResult.RESULT_SUCCESS
+                else:
+                    result_code = RepoSyncResult.RESULT_FAILED
 
-            if sync_report.canceled_flag:
-                # need to leave this in case cancel_sync_repo() was not called from parent
-                result_code = RepoSyncResult.RESULT_CANCELED
-            elif sync_report.success_flag:
-                result_code = RepoSyncResult.RESULT_SUCCESS
             else:
-                result_code = RepoSyncResult.RESULT_FAILED
+                msg = _('Plugin type [%s] on repo [%s] did not return a valid sync report')
+                _logger.warn(msg % (repo_importer['importer_type_id'], repo_obj.repo_id))
+                summary = details = msg
+                result_code = RepoSyncResult.RESULT_ERROR  # RESULT_UNKNOWN?
 
-        else:
-            msg = _('Plugin type [%s] on repo [%s] did not return a valid sync report')
-            _logger.warn(msg % (repo_importer['importer_type_id'], repo_obj.repo_id))
-            summary = details = msg
-            result_code = RepoSyncResult.RESULT_ERROR  # RESULT_UNKNOWN?
-
-        sync_result, sync_end_timestamp = _reposync_result(repo_obj, repo_importer,
-                                                           sync_start_timestamp, summary, details,
-                                                           result_code, before_sync_unit_count)
-    finally:
-        if sync_result is None:
-            msg = _('Sync was cancelled')
-            summary = details = msg
-            result_code = RepoSyncResult.RESULT_CANCELED
             sync_result, sync_end_timestamp = _reposync_result(repo_obj, repo_importer,
                                                                sync_start_timestamp, summary,
                                                                details, result_code,
                                                                before_sync_unit_count)
-        # Update the override config if it has changed
-        if check_override_config_change(repo_id, call_config):
-            model.Importer.objects(repo_id=repo_id).\
-                update(set__last_override_config=call_config.override_config)
-        # Do an update instead of a save in case the importer has changed the scratchpad
-        model.Importer.objects(repo_id=repo_obj.repo_id).update(set__last_sync=sync_end_timestamp)
-        # Add a sync history entry for this run
-        sync_result_collection.save(sync_result)
-        # Ensure counts are updated
-        rebuild_content_unit_counts(repo_obj)
-        if sync_result['added_count'] > 0:
-            update_last_unit_added(repo_obj.repo_id)
-        if sync_result['removed_count'] > 0:
-            update_last_unit_removed(repo_obj.repo_id)
+        finally:
+            if sync_result is None:
+                msg = _('Sync was cancelled')
+                summary = details = msg
+                result_code = RepoSyncResult.RESULT_CANCELED
+                sync_result, sync_end_timestamp = _reposync_result(repo_obj, repo_importer,
+                                                                   sync_start_timestamp, summary,
+                                                                   details, result_code,
+                                                                   before_sync_unit_count)
+            # Update the override config if it has changed
+            if check_override_config_change(repo_id, call_config):
+                model.Importer.objects(repo_id=repo_id).\
+                    update(set__last_override_config=call_config.override_config)
+            # Do an update instead of a save in case the importer has changed the scratchpad
+            model.Importer.objects(repo_id=repo_obj.repo_id).update(
+                set__last_sync=sync_end_timestamp)
+            # Add a sync history entry for this run
+            sync_result_collection.save(sync_result)
+            if sync_result['added_count'] > 0:
+                update_last_unit_added(repo_obj.repo_id)
+            if sync_result['removed_count'] > 0:
+                update_last_unit_removed(repo_obj.repo_id)
+
+    if sync_result['result'] != RepoSyncResult.RESULT_ERROR:
+        # The units added and removed according to the sync result show whether the plugin
+        # associated units in a way the accumulated changes do not account for.
+        _check_unit_counts(repo_obj, before_sync_unit_count + sync_result['added_count'] +
+                           sync_result['removed_count'])
 
     fire_manager.fire_repo_sync_finished(sync_result)
     if sync_result.result == RepoSyncResult.RESULT_FAILED:
@@ -1240,7 +1714,11 @@ def _do_publish(repo_obj, dist_id, dist_inst, transfer_repo, conduit, call_confi
         # respond to signals by calling the Distributor's cancel_publish_repo() method.
         publish_repo = register_sigterm_handler(dist_inst.publish_repo,
                                                 dist_inst.cancel_publish_repo)
-        publish_report = publish_repo(transfer_repo, conduit, call_config)
+        try:
+            publish_report = publish_repo(transfer_repo, conduit, call_config)
+        finally:
+            # Published content may have changed even if the publish failed
+            content_cache.touch_publish_marker()
         if publish_report is not None and hasattr(publish_report, 'success_flag') \
                 and not publish_report.success_flag:
             _logger.info(publish_report.summary)
@@ -1398,13 +1876,15 @@ def download_repo(repo_id, verify_all_units=False):
     :param verify_all_units: When verify_all_units is `True`, all units in the
                              repository will be inspected. If a file for a unit is
                              already present in its expected storage location and its
-                             checksum is valid, it will not be downloaded again.
+                             checksum is valid, it will not be downloaded again. The
+                             stored files are verified in batches before any download
+                             starts, so only the units that fail are requested.
     :type  verify_all_units: bool
     """
     task_description = _('Download Repository Content')
     if verify_all_units:
         repo_unit_querysets = get_mongoengine_unit_querysets(repo_id)
-        missing_content_units = chain(*repo_unit_querysets)
+        missing_content_units = _find_units_failing_verification(chain(*repo_unit_querysets))
     else:
         missing_content_units = find_units_not_downloaded(repo_id)
 
@@ -1440,6 +1920,61 @@ def _get_deferred_content_units():
                 type=deferred_download.unit_type_id, id=deferred_download.unit_id))
 
 
+def _find_units_failing_verification(content_units):
+    """
+    Verify the stored files of the given content units against the lazy catalog, and find the
+    units that need to be downloaded again. The files of each page of units are verified as a
+    batch, by verification.verify_checksums. Units whose files are all present and valid are
+    marked as downloaded.
+
+    Files with no checksum in the catalog are only checked for existence, and files with no
+    catalog entry are skipped, as _create_download_requests() cannot download them.
+
+    :param content_units: The content units to verify.
+    :type  content_units: iterable of pulp.server.db.model.FileContentUnit
+
+    :return: The content units with a file that is missing or fails verification.
+    :rtype:  list of pulp.server.db.model.FileContentUnit
+    """
+    failed_units = []
+    for page in paginate(content_units, page_size=VERIFY_PAGE_SIZE):
+        # storage path -> the id of the unit the file belongs to
+        unit_by_path = {}
+        files = []
+        missing = set()
+        for content_unit in page:
+            for file_path in content_unit.list_files():
+                qs = model.LazyCatalogEntry.objects.filter(
+                    unit_id=content_unit.id,
+                    unit_type_id=content_unit.type_id,
+                    path=file_path
+                )
+                catalog_entry = qs.order_by('revision').first()
+                if catalog_entry is None:
+                    continue
+                unit_by_path[catalog_entry.path] = content_unit.id
+                if catalog_entry.checksum_algorithm and catalog_entry.checksum:
+                    checksums = {catalog_entry.checksum_algorithm: catalog_entry.checksum}
+                    files.append((catalog_entry.path, checksums))
+                elif not os.path.isfile(catalog_entry.path):
+                    missing.add(catalog_entry.path)
+
+        failures = verification.verify_checksums(files)
+        for path, error in failures.items():
+            _logger.info(_('Verification of {path} failed: {reason}.').format(
+                path=path, reason=str(error)))
+
+        checked = set(unit_by_path.values())
+        failed = set(unit_by_path[path] for path in missing.union(failures))
+        for content_unit in page:
+            if content_unit.id in failed:
+                failed_units.append(content_unit)
+            elif content_unit.id in checked:
+                unit_model = plugin_api.get_unit_model_by_id(content_unit.type_id)
+                unit_model.objects.filter(id=content_unit.id).update_one(set__downloaded=True)
+    return failed_units
+
+
 def _create_download_requests(content_units):
     """
     Make a list of Nectar DownloadRequests for the given content units using
@@ -1692,23 +2227,25 @@ class LazyUnitDownloadStep(DownloadEventListener):
         ).get()
         path_entry = report.data[UNIT_FILES][report.destination]
 
-        # Validate the file and update the progress.
+        # Validate the file and update the progress. The checksum, if known, is verified
+        # as the file is copied into storage, so that it is only read once.
         catalog_entry = path_entry[CATALOG_ENTRY]
         try:
-            self.validate_file(
-                report.destination,
-                catalog_entry.checksum_algorithm,
-                catalog_entry.checksum
-            )
+            checksums = None
+            if catalog_entry.checksum_algorithm and catalog_entry.checksum:
+                checksums = {catalog_entry.checksum_algorithm: catalog_entry.checksum}
+            else:
+                self.validate_file(report.destination, None, None)
 
             if len(report.data[UNIT_FILES]) == 1:
-                content_unit.import_content(report.destination)
+                content_unit.import_content(report.destination, checksums=checksums)
             else:
                 relative_path = os.path.relpath(
                     catalog_entry.path,
                     content_unit.storage_path,
                 )
-                content_unit.import_content(report.destination, location=relative_path)
+                content_unit.import_content(report.destination, location=relative_path,
+                                            checksums=checksums)
             self.progress_successes += 1
             path_entry[PATH_DOWNLOADED] = True
         except (InvalidChecksumType, VerificationException, IOError), e:
@@ -1765,8 +2302,9 @@ class LazyUnitDownloadStep(DownloadEventListener):
                                        one provided in the report.
         """
         if checksum_algorithm and checksum:
-            with open(file_path) as f:
-                verify_checksum(f, checksum_algorithm, checksum)
+            calculated = calculate_file_checksums(file_path, [checksum_algorithm])
+            if calculated[checksum_algorithm] != checksum:
+                raise VerificationException(calculated[checksum_algorithm])
         else:
             if not os.path.isfile(file_path):
                 raise IOError(_("The path '{path}' does not exist").format(path=file_path))
@@ -4,17 +4,21 @@ import copy
 import itertools
 import logging
 import ssl
+import threading
 import time
+from contextlib import contextmanager
 from gettext import gettext as _
 
 import mongoengine
+from pymongo import monitoring
 from pymongo.collection import Collection
 from pymongo.errors import AutoReconnect, OperationFailure
+from pymongo.read_preferences import SecondaryPreferred
 from pymongo.son_manipulator import NamespaceInjector
 
 from pulp.common import error_codes
 
-from pulp.server import config
+from pulp.server import config, metrics
 from pulp.server.compat import wraps
 from pulp.server.exceptions import PulpCodedException, PulpException
 
@@ -29,8 +33,23 @@ _DEFAULT_MAX_POOL_SIZE = 10
 MONGO_MINIMUM_VERSION = semantic_version.Version("2.4.0")
 MONGO_WRITE_CONCERN_VERSION = semantic_version.Version("2.6.0")
 
+# Collections that are always read from the primary, even by queries that are routed to
+# secondaries, because tasks, reservations, locks and authentication must see the latest writes.
+PRIMARY_COLLECTIONS = frozenset([
+    'celery_beat_lock', 'celery_taskmeta', 'content_types_version', 'migration_checkpoints',
+    'migration_trackers', 'permissions', 'reserved_resources', 'resource_manager_lock', 'roles',
+    'schedule_version', 'scheduled_calls', 'task_status', 'users', 'workers',
+])
+
+# Holds the read preference of the queries routed to secondaries by the current thread.
+_routing = threading.local()
+
 _logger = logging.getLogger(__name__)
 
+# Listeners only apply to clients created after they are registered, so this must be done before
+# initialize() connects.
+monitoring.register(metrics.MongoCommandListener())
+
 
 def initialize(name=None, seeds=None, max_pool_size=None, replica_set=None, max_timeout=32):
     """
@@ -272,6 +291,15 @@ class PulpCollection(Collection):
         super(PulpCollection, self).__init__(database, name, create=create, **kwargs)
         UnsafeRetry.decorate_instance(instance=self, full_name=self.full_name)
 
+    @property
+    def read_preference(self):
+        """
+        The read preference of the collection, unless its reads are routed to secondaries.
+
+        :rtype: pymongo.read_preferences.ServerMode
+        """
+        return routed_read_preference(self.name) or super(PulpCollection, self).read_preference
+
     def __getstate__(self):
         return {'name': self.name}
 
@@ -301,6 +329,69 @@ class PulpCollection(Collection):
         return cursor
 
 
+def secondary_read_preference():
+    """
+    :return: the read preference of the queries that may be routed to secondaries, None if the
+             server is not configured to read from secondaries
+    :rtype:  pymongo.read_preferences.SecondaryPreferred
+    """
+    if not config.config.getboolean('database', 'secondary_reads'):
+        return None
+    max_staleness = config.config.getint('database', 'max_staleness')
+    if max_staleness <= 0:
+        max_staleness = -1
+    return SecondaryPreferred(max_staleness=max_staleness)
+
+
+@contextmanager
+def secondary_reads(enabled=True):
+    """
+    Route the queries of the current thread that are made within the block to secondaries, when
+    the server is configured to read from them. Only the cursors and querysets created within the
+    block are routed, and the collections in PRIMARY_COLLECTIONS are never routed.
+
+    :param enabled: if False, the queries are not routed
+    :type  enabled: bool
+    """
+    previous = getattr(_routing, 'read_preference', None)
+    if enabled:
+        _routing.read_preference = secondary_read_preference()
+    try:
+        yield
+    finally:
+        _routing.read_preference = previous
+
+
+def iter_secondary_reads(iterable):
+    """
+    Iterate over an iterable that makes queries as it goes, such as a generator of search
+    results, routing those queries to secondaries.
+
+    :param iterable: the iterable
+    :type  iterable: iterable
+    :return: an iterator over the items of the iterable
+    :rtype:  generator
+    """
+    iterator = iter(iterable)
+    while True:
+        with secondary_reads():
+            item = next(iterator)
+        yield item
+
+
+def routed_read_preference(collection_name):
+    """
+    :param collection_name: name of the collection being read
+    :type  collection_name: basestring
+    :return: the read preference of the queries of the current thread on the collection, None
+             if they are not routed
+    :rtype:  pymongo.read_preferences.ServerMode
+    """
+    if collection_name in PRIMARY_COLLECTIONS:
+        return None
+    return getattr(_routing, 'read_preference', None)
+
+
 def get_collection(name, create=False):
     """
     Factory function to instantiate PulpConnection objects using configurable
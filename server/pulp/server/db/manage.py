@@ -54,7 +54,8 @@ def parse_args():
                       help=_('Run migration, but do not update version'))
     parser.add_option('--dry-run', action='store_true', dest='dry_run', default=False,
                       help=_('Perform a dry run with no changes made. Returns 1 if there are '
-                             'migrations to apply.'))
+                             'migrations to apply. Migrations that are able to estimate their '
+                             'duration report it.'))
     options, args = parser.parse_args()
     if args:
         parser.error(_('Unknown arguments: %s') % ', '.join(args))
@@ -69,6 +70,7 @@ def migrate_database(options):
     """
     migration_packages = models.get_migration_packages()
     unperformed_migrations = False
+    estimated_seconds = 0
     for migration_package in migration_packages:
         if migration_package.current_version > migration_package.latest_available_version:
             msg = _('The database for migration package %(p)s is at version %(v)s, which is larger '
@@ -120,6 +122,8 @@ def migrate_database(options):
                 _logger.info(message)
                 if options.dry_run:
                     unperformed_migrations = True
+                    if migration.estimate is not None:
+                        estimated_seconds += _log_estimate(migration)
                     message = _('Would have applied migration to %(p)s version %(v)s')
                     message = message % {'p': migration_package.name, 'v': migration.version}
                 else:
@@ -146,10 +150,35 @@ def migrate_database(options):
     if not options.dry_run:
         ensure_database_indexes()
 
+    if estimated_seconds:
+        message = _('The migrations are estimated to take %(t)s.')
+        _logger.info(message % {'t': timedelta(seconds=int(round(estimated_seconds)))})
+
     if options.dry_run and unperformed_migrations:
         raise UnperformedMigrationException
 
 
+def _log_estimate(migration):
+    """
+    Log the work remaining for a migration that is able to estimate it.
+
+    :param migration: The migration that would be applied.
+    :type  migration: pulp.server.db.migrate.models.MigrationModule
+    :return: The estimated number of seconds the migration would take, 0 if unknown.
+    :rtype:  float
+    """
+    estimate = migration.estimate()
+    log_args = {'m': migration.name, 'd': estimate.documents}
+    if estimate.seconds is None:
+        message = _('Migration %(m)s would process %(d)s documents.')
+        _logger.info(message % log_args)
+        return 0
+    log_args['t'] = timedelta(seconds=int(round(estimate.seconds)))
+    message = _('Migration %(m)s would process %(d)s documents in about %(t)s.')
+    _logger.info(message % log_args)
+    return estimate.seconds
+
+
 def ensure_database_indexes():
     """
     Ensure that the minimal required indexes have been created for all collections.
@@ -165,9 +194,11 @@ def ensure_database_indexes():
     model.Worker.ensure_indexes()
     model.CeleryBeatLock.ensure_indexes()
     model.ResourceManagerLock.ensure_indexes()
+    model.ScheduleVersion.ensure_indexes()
     model.LazyCatalogEntry.ensure_indexes()
     model.DeferredDownload.ensure_indexes()
     model.Distributor.ensure_indexes()
+    model.MigrationCheckpoint.ensure_indexes()
 
     # Load all the model classes that the server knows about and ensure their indexes as well
     plugin_manager = PluginManager()
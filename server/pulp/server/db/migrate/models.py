@@ -8,6 +8,7 @@ import pkg_resources
 from mongoengine.queryset import DoesNotExist
 
 from pulp.common.compat import iter_modules
+from pulp.server.db.migrate import runner
 from pulp.server.db.model import MigrationTracker
 import pulp.server.db.migrations
 
@@ -64,7 +65,7 @@ class MigrationModule(object):
     This is a wrapper around the real migration module. It allows us to add a version attribute to
     the module without interfering with the module's namespace, and it also natively sorts by
     migration version. It has a reference to the module's migrate() function as its migrate
-    attribute.
+    attribute, and to the module's optional estimate() function as its estimate attribute.
     """
     class MissingMigrate(Exception):
         """
@@ -92,6 +93,7 @@ class MigrationModule(object):
         if not hasattr(self._module, 'migrate'):
             raise self.__class__.MissingMigrate()
         self.migrate = self._module.migrate
+        self.estimate = getattr(self._module, 'estimate', None)
 
     @property
     def name(self):
@@ -174,7 +176,8 @@ class MigrationPackage(object):
     def apply_migration(self, migration, update_current_version=True):
         """
         Apply the migration that is passed in, and update the DB to note the new version that this
-        migration represents.
+        migration represents. The batch checkpoints recorded by the migration are removed once it
+        has been applied.
 
         :param migration:              The migration to apply
         :type  migration:              pulp.server.db.migrate.utils.MigrationModule
@@ -184,6 +187,7 @@ class MigrationPackage(object):
         :type  update_current_version: bool
         """
         migration.migrate()
+        runner.remove_checkpoints(migration.name)
         if update_current_version:
             self._migration_tracker.version = migration.version
             self._migration_tracker.save()
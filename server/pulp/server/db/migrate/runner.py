@@ -0,0 +1,204 @@
+"""
+Provides a runner for migrations that process the documents of large collections.
+
+The runner pages through a collection in _id order and hands each batch of documents to a
+bounded pool of worker threads. After every completed batch, the _id of its last document is
+recorded in a MigrationCheckpoint, so that a migration which is interrupted resumes after the
+last completed batch when it is applied again rather than starting over. The checkpoints of a
+migration are removed once it has been applied. Documents of a batch that was interrupted are
+processed again, so the processing must be idempotent.
+
+A migration module may also define an estimate() function, which is used by the dry run of
+pulp-manage-db to report how long the migration is expected to take.
+For example:
+
+from pulp.server.db import connection
+from pulp.server.db.migrate.runner import BatchRunner
+
+
+def migrate(*args, **kwargs):
+    collection = connection.get_collection('units_rpm')
+    BatchRunner(__name__).run(collection, _migrate_unit, spec={'checksumtype': 'sha'})
+
+
+def estimate(*args, **kwargs):
+    collection = connection.get_collection('units_rpm')
+    return BatchRunner(__name__).estimate(collection, spec={'checksumtype': 'sha'},
+                                          seconds_per_document=0.005)
+"""
+from collections import namedtuple
+from gettext import gettext as _
+from multiprocessing.pool import ThreadPool
+import logging
+import time
+
+from pymongo import ASCENDING
+
+from pulp.common import dateutils
+from pulp.server.db.model import MigrationCheckpoint
+
+
+_logger = logging.getLogger(__name__)
+
+
+# The number of documents fetched and checkpointed at a time.
+DEFAULT_BATCH_SIZE = 1000
+
+# The number of threads processing the documents of a batch.
+DEFAULT_WORKERS = 4
+
+
+# The number of documents a migration has left to process and the number of seconds that is
+# expected to take, which is None when it cannot be estimated.
+Estimate = namedtuple('Estimate', ['documents', 'seconds'])
+
+
+class BatchRunner(object):
+    """
+    Processes the documents of a collection in checkpointed batches.
+
+    :ivar migration: The name of the migration module.
+    :type migration: str
+    :ivar step: Identifies the batched loop when a migration runs more than one.
+    :type step: str
+    :ivar batch_size: The number of documents in each batch.
+    :type batch_size: int
+    :ivar workers: The number of threads processing the documents of a batch.
+    :type workers: int
+    """
+
+    def __init__(self, migration, step='', batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS):
+        """
+        :param migration: The name of the migration module.
+        :type migration: str
+        :param step: Identifies the batched loop when a migration runs more than one.
+        :type step: str
+        :param batch_size: The number of documents in each batch.
+        :type batch_size: int
+        :param workers: The number of threads processing the documents of a batch.
+        :type workers: int
+        """
+        self.migration = migration
+        self.step = step
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def _checkpoint(self):
+        """
+        :return: The checkpoint of this runner, or None if no batch has been completed.
+        :rtype: pulp.server.db.model.MigrationCheckpoint
+        """
+        return MigrationCheckpoint.objects(migration=self.migration, step=self.step).first()
+
+    def _save_checkpoint(self, marker, processed, elapsed):
+        """
+        Record a completed batch.
+
+        :param marker: The _id of the last document of the batch.
+        :param processed: The number of documents in the batch.
+        :type processed: int
+        :param elapsed: The number of seconds spent on the batch.
+        :type elapsed: float
+        """
+        MigrationCheckpoint.objects(migration=self.migration, step=self.step).update_one(
+            set__marker=marker,
+            inc__processed=processed,
+            inc__elapsed=elapsed,
+            set__updated=dateutils.now_utc_datetime_with_tzinfo(),
+            upsert=True)
+
+    @staticmethod
+    def _remaining(spec, marker):
+        """
+        :param spec: The query matching the documents to process.
+        :type spec: dict
+        :param marker: The _id of the last processed document, or None.
+        :return: The query matching the documents that remain to be processed.
+        :rtype: dict
+        """
+        spec = spec or {}
+        if marker is None:
+            return spec
+        return {'$and': [spec, {'_id': {'$gt': marker}}]}
+
+    def run(self, collection, process, spec=None, projection=None):
+        """
+        Process the documents of the collection matching the spec, resuming after the last
+        completed batch.
+
+        :param collection: The collection.
+        :type collection: pymongo.collection.Collection
+        :param process: Called with each document.
+        :type process: callable
+        :param spec: The query matching the documents to process. All documents when None.
+        :type spec: dict
+        :param projection: The fields of the documents to fetch. All fields when None.
+        :type projection: dict or list
+        :return: The number of documents processed by this call.
+        :rtype: int
+        """
+        checkpoint = self._checkpoint()
+        marker = None
+        if checkpoint is not None:
+            marker = checkpoint.marker
+            msg = _('Resuming %(m)s after %(n)s processed documents.')
+            _logger.info(msg % {'m': self.migration, 'n': checkpoint.processed})
+
+        processed = 0
+        pool = ThreadPool(self.workers) if self.workers > 1 else None
+        try:
+            while True:
+                started = time.time()
+                cursor = collection.find(self._remaining(spec, marker), projection=projection)
+                documents = list(cursor.sort('_id', ASCENDING).limit(self.batch_size))
+                if not documents:
+                    break
+                if pool is None:
+                    for document in documents:
+                        process(document)
+                else:
+                    pool.map(process, documents)
+                marker = documents[-1]['_id']
+                processed += len(documents)
+                self._save_checkpoint(marker, len(documents), time.time() - started)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return processed
+
+    def estimate(self, collection, spec=None, seconds_per_document=None):
+        """
+        Estimate the work remaining for the run() of this runner. When earlier runs were
+        interrupted, the rate they achieved is used instead of the rate that is passed in.
+
+        :param collection: The collection.
+        :type collection: pymongo.collection.Collection
+        :param spec: The query matching the documents to process. All documents when None.
+        :type spec: dict
+        :param seconds_per_document: The expected number of seconds needed for each document.
+        :type seconds_per_document: float
+        :return: The estimate.
+        :rtype: Estimate
+        """
+        checkpoint = self._checkpoint()
+        marker = None
+        if checkpoint is not None:
+            marker = checkpoint.marker
+            if checkpoint.processed:
+                seconds_per_document = checkpoint.elapsed / checkpoint.processed
+        documents = collection.count(self._remaining(spec, marker))
+        seconds = None
+        if seconds_per_document is not None:
+            seconds = documents * seconds_per_document
+        return Estimate(documents, seconds)
+
+
+def remove_checkpoints(migration):
+    """
+    Remove the checkpoints of a migration that has been applied.
+
+    :param migration: The name of the migration module.
+    :type migration: str
+    """
+    MigrationCheckpoint.objects(migration=migration).delete()
@@ -0,0 +1,19 @@
+"""
+This migration builds the consumer applicability index from the existing consumer profiles,
+bindings and applicability data.
+"""
+from pulp.server.db.connection import get_collection
+from pulp.server.managers.consumer.applicability import update_consumer_applicability_index
+
+
+def migrate(*args, **kwargs):
+    """
+    Perform the migration as described in this module's docblock.
+
+    :param args:   unused
+    :type  args:   list
+    :param kwargs: unused
+    :type  kwargs: dict
+    """
+    consumers = get_collection('consumers').find(projection=['id'])
+    update_consumer_applicability_index([c['id'] for c in consumers])
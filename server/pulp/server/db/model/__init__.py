@@ -9,8 +9,8 @@ from gettext import gettext as _
 from hashlib import sha256
 from hmac import HMAC
 
-from mongoengine import (BooleanField, DictField, Document, DynamicField, IntField,
-                         ListField, StringField, UUIDField, ValidationError, QuerySetNoCache)
+from mongoengine import (BooleanField, DictField, Document, DynamicField, FloatField, IntField,
+                         ListField, StringField, UUIDField, ValidationError)
 from mongoengine import signals
 
 from pulp.common import constants, dateutils, error_codes
@@ -27,7 +27,7 @@ from pulp.server.db.fields import ISO8601StringField, UTCDateTimeField
 from pulp.server.db.model.reaper_base import ReaperMixin
 from pulp.server.db.model import base
 from pulp.server.db.querysets import (CriteriaQuerySet, RepoQuerySet, RepositoryContentUnitQuerySet,
-                                      WorkerQuerySet)
+                                      RoutedQuerySetNoCache, WorkerQuerySet)
 from pulp.server.managers import factory
 from pulp.server.util import Singleton
 from pulp.server.webservices.views import serializers
@@ -56,11 +56,12 @@ class AutoRetryDocument(Document):
         super(AutoRetryDocument, self).__init__(*args, **kwargs)
         UnsafeRetry.decorate_instance(instance=self, full_name=type(self))
 
-    # QuerySetNoCache is used as the default QuerySet to ensure that all sub-classes
-    # do not cache query results unless specifically requested by calling ``cache``.
+    # RoutedQuerySetNoCache is used as the default QuerySet to ensure that all sub-classes
+    # do not cache query results unless specifically requested by calling ``cache``, and that
+    # their reads can be routed to secondaries.
     meta = {
         'abstract': True,
-        'queryset_class': QuerySetNoCache,
+        'queryset_class': RoutedQuerySetNoCache,
     }
 
     def clean(self):
@@ -227,6 +228,31 @@ class RepositoryContentUnit(AutoRetryDocument):
             }
 
 
+class DeletedRepository(AutoRetryDocument):
+    """
+    Marks a repository whose deletion has been dispatched but has not finished, which includes
+    the removal of its content unit associations. The repository is not found by lookups and
+    searches, and a repository with the same ID cannot be created, while the marker exists, so
+    that a new repository does not show the content of the deleted one.
+
+    :ivar repo_id: the id of the deleted repository
+    :type repo_id: mongoengine.StringField
+    :ivar deleted: the time the repository was deleted
+    :type deleted: pulp.server.db.fields.UTCDateTimeField
+    :ivar _ns: (Deprecated), Contains the name of the collection this model represents
+    :type _ns: mongoengine.StringField
+    """
+    repo_id = StringField(primary_key=True)
+    deleted = UTCDateTimeField(default=dateutils.now_utc_datetime_with_tzinfo)
+
+    # For backward compatibility
+    _ns = StringField(default='deleted_repos')
+
+    meta = {'collection': 'deleted_repos',
+            'indexes': [],  # only queried by id, or read whole since it is small
+            'allow_inheritance': False}
+
+
 class Importer(AutoRetryDocument):
     """
     Defines schema for an Importer in the `repo_importers` collection.
@@ -410,7 +436,8 @@ class Worker(AutoRetryDocument):
     _ns = StringField(default='workers')
 
     meta = {'collection': 'workers',
-            'indexes': [],  # this is a small collection that does not need an index
+            # the scheduler finds the workers that have gone missing by their last heartbeat
+            'indexes': ['last_heartbeat'],
             'allow_inheritance': False,
             'queryset_class': WorkerQuerySet}
 
@@ -450,6 +477,42 @@ class MigrationTracker(AutoRetryDocument):
             'allow_inheritance': False}
 
 
+class MigrationCheckpoint(AutoRetryDocument):
+    """
+    Records the progress of a migration that processes documents in batches, so that an
+    interrupted migration resumes after the last completed batch. Checkpoints are removed once
+    the migration has been applied.
+
+    :ivar migration: The name of the migration module
+    :type migration: mongoengine.StringField
+    :ivar step:      Identifies a batched loop within the migration
+    :type step:      mongoengine.StringField
+    :ivar marker:    The _id of the last document of the last completed batch
+    :type marker:    mongoengine.DynamicField
+    :ivar processed: The number of documents processed so far
+    :type processed: mongoengine.IntField
+    :ivar elapsed:   The number of seconds spent processing them
+    :type elapsed:   mongoengine.FloatField
+    :ivar updated:   When the last batch was completed
+    :type updated:   UTCDateTimeField
+    :ivar _ns: The namespace field (Deprecated), reading
+    :type _ns: mongoengine.StringField
+    """
+
+    migration = StringField(required=True)
+    step = StringField(required=True, default='')
+    marker = DynamicField()
+    processed = IntField(default=0)
+    elapsed = FloatField(default=0.0)
+    updated = UTCDateTimeField()
+    # For backward compatibility
+    _ns = StringField(default='migration_checkpoints')
+
+    meta = {'collection': 'migration_checkpoints',
+            'indexes': [{'fields': ['migration', 'step'], 'unique': True}],
+            'allow_inheritance': False}
+
+
 class TaskStatus(AutoRetryDocument, ReaperMixin):
     """
     Represents a task.
@@ -485,6 +548,9 @@ class TaskStatus(AutoRetryDocument, ReaperMixin):
     :type exception:   None
     :ivar traceback:   Deprecated. This is always None.
     :type traceback:   None
+    :ivar metrics:     wall and CPU time, MongoDB, I/O and step metrics of the task, as reported
+                       by pulp.server.metrics
+    :type metrics:     dict
     """
 
     task_id = StringField(required=True)
@@ -499,6 +565,7 @@ class TaskStatus(AutoRetryDocument, ReaperMixin):
     finish_time = ISO8601StringField()
     result = DynamicField()
     group_id = UUIDField(default=None)
+    metrics = DictField()
 
     # These are deprecated, and will always be None
     exception = StringField()
@@ -868,7 +935,7 @@ class FileContentUnit(ContentUnit):
                 raise ValueError(_('must be relative path'))
         self._storage_path = path
 
-    def import_content(self, path, location=None):
+    def import_content(self, path, location=None, checksums=None):
         """
         Import a content file into platform storage.
         The (optional) *location* may be used to specify a path within the unit
@@ -882,9 +949,14 @@ class FileContentUnit(ContentUnit):
         :param location: The (optional) location within the unit storage path
             where the content is to be stored.
         :type location: str
+        :param checksums: The (optional) expected checksums of the file, keyed by
+            checksum type. They are verified as the file is copied into storage.
+        :type checksums: dict
 
         :raises ImportError: if the unit has not been saved.
         :raises PulpCodedException: PLP0037 if *path* is not an existing file.
+        :raises InvalidChecksumType: if a checksum type is not supported.
+        :raises VerificationException: if a checksum of the file is not the one expected.
         """
         if not self._last_updated:
             raise ImportError("Content unit must be saved before associated content"
@@ -892,7 +964,7 @@ class FileContentUnit(ContentUnit):
         if not os.path.isfile(path):
             raise exceptions.PulpCodedException(error_code=error_codes.PLP0037, path=path)
         with FileStorage() as storage:
-            storage.put(self, path, location)
+            storage.put(self, path, location, checksums=checksums)
 
     def save_and_import_content(self, path, location=None):
         """
@@ -1028,6 +1100,102 @@ class ResourceManagerLock(AutoRetryDocument):
     _ns = StringField(default='resource_manager_lock')
 
 
+class ScheduleVersion(AutoRetryDocument):
+    """
+    Single document collection which holds a counter that is incremented every time a
+    scheduled call is added, changed or removed. The scheduler compares the counter with
+    the version it last loaded to cheaply detect that the schedule needs to be re-read.
+
+    :ivar name: The name of the versioned schedule.
+    :type name: basestring
+    :ivar version: The schedule change counter.
+    :type version: int
+    :ivar _ns: (Deprecated), Contains the name of the collection this model represents
+    :type _ns: mongoengine.StringField
+    """
+    SCHEDULED_CALLS = 'scheduled_calls'
+
+    name = StringField(primary_key=True, default=SCHEDULED_CALLS)
+    version = IntField(default=0)
+
+    # For backward compatibility
+    _ns = StringField(default='schedule_version')
+
+    meta = {'collection': 'schedule_version',
+            'indexes': [],  # single document collection, does not need an index
+            'allow_inheritance': False}
+
+    @classmethod
+    def increment(cls):
+        """
+        Atomically increment the schedule version, creating the document as needed.
+        """
+        cls._get_collection().update(
+            {'_id': cls.SCHEDULED_CALLS}, {'$inc': {'version': 1}}, upsert=True)
+
+    @classmethod
+    def get_version(cls):
+        """
+        Get the current schedule version.
+
+        :return: The current schedule version, 0 if it has never been incremented.
+        :rtype: int
+        """
+        document = cls._get_collection().find_one({'_id': cls.SCHEDULED_CALLS}, {'version': 1})
+        if document is None:
+            return 0
+        return document['version']
+
+
+class ContentTypesVersion(AutoRetryDocument):
+    """
+    Single document collection which holds a token that is replaced every time a content type
+    definition is added, changed or removed. Processes compare the token with the one of the
+    definitions they cached to cheaply detect that the definitions need to be re-read. A random
+    token is used rather than a counter so that a re-created database is never mistaken for the
+    one that was cached.
+
+    :ivar name: The name of the versioned definitions.
+    :type name: basestring
+    :ivar version: The token of the current definitions.
+    :type version: basestring
+    :ivar _ns: (Deprecated), Contains the name of the collection this model represents
+    :type _ns: mongoengine.StringField
+    """
+    CONTENT_TYPES = 'content_types'
+
+    name = StringField(primary_key=True, default=CONTENT_TYPES)
+    version = StringField()
+
+    # For backward compatibility
+    _ns = StringField(default='content_types_version')
+
+    meta = {'collection': 'content_types_version',
+            'indexes': [],  # single document collection, does not need an index
+            'allow_inheritance': False}
+
+    @classmethod
+    def change(cls):
+        """
+        Replace the token, creating the document as needed.
+        """
+        cls._get_collection().update(
+            {'_id': cls.CONTENT_TYPES}, {'$set': {'version': str(uuid.uuid4())}}, upsert=True)
+
+    @classmethod
+    def get_version(cls):
+        """
+        Get the current token.
+
+        :return: The current token, None if the definitions have never been changed.
+        :rtype: basestring
+        """
+        document = cls._get_collection().find_one({'_id': cls.CONTENT_TYPES}, {'version': 1})
+        if document is None:
+            return None
+        return document['version']
+
+
 class LazyCatalogEntry(AutoRetryDocument):
     """
     A catalog of content that can be downloaded by the specified plugin.
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 
 from pulp.server.db.model.base import Model
-from pulp.server.db.model.reaper_base import ReaperMixin
+from pulp.server.db.model.reaper_base import REAP_BATCH_SIZE, ReaperMixin, _remove_in_batches
 
 
 class CeleryResult(Model, ReaperMixin):
@@ -13,7 +13,7 @@ class CeleryResult(Model, ReaperMixin):
     unique_indices = tuple()
 
     @classmethod
-    def reap_old_documents(cls, config_days):
+    def reap_old_documents(cls, config_days, batch_size=REAP_BATCH_SIZE, batch_delay=0):
         """
         Delete old Celery task results from the celery_taskmeta collection.
 
@@ -23,8 +23,15 @@ class CeleryResult(Model, ReaperMixin):
 
         :param config_days: Remove all records older than the number of days set by config_days.
         :type config_days: float
+        :param batch_size: The maximum number of documents removed by each batch.
+        :type batch_size: int
+        :param batch_delay: The number of seconds to pause between batches.
+        :type batch_delay: float
+        :return: The number of documents that were removed.
+        :rtype: int
         """
         # Remove all objects older than the epoch time encoded in last_valid_date_done
         last_valid_date_done = datetime.utcnow() - timedelta(days=config_days)
         collection = cls.get_collection()
-        collection.remove({'date_done': {'$lt': last_valid_date_done}})
+        return _remove_in_batches(collection, {'date_done': {'$lt': last_valid_date_done}},
+                                  batch_size, batch_delay)
@@ -12,12 +12,10 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 import datetime
-import hashlib
-import json
 
 from pulp.server.db.model.base import Model
 from pulp.server.db.model.reaper_base import ReaperMixin
-from pulp.common import dateutils
+from pulp.common import dateutils, util
 
 
 # -- classes -----------------------------------------------------------------
@@ -234,6 +232,37 @@ class RepoProfileApplicability(Model):
             self._id = self.get_collection().insert(new_document)
 
 
+class ConsumerApplicability(Model):
+    """
+    An index of the RepoProfileApplicability objects that apply to each consumer. There is one
+    document for every combination of consumer, profile hash and repository for which
+    applicability data exists, where the consumer has a profile with that hash and is bound to
+    that repository. The content types in the applicability data are included so that queries
+    limited by content type only consider the relevant documents.
+
+    The index is maintained by pulp.server.managers.consumer.applicability as applicability data
+    is created, and as the profiles and bindings of consumers change.
+
+    :ivar consumer_id:   A consumer ID.
+    :type consumer_id:   str
+    :ivar profile_hash:  The hash of one of the consumer's profiles.
+    :type profile_hash:  basestring
+    :ivar repo_id:       The ID of a repository the consumer is bound to.
+    :type repo_id:       str
+    :ivar content_types: The content types in the applicability data.
+    :type content_types: list
+    """
+    collection_name = 'consumer_applicability'
+
+    unique_indices = (
+        ('consumer_id', 'profile_hash', 'repo_id'),
+    )
+    search_indices = (
+        ('profile_hash', 'repo_id'),
+        'content_types',
+    )
+
+
 class UnitProfile(Model):
     """
     Represents a consumer profile, which is a data structure that records which content is installed
@@ -265,14 +294,21 @@ class UnitProfile(Model):
     :type profile:      object
     :ivar  profile_hash: A hash of the profile, used for quick comparisons of profiles
     :type profile_hash: basestring
+    :ivar  upload_hash:  A hash of the profile as it was uploaded by the consumer, before it was
+                         updated by the profiler. Used to detect that an uploaded profile has not
+                         changed.
+    :type upload_hash:  basestring
     """
 
     collection_name = 'consumer_unit_profiles'
     unique_indices = (
         ('consumer_id', 'content_type'),
     )
+    search_indices = (
+        'profile_hash',
+    )
 
-    def __init__(self, consumer_id, content_type, profile, profile_hash=None):
+    def __init__(self, consumer_id, content_type, profile, profile_hash=None, upload_hash=None):
         """
         :param consumer_id:  A consumer ID.
         :type  consumer_id:  str
@@ -284,12 +320,15 @@ class UnitProfile(Model):
                              None, the constructor will automatically calculate it based on the
                              profile.
         :type  profile_hash: basestring
+        :param upload_hash:  A hash of the profile as it was uploaded by the consumer.
+        :type  upload_hash:  basestring
         """
         super(UnitProfile, self).__init__()
         self.consumer_id = consumer_id
         self.content_type = content_type
         self.profile = profile
         self.profile_hash = profile_hash
+        self.upload_hash = upload_hash
 
         if self.profile_hash is None:
             self.profile_hash = self.calculate_hash(self.profile)
@@ -305,10 +344,7 @@ class UnitProfile(Model):
         :return:        Hash of profile
         :rtype:         basestring
         """
-        # Don't use any whitespace in the json separators, and sort dictionary keys to be repeatable
-        serialized_profile = json.dumps(profile, separators=(',', ':'), sort_keys=True)
-        hasher = hashlib.sha256(serialized_profile)
-        return hasher.hexdigest()
+        return util.profile_hash(profile)
 
 
 class ConsumerHistoryEvent(Model, ReaperMixin):
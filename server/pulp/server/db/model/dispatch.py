@@ -11,6 +11,7 @@ from celery.schedules import schedule as CelerySchedule
 
 from pulp.common import dateutils
 from pulp.server.async.celery_instance import celery as app
+from pulp.server.db.model import ScheduleVersion
 from pulp.server.db.model.base import Model
 from pulp.server.managers import factory
 
@@ -269,6 +270,7 @@ class ScheduledCall(Model):
             as_dict['_id'] = ObjectId(as_dict['_id'])
             self.get_collection().insert(as_dict)
             self._new = False
+            ScheduleVersion.increment()
         else:
             as_dict = self.as_dict()
             del as_dict['_id']
@@ -400,6 +402,8 @@ class ScheduleEntry(beat.ScheduleEntry):
             _logger.info('disabling schedule with 0 remaining runs: %s' % self._scheduled_call.id)
             self._scheduled_call.enabled = False
         self._scheduled_call.save()
+        if not self._scheduled_call.enabled:
+            ScheduleVersion.increment()
         return self._scheduled_call.as_schedule_entry()
 
     __next__ = next = _next_instance
@@ -1,9 +1,17 @@
 from datetime import timedelta, datetime
+import time
+
+from pymongo import ASCENDING
 
 from pulp.common import dateutils
+from pulp.plugins.util.misc import paginate
 from pulp.server.compat import ObjectId
 
 
+# The default number of documents removed by each batch.
+REAP_BATCH_SIZE = 1000
+
+
 class ReaperMixin(object):
     """
     A Mixin class providing default reaping functionality.
@@ -13,12 +21,22 @@ class ReaperMixin(object):
     """
 
     @classmethod
-    def reap_old_documents(cls, config_days):
+    def reap_old_documents(cls, config_days, batch_size=REAP_BATCH_SIZE, batch_delay=0):
         """
         Remove documents from that are older than config_days.
 
+        The documents are removed in batches of bounded _id ranges, oldest first, so that no
+        single remove holds the write lock for long. Each batch is complete once removed, so an
+        interrupted reap is resumed from the oldest remaining document when it next runs.
+
         :param config_days: Remove all records older than the number of days set by config_days.
         :type config_days: float
+        :param batch_size: The maximum number of documents removed by each batch.
+        :type batch_size: int
+        :param batch_delay: The number of seconds to pause between batches.
+        :type batch_delay: float
+        :return: The number of documents that were removed.
+        :rtype: int
         """
         age = timedelta(days=config_days)
         # Generate an ObjectId that we can use to know which objects to remove
@@ -32,7 +50,36 @@ class ReaperMixin(object):
             # and just use mongoengine queryset to delete old documents.
             collection = cls._get_collection()
 
-        collection.remove({'_id': {'$lte': expired_object_id}})
+        return _remove_in_batches(collection, {'_id': {'$lte': expired_object_id}}, batch_size,
+                                  batch_delay)
+
+
+def _remove_in_batches(collection, spec, batch_size, batch_delay):
+    """
+    Remove the documents that match a spec in batches. The _id of the matching documents are
+    read in ascending order, and each batch removes the matching documents in the range of _id
+    of the next batch_size documents.
+
+    :param collection:  The collection to remove documents from.
+    :type  collection:  pymongo.collection.Collection
+    :param spec:        The spec of the documents to remove.
+    :type  spec:        dict
+    :param batch_size:  The maximum number of documents removed by each batch.
+    :type  batch_size:  int
+    :param batch_delay: The number of seconds to pause between batches.
+    :type  batch_delay: float
+    :return:            The number of documents that were removed.
+    :rtype:             int
+    """
+    removed = 0
+    cursor = collection.find(spec, projection={'_id': True}).sort('_id', ASCENDING)
+    for batch_number, page in enumerate(paginate((d['_id'] for d in cursor), batch_size)):
+        if batch_number and batch_delay > 0:
+            time.sleep(batch_delay)
+        result = collection.remove({'$and': [spec, {'_id': {'$gte': page[0], '$lte': page[-1]}}]})
+        if result:
+            removed += result.get('n', 0)
+    return removed
 
 
 def _create_expired_object_id(age):
@@ -9,9 +9,23 @@ from pymongo import ASCENDING
 from pulp.common import constants
 from pulp.common.dateutils import ensure_tz
 from pulp.server import exceptions as pulp_exceptions
+from pulp.server.db import connection
 
 
-class QuerySetPreventCache(QuerySetNoCache):
+class RoutedQuerySetNoCache(QuerySetNoCache):
+    """
+    A QuerySetNoCache whose reads are routed to secondaries when it is created within
+    pulp.server.db.connection.secondary_reads().
+    """
+
+    def __init__(self, document, collection):
+        super(RoutedQuerySetNoCache, self).__init__(document, collection)
+        read_preference = connection.routed_read_preference(document._get_collection_name())
+        if read_preference is not None:
+            self._read_preference = read_preference
+
+
+class QuerySetPreventCache(RoutedQuerySetNoCache):
     """
     All custom QuerySet classes should inherit from this class rather than QuerySet
     or QuerySetNoCache. There are two reasons for this. Firstly, all QuerySets should
@@ -145,23 +159,65 @@ class RepoQuerySet(CriteriaQuerySet):
     Custom queryset for repositories.
     """
 
-    def get_repo_or_missing_resource(self, repo_id):
+    def get_repo_or_missing_resource(self, repo_id, include_deleted=False):
         """
-        Allows a django-like get or 404.
+        Allows a django-like get or 404. A repository whose deletion has been dispatched is
+        not found, unless include_deleted is True.
 
         :param repo_id: identifies the repository to be returned
         :type  repo_id: str
+        :param include_deleted: also return a repository whose deletion has been dispatched
+        :type  include_deleted: bool
 
         :return: repository object
         :rtype:  pulp.server.db.model.Repository
 
         :raises pulp_exceptions.MissingResource if repository is not found
         """
+        if not include_deleted and repo_id in self._deleted_repo_ids([repo_id]):
+            raise pulp_exceptions.MissingResource(repository=repo_id)
         try:
             return self.get(repo_id=repo_id)
         except DoesNotExist:
             raise pulp_exceptions.MissingResource(repository=repo_id)
 
+    def exclude_deleted(self):
+        """
+        Exclude the repositories whose deletion has been dispatched.
+
+        :return: mongoengine queryset object
+        :rtype:  mongoengine.queryset.QuerySet
+        """
+        deleted = self._deleted_repo_ids()
+        if not deleted:
+            return self
+        return self.filter(repo_id__nin=deleted)
+
+    def find_by_criteria(self, criteria):
+        """
+        Run a query with a Pulp custom query object. The repositories whose deletion has been
+        dispatched are not found.
+
+        :param criteria: Criteria object specifying the query to run
+        :type  criteria: pulp.server.db.model.criteria.Criteria
+        :return: mongoengine queryset object
+        :rtype:  mongoengine.queryset.QuerySet
+        """
+        return super(RepoQuerySet, self.exclude_deleted()).find_by_criteria(criteria)
+
+    def _deleted_repo_ids(self, repo_ids=None):
+        """
+        :param repo_ids: only look for these repositories, None for all of them
+        :type  repo_ids: list
+        :return: the IDs of the repositories whose deletion has been dispatched but has not
+                 finished
+        :rtype:  list
+        """
+        spec = {} if repo_ids is None else {'_id': {'$in': repo_ids}}
+        # the markers are kept by pulp.server.db.model.DeletedRepository
+        collection = self._document._get_db()['deleted_repos']
+        return [marker['_id'] for marker in collection.find(spec, projection={'_id': 1})]
+
 
 class RepositoryContentUnitQuerySet(CriteriaQuerySet):
     """
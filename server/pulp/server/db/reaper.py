@@ -7,6 +7,7 @@ from pulp.common.tags import action_tag
 from pulp.server import config as pulp_config
 from pulp.server.db import model
 from pulp.server.async.tasks import PulpTask, Task
+from pulp.server.controllers import repository as repo_controller
 from pulp.server.db.model import celery_result, consumer, repo_group, repository
 
 
@@ -42,11 +43,25 @@ def reap_expired_documents():
     For each collection in _COLLECTION_TIMEDELTAS, call the class method reap_old_documents().
 
     This method gets the number of days from the pulp_config, and calls reap_old_documents with the
-    number of days as the argument.
+    number of days as the argument. Documents are removed in batches of the configured size, with
+    the configured pause between batches. The deletions of repositories that were interrupted are
+    also resumed, so that their content unit associations do not keep units from being orphaned.
+
+    :return: The number of documents removed, keyed by the config name of each collection.
+    :rtype:  dict
     """
     _logger.info(_('The reaper task is cleaning out old documents from the database.'))
+    batch_size = pulp_config.config.getint('data_reaping', 'reaper_batch_size')
+    batch_delay = pulp_config.config.getfloat('data_reaping', 'reaper_batch_delay')
+    removed = {}
     for model_class, config_name in _COLLECTION_TIMEDELTAS.items():
         # Get the config for how old documents should be before they are reaped.
         config_days = pulp_config.config.getfloat('data_reaping', config_name)
-        model_class.reap_old_documents(config_days)
-    _logger.info(_('The reaper task has completed.'))
+        removed[config_name] = model_class.reap_old_documents(
+            config_days, batch_size=batch_size, batch_delay=batch_delay)
+        msg = _('Removed %(n)d documents from %(c)s.')
+        _logger.debug(msg % {'n': removed[config_name], 'c': config_name})
+    repo_controller.resume_deletions()
+    _logger.info(_('The reaper task has completed, removing %(n)d documents.') %
+                 {'n': sum(removed.itervalues())})
+    return removed
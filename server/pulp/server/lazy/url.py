@@ -18,9 +18,12 @@ zDFYRlosVNTom5YiKprVkJEAo3cbTOMoZss_NS-vpzauuk-qXwqj05gI7fJVsVD915gGcY0xPUbpCbVT
 """
 
 from base64 import urlsafe_b64encode, urlsafe_b64decode
+from collections import OrderedDict
 from gettext import gettext as _
 from hashlib import sha256
+from threading import RLock
 from time import time
+import hmac
 from urllib import quote, unquote
 from urlparse import ParseResult, urlparse, urlunparse
 
@@ -411,6 +414,71 @@ class Key(object):
         return key
 
 
+class SharedKey(object):
+    """
+    A symmetric key used to sign and validate URLs using HMAC-SHA256.
+    Provides the same sign() and verify() interface as an RSA key so it may
+    be used in place of the RSA key pair when the content application and the
+    streamer are configured to share a secret.  HMAC signing and validation is
+    orders of magnitude cheaper than the RSA private and public key operations.
+
+    :ivar secret: The shared secret.
+    :type secret: str
+    """
+
+    @staticmethod
+    def load(path):
+        """
+        Load the shared secret stored in the file at the specified path.
+        Leading and trailing whitespace is ignored.
+
+        :param path: An absolute path to a file containing the secret.
+        :type path: str
+        :return: The loaded key.
+        :rtype: SharedKey
+        """
+        with open(path) as fp:
+            return SharedKey(fp.read().strip())
+
+    def __init__(self, secret):
+        """
+        :param secret: The shared secret.
+        :type secret: str
+        """
+        self.secret = secret
+
+    def sign(self, digest):
+        """
+        Sign the specified digest.
+
+        :param digest: A policy digest.
+        :type digest: str
+        :return: The HMAC signature.
+        :rtype: str
+        """
+        return hmac.new(self.secret, digest, sha256).digest()
+
+    def verify(self, digest, signature):
+        """
+        Verify the signature of the specified digest.
+        The comparison is done in constant time.
+
+        :param digest: A policy digest.
+        :type digest: str
+        :param signature: The signature to be verified.
+        :type signature: str
+        :return: True if the signature is valid.
+        :rtype: bool
+        """
+        expected = self.sign(digest)
+        if len(expected) != len(signature):
+            return False
+        result = 0
+        for x, y in zip(expected, signature):
+            result |= ord(x) ^ ord(y)
+        return result == 0
+
+
 class URL(object):
     """
     An URL object that supports signing.
@@ -499,8 +567,8 @@ class URL(object):
         The *signature* is RSA signature of the SHA256 digest of the
         json/base64 encoded policy.
 
-        :param key: A private RSA key.
-        :type key: RSA.RSA
+        :param key: A private RSA key or a shared key.
+        :type key: RSA.RSA or SharedKey
         :param expiration: The signature expiration in seconds.
         :type expiration: int
         :param extensions: Optional policy extensions.
@@ -508,7 +576,22 @@ class URL(object):
         :return: The signed URL.
         :rtype: SignedURL
         """
-        expiration = int(time() + expiration)
+        return self.sign_until(key, int(time() + expiration), **extensions)
+
+    def sign_until(self, key, expiration, **extensions):
+        """
+        Sign the URL using the specified key with an absolute expiration.
+        See: sign().
+
+        :param key: A private RSA key or a shared key.
+        :type key: RSA.RSA or SharedKey
+        :param expiration: The signature expiration (seconds since epoch).
+        :type expiration: int
+        :param extensions: Optional policy extensions.
+        :type extensions: dict
+        :return: The signed URL.
+        :rtype: SignedURL
+        """
         policy = Policy(self.resource, expiration)
         policy.extensions = extensions
         policy, signature = policy.sign(key)
@@ -577,8 +660,8 @@ class SignedURL(URL):
         specified in the URL.  Last, the policy extensions are matched
         against the specified extensions.
 
-        :param key: A public RSA key.
-        :type key: RSA.RSA
+        :param key: A public RSA key or a shared key.
+        :type key: RSA.RSA or SharedKey
         :param extensions: Optional policy extensions.
         :type extensions: dict
         :return: The resource specified in the policy.
@@ -594,3 +677,76 @@ class SignedURL(URL):
             if extensions.get(k) != v:
                 raise ExtensionNotMatched(k)
         return policy.resource
+
+
+class SignedURLCache(object):
+    """
+    A bounded, thread-safe cache of signed URLs.
+
+    Signing is expensive, so URLs signed for the same (URL, remote IP) are reused
+    within a time bucket.  All URLs signed within a bucket share the same expiration
+    which is the end of the bucket plus the requested expiration.  This guarantees that
+    a cached URL is always valid for at least the requested expiration.  Entries for
+    earlier buckets are discarded once a new bucket begins.
+
+    :ivar max_entries: The maximum number of cached URLs.
+    :type max_entries: int
+    :ivar bucket: The length of a time bucket in seconds.
+    :type bucket: int
+    :ivar expiration: The minimum signature expiration in seconds.
+    :type expiration: int
+    """
+
+    def __init__(self, max_entries, bucket=30, expiration=90):
+        """
+        :param max_entries: The maximum number of cached URLs.
+        :type max_entries: int
+        :param bucket: The length of a time bucket in seconds.
+        :type bucket: int
+        :param expiration: The minimum signature expiration in seconds.
+        :type expiration: int
+        """
+        self.max_entries = max_entries
+        self.bucket = bucket
+        self.expiration = expiration
+        self._entries = OrderedDict()
+        self._current = None
+        self._lock = RLock()
+
+    def sign(self, url, key, **extensions):
+        """
+        Get the signed URL from the cache or sign the URL and cache it.
+
+        :param url: The URL to be signed.
+        :type url: URL
+        :param key: A private RSA key or a shared key.
+        :type key: RSA.RSA or SharedKey
+        :param extensions: Optional policy extensions.
+        :type extensions: dict
+        :return: The signed URL.
+        :rtype: SignedURL
+        """
+        bucket = int(time()) // self.bucket
+        cache_key = (str(url), tuple(sorted(extensions.items())))
+        with self._lock:
+            if bucket != self._current:
+                self._entries.clear()
+                self._current = bucket
+            signed = self._entries.get(cache_key)
+            if signed is not None:
+                return signed
+        expiration = (bucket + 1) * self.bucket + self.expiration
+        signed = url.sign_until(key, expiration, **extensions)
+        with self._lock:
+            if bucket == self._current and self.max_entries > 0:
+                while len(self._entries) >= self.max_entries:
+                    self._entries.popitem(last=False)
+                self._entries[cache_key] = signed
+        return signed
+
+    def clear(self):
+        """
+        Discard all cached URLs.
+        """
+        with self._lock:
+            self._entries.clear()
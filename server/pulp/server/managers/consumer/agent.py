@@ -15,18 +15,24 @@ from pulp.plugins.conduits.profiler import ProfilerConduit
 from pulp.plugins.loader import api as plugin_api, exceptions as plugin_exceptions
 from pulp.plugins.model import Consumer as ProfiledConsumer
 from pulp.plugins.profiler import Profiler, InvalidUnitsRequested
+from pulp.plugins.util.misc import paginate
 from pulp.server.agent.context import Context
 from pulp.server.agent.direct.pulpagent import PulpAgent
 from pulp.server.async.tasks import Task
 from pulp.server.controllers import distributor as dist_controller
 from pulp.server.db import model
 from pulp.server.db.model.consumer import Bind
+from pulp.server.db.model.criteria import Criteria
 from pulp.server.db.model import TaskStatus
-from pulp.server.exceptions import PulpExecutionException, PulpDataException, MissingResource
+from pulp.server.exceptions import (PulpExecutionException, PulpDataException, MissingResource,
+                                    PulpException)
 from pulp.server.managers import factory as managers
 
 
 QUEUE_DELETE_DELAY = 600  # 10 min.
+
+# The number of consumers resolved using a single query during bulk (group) requests.
+BATCH_SIZE = 100
 QUEUE_DELETE_FAILED = _('queue %(name)s cannot be deleted: %(reason)s')
 QUEUE_DELETED = _('queue %(name)s deleted')
 
@@ -116,6 +122,83 @@ class AgentManager(object):
 
         return task
 
+    @staticmethod
+    def bind_many(bindings, options):
+        """
+        Request the agents to perform the specified binds.
+        This is the bulk equivalent of bind().  The consumers are fetched in
+        batches and the bind payload is created once for each distributor and
+        binding configuration.  Bindings for consumers that no longer exist are
+        reported as errors.
+
+        :param bindings: A list of binding documents.
+        :type bindings: list
+        :param options: The options are handler specific.
+        :type options: dict
+        :return: A tuple of: (tasks, errors).  The list of tasks created to track
+            the agent requests and the list of exceptions raised by failed requests.
+        :rtype: tuple
+        """
+        tasks = []
+        errors = []
+        payloads = {}
+        agent = PulpAgent()
+        bind_manager = managers.consumer_bind_manager()
+        for batch in paginate(bindings, BATCH_SIZE):
+            consumers = AgentManager._consumers([b['consumer_id'] for b in batch])
+            for binding in batch:
+                consumer_id = binding['consumer_id']
+                repo_id = binding['repo_id']
+                distributor_id = binding['distributor_id']
+                try:
+                    consumer = consumers.get(consumer_id)
+                    if consumer is None:
+                        raise MissingResource(consumer=consumer_id)
+                    key = (repo_id, distributor_id)
+                    cached = payloads.get(key)
+                    if cached is None or cached[0] != binding['binding_config']:
+                        cached = (binding['binding_config'], AgentManager._bindings([binding]))
+                        payloads[key] = cached
+                    agent_bindings = cached[1]
+
+                    # track agent operations using a pseudo task
+                    task_id = str(uuid4())
+                    task_tags = [
+                        tags.resource_tag(tags.RESOURCE_CONSUMER_TYPE, consumer_id),
+                        tags.resource_tag(tags.RESOURCE_REPOSITORY_TYPE, repo_id),
+                        tags.resource_tag(tags.RESOURCE_REPOSITORY_DISTRIBUTOR_TYPE,
+                                          distributor_id),
+                        tags.action_tag(tags.ACTION_AGENT_BIND)
+                    ]
+                    task = TaskStatus(task_id=task_id, worker_name='agent', tags=task_tags).save()
+
+                    # agent request
+                    context = Context(
+                        consumer,
+                        task_id=task_id,
+                        action='bind',
+                        consumer_id=consumer_id,
+                        repo_id=repo_id,
+                        distributor_id=distributor_id)
+                    agent.consumer.bind(context, agent_bindings, options)
+
+                    # bind action tracking
+                    bind_manager.action_pending(
+                        consumer_id,
+                        repo_id,
+                        distributor_id,
+                        Bind.Action.BIND,
+                        task_id)
+
+                    tasks.append(task)
+                except PulpException, e:
+                    logger.warn(e)
+                    errors.append(e)
+                except Exception, e:
+                    logger.exception(e)
+                    errors.append(e)
+        return tasks, errors
+
     @staticmethod
     def unbind(consumer_id, repo_id, distributor_id, options):
         """
@@ -167,6 +250,71 @@ class AgentManager(object):
 
         return task
 
+    @staticmethod
+    def unbind_many(bindings, options):
+        """
+        Request the agents to perform the specified unbinds.
+        This is the bulk equivalent of unbind().  The consumers are fetched
+        using a single query and the distributor type is looked up once for
+        each distributor.  Bindings for consumers that no longer exist have no
+        agent to confirm the unbind, so they are deleted immediately.
+        :param bindings: A list of binding documents.
+        :type bindings: list
+        :param options: The options are handler specific.
+        :type options: dict
+        :return: The list of tasks created to track the agent requests.
+        :rtype: list
+        """
+        consumers = AgentManager._consumers([b['consumer_id'] for b in bindings])
+        agent_bindings = {}
+        agent = PulpAgent()
+        bind_manager = managers.consumer_bind_manager()
+        tasks = []
+        orphaned = []
+        for binding in bindings:
+            consumer_id = binding['consumer_id']
+            repo_id = binding['repo_id']
+            distributor_id = binding['distributor_id']
+            consumer = consumers.get(consumer_id)
+            if consumer is None:
+                orphaned.append(binding)
+                continue
+            key = (repo_id, distributor_id)
+            if key not in agent_bindings:
+                agent_bindings[key] = AgentManager._unbindings([binding])
+
+            # track agent operations using a pseudo task
+            task_id = str(uuid4())
+            task_tags = [
+                tags.resource_tag(tags.RESOURCE_CONSUMER_TYPE, consumer_id),
+                tags.resource_tag(tags.RESOURCE_REPOSITORY_TYPE, repo_id),
+                tags.resource_tag(tags.RESOURCE_REPOSITORY_DISTRIBUTOR_TYPE, distributor_id),
+                tags.action_tag(tags.ACTION_AGENT_UNBIND)
+            ]
+            task = TaskStatus(task_id=task_id, worker_name='agent', tags=task_tags).save()
+
+            # agent request
+            context = Context(
+                consumer,
+                task_id=task_id,
+                action='unbind',
+                consumer_id=consumer_id,
+                repo_id=repo_id,
+                distributor_id=distributor_id)
+            agent.consumer.unbind(context, agent_bindings[key], options)
+
+            # unbind action tracking
+            bind_manager.action_pending(
+                consumer_id,
+                repo_id,
+                distributor_id,
+                Bind.Action.UNBIND,
+                task_id)
+
+            tasks.append(task)
+        bind_manager.delete_many(orphaned)
+        return tasks
+
     @staticmethod
     def install_content(consumer_id, units, options):
         """
@@ -303,6 +451,153 @@ class AgentManager(object):
         history_manager.record_event(consumer_id, 'content_unit_uninstalled', {'units': units})
         return task
 
+    @staticmethod
+    def install_content_many(consumer_ids, units, options):
+        """
+        Install content units on many consumers.
+        This is the bulk equivalent of install_content().
+        :param consumer_ids: A list of consumer IDs.
+        :type consumer_ids: list
+        :param units: A list of content units to be installed.
+        :type units: list of:
+            { type_id:<str>, unit_key:<dict> }
+        :param options: Install options; based on unit type.
+        :type options: dict
+        :return: A tuple of: (tasks, errors).  See: _content_many().
+        :rtype: tuple
+        """
+        return AgentManager._content_many(
+            consumer_ids,
+            units,
+            options,
+            tags.ACTION_AGENT_UNIT_INSTALL,
+            'install_units',
+            'install',
+            'content_unit_installed')
+
+    @staticmethod
+    def update_content_many(consumer_ids, units, options):
+        """
+        Update content units on many consumers.
+        This is the bulk equivalent of update_content().
+        :param consumer_ids: A list of consumer IDs.
+        :type consumer_ids: list
+        :param units: A list of content units to be updated.
+        :type units: list of:
+            { type_id:<str>, unit_key:<dict> }
+        :param options: Update options; based on unit type.
+        :type options: dict
+        :return: A tuple of: (tasks, errors).  See: _content_many().
+        :rtype: tuple
+        """
+        return AgentManager._content_many(
+            consumer_ids,
+            units,
+            options,
+            tags.ACTION_AGENT_UNIT_UPDATE,
+            'update_units',
+            'update')
+
+    @staticmethod
+    def uninstall_content_many(consumer_ids, units, options):
+        """
+        Uninstall content units on many consumers.
+        This is the bulk equivalent of uninstall_content().
+        :param consumer_ids: A list of consumer IDs.
+        :type consumer_ids: list
+        :param units: A list of content units to be uninstalled.
+        :type units: list of:
+            { type_id:<str>, unit_key:<dict> }
+        :param options: Uninstall options; based on unit type.
+        :type options: dict
+        :return: A tuple of: (tasks, errors).  See: _content_many().
+        :rtype: tuple
+        """
+        return AgentManager._content_many(
+            consumer_ids,
+            units,
+            options,
+            tags.ACTION_AGENT_UNIT_UNINSTALL,
+            'uninstall_units',
+            'uninstall',
+            'content_unit_uninstalled')
+
+    @staticmethod
+    def _content_many(consumer_ids, units, options, action, plugin_method, agent_method,
+                      event_type=None):
+        """
+        Request a content operation on many consumers.
+        The profilers are resolved once.  The consumers and their profiles are
+        fetched in batches of BATCH_SIZE using a single query each.  A failure
+        for one consumer does not prevent the request to the other consumers.
+        :param consumer_ids: A list of consumer IDs.
+        :type consumer_ids: list
+        :param units: A list of content units.
+        :type units: list of:
+            { type_id:<str>, unit_key:<dict> }
+        :param options: Options; based on unit type.
+        :type options: dict
+        :param action: The action tag (ACTION_AGENT_UNIT_*).
+        :type action: str
+        :param plugin_method: The name of the profiler method used to translate the units.
+        :type plugin_method: str
+        :param agent_method: The name of the agent content method.
+        :type agent_method: str
+        :param event_type: The (optional) consumer history event type.
+        :type event_type: str
+        :return: A tuple of: (tasks, errors).  The list of tasks created to track
+            the agent requests and the list of exceptions raised by failed requests.
+        :rtype: tuple
+        """
+        tasks = []
+        errors = []
+        conduit = ProfilerConduit()
+        collated = Units(units)
+        profilers = dict((typeid, AgentManager._profiler(typeid)) for typeid in collated)
+        agent = PulpAgent()
+        request = getattr(agent.content, agent_method)
+        history_manager = managers.consumer_history_manager()
+        for batch in paginate(consumer_ids, BATCH_SIZE):
+            consumers = AgentManager._consumers(batch)
+            profiled = AgentManager._profiled_consumers(batch)
+            for consumer_id in batch:
+                try:
+                    consumer = consumers.get(consumer_id)
+                    if consumer is None:
+                        raise MissingResource(consumer=consumer_id)
+                    translated = []
+                    for typeid, typed_units in collated.items():
+                        profiler, cfg = profilers[typeid]
+                        translated.extend(AgentManager._invoke_plugin(
+                            getattr(profiler, plugin_method),
+                            profiled[consumer_id],
+                            list(typed_units),
+                            options,
+                            cfg,
+                            conduit))
+
+                    # track agent operations using a pseudo task
+                    task_id = str(uuid4())
+                    task_tags = [
+                        tags.resource_tag(tags.RESOURCE_CONSUMER_TYPE, consumer_id),
+                        tags.action_tag(action)
+                    ]
+                    task = TaskStatus(task_id=task_id, worker_name='agent', tags=task_tags).save()
+
+                    # agent request
+                    context = Context(consumer, task_id=task_id, consumer_id=consumer_id)
+                    request(context, translated, options)
+                    if event_type:
+                        history_manager.record_event(consumer_id, event_type, {'units': translated})
+                    tasks.append(task)
+                except PulpException, e:
+                    logger.warn(e)
+                    errors.append(e)
+                except Exception, e:
+                    logger.exception(e)
+                    errors.append(e)
+        return tasks, errors
+
     def cancel_request(self, consumer_id, task_id):
         """
         Cancel an agent request associated with the specified task ID.
@@ -362,6 +657,38 @@ class AgentManager(object):
             profiles[typeid] = profile
         return ProfiledConsumer(consumer_id, profiles)
 
+    @staticmethod
+    def _profiled_consumers(consumer_ids):
+        """
+        Get profiler consumer model objects for many consumers using a single query.
+
+        :param consumer_ids: A list of consumer IDs.
+        :type  consumer_ids: list
+        :return: A dictionary of populated profiler consumer model objects keyed by consumer ID.
+        :rtype:  dict
+        """
+        profiles = dict((consumer_id, {}) for consumer_id in consumer_ids)
+        manager = managers.consumer_profile_manager()
+        criteria = Criteria(filters={'consumer_id': {'$in': list(consumer_ids)}})
+        for p in manager.find_by_criteria(criteria):
+            profiles[p['consumer_id']][p['content_type']] = p['profile']
+        return dict((consumer_id, ProfiledConsumer(consumer_id, p))
+                    for consumer_id, p in profiles.items())
+
+    @staticmethod
+    def _consumers(consumer_ids):
+        """
+        Get many consumers using a single query.
+
+        :param consumer_ids: A list of consumer IDs.
+        :type  consumer_ids: list
+        :return: A dictionary of consumers keyed by consumer ID.
+            Consumers that do not exist are not included.
+        :rtype:  dict
+        """
+        manager = managers.consumer_query_manager()
+        return dict((c['id'], c) for c in manager.find_by_id_list(list(set(consumer_ids))))
+
     @staticmethod
     def _bindings(bindings):
         """
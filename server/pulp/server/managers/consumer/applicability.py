@@ -4,6 +4,7 @@ Contains content applicability management classes
 
 from gettext import gettext as _
 from logging import getLogger
+import math
 from uuid import uuid4
 
 from celery import task
@@ -12,9 +13,11 @@ from pulp.plugins.conduits.profiler import ProfilerConduit
 from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api, exceptions as plugin_exceptions
 from pulp.plugins.profiler import Profiler
-from pulp.server.async.tasks import Task
+from pulp.plugins.types import database as types_db
+from pulp.server.async.tasks import Task, get_worker_count
 from pulp.server.db import model
-from pulp.server.db.model.consumer import Bind, RepoProfileApplicability, UnitProfile
+from pulp.server.db.model.consumer import (Bind, ConsumerApplicability, RepoProfileApplicability,
+                                           UnitProfile)
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.managers import factory as managers
 from pulp.server.managers.consumer.query import ConsumerQueryManager
@@ -23,6 +26,35 @@ from pulp.plugins.util.misc import paginate
 
 _logger = getLogger(__name__)
 
+# Bounds on the number of profile hashes regenerated by each batch_regenerate_applicability task.
+# All of the applicability data of a batch is loaded into memory at once.
+MIN_REGENERATION_BATCH_SIZE = 10
+MAX_REGENERATION_BATCH_SIZE = 250
+
+# The number of batch_regenerate_applicability tasks each worker is given for a repository,
+# so that work stays spread across workers when batches take different amounts of time.
+REGENERATION_BATCHES_PER_WORKER = 4
+
+# The number of consumers whose entries in the consumer applicability index are rebuilt at once.
+INDEX_BATCH_SIZE = 100
+
+
+def regeneration_batch_size(profile_count, worker_count):
+    """
+    Size the batches of profile hashes that applicability regeneration for a repository is split
+    into, so that each worker gets REGENERATION_BATCHES_PER_WORKER of them.
+
+    :param profile_count: The number of profile hashes to regenerate applicability for
+    :type  profile_count: int
+    :param worker_count: The number of workers that the batches can be run by
+    :type  worker_count: int
+    :return: The number of profile hashes in each batch
+    :rtype:  int
+    """
+    batch_count = max(worker_count, 1) * REGENERATION_BATCHES_PER_WORKER
+    batch_size = int(math.ceil(profile_count / float(batch_count)))
+    return min(max(batch_size, MIN_REGENERATION_BATCH_SIZE), MAX_REGENERATION_BATCH_SIZE)
+
 
 class ApplicabilityRegenerationManager(object):
     @staticmethod
@@ -160,13 +192,14 @@ class ApplicabilityRegenerationManager(object):
         repo_ids = [r.repo_id for r in model.Repository.objects.find_by_criteria(repo_criteria)]
 
         task_group_id = uuid4()
+        worker_count = get_worker_count()
 
         for repo_id in repo_ids:
             profile_hashes = RepoProfileApplicability.get_collection().find(
-                {'repo_id': repo_id}, {'profile_hash': 1})
-            for batch in paginate(profile_hashes, 10):
-                batch_regenerate_applicability_task.apply_async((repo_id, batch),
-                                                                **{'group_id': task_group_id})
+                {'repo_id': repo_id}, {'profile_hash': 1, '_id': 0})
+            batch_size = regeneration_batch_size(profile_hashes.count(), worker_count)
+            batches = ((repo_id, batch) for batch in paginate(profile_hashes, batch_size))
+            batch_regenerate_applicability_task.apply_async_many(batches, group_id=task_group_id)
         return task_group_id
 
     @staticmethod
@@ -264,6 +297,7 @@ class ApplicabilityRegenerationManager(object):
                 # Update existing applicability object
                 existing_applicability.applicability = applicability
                 existing_applicability.save()
+                _update_indexed_content_types(profile_hash, bound_repo_id, applicability)
             else:
                 # Create a new RepoProfileApplicability object and save it in the db
                 RepoProfileApplicability.objects.create(profile_hash,
@@ -382,6 +416,7 @@ class RepoProfileApplicabilityManager(object):
             profile_hash=profile_hash, repo_id=repo_id, profile=profile,
             applicability=applicability)
         applicability.save()
+        _index_applicability(profile_hash, repo_id, applicability.applicability)
         return applicability
 
     def filter(self, query_params):
@@ -442,6 +477,7 @@ class RepoProfileApplicabilityManager(object):
         # Remove all RepoProfileApplicability objects that reference these repo_ids
         if missing_repo_ids:
             rpa_collection.remove({'repo_id': {'$in': missing_repo_ids}})
+            ConsumerApplicability.get_collection().remove({'repo_id': {'$in': missing_repo_ids}})
 
         # Next, we need to find profile_hashes that don't exist in the UnitProfile collection
         rpa_profile_hashes = rpa_collection.distinct('profile_hash')
@@ -456,6 +492,8 @@ class RepoProfileApplicabilityManager(object):
         # Remove all RepoProfileApplicability objects that reference these profile hashes
         if missing_profile_hashes:
             rpa_collection.remove({'profile_hash': {'$in': missing_profile_hashes}})
+            ConsumerApplicability.get_collection().remove(
+                {'profile_hash': {'$in': missing_profile_hashes}})
 # Instantiate one of the managers on the object it manages for convenience
 RepoProfileApplicability.objects = RepoProfileApplicabilityManager()
 
@@ -476,6 +514,10 @@ def retrieve_consumer_applicability(consumer_criteria, content_types=None):
      {'consumers': ['consumer_2', 'consumer_3'],
       'applicability': {'content_type_1': ['unit_1', 'unit_2']}}]
 
+    The applicability data that applies to the consumers is found using the consumer
+    applicability index, so only the applicability data for the combinations of profiles and
+    repositories of the matched consumers, and only the requested content types, is loaded.
+
     :param consumer_ids:  A list of consumer ids that the applicability data should be retrieved
                           against
     :type  consumer_ids:  list
@@ -488,26 +530,14 @@ def retrieve_consumer_applicability(consumer_criteria, content_types=None):
     # We only need the consumer ids
     consumer_criteria['fields'] = ['id']
     consumer_ids = [c['id'] for c in ConsumerQueryManager.find_by_criteria(consumer_criteria)]
-    consumer_map = dict([(c, {'profiles': [], 'repo_ids': []}) for c in consumer_ids])
-
-    # Fill out the mapping of consumer_ids to profiles, and store the list of profile_hashes
-    profile_hashes = _add_profiles_to_consumer_map_and_get_hashes(consumer_ids, consumer_map)
 
-    # Now add in repo_ids that the consumers are bound to
-    _add_repo_ids_to_consumer_map(consumer_ids, consumer_map)
+    # Look up which applicability data applies to which consumers in the index
+    applicability_map = _get_indexed_applicability_map(consumer_ids, content_types)
     # We don't need the list of consumer_ids anymore, so let's free a little RAM
     del consumer_ids
 
-    # Now lets get all RepoProfileApplicability objects that have the profile hashes for our
-    # consumers
-    applicability_map = _get_applicability_map(profile_hashes, content_types)
-    # We don't need the profile_hashes anymore, so let's free some RAM
-    del profile_hashes
-
-    # Now we need to add consumers who match the applicability data to the applicability_map
-    _add_consumers_to_applicability_map(consumer_map, applicability_map)
-    # We don't need the consumer_map anymore, so let's free it up
-    del consumer_map
+    # Now add the applicability data itself to the applicability_map
+    _add_applicability_to_applicability_map(applicability_map, content_types)
 
     # Collate all the entries for the same sets of consumers together
     consumer_applicability_map = _get_consumer_applicability_map(applicability_map)
@@ -518,6 +548,146 @@ def retrieve_consumer_applicability(consumer_criteria, content_types=None):
     return _format_report(consumer_applicability_map)
 
 
+def update_consumer_applicability_index(consumer_ids, repo_ids=None):
+    """
+    Rebuild the entries of the given consumers in the consumer applicability index. This must be
+    called whenever the profiles or the bindings of consumers change.
+
+    Only the applicability data of the repositories the consumers are bound to is read, and only
+    the entries that are missing, out of date or no longer apply are written.
+
+    :param consumer_ids: A list of consumer ids
+    :type  consumer_ids: list
+    :param repo_ids:     If not None, only the entries for these repositories are rebuilt. This
+                         is enough when only the bindings to these repositories changed.
+    :type  repo_ids:     list or None
+    """
+    collection = ConsumerApplicability.get_collection()
+    for batch in paginate(consumer_ids, INDEX_BATCH_SIZE):
+        batch = list(batch)
+        consumer_map = dict([(c, {'profiles': [], 'repo_ids': []}) for c in batch])
+        profile_hashes = _add_profiles_to_consumer_map_and_get_hashes(batch, consumer_map)
+        _add_repo_ids_to_consumer_map(batch, consumer_map, repo_ids)
+        bound_repo_ids = set()
+        for data in consumer_map.itervalues():
+            bound_repo_ids.update(data['repo_ids'])
+        content_types_map = _get_content_types_map(profile_hashes, list(bound_repo_ids))
+
+        expected = {}
+        for consumer_id, data in consumer_map.iteritems():
+            for profile in data['profiles']:
+                for repo_id in data['repo_ids']:
+                    repo_profile = (profile['profile_hash'], repo_id)
+                    if repo_profile in content_types_map:
+                        expected[(consumer_id,) + repo_profile] = content_types_map[repo_profile]
+
+        # Leave the entries that are up to date alone and remove those that no longer apply
+        query = {'consumer_id': {'$in': batch}}
+        if repo_ids is not None:
+            query['repo_id'] = {'$in': list(repo_ids)}
+        entries = collection.find(
+            query, projection=['consumer_id', 'profile_hash', 'repo_id', 'content_types'])
+        stale = []
+        for entry in entries:
+            key = (entry['consumer_id'], entry['profile_hash'], entry['repo_id'])
+            if key not in expected:
+                stale.append(entry['_id'])
+            elif sorted(entry.get('content_types', [])) == sorted(expected[key]):
+                del expected[key]
+        if stale:
+            collection.remove({'_id': {'$in': stale}})
+        for (consumer_id, profile_hash, repo_id), content_types in expected.iteritems():
+            _index_consumer(collection, consumer_id, profile_hash, repo_id, content_types)
+
+
+def _get_content_types_map(profile_hashes, repo_ids):
+    """
+    Find the content types that have applicability data for each combination of the given
+    profile hashes and repositories. At most one applicable unit id of each content type is
+    read from the database, since only the types are needed.
+
+    :param profile_hashes: A list of profile hashes
+    :type  profile_hashes: list
+    :param repo_ids:       A list of repo IDs
+    :type  repo_ids:       list
+    :return:               A dictionary mapping (profile_hash, repo_id) to a list of content
+                           type ids, for the combinations that have applicability data
+    :rtype:                dict
+    """
+    if not profile_hashes or not repo_ids:
+        return {}
+    projection = {'profile_hash': 1, 'repo_id': 1}
+    for type_id in types_db.all_type_ids():
+        projection['applicability.%s' % type_id] = {'$slice': 1}
+    applicabilities = RepoProfileApplicability.get_collection().find(
+        {'profile_hash': {'$in': profile_hashes}, 'repo_id': {'$in': repo_ids}},
+        projection=projection)
+    return dict(((a['profile_hash'], a['repo_id']), a.get('applicability', {}).keys())
+                for a in applicabilities)
+
+
+def _index_applicability(profile_hash, repo_id, applicability):
+    """
+    Add new applicability data to the consumer applicability index for each of the consumers that
+    have a profile with the given hash and are bound to the given repository.
+
+    :param profile_hash:  The hash of the profile the applicability data is for
+    :type  profile_hash:  basestring
+    :param repo_id:       The repo ID the applicability data is for
+    :type  repo_id:       basestring
+    :param applicability: A dictionary mapping content_type_ids to lists of applicable Unit IDs.
+    :type  applicability: dict
+    """
+    collection = ConsumerApplicability.get_collection()
+    profiles = UnitProfile.get_collection().find({'profile_hash': profile_hash},
+                                                 projection=['consumer_id'])
+    consumer_ids = [p['consumer_id'] for p in profiles]
+    for batch in paginate(consumer_ids, INDEX_BATCH_SIZE):
+        bindings = Bind.get_collection().find(
+            {'consumer_id': {'$in': list(batch)}, 'repo_id': repo_id},
+            projection=['consumer_id'])
+        for consumer_id in set(b['consumer_id'] for b in bindings):
+            _index_consumer(collection, consumer_id, profile_hash, repo_id, applicability.keys())
+
+
+def _index_consumer(collection, consumer_id, profile_hash, repo_id, content_types):
+    """
+    Add or update the entry for the given consumer, profile hash and repository in the consumer
+    applicability index.
+
+    :param collection:    The consumer applicability index collection
+    :type  collection:    pulp.server.db.connection.PulpCollection
+    :param consumer_id:   The consumer id
+    :type  consumer_id:   str
+    :param profile_hash:  The hash of the profile the applicability data is for
+    :type  profile_hash:  basestring
+    :param repo_id:       The repo ID the applicability data is for
+    :type  repo_id:       basestring
+    :param content_types: The content type ids the applicability data has
+    :type  content_types: list
+    """
+    collection.update(
+        {'consumer_id': consumer_id, 'profile_hash': profile_hash, 'repo_id': repo_id},
+        {'$set': {'content_types': content_types}}, upsert=True)
+
+
+def _update_indexed_content_types(profile_hash, repo_id, applicability):
+    """
+    Update the content types of the entries in the consumer applicability index after the
+    applicability data for the given profile hash and repository has been regenerated.
+
+    :param profile_hash:  The hash of the profile the applicability data is for
+    :type  profile_hash:  basestring
+    :param repo_id:       The repo ID the applicability data is for
+    :type  repo_id:       basestring
+    :param applicability: A dictionary mapping content_type_ids to lists of applicable Unit IDs.
+    :type  applicability: dict
+    """
+    ConsumerApplicability.get_collection().update(
+        {'profile_hash': profile_hash, 'repo_id': repo_id},
+        {'$set': {'content_types': applicability.keys()}}, multi=True)
+
+
 def _add_consumers_to_applicability_map(consumer_map, applicability_map):
     """
     For all consumers in the consumer_map, look for their profiles and repos in the
@@ -543,6 +713,45 @@ def _add_consumers_to_applicability_map(consumer_map, applicability_map):
                     applicability_map[repo_profile]['consumers'].append(consumer_id)
 
 
+def _add_applicability_to_applicability_map(applicability_map, content_types):
+    """
+    Query for the applicability data of each (profile_hash, repo_id) in the applicability_map,
+    limited to the given content types, and add it to the applicability_map. Entries for which
+    there is no applicability data worth reporting are removed.
+
+    :param applicability_map: The mapping of (profile_hash, repo_id) to applicability_data and
+                              consumer_ids the data applies to.
+    :type  applicability_map: dict
+    :param content_types:     If not None, content_types is a list of content_types to
+                              be included in the applicability data
+    :type  content_types:     list or None
+    """
+    repo_profile_hashes = {}
+    for profile_hash, repo_id in applicability_map:
+        repo_profile_hashes.setdefault(repo_id, []).append(profile_hash)
+    if not repo_profile_hashes:
+        return
+
+    projection = ['profile_hash', 'repo_id']
+    if content_types is None:
+        projection.append('applicability')
+    else:
+        projection.extend('applicability.%s' % content_type for content_type in content_types)
+    query = {'$or': [{'repo_id': repo_id, 'profile_hash': {'$in': profile_hashes}}
+                     for repo_id, profile_hashes in repo_profile_hashes.iteritems()]}
+    applicabilities = RepoProfileApplicability.get_collection().find(query, projection=projection)
+    for a in applicabilities:
+        repo_profile = (a['profile_hash'], a['repo_id'])
+        applicability_map[repo_profile]['applicability'] = a.get('applicability', {})
+
+    for repo_profile, data in applicability_map.items():
+        # The applicability data may have been removed since the index was read, or may not
+        # have anything worth reporting for the requested types
+        if data['applicability'] is None or (content_types is not None and
+                                             not data['applicability']):
+            del applicability_map[repo_profile]
+
+
 def _add_profiles_to_consumer_map_and_get_hashes(consumer_ids, consumer_map):
     """
     Query for all the profiles associated with the given list of consumer_ids, add those
@@ -570,7 +779,7 @@ def _add_profiles_to_consumer_map_and_get_hashes(consumer_ids, consumer_map):
     return list(profile_hashes)
 
 
-def _add_repo_ids_to_consumer_map(consumer_ids, consumer_map):
+def _add_repo_ids_to_consumer_map(consumer_ids, consumer_map, repo_ids=None):
     """
     Query for all bindings for the given list of consumer_ids, and for each one add the bound
     repo_ids to the consumer_map's entry for the consumer.
@@ -583,10 +792,13 @@ def _add_repo_ids_to_consumer_map(consumer_ids, consumer_map):
                          which indexes a list that this method will append the found profiles
                          to.
     :type  consumer_map: dict
+    :param repo_ids:     If not None, only the bindings to these repositories are added
+    :type  repo_ids:     list or None
     """
-    bindings = Bind.get_collection().find(
-        {'consumer_id': {'$in': consumer_ids}},
-        projection=['consumer_id', 'repo_id'])
+    query = {'consumer_id': {'$in': consumer_ids}}
+    if repo_ids is not None:
+        query['repo_id'] = {'$in': list(repo_ids)}
+    bindings = Bind.get_collection().find(query, projection=['consumer_id', 'repo_id'])
     for b in bindings:
         consumer_map[b['consumer_id']]['repo_ids'].append(b['repo_id'])
 
@@ -657,6 +869,36 @@ def _get_applicability_map(profile_hashes, content_types):
     return return_value
 
 
+def _get_indexed_applicability_map(consumer_ids, content_types):
+    """
+    Build an "applicability_map" from the consumer applicability index. It is a dictionary that
+    maps tuples of (profile_hash, repo_id) to a dictionary of applicability data and the
+    consumer_ids it applies to. The applicability data is initialized to None, so that a later
+    method can add it. For example, it might look like:
+
+    {('profile_hash_1', 'repo_1'): {'applicability': None, 'consumers': ['consumer_1']}}
+
+    :param consumer_ids:  A list of consumer_ids the applicability map is built for
+    :type  consumer_ids:  list
+    :param content_types: If not None, content_types is a list of content_types, and only
+                          applicability data that includes one of them is considered
+    :type  content_types: list or None
+    :return:              The applicability map
+    :rtype:               dict
+    """
+    query = {'consumer_id': {'$in': consumer_ids}}
+    if content_types is not None:
+        query['content_types'] = {'$in': content_types}
+    entries = ConsumerApplicability.get_collection().find(
+        query, projection=['consumer_id', 'profile_hash', 'repo_id'])
+    return_value = {}
+    for entry in entries:
+        repo_profile = (entry['profile_hash'], entry['repo_id'])
+        data = return_value.setdefault(repo_profile, {'applicability': None, 'consumers': []})
+        data['consumers'].append(entry['consumer_id'])
+    return return_value
+
+
 def _get_consumer_applicability_map(applicability_map):
     """
     Massage the applicability_map into a form that will help us to collate applicability
@@ -8,15 +8,20 @@ from time import time
 from celery import task
 from pymongo.errors import DuplicateKeyError
 
+from pulp.plugins.util.misc import paginate
 from pulp.server.async.tasks import Task
 from pulp.server.db import model
-from pulp.server.db.model.consumer import Bind
+from pulp.server.db.model.consumer import Bind, Consumer
 from pulp.server.exceptions import MissingResource, InvalidValue
 from pulp.server.managers import factory
+from pulp.server.managers.consumer.applicability import update_consumer_applicability_index
 
 
 _logger = getLogger(__name__)
 
+# The number of consumers resolved using a single query by bind_many().
+BATCH_SIZE = 100
+
 
 class BindManager(object):
     """
@@ -77,6 +82,7 @@ class BindManager(object):
             BindManager._update_binding(consumer_id, repo_id, distributor_id, notify_agent,
                                         binding_config)
             BindManager._reset_bind(consumer_id, repo_id, distributor_id)
+        update_consumer_applicability_index([consumer_id], [repo_id])
         # fetch the inserted/updated bind
         bind = BindManager.get_bind(consumer_id, repo_id, distributor_id)
         # update history
@@ -85,6 +91,81 @@ class BindManager(object):
         manager.record_event(consumer_id, 'repo_bound', details)
         return bind
 
+    @staticmethod
+    def bind_many(consumer_ids, repo_id, distributor_id, notify_agent, binding_config):
+        """
+        Bind many consumers to a specific distributor associated with a repository.
+        This is the bulk equivalent of bind().  The repository and distributor are
+        validated once and the consumers are resolved and the bindings fetched in
+        batches using a single query each.  This call is idempotent.
+
+        :param consumer_ids: A list of consumer IDs.
+        :type  consumer_ids: list
+        :param repo_id: uniquely identifies the repository.
+        :type  repo_id: str
+        :param distributor_id: uniquely identifies a distributor.
+        :type  distributor_id: str
+
+        :return: A tuple of: (bindings, errors).  The list of Bind objects and the
+            list of exceptions raised for consumers that could not be bound.
+        :rtype:  tuple
+
+        :raise InvalidValid: when the repository or distributor id is invalid, or
+            if the notify_agent value is invalid
+        """
+        # Validation
+        missing_values = {}
+        try:
+            model.Repository.objects.get_repo_or_missing_resource(repo_id)
+        except MissingResource:
+            missing_values['repo_id'] = repo_id
+        try:
+            model.Distributor.objects.get_or_404(repo_id=repo_id, distributor_id=distributor_id)
+        except MissingResource:
+            missing_values['distributor_id'] = distributor_id
+        if missing_values:
+            raise InvalidValue(missing_values.keys())
+
+        # ensure notify_agent is a boolean
+        if not isinstance(notify_agent, bool):
+            raise InvalidValue(['notify_agent'])
+
+        bindings = []
+        errors = []
+        collection = Bind.get_collection()
+        manager = factory.consumer_history_manager()
+        details = {'repo_id': repo_id, 'distributor_id': distributor_id}
+        for batch in paginate(consumer_ids, BATCH_SIZE):
+            query = {'id': {'$in': list(batch)}}
+            cursor = Consumer.get_collection().find(query, projection={'id': 1})
+            existing = set(c['id'] for c in cursor)
+            bound = []
+            for consumer_id in batch:
+                if consumer_id not in existing:
+                    errors.append(MissingResource(consumer_id=consumer_id))
+                    continue
+                # perform the bind
+                try:
+                    bind = Bind(consumer_id, repo_id, distributor_id, notify_agent, binding_config)
+                    collection.save(bind)
+                except DuplicateKeyError:
+                    BindManager._update_binding(consumer_id, repo_id, distributor_id,
+                                                notify_agent, binding_config)
+                    BindManager._reset_bind(consumer_id, repo_id, distributor_id)
+                # update history
+                manager.record_event(consumer_id, 'repo_bound', details)
+                bound.append(consumer_id)
+            # fetch the inserted/updated binds
+            if bound:
+                update_consumer_applicability_index(bound, [repo_id])
+                query = {
+                    'consumer_id': {'$in': bound},
+                    'repo_id': repo_id,
+                    'distributor_id': distributor_id
+                }
+                bindings.extend(collection.find(query))
+        return bindings, errors
+
     @staticmethod
     def _update_binding(consumer_id, repo_id, distributor_id, notify_agent, binding_config):
         """
@@ -159,6 +240,50 @@ class BindManager(object):
         manager.record_event(consumer_id, 'repo_unbound', details)
         return bind
 
+    @staticmethod
+    def unbind_many(bindings):
+        """
+        Unbind many consumers.  This is the bulk equivalent of unbind() and is
+        intended for callers that already have the binding documents in hand.
+        All bindings are marked as deleted using a single update and an unbind
+        event is recorded in the history of each consumer.
+
+        :param bindings: A list of binding documents.
+        :type  bindings: list
+        """
+        if not bindings:
+            return
+        collection = Bind.get_collection()
+        query = {'_id': {'$in': [b['_id'] for b in bindings]}, 'deleted': False}
+        collection.update(query, {'$set': {'deleted': True}}, multi=True)
+        manager = factory.consumer_history_manager()
+        for binding in bindings:
+            details = {
+                'repo_id': binding['repo_id'],
+                'distributor_id': binding['distributor_id']
+            }
+            try:
+                manager.record_event(binding['consumer_id'], 'repo_unbound', details)
+            except MissingResource:
+                # the consumer has been unregistered in the meantime
+                continue
+
+    @staticmethod
+    def delete_many(bindings):
+        """
+        Delete many bindings using a single operation.  This is the bulk
+        equivalent of a forced delete().
+
+        :param bindings: A list of binding documents.
+        :type  bindings: list
+        """
+        if not bindings:
+            return
+        collection = Bind.get_collection()
+        collection.remove({'_id': {'$in': [b['_id'] for b in bindings]}})
+        update_consumer_applicability_index(list(set(b['consumer_id'] for b in bindings)),
+                                            list(set(b['repo_id'] for b in bindings)))
+
     def consumer_deleted(self, consumer_id):
         """
         Removes all bindings associated with the specified consumer.
@@ -168,6 +293,7 @@ class BindManager(object):
         collection = Bind.get_collection()
         query = dict(consumer_id=consumer_id)
         collection.remove(query)
+        update_consumer_applicability_index([consumer_id])
 
     @staticmethod
     def get_bind(consumer_id, repo_id, distributor_id):
@@ -320,6 +446,7 @@ class BindManager(object):
         if not force:
             bind_id['deleted'] = True
         collection.remove(bind_id)
+        update_consumer_applicability_index([consumer_id], [repo_id])
 
     def action_pending(self, consumer_id, repo_id, distributor_id, action, action_id):
         """
@@ -11,6 +11,7 @@ from celery import task
 
 from pulp.common.bundle import Bundle
 from pulp.server import config
+from pulp.server.agent.auth import key_store
 from pulp.server.async.tasks import Task
 from pulp.server.db.model.consumer import Consumer
 from pulp.server.exceptions import DuplicateResource, InvalidValue, \
@@ -132,6 +133,10 @@ class ConsumerManager(object):
                 'Error updating database collection while removing consumer [%s]' % consumer_id)
             raise PulpExecutionException("database-error"), None, sys.exc_info()[2]
 
+        # Only frees the memory of the cached key. The key store never serves the key of a
+        # consumer that no longer exists.
+        key_store.invalidate(consumer_id)
+
         # remove the consumer from any groups it was a member of
         group_manager = factory.consumer_group_manager()
         group_manager.remove_consumer_from_groups(consumer_id)
@@ -6,18 +6,23 @@ from celery import task
 from pymongo.errors import DuplicateKeyError
 
 from pulp.common import error_codes
+from pulp.plugins.util.misc import paginate
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.async.tasks import Task, TaskResult
 from pulp.server.db.model.consumer import Consumer, ConsumerGroup
-from pulp.server.exceptions import PulpCodedException, PulpException
+from pulp.server.db.model.criteria import Criteria
+from pulp.server.exceptions import MissingResource, PulpCodedException, PulpException
 from pulp.server.managers import factory as manager_factory
-from pulp.server.controllers.consumer import bind as bind_task, unbind as unbind_task
+from pulp.server.controllers.consumer import unbind_many
 
 
 _logger = logging.getLogger(__name__)
 
 _CONSUMER_GROUP_ID_REGEX = re.compile(r'^[\-_A-Za-z0-9]+$')  # letters, numbers, underscore, hyphen
 
+# The number of consumers unbound at a time.
+UNBIND_BATCH_SIZE = 100
+
 
 class ConsumerGroupManager(object):
     @staticmethod
@@ -256,7 +261,8 @@ class ConsumerGroupManager(object):
 
         return ConsumerGroupManager.process_group(consumer_group, error_codes.PLP0020,
                                                   {'group_id': consumer_group_id},
-                                                  agent_manager.install_content, units, options)
+                                                  agent_manager.install_content_many,
+                                                  units, options)
 
     @staticmethod
     def update_content(consumer_group_id, units, options):
@@ -276,7 +282,8 @@ class ConsumerGroupManager(object):
 
         return ConsumerGroupManager.process_group(consumer_group, error_codes.PLP0021,
                                                   {'group_id': consumer_group_id},
-                                                  agent_manager.update_content, units, options)
+                                                  agent_manager.update_content_many,
+                                                  units, options)
 
     @staticmethod
     def uninstall_content(consumer_group_id, units, options):
@@ -296,7 +303,8 @@ class ConsumerGroupManager(object):
 
         return ConsumerGroupManager.process_group(consumer_group, error_codes.PLP0022,
                                                   {'group_id': consumer_group_id},
-                                                  agent_manager.uninstall_content, units, options)
+                                                  agent_manager.uninstall_content_many,
+                                                  units, options)
 
     @staticmethod
     def bind(group_id, repo_id, distributor_id, notify_agent, binding_config, agent_options):
@@ -325,20 +333,23 @@ class ConsumerGroupManager(object):
         bind_errors = []
         additional_tasks = []
 
-        for consumer_id in group['consumer_ids']:
-            try:
-                report = bind_task(consumer_id, repo_id, distributor_id, notify_agent,
-                                   binding_config, agent_options)
-                if report.spawned_tasks:
-                    additional_tasks.extend(report.spawned_tasks)
-            except PulpException, e:
-                # Log a message so that we can debug but don't throw
-                _logger.debug(e)
-                bind_errors.append(e)
-            except Exception, e:
-                _logger.exception(e)
-                # Don't do anything else since we still want to process all the other consumers
-                bind_errors.append(e)
+        try:
+            bind_manager = manager_factory.consumer_bind_manager()
+            bindings, bind_errors = bind_manager.bind_many(
+                group['consumer_ids'], repo_id, distributor_id, notify_agent, binding_config)
+            if notify_agent:
+                agent_manager = manager_factory.consumer_agent_manager()
+                tasks, agent_errors = agent_manager.bind_many(bindings, agent_options)
+                # we only want the task's ID, not the full task
+                additional_tasks.extend({'task_id': t['task_id']} for t in tasks)
+                bind_errors.extend(agent_errors)
+        except PulpException, e:
+            # Log a message so that we can debug but don't throw
+            _logger.debug(e)
+            bind_errors.append(e)
+        except Exception, e:
+            _logger.exception(e)
+            bind_errors.append(e)
 
         bind_error = None
         if len(bind_errors) > 0:
@@ -371,18 +382,28 @@ class ConsumerGroupManager(object):
         bind_errors = []
         additional_tasks = []
 
-        for consumer_id in group['consumer_ids']:
+        bind_manager = manager_factory.consumer_bind_manager()
+        for consumer_ids in paginate(group['consumer_ids'], UNBIND_BATCH_SIZE):
             try:
-                report = unbind_task(consumer_id, repo_id, distributor_id, options)
-                if report:
-                    additional_tasks.extend(report.spawned_tasks)
+                criteria = Criteria(filters={
+                    'consumer_id': {'$in': list(consumer_ids)},
+                    'repo_id': repo_id,
+                    'distributor_id': distributor_id})
+                bindings = bind_manager.find_by_criteria(criteria)
+                bound = set(b['consumer_id'] for b in bindings)
+                for consumer_id in consumer_ids:
+                    if consumer_id not in bound:
+                        bind_id = bind_manager.bind_id(consumer_id, repo_id, distributor_id)
+                        bind_errors.append(MissingResource(bind_id=bind_id))
+                report = unbind_many(bindings, options)
+                additional_tasks.extend(report.spawned_tasks)
             except PulpException, e:
                 # Log a message so that we can debug but don't throw
                 _logger.warn(e)
                 bind_errors.append(e)
             except Exception, e:
                 bind_errors.append(e)
-                # Don't do anything else since we still want to process all the other consumers
+                # Don't do anything else since we still want to process the other consumers
 
         bind_error = None
         if len(bind_errors) > 0:
@@ -404,7 +425,8 @@ class ConsumerGroupManager(object):
         :type error_code: pulp.common.error_codes.Error
         :param error_kwargs: The keyword arguments to pass to the error code when it is instantiated
         :type error_kwargs: dict
-        :param process_method: The method to call on each consumer in the group
+        :param process_method: The bulk method called with the list of IDs of the consumers in the
+                               group.  It returns a tuple of: (spawned tasks, errors).
         :type process_method: function
         :param args: any additional arguments passed to this method will be passed to the
                      process method function
@@ -414,18 +436,15 @@ class ConsumerGroupManager(object):
         """
         errors = []
         spawned_tasks = []
-        for consumer_id in consumer_group['consumer_ids']:
-            try:
-                group_task = process_method(consumer_id, *args)
-                spawned_tasks.append(group_task)
-            except PulpException, e:
-                # Log a message so that we can debug but don't throw
-                _logger.warn(e)
-                errors.append(e)
-            except Exception, e:
-                _logger.exception(e)
-                errors.append(e)
-                # Don't do anything else since we still want to process all the other consumers
+        try:
+            spawned_tasks, errors = process_method(consumer_group['consumer_ids'], *args)
+        except PulpException, e:
+            # Log a message so that we can debug but don't throw
+            _logger.warn(e)
+            errors.append(e)
+        except Exception, e:
+            _logger.exception(e)
+            errors.append(e)
 
         error = None
         if len(errors) > 0:
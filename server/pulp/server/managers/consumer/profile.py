@@ -3,12 +3,14 @@ Contains profile management classes
 """
 from celery import task
 
+from pulp.common import util
 from pulp.plugins.loader import api as plugin_api, exceptions as plugin_exceptions
 from pulp.plugins.profiler import Profiler
 from pulp.server.async.tasks import Task
 from pulp.server.db.model.consumer import UnitProfile
 from pulp.server.exceptions import MissingResource, MissingValue
 from pulp.server.managers import factory
+from pulp.server.managers.consumer.applicability import update_consumer_applicability_index
 
 
 class ProfileManager(object):
@@ -16,7 +18,7 @@ class ProfileManager(object):
     Manage consumer installed content unit profiles.
     """
     @staticmethod
-    def create(consumer_id, content_type, profile):
+    def create(consumer_id, content_type, profile, upload_hash=None):
         """
         Create a unit profile.
         Updated if already exists.
@@ -26,22 +28,43 @@ class ProfileManager(object):
         @type content_type: str
         @param profile: The unit profile
         @type profile: object
+        @param upload_hash: The hash of the uploaded profile (optional).
+        @type upload_hash: str
         """
-        return ProfileManager.update(consumer_id, content_type, profile)
+        return ProfileManager.update(consumer_id, content_type, profile, upload_hash)
 
     @staticmethod
-    def update(consumer_id, content_type, profile):
+    def update(consumer_id, content_type, profile, upload_hash=None):
         """
         Update a unit profile.
         Created if not already exists.
 
+        The hash of the uploaded profile is stored with it. When a consumer uploads a profile
+        with the same hash as the one it uploaded previously, the stored profile is returned
+        without being updated by the profiler or written.
+
         :param consumer_id:  uniquely identifies the consumer.
         :type  consumer_id:  str
         :param content_type: The profile (content) type ID.
         :type  content_type: str
         :param profile:      The unit profile
         :type  profile:      object
+        :param upload_hash:  The hash of the uploaded profile as calculated by the consumer using
+                             pulp.common.util.profile_hash(). Calculated when not specified.
+        :type  upload_hash:  str
+        :return:             The stored unit profile.
+        :rtype:              dict
         """
+        if profile is None:
+            raise MissingValue('profile')
+        if upload_hash is None:
+            upload_hash = util.profile_hash(profile)
+        try:
+            p = ProfileManager.get_profile(consumer_id, content_type)
+        except MissingResource:
+            p = None
+        if p is not None and p.get('upload_hash') == upload_hash:
+            return p
         consumer = factory.consumer_manager().get_consumer(consumer_id)
         try:
             profiler, config = plugin_api.get_profiler_by_type(content_type)
@@ -50,18 +73,17 @@ class ProfileManager(object):
             # Profiler
             profiler, config = (Profiler(), {})
         # Allow the profiler a chance to update the profile before we save it
-        if profile is None:
-            raise MissingValue('profile')
         profile = profiler.update_profile(consumer, content_type, profile, config)
-        try:
-            p = ProfileManager.get_profile(consumer_id, content_type)
+        if p is None:
+            p = UnitProfile(consumer_id, content_type, profile, upload_hash=upload_hash)
+        else:
             p['profile'] = profile
             # We store the profile's hash anytime the profile gets altered
             p['profile_hash'] = UnitProfile.calculate_hash(profile)
-        except MissingResource:
-            p = UnitProfile(consumer_id, content_type, profile)
+            p['upload_hash'] = upload_hash
         collection = UnitProfile.get_collection()
         collection.save(p)
+        update_consumer_applicability_index([consumer_id])
         history_manager = factory.consumer_history_manager()
         history_manager.record_event(
             consumer_id,
@@ -81,6 +103,7 @@ class ProfileManager(object):
         profile = ProfileManager.get_profile(consumer_id, content_type)
         collection = UnitProfile.get_collection()
         collection.remove(profile)
+        update_consumer_applicability_index([consumer_id])
 
     def consumer_deleted(self, id):
         """
@@ -92,6 +115,7 @@ class ProfileManager(object):
         collection = UnitProfile.get_collection()
         for p in self.get_profiles(id):
             collection.remove(p)
+        update_consumer_applicability_index([id])
 
     @staticmethod
     def get_profile(consumer_id, content_type):
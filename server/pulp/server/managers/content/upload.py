@@ -214,17 +214,19 @@ class ContentUploadManager(object):
 
         # Invoke the importer
         try:
-            result = importer_instance.upload_unit(transfer_repo, unit_type_id, unit_key,
-                                                   unit_metadata, file_path, conduit, call_config)
-            if not result['success_flag']:
-                raise PulpCodedException(
-                    error_code=error_codes.PLP0047, repo_id=transfer_repo.id,
-                    importer_id=repo_importer['importer_type_id'],
-                    unit_type=unit_type_id, summary=result['summary'], details=result['details']
-                )
-
-            repo_controller.rebuild_content_unit_counts(repo_obj)
-            repo_controller.update_last_unit_added(repo_obj.repo_id)
+            with repo_controller.track_unit_counts(repo_obj):
+                result = importer_instance.upload_unit(transfer_repo, unit_type_id, unit_key,
+                                                       unit_metadata, file_path, conduit,
+                                                       call_config)
+                if not result['success_flag']:
+                    raise PulpCodedException(
+                        error_code=error_codes.PLP0047, repo_id=transfer_repo.id,
+                        importer_id=repo_importer['importer_type_id'],
+                        unit_type=unit_type_id, summary=result['summary'],
+                        details=result['details']
+                    )
+
+                repo_controller.update_last_unit_added(repo_obj.repo_id)
             return result
 
         except PulpException:
@@ -10,6 +10,7 @@ from pulp.plugins.conduits.repo_config import RepoConfigConduit
 from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api
 from pulp.server.async.tasks import Task
+from pulp.server.content.web import cache as content_cache
 from pulp.server.db.model.repo_group import RepoGroup, RepoGroupDistributor
 from pulp.server.exceptions import (InvalidValue, MissingResource, PulpDataException,
                                     PulpExecutionException)
@@ -225,6 +226,8 @@ class RepoGroupDistributorManager(object):
 
             if not force:
                 raise PulpExecutionException(), None, sys.exc_info()[2]
+        finally:
+            content_cache.touch_publish_marker()
 
         # Clean up the database
         distributor_coll.remove(distributor)
@@ -10,6 +10,7 @@ from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api
 from pulp.plugins.model import PublishReport
 from pulp.server.async.tasks import Task
+from pulp.server.content.web import cache as content_cache
 from pulp.server.db.model.repo_group import RepoGroupPublishResult, RepoGroupDistributor
 from pulp.server.managers import factory as manager_factory
 from pulp.server.managers.repo import _common as common_utils
@@ -68,7 +69,11 @@ class RepoGroupPublishManager(object):
         # Perform the publish
         publish_start_timestamp = _now_timestamp()
         try:
-            report = distributor_instance.publish_group(group, conduit, call_config)
+            try:
+                report = distributor_instance.publish_group(group, conduit, call_config)
+            finally:
+                # Published content may have changed even if the publish failed
+                content_cache.touch_publish_marker()
         except Exception, e:
             publish_end_timestamp = _now_timestamp()
 
@@ -151,6 +151,27 @@ class RepoUnitAssociationManager(object):
         :return:    generator of pulp.server.db.model.ContentUnit instances
         :rtype:     generator
         """
+        association_q, unit_q = RepoUnitAssociationManager._criteria_queries(source_repo, criteria)
+        return repo_controller.find_repo_content_units(
+            repository=source_repo,
+            repo_content_unit_q=association_q,
+            units_q=unit_q,
+            unit_fields=criteria['unit_fields'],
+            yield_content_unit=True)
+
+    @staticmethod
+    def _criteria_queries(source_repo, criteria):
+        """
+        Translate a criteria into queries for the associations and the units of a repository.
+
+        :param source_repo: repository to look for units in
+        :type  source_repo: pulp.server.db.model.Repository
+        :param criteria:    criteria object to use for the search parameters
+        :type  criteria:    pulp.server.db.model.criteria.UnitAssociationCriteria
+
+        :return:    tuple of the query for the associations and the query for the units
+        :rtype:     tuple of mongoengine.Q
+        """
         association_q = mongoengine.Q(__raw__=criteria.association_spec)
         if criteria.type_ids:
             association_q &= mongoengine.Q(unit_type_id__in=criteria.type_ids)
@@ -174,12 +195,7 @@ class RepoUnitAssociationManager(object):
                 unit_spec_t['_content_type_id'] = unit_type_id
                 unit_q |= mongoengine.Q(__raw__=unit_spec_t)
 
-        return repo_controller.find_repo_content_units(
-            repository=source_repo,
-            repo_content_unit_q=association_q,
-            units_q=unit_q,
-            unit_fields=criteria['unit_fields'],
-            yield_content_unit=True)
+        return association_q, unit_q
 
     @staticmethod
     def associate_from_repo(source_repo_id, dest_repo_id, criteria,
@@ -194,10 +210,12 @@ class RepoUnitAssociationManager(object):
         unit list and the importer metadata and takes place before the
         destination repository is called.
 
-        Pulp does not actually perform the associations as part of this call.
+        Pulp does not usually perform the associations as part of this call.
         The unit list is determined and passed to the destination repository's
         importer. It is the job of the importer to make the associate calls
-        back into Pulp where applicable.
+        back into Pulp where applicable. If all of the units are mongoengine
+        units and the importer indicates that copying them only requires them
+        to be associated, Pulp associates them itself without loading them.
 
         If criteria is None, the effect of this call is to copy the source
         repository's associations into the destination repository.
@@ -236,9 +254,28 @@ class RepoUnitAssociationManager(object):
         # of importing either the selected units or all of the units
         if not source_repo_unit_types.issubset(supported_type_ids):
             raise exceptions.PulpCodedException(error_code=error_codes.PLP0044)
+        # Convert the two repos into the plugin API model
+        transfer_dest_repo = dest_repo.to_transfer_repo()
+        transfer_source_repo = source_repo.to_transfer_repo()
+
+        importer_instance, plugin_config = plugin_api.get_importer_by_id(
+            dest_repo_importer.importer_type_id)
+
+        call_config = PluginCallConfiguration(plugin_config, dest_repo_importer.config,
+                                              import_config_override)
+
         transfer_units = None
         # if all source types have been converted to mongo - search via new style
         if source_repo_unit_types.issubset(set(plugin_api.list_unit_models())):
+            if importer_instance.can_copy_associations(transfer_source_repo, transfer_dest_repo,
+                                                       call_config):
+                association_q, unit_q = RepoUnitAssociationManager._criteria_queries(
+                    source_repo, criteria)
+                with repo_controller.track_unit_counts(dest_repo):
+                    unit_ids = repo_controller.copy_repo_content_units(
+                        source_repo, dest_repo, repo_content_unit_q=association_q,
+                        units_q=unit_q)
+                return {'units_successful': unit_ids}
             transfer_units = RepoUnitAssociationManager._units_from_criteria(source_repo, criteria)
         else:
             # else, search via old style
@@ -253,32 +290,23 @@ class RepoUnitAssociationManager(object):
             if associate_us is not None:
                 transfer_units = create_transfer_units(associate_us)
 
-        # Convert the two repos into the plugin API model
-        transfer_dest_repo = dest_repo.to_transfer_repo()
-        transfer_source_repo = source_repo.to_transfer_repo()
-
         # Invoke the importer
-        importer_instance, plugin_config = plugin_api.get_importer_by_id(
-            dest_repo_importer.importer_type_id)
-
-        call_config = PluginCallConfiguration(plugin_config, dest_repo_importer.config,
-                                              import_config_override)
         conduit = ImportUnitConduit(
             source_repo_id, dest_repo_id, source_repo_importer.importer_type_id,
             dest_repo_importer.importer_type_id)
 
         try:
-            copied_units = importer_instance.import_units(
-                transfer_source_repo, transfer_dest_repo, conduit, call_config,
-                units=transfer_units)
+            # The unit counts of the destination repository are updated when the import is done
+            with repo_controller.track_unit_counts(dest_repo):
+                copied_units = importer_instance.import_units(
+                    transfer_source_repo, transfer_dest_repo, conduit, call_config,
+                    units=transfer_units)
             if isinstance(copied_units, tuple):
                 suc_units_ids = [u.to_id_dict() for u in copied_units[0] if u is not None]
                 unsuc_units_ids = [u.to_id_dict() for u in copied_units[1]]
-                repo_controller.rebuild_content_unit_counts(dest_repo)
                 return {'units_successful': suc_units_ids,
                         'units_failed_signature_filter': unsuc_units_ids}
             unit_ids = [u.to_id_dict() for u in copied_units if u is not None]
-            repo_controller.rebuild_content_unit_counts(dest_repo)
             return {'units_successful': unit_ids}
         except Exception as e:
             msg = _('Exception from importer [%(i)s] while importing units into repository [%(r)s]')
@@ -379,23 +407,25 @@ class RepoUnitAssociationManager(object):
 
         collection = RepoContentUnit.get_collection()
 
-        for unit_type_id, unit_ids in unit_map.items():
-            spec = {
-                'repo_id': repo_id,
-                'unit_type_id': unit_type_id,
-                'unit_id': {'$in': unit_ids}
-            }
-            collection.remove(spec)
-
-            unique_count = sum(
-                1 for unit_id in unit_ids if not RepoUnitAssociationManager.association_exists(
-                    repo_id, unit_id, unit_type_id))
-            if not unique_count:
-                continue
-
-            repo_controller.update_unit_count(repo_id, unit_type_id, -unique_count)
-
-        repo_controller.update_last_unit_removed(repo_id)
+        # Apply the changes to the unit counts and the last removed time in one update
+        with repo_controller.track_unit_counts(repo):
+            for unit_type_id, unit_ids in unit_map.items():
+                spec = {
+                    'repo_id': repo_id,
+                    'unit_type_id': unit_type_id,
+                    'unit_id': {'$in': unit_ids}
+                }
+                collection.remove(spec)
+
+                unique_count = sum(
+                    1 for unit_id in unit_ids if not RepoUnitAssociationManager.association_exists(
+                        repo_id, unit_id, unit_type_id))
+                if not unique_count:
+                    continue
+
+                repo_controller.update_unit_count(repo_id, unit_type_id, -unique_count)
+
+            repo_controller.update_last_unit_removed(repo_id)
 
         # Match the return type/format as copy
         serializable_units = [u.to_id_dict() for u in transfer_units]
@@ -13,6 +13,7 @@ import isodate
 
 from pulp.common import dateutils
 from pulp.server import exceptions
+from pulp.server.db.model import ScheduleVersion
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.db.model.dispatch import ScheduledCall
 
@@ -69,6 +70,17 @@ def get_enabled():
     return ScheduledCall.get_collection().query(criteria)
 
 
+def get_enabled_ids():
+    """
+    Get the IDs of schedules that are enabled, that is, their "enabled" attribute is True
+
+    :return:    set of schedule IDs
+    :rtype:     set
+    """
+    cursor = ScheduledCall.get_collection().find({'enabled': True}, projection={'_id': 1})
+    return set(str(call['_id']) for call in cursor)
+
+
 def get_updated_since(seconds):
     """
     Get schedules that are enabled, that is, their "enabled" attribute is True,
@@ -106,6 +118,7 @@ def delete(schedule_id):
         query=spec, remove=True)
     if schedule is None:
         raise exceptions.MissingResource(schedule_id=schedule_id)
+    ScheduleVersion.increment()
 
 
 def delete_by_resource(resource):
@@ -116,6 +129,7 @@ def delete_by_resource(resource):
     :type  resource:    basestring
     """
     ScheduledCall.get_collection().remove({'resource': resource})
+    ScheduleVersion.increment()
 
 
 def update(schedule_id, delta):
@@ -161,6 +175,7 @@ def update(schedule_id, delta):
         query=spec, update={'$set': delta}, new=True)
     if schedule is None:
         raise exceptions.MissingResource(schedule_id=schedule_id)
+    ScheduleVersion.increment()
     return ScheduledCall.from_db(schedule)
 
 
@@ -181,6 +196,7 @@ def reset_failure_count(schedule_id):
         'last_updated': time.time(),
     }}
     ScheduledCall.get_collection().update(spec=spec, document=delta)
+    ScheduleVersion.increment()
 
 
 def increment_failure_count(schedule_id):
@@ -202,6 +218,7 @@ def increment_failure_count(schedule_id):
     schedule = ScheduledCall.get_collection().find_and_modify(
         query=spec, update=delta, new=True)
     if schedule:
+        ScheduleVersion.increment()
         scheduled_call = ScheduledCall.from_db(schedule)
         if scheduled_call.failure_threshold is None or not scheduled_call.enabled:
             return
@@ -214,6 +231,7 @@ def increment_failure_count(schedule_id):
                 'last_updated': time.time(),
             }}
             ScheduledCall.get_collection().update(spec, delta)
+            ScheduleVersion.increment()
 
 
 def validate_keys(options, valid_keys, all_required=False):
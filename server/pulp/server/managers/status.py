@@ -6,11 +6,18 @@ from pkg_resources import get_distribution
 
 from pulp.server.async.celery_instance import celery
 from pulp.server.db import connection
-from pulp.server.db.model import Worker
+from pulp.server.db.model import TaskStatus, Worker
 
 
 _logger = getLogger(__name__)
 
+# The upper bounds, in seconds, of the buckets of the task metrics histograms. Durations greater
+# than the last bound are counted in the '+Inf' bucket.
+TASK_METRICS_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600)
+
+# The task metrics that are aggregated by task type.
+TASK_METRICS_TIMES = ('wall_time', 'cpu_time', 'mongo_time')
+
 
 def get_version():
     """
@@ -62,3 +69,67 @@ def get_broker_conn_status():
         _logger.exception('Connection to broker failed during status check!')
         # if the above was not successful for any reason, return False
         return {'connected': False}
+
+
+def _bucket_expression(field):
+    """
+    Build an aggregation expression that evaluates to the label of the histogram bucket that the
+    value of the given field falls in.
+
+    :param field: The field path, such as '$metrics.wall_time'
+    :type  field: str
+
+    :return: aggregation expression
+    :rtype:  dict or str
+    """
+    expression = '+Inf'
+    for bound in reversed(TASK_METRICS_BUCKETS):
+        expression = {'$cond': [{'$lte': [field, bound]}, '%g' % bound, expression]}
+    return expression
+
+
+def _histograms(pipeline, key, field):
+    """
+    Run an aggregation that groups the task status collection by key and histogram bucket and fold
+    the results into histograms.
+
+    :param pipeline: The stages that select the documents to aggregate.
+    :type  pipeline: list
+    :param key:      The field path that the histograms are keyed by, such as '$task_type'
+    :type  key:      str
+    :param field:    The field path of the measured value.
+    :type  field:    str
+
+    :return: Dictionary of histograms keyed by the value of key. Each histogram has the number of
+             values, their sum and the number of values in each bucket.
+    :rtype:  dict
+    """
+    group = {'$group': {'_id': {'key': key, 'bucket': _bucket_expression(field)},
+                        'count': {'$sum': 1},
+                        'sum': {'$sum': field}}}
+    histograms = {}
+    for result in TaskStatus._get_collection().aggregate(pipeline + [group]):
+        histogram = histograms.setdefault(result['_id']['key'],
+                                          {'count': 0, 'sum': 0.0, 'buckets': {}})
+        histogram['count'] += result['count']
+        histogram['sum'] += result['sum']
+        histogram['buckets'][result['_id']['bucket']] = result['count']
+    return histograms
+
+
+def get_task_metrics():
+    """
+    Aggregate the metrics recorded in the task statuses into histograms. The wall, CPU and MongoDB
+    times are aggregated by task type and the step durations by step type.
+
+    :returns: Dictionary of histograms keyed by metric name and then by task or step type
+    :rtype:   dict
+    """
+    task_metrics = {}
+    for name in TASK_METRICS_TIMES:
+        match = {'$match': {'metrics.%s' % name: {'$exists': True}}}
+        task_metrics[name] = _histograms([match], '$task_type', '$metrics.%s' % name)
+    steps = [{'$match': {'metrics.steps': {'$exists': True}}}, {'$unwind': '$metrics.steps'}]
+    task_metrics['steps'] = _histograms(steps, '$metrics.steps.step_type',
+                                        '$metrics.steps.duration')
+    return task_metrics
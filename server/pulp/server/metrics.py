@@ -0,0 +1,211 @@
+"""
+Lightweight instrumentation of Pulp tasks.
+
+A TaskMetrics collector is started when a task begins executing in a worker and is stopped when
+it completes. While it is running, the collector accumulates the wall and CPU time of the task, the
+number and duration of the MongoDB commands it issues, the number of bytes it downloads and
+writes to storage, and the duration of each plugin Step it processes. The result is recorded in
+the "metrics" field of the task's TaskStatus.
+
+Workers execute one task per process at a time, so the collector is kept per process rather than
+per thread. This ensures that work done in helper threads, such as the download threads of
+nectar, is attributed to the task.
+"""
+import os
+import resource
+import threading
+import time
+
+from pymongo import monitoring
+
+
+_current = None
+_lock = threading.Lock()
+
+
+def _cpu_time():
+    """
+    :return: The user and system CPU time consumed by this process, in seconds.
+    :rtype:  float
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class TaskMetrics(object):
+    """
+    Accumulates the metrics of a single task.
+
+    :ivar wall_time:        The elapsed time of the task, in seconds.
+    :type wall_time:        float
+    :ivar cpu_time:         The CPU time consumed while the task was running, in seconds.
+    :type cpu_time:         float
+    :ivar mongo_operations: The number of MongoDB commands that were issued.
+    :type mongo_operations: int
+    :ivar mongo_time:       The total duration of the MongoDB commands, in seconds.
+    :type mongo_time:       float
+    :ivar bytes_downloaded: The number of bytes that were downloaded.
+    :type bytes_downloaded: int
+    :ivar bytes_written:    The number of bytes that were written to content storage.
+    :type bytes_written:    int
+    :ivar steps:            The total duration of each step type, in seconds, keyed by step type.
+    :type steps:            dict
+    """
+
+    def __init__(self):
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.mongo_operations = 0
+        self.mongo_time = 0.0
+        self.bytes_downloaded = 0
+        self.bytes_written = 0
+        self.steps = {}
+        self._started = None
+
+    def start(self):
+        """
+        Start measuring the wall and CPU time.
+        """
+        self._started = (time.time(), _cpu_time())
+
+    def stop(self):
+        """
+        Stop measuring the wall and CPU time.
+        """
+        wall_started, cpu_started = self._started
+        self.wall_time = time.time() - wall_started
+        self.cpu_time = _cpu_time() - cpu_started
+
+    def to_dict(self):
+        """
+        :return: The metrics in the form that is stored in the TaskStatus. The steps are a list of
+                 dicts with "step_type" and "duration" keys so that they can be aggregated.
+        :rtype:  dict
+        """
+        steps = [{'step_type': step_type, 'duration': duration}
+                 for step_type, duration in sorted(self.steps.iteritems())]
+        return {'wall_time': self.wall_time,
+                'cpu_time': self.cpu_time,
+                'mongo_operations': self.mongo_operations,
+                'mongo_time': self.mongo_time,
+                'bytes_downloaded': self.bytes_downloaded,
+                'bytes_written': self.bytes_written,
+                'steps': steps}
+
+
+def start():
+    """
+    Start collecting the metrics of the task that is executing in this process. Any collection
+    already in progress is discarded.
+
+    :return: The new collector.
+    :rtype:  TaskMetrics
+    """
+    global _current
+    task_metrics = TaskMetrics()
+    task_metrics.start()
+    _current = task_metrics
+    return task_metrics
+
+
+def stop():
+    """
+    Stop collecting the metrics of the task that is executing in this process.
+
+    :return: The collected metrics, or None if no collection was in progress.
+    :rtype:  dict or None
+    """
+    global _current
+    task_metrics, _current = _current, None
+    if task_metrics is None:
+        return None
+    task_metrics.stop()
+    return task_metrics.to_dict()
+
+
+def add_mongo_operation(duration):
+    """
+    Record a MongoDB command.
+
+    :param duration: The duration of the command, in seconds.
+    :type  duration: float
+    """
+    task_metrics = _current
+    if task_metrics is None:
+        return
+    with _lock:
+        task_metrics.mongo_operations += 1
+        task_metrics.mongo_time += duration
+
+
+def add_bytes_downloaded(count):
+    """
+    Record downloaded bytes.
+
+    :param count: The number of bytes.
+    :type  count: int
+    """
+    task_metrics = _current
+    if task_metrics is None or not count:
+        return
+    with _lock:
+        task_metrics.bytes_downloaded += count
+
+
+def add_file_written(path):
+    """
+    Record a file written to content storage. The file is only examined while a collection is in
+    progress.
+
+    :param path: The absolute path to the file.
+    :type  path: str
+    """
+    task_metrics = _current
+    if task_metrics is None:
+        return
+    size = os.path.getsize(path)
+    with _lock:
+        task_metrics.bytes_written += size
+
+
+def add_step(step_type, duration):
+    """
+    Record the processing of a step.
+
+    :param step_type: The type of the step.
+    :type  step_type: basestring
+    :param duration:  The duration of the step, in seconds.
+    :type  duration:  float
+    """
+    task_metrics = _current
+    if task_metrics is None:
+        return
+    with _lock:
+        task_metrics.steps[step_type] = task_metrics.steps.get(step_type, 0.0) + duration
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Records the MongoDB commands issued by this process in the current TaskMetrics.
+    """
+
+    def started(self, event):
+        """
+        :param event: The command started event.
+        :type  event: pymongo.monitoring.CommandStartedEvent
+        """
+        pass
+
+    def succeeded(self, event):
+        """
+        :param event: The command succeeded event.
+        :type  event: pymongo.monitoring.CommandSucceededEvent
+        """
+        add_mongo_operation(event.duration_micros / 1000000.0)
+
+    def failed(self, event):
+        """
+        :param event: The command failed event.
+        :type  event: pymongo.monitoring.CommandFailedEvent
+        """
+        add_mongo_operation(event.duration_micros / 1000000.0)
@@ -5,8 +5,9 @@ from contextlib import contextmanager
 from gettext import gettext as _
 import hashlib
 import logging
+import mmap
 import os
-from shutil import copy, Error
+from shutil import copy, copyfileobj, copymode, Error
 
 from pulp.common import error_codes
 
@@ -324,17 +325,17 @@ def sanitize_checksum_type(checksum_type):
     return lowercase_checksum_type
 
 
-def calculate_checksums(file_object, checksum_types):
+def _hashers(checksum_types):
     """
-    Calculate multiple checksums for the contents of an open file.
+    Create a hasher for each checksum type.
 
-    :param file_object: an open file
-    :type  file_object: file
     :param checksum_types: list of checksum types. Must be in CHECKSUM_FUNCTIONS.
     :type  checksum_types: list
 
-    :return:    dict where keys are checksum types and values are checksum values.
+    :return:    dict where keys are checksum types and values are hashers.
     :rtype:     dict
+
+    :raises InvalidChecksumType: if a checksum type is not in CHECKSUM_FUNCTIONS
     """
     hashers = {}
     for checksum_type in checksum_types:
@@ -342,6 +343,102 @@ def calculate_checksums(file_object, checksum_types):
             hashers[checksum_type] = CHECKSUM_FUNCTIONS[checksum_type]()
         except KeyError:
             raise InvalidChecksumType('Unknown checksum type [%s]' % checksum_type)
+    return hashers
+
+
+def _hexdigests(hashers):
+    """
+    :param hashers: dict where keys are checksum types and values are hashers.
+    :type  hashers: dict
+
+    :return:    dict where keys are checksum types and values are checksum values.
+    :rtype:     dict
+    """
+    return dict((checksum_type, hasher.hexdigest()) for checksum_type, hasher in hashers.items())
+
+
+class ChecksumStream(object):
+    """
+    A file-like object that calculates checksums of the bytes read from or written to the
+    file it wraps. It can be given as the destination of a download or copy so that the content
+    is hashed as it arrives, rather than read again once it has been written. Other attributes
+    are those of the wrapped file. Seeking the stream invalidates the checksums.
+
+    :ivar file_object: the wrapped file
+    :type file_object: file
+    """
+
+    def __init__(self, file_object, checksum_types):
+        """
+        :param file_object: the file to wrap
+        :type  file_object: file
+        :param checksum_types: list of checksum types. Must be in CHECKSUM_FUNCTIONS.
+        :type  checksum_types: list
+
+        :raises InvalidChecksumType: if a checksum type is not in CHECKSUM_FUNCTIONS
+        """
+        self.file_object = file_object
+        self._hashers = _hashers(checksum_types)
+
+    def __getattr__(self, name):
+        return getattr(self.file_object, name)
+
+    def update(self, bits):
+        """
+        Add bits to the checksums without passing them to the wrapped file.
+
+        :param bits: the bits
+        :type  bits: str
+        """
+        for hasher in self._hashers.values():
+            hasher.update(bits)
+
+    def read(self, size=-1):
+        """
+        Read from the wrapped file.
+
+        :param size: the maximum number of bytes to read, all of them if negative
+        :type  size: int
+
+        :return:    the bits that were read
+        :rtype:     str
+        """
+        bits = self.file_object.read(size)
+        self.update(bits)
+        return bits
+
+    def write(self, bits):
+        """
+        Write to the wrapped file.
+
+        :param bits: the bits to write
+        :type  bits: str
+        """
+        self.update(bits)
+        self.file_object.write(bits)
+
+    def hexdigests(self):
+        """
+        :return:    dict where keys are checksum types and values are checksum values of the bits
+                    read or written so far.
+        :rtype:     dict
+        """
+        return _hexdigests(self._hashers)
+
+
+def calculate_checksums(file_object, checksum_types):
+    """
+    Calculate multiple checksums for the contents of an open file.
+
+    :param file_object: an open file
+    :type  file_object: file
+    :param checksum_types: list of checksum types. Must be in CHECKSUM_FUNCTIONS.
+    :type  checksum_types: list
+
+    :return:    dict where keys are checksum types and values are checksum values.
+    :rtype:     dict
+    """
+    hashers = _hashers(checksum_types)
 
     file_object.seek(0)
     bits = file_object.read(CHECKSUM_CHUNK_SIZE)
@@ -350,4 +447,61 @@ def calculate_checksums(file_object, checksum_types):
             hasher.update(bits)
         bits = file_object.read(CHECKSUM_CHUNK_SIZE)
 
-    return dict((checksum_type, hasher.hexdigest()) for checksum_type, hasher in hashers.items())
+    return _hexdigests(hashers)
+
+
+def calculate_file_checksums(path, checksum_types):
+    """
+    Calculate multiple checksums for the contents of a file. The file is memory mapped so that
+    the hashers read the page cache directly instead of copies of each chunk. Hashing releases the
+    GIL, so files may be hashed by several threads at once.
+
+    :param path: the absolute path to the file
+    :type  path: str
+    :param checksum_types: list of checksum types. Must be in CHECKSUM_FUNCTIONS.
+    :type  checksum_types: list
+
+    :return:    dict where keys are checksum types and values are checksum values.
+    :rtype:     dict
+
+    :raises IOError: if the file cannot be read
+    """
+    hashers = _hashers(checksum_types)
+
+    with open(path, 'rb') as file_object:
+        size = os.fstat(file_object.fileno()).st_size
+        # empty files cannot be mapped
+        if size:
+            mapped = mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for offset in xrange(0, size, CHECKSUM_CHUNK_SIZE):
+                    bits = buffer(mapped, offset, CHECKSUM_CHUNK_SIZE)
+                    for hasher in hashers.values():
+                        hasher.update(bits)
+            finally:
+                mapped.close()
+
+    return _hexdigests(hashers)
+
+
+def copy_with_checksums(source, destination, checksum_types):
+    """
+    Copy a file and its permission bits, calculating multiple checksums for its contents as it is
+    copied.
+
+    :param source: the absolute path to the file to copy
+    :type  source: str
+    :param destination: the absolute path to copy it to
+    :type  destination: str
+    :param checksum_types: list of checksum types. Must be in CHECKSUM_FUNCTIONS.
+    :type  checksum_types: list
+
+    :return:    dict where keys are checksum types and values are checksum values.
+    :rtype:     dict
+    """
+    with open(source, 'rb') as source_file:
+        with open(destination, 'wb') as destination_file:
+            stream = ChecksumStream(destination_file, checksum_types)
+            copyfileobj(source_file, stream, CHECKSUM_CHUNK_SIZE)
+    copymode(source, destination)
+    return stream.hexdigests()
@@ -61,3 +61,43 @@ class ExceptionHandlerMiddleware(object):
         except Exception, e:
             logger.exception(e)
             raise
+
+    def process_response(self, request, response):
+        """
+        Catch exceptions raised while the body of a streaming response is written. The status and
+        headers have been sent by then, so the response cannot be replaced with an error. The
+        exception is logged with the request, and the body ends where the failure happened; for
+        a JSON response, the client receives a document that does not parse.
+
+        :param request: WSGI request object
+        :type request: django.core.handlers.wsgi.WSGIRequest
+        :param response: response to the request
+        :type response: django.http.HttpResponse
+
+        :return: the response
+        :rtype: django.http.HttpResponse
+        """
+        if getattr(response, 'streaming', False):
+            response.streaming_content = _log_stream_errors(request, response.streaming_content)
+        return response
+
+
+def _log_stream_errors(request, content):
+    """
+    Pass through the chunks of a streaming response body, logging any exception raised while
+    producing them along with the request being answered.
+
+    :param request: WSGI request object
+    :type request: django.core.handlers.wsgi.WSGIRequest
+    :param content: chunks of the response body
+    :type content: iterable
+
+    :return: chunks of the response body
+    :rtype: generator
+    """
+    try:
+        for chunk in content:
+            yield chunk
+    except Exception:
+        logger.exception(_('Streaming the response to %(method)s %(path)s failed.') %
+                         {'method': request.method, 'path': request.get_full_path()})
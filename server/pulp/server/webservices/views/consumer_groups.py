@@ -151,6 +151,7 @@ class ConsumerGroupSearchView(search.SearchView):
     """
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
     manager = query.ConsumerGroupQueryManager()
+    secondary_reads = True
     serializer = staticmethod(serialize)
 
 
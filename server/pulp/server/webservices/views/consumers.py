@@ -6,7 +6,8 @@ from pulp.common import tags
 from pulp.server.async.tasks import TaskResult
 from pulp.server.auth import authorization
 from pulp.server.controllers import consumer as consumer_controller
-from pulp.server.db import model
+from pulp.server.db import connection, model
+from pulp.server.db.model.consumer import Bind, Consumer
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.exceptions import (InvalidValue, MissingResource, MissingValue,
                                     OperationPostponed, UnsupportedValue)
@@ -19,9 +20,9 @@ from pulp.server.managers.consumer.applicability import (regenerate_applicabilit
 from pulp.server.managers.schedule.consumer import (UNIT_INSTALL_ACTION, UNIT_UNINSTALL_ACTION,
                                                     UNIT_UPDATE_ACTION)
 from pulp.server.webservices.views import search
-from pulp.server.webservices.views.decorators import auth_required
+from pulp.server.webservices.views.decorators import auth_required, conditional_get
 from pulp.server.webservices.views.serializers import binding as serial_binding
-from pulp.server.webservices.views.util import (_ensure_input_encoding,
+from pulp.server.webservices.views.util import (_ensure_input_encoding, documents_etag,
                                                 generate_json_response,
                                                 generate_json_response_with_pulp_encoder,
                                                 generate_redirect_response,
@@ -102,6 +103,32 @@ def scheduled_unit_management_obj(scheduled_call):
     return scheduled_call
 
 
+def _consumers_etag(request, consumer_id=None):
+    """
+    Compute the entity tag of one or all consumers, including their bindings when they are
+    requested.
+
+    :param request: WSGI request object
+    :type  request: django.core.handlers.wsgi.WSGIRequest
+    :param consumer_id: id of the requested consumer, None for all consumers
+    :type  consumer_id: str
+
+    :return: the entity tag, None if there are no consumers to tag
+    :rtype:  str
+    """
+    details = request.GET.get('details', 'false').lower() == 'true'
+    bindings = request.GET.get('bindings', 'false').lower() == 'true' or details
+    if consumer_id is None:
+        queries = [(Consumer.get_collection(), {})]
+        if bindings:
+            queries.append((Bind.get_collection(), {}))
+    else:
+        queries = [(Consumer.get_collection(), {'id': consumer_id})]
+        if bindings:
+            queries.append((Bind.get_collection(), {'consumer_id': consumer_id}))
+    return documents_etag(queries, (bindings,))
+
+
 def expand_consumers(details, bindings, consumers):
     """
     Expand a list of users based on the flag specified in the query parameters.
@@ -146,6 +173,7 @@ class ConsumersView(View):
     """
 
     @auth_required(authorization.READ)
+    @conditional_get(etag_func=_consumers_etag)
     def get(self, request):
         """
         List the available consumers.
@@ -217,6 +245,7 @@ class ConsumerResourceView(View):
     """
 
     @auth_required(authorization.READ)
+    @conditional_get(etag_func=_consumers_etag)
     def get(self, request, consumer_id):
         """
         Return a serialized object representing the requested consumer.
@@ -288,6 +317,7 @@ class ConsumerSearchView(search.SearchView):
     optional_bool_fields = ('details', 'bindings')
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
     manager = query_manager.ConsumerQueryManager()
+    secondary_reads = True
 
     @classmethod
     def get_results(cls, query, search_method, options, *args):
@@ -320,6 +350,8 @@ class ConsumerBindingSearchView(search.SearchView):
     """
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
     manager = bind.BindManager()
+    streaming = True
+    secondary_reads = True
 
 
 class ConsumerProfileSearchView(search.SearchView):
@@ -328,6 +360,8 @@ class ConsumerProfileSearchView(search.SearchView):
     """
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
     manager = profile.ProfileManager()
+    streaming = True
+    secondary_reads = True
 
 
 class ConsumerRepoBindingView(View):
@@ -713,9 +747,10 @@ class ConsumerProfilesView(View):
         body = request.body_as_json
         content_type = body.get('content_type')
         profile = body.get('profile')
+        upload_hash = body.get('upload_hash')
 
         manager = factory.consumer_profile_manager()
-        new_profile = manager.create(consumer_id, content_type, profile)
+        new_profile = manager.create(consumer_id, content_type, profile, upload_hash)
         if content_type is None:
             raise MissingValue('content_type')
         link = add_link_profile(new_profile)
@@ -771,9 +806,10 @@ class ConsumerProfileResourceView(View):
 
         body = request.body_as_json
         profile = body.get('profile')
+        upload_hash = body.get('upload_hash')
 
         manager = factory.consumer_profile_manager()
-        consumer = manager.update(consumer_id, content_type, profile)
+        consumer = manager.update(consumer_id, content_type, profile, upload_hash)
 
         add_link_profile(consumer)
 
@@ -841,7 +877,9 @@ class ConsumerContentApplicabilityView(View):
         except InvalidValue, e:
             return HttpResponseBadRequest(str(e))
 
-        response = retrieve_consumer_applicability(consumer_criteria, content_types)
+        # applicability reports can be large, so they are served by secondaries when allowed
+        with connection.secondary_reads():
+            response = retrieve_consumer_applicability(consumer_criteria, content_types)
         return generate_json_response_with_pulp_encoder(response)
 
     def _get_consumer_criteria(self, request):
@@ -1,3 +1,4 @@
+from datetime import datetime
 from gettext import gettext as _
 
 from django.core.urlresolvers import reverse
@@ -8,6 +9,7 @@ from pulp.common import tags
 from pulp.common.tags import (ACTION_REFRESH_ALL_CONTENT_SOURCES,
                               ACTION_REFRESH_CONTENT_SOURCE,
                               RESOURCE_CONTENT_SOURCE)
+from pulp.plugins.types import database as types_db
 from pulp.server import constants
 from pulp.server.auth import authorization
 from pulp.server.content.sources.container import ContentContainer
@@ -19,14 +21,52 @@ from pulp.server.managers import factory
 from pulp.server.managers.content import query as content_query
 from pulp.server.managers.content import orphan as content_orphan
 from pulp.server.webservices.views import search
-from pulp.server.webservices.views.decorators import auth_required
+from pulp.server.webservices.views.decorators import auth_required, conditional_get
 from pulp.server.webservices.views.serializers import content as serial_content
-from pulp.server.webservices.views.util import (generate_json_response,
+from pulp.server.webservices.views.util import (documents_etag, generate_json_response,
                                                 generate_json_response_with_pulp_encoder,
                                                 generate_redirect_response,
                                                 parse_json_body)
 
 
+def _unit_etag(request, type_id, unit_id):
+    """
+    Compute the entity tag of a content unit.
+
+    :param request: WSGI request object
+    :type  request: django.core.handlers.wsgi.WSGIRequest
+    :param type_id: type of the content unit
+    :type  type_id: str
+    :param unit_id: unique id of the content unit
+    :type  unit_id: str
+
+    :return: the entity tag, None if the unit does not exist
+    :rtype:  str
+    """
+    return documents_etag([(types_db.type_units_collection(type_id), {'_id': unit_id})])
+
+
+def _unit_last_modified(request, type_id, unit_id):
+    """
+    Get the time a content unit was last updated.
+
+    :param request: WSGI request object
+    :type  request: django.core.handlers.wsgi.WSGIRequest
+    :param type_id: type of the content unit
+    :type  type_id: str
+    :param unit_id: unique id of the content unit
+    :type  unit_id: str
+
+    :return: the time of the last update in UTC, None if it is not known
+    :rtype:  datetime.datetime
+    """
+    collection = types_db.type_units_collection(type_id)
+    unit = collection.find_one({'_id': unit_id}, projection={'_last_updated': 1})
+    if not unit or not unit.get('_last_updated'):
+        return None
+    return datetime.utcfromtimestamp(unit['_last_updated'])
+
+
 def _process_content_unit(content_unit, content_type):
     """
     Adds an href to the content unit and hrefs for its children.
@@ -245,6 +285,7 @@ class ContentUnitSearch(search.SearchView):
     """
     optional_bool_fields = ('include_repos',)
     manager = content_query.ContentQueryManager()
+    secondary_reads = True
 
     @staticmethod
     def _add_repo_memberships(units, type_id):
@@ -304,6 +345,7 @@ class ContentUnitResourceView(View):
     """
 
     @auth_required(authorization.READ)
+    @conditional_get(etag_func=_unit_etag, last_modified_func=_unit_last_modified)
     def get(self, request, type_id, unit_id):
         """
         Return a response containing information about the requested content unit.
@@ -360,6 +402,7 @@ class ContentUnitUserMetadataResourceView(View):
     content unit.
     """
     @auth_required(authorization.READ)
+    @conditional_get(etag_func=_unit_etag, last_modified_func=_unit_last_modified)
     def get(self, request, type_id, unit_id):
         """
         Return user metadata for a content unit.
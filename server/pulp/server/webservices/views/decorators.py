@@ -2,8 +2,11 @@
 This module contains decorators for Pulp views.
 """
 
+import functools
 import logging
 
+from django.views.decorators.http import condition
+
 from pulp.common import error_codes
 from pulp.server.auth.authorization import CREATE, READ, UPDATE, DELETE, EXECUTE, OPERATION_NAMES
 from pulp.server.config import config
@@ -242,3 +245,39 @@ def auth_required(operation=None, super_user_only=False):
 
         return _auth_decorator
     return _auth_required
+
+
+def conditional_get(etag_func=None, last_modified_func=None):
+    """
+    View method wrapper that answers conditional GET requests with 304 Not Modified when the
+    requested resource has not changed, without running the view, and adds the ETag and
+    Last-Modified headers to the responses of the view.
+
+    The entity tag is computed by etag_func for every request, so that all the responses for a
+    resource carry the same validator and any of them can be used in a later If-None-Match.
+    It is computed from the raw documents of the resource, which are not decoded.
+
+    The functions are called with the arguments of the view method, without self. This wrapper
+    must be listed below auth_required, so that only authorized requests are answered.
+
+    :param etag_func: returns the entity tag of the resource, or None
+    :type  etag_func: callable
+    :param last_modified_func: returns the datetime at which the resource last changed, or None
+    :type  last_modified_func: callable
+    """
+    def _conditional_get(method):
+        """
+        Closure method for decorator.
+        """
+        @wraps(method)
+        def _conditional_decorator(self, *args, **kwargs):
+            """
+            Answers the request using django's conditional view processing.
+
+            :return: The result of the wrapped view method, or a 304 response.
+            """
+            view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(
+                functools.partial(method, self))
+            return view(*args, **kwargs)
+        return _conditional_decorator
+    return _conditional_get
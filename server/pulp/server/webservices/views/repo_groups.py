@@ -154,6 +154,7 @@ class RepoGroupSearch(search.SearchView):
     """
     serializer = staticmethod(_add_group_link)
     manager = repo_group_query.RepoGroupQueryManager()
+    secondary_reads = True
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
 
 
@@ -4,6 +4,7 @@ from django.core.urlresolvers import reverse
 from django.views.generic import View
 
 from pulp.common import constants, dateutils, tags
+from pulp.plugins.util.misc import paginate
 from pulp.server import exceptions
 from pulp.server.auth import authorization
 from pulp.server.controllers import importer as importer_controller
@@ -17,15 +18,48 @@ from pulp.server.managers.consumer.applicability import (ApplicabilityRegenerati
 from pulp.server.managers.content.upload import import_uploaded_unit
 from pulp.server.managers.repo.unit_association import associate_from_repo, unassociate_by_criteria
 from pulp.server.webservices.views import search, serializers
-from pulp.server.webservices.views.decorators import auth_required
+from pulp.server.webservices.views.decorators import auth_required, conditional_get
 from pulp.server.webservices.views.schedule import ScheduleResource
 from pulp.server.webservices.views.serializers import content
-from pulp.server.webservices.views.util import (generate_json_response,
+from pulp.server.webservices.views.util import (documents_etag, generate_json_response,
                                                 generate_json_response_with_pulp_encoder,
                                                 generate_redirect_response,
+                                                generate_streaming_json_response_with_pulp_encoder,
                                                 parse_json_body)
 
 
+def _repos_etag(request, repo_id=None):
+    """
+    Compute the entity tag of one or all repositories, including the related importers and
+    distributors when they are requested.
+
+    :param request: WSGI request object
+    :type  request: django.core.handlers.wsgi.WSGIRequest
+    :param repo_id: id of the requested repository, None for all repositories
+    :type  repo_id: str
+
+    :return: the entity tag, None if there are no repositories to tag
+    :rtype:  str
+    """
+    details = request.GET.get('details', 'false').lower() == 'true'
+    if details and repo_id is not None:
+        # the details of a repository include the number of its units that are not downloaded,
+        # which changes without the repository changing
+        return None
+    importers = request.GET.get('importers', 'false').lower() == 'true' or details
+    distributors = request.GET.get('distributors', 'false').lower() == 'true' or details
+    spec = {} if repo_id is None else {'repo_id': repo_id}
+    queries = [(model.Repository._get_collection(), spec)]
+    if importers:
+        queries.append((model.Importer._get_collection(), spec))
+    if distributors:
+        queries.append((model.Distributor._get_collection(), spec))
+    # a repository is hidden as soon as its deletion is dispatched
+    marker_spec = {} if repo_id is None else {'_id': repo_id}
+    queries.append((model.DeletedRepository._get_collection(), marker_spec))
+    return documents_etag(queries, (importers, distributors))
+
+
 def _merge_related_objects(name, model, repos):
     """
     Modifies in place a list of repo dicts and adds their corresponding related objects in a list
@@ -46,7 +80,8 @@ def _merge_related_objects(name, model, repos):
     for repo in repos:
         repo[name] = []
 
-    for item in model.objects(repo_id__in=repo_ids):
+    items = model.objects(repo_id__in=repo_ids).as_pymongo()
+    for item in serializers.from_pymongo(model, items):
         serialized = model.SERIALIZER(item).data
         repo_dict[item['repo_id']][name].append(serialized)
 
@@ -79,29 +114,58 @@ def _process_repos(repo_objs, details, importers, distributors):
     return repos
 
 
+def _iter_process_repos(repo_objs, details, importers, distributors):
+    """
+    The streaming counterpart of _process_repos. Repositories are serialized, and have their
+    related importers and distributors added, in batches of search.STREAM_BATCH_SIZE as they
+    are read from the given collection.
+
+    :param repo_objs: collection of repository objects
+    :type  repo_objs: iterable of pulp.server.db.model.Repository objects
+    :param details: if True, include importers and distributors, overrides other values
+    :type  details: bool
+    :param importers: if True, adds related importers under the attribute "importers".
+    :type  importers: bool
+    :param distributors: if True, adds related distributors under the attribute "distributors"
+    :type  distributors: bool
+
+    :return: serialized repositories with importer and distributor data optionally added
+    :rtype:  generator of dicts
+    """
+    for page in paginate(repo_objs, search.STREAM_BATCH_SIZE):
+        for repo in _process_repos(page, details, importers, distributors):
+            yield repo
+
+
 class ReposView(View):
     """
     View for all repos.
     """
 
     @auth_required(authorization.READ)
+    @conditional_get(etag_func=_repos_etag)
     def get(self, request):
         """
         Return information about all repositories.
 
+        The repositories are serialized while the response is written, so a failure part way
+        through is logged and leaves the client with truncated, invalid JSON.
+
         :param request: WSGI request object
         :type  request: django.core.handlers.wsgi.WSGIRequest
 
-        :return: Response containing a list of dicts, one for each repo
-        :rtype : django.http.HttpResponse
+        :return: Response streaming a list of dicts, one for each repo
+        :rtype : django.http.StreamingHttpResponse
         """
         details = request.GET.get('details', 'false').lower() == 'true'
         include_importers = request.GET.get('importers', 'false').lower() == 'true'
         include_distributors = request.GET.get('distributors', 'false').lower() == 'true'
 
-        processed_repos = _process_repos(model.Repository.objects(), details, include_importers,
-                                         include_distributors)
-        return generate_json_response_with_pulp_encoder(processed_repos)
+        repos = serializers.from_pymongo(model.Repository,
+                                         model.Repository.objects.exclude_deleted().as_pymongo())
+        processed_repos = _iter_process_repos(repos, details, include_importers,
+                                              include_distributors)
+        return generate_streaming_json_response_with_pulp_encoder(processed_repos)
 
     @auth_required(authorization.CREATE)
     @parse_json_body(json_type=dict)
@@ -139,6 +203,7 @@ class RepoResourceView(View):
     """
 
     @auth_required(authorization.READ)
+    @conditional_get(etag_func=_repos_etag)
     def get(self, request, repo_id):
         """
         Looks for query parameters 'importers' and 'distributors', and will add
@@ -230,6 +295,8 @@ class RepoSearch(search.SearchView):
     model = model.Repository
     optional_bool_fields = ('details', 'importers', 'distributors')
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
+    streaming = True
+    secondary_reads = True
 
     @classmethod
     def get_results(cls, query, search_method, options, *args, **kwargs):
@@ -248,7 +315,7 @@ class RepoSearch(search.SearchView):
         :rtype:  list
         """
         only = query.get('fields', [])
-        results = list(search_method(query))
+        results = list(cls._search(query, search_method))
         results = _process_repos(results, options.get('details', False),
                                  options.get('importers', False),
                                  options.get('distributors', False))
@@ -257,11 +324,54 @@ class RepoSearch(search.SearchView):
             search._trim_results(cls.model, results, only)
         return results
 
+    @classmethod
+    def iter_results(cls, query, search_method, options, *args, **kwargs):
+        """
+        The streaming counterpart of get_results.
+
+        :param query: The criteria that should be used to search for objects
+        :type  query: dict
+        :param search_method: function that should be used to search
+        :type  search_method: func
+        :param options: additional options for including extra data
+        :type  options: dict
+
+        :return: processed results of the query
+        :rtype:  generator
+        """
+        only = query.get('fields', [])
+        if only:
+            only.extend(['importers', 'distributors'])
+        repos = _iter_process_repos(cls._search(query, search_method),
+                                    options.get('details', False),
+                                    options.get('importers', False),
+                                    options.get('distributors', False))
+        for repo in repos:
+            if only:
+                search._trim_results(cls.model, [repo], only)
+            yield repo
+
+
+def _remap_units(units):
+    """
+    Remap the fields of each unit's metadata as it is read from the given collection.
+
+    :param units: units associated with a repository
+    :type  units: iterable of dicts
+
+    :return: the same units, with their metadata remapped
+    :rtype:  generator of dicts
+    """
+    for unit in units:
+        content.remap_fields_with_serializer(unit['metadata'])
+        yield unit
+
 
 class RepoUnitSearch(search.SearchView):
     """
     Adds GET and POST searching for units within a repository.
     """
+    secondary_reads = True
 
     @classmethod
     def _generate_response(cls, query, options, *args, **kwargs):
@@ -272,13 +382,16 @@ class RepoUnitSearch(search.SearchView):
         This overrides the base class so we can validate repo existance and to choose the search
         method depending on how many unit types we are dealing with.
 
+        The units are serialized while the response is written, so a failure part way through is
+        logged and leaves the client with truncated, invalid JSON.
+
         :param query: The criteria that should be used to search for objects
         :type  query: dict
         :param options: additional options for including extra data
         :type  options: dict
 
-        :return:      The serialized search results in an HttpReponse
-        :rtype:       django.http.HttpResponse
+        :return:      The serialized search results streamed in an HttpReponse
+        :rtype:       django.http.StreamingHttpResponse
         """
         repo_id = kwargs.get('repo_id')
         model.Repository.objects.get_repo_or_missing_resource(repo_id)
@@ -286,12 +399,12 @@ class RepoUnitSearch(search.SearchView):
         manager = manager_factory.repo_unit_association_query_manager()
         if criteria.type_ids is not None and len(criteria.type_ids) == 1:
             type_id = criteria.type_ids[0]
-            units = manager.get_units_by_type(repo_id, type_id, criteria=criteria)
+            units = manager.get_units_by_type(repo_id, type_id, criteria=criteria,
+                                              as_generator=True)
         else:
-            units = manager.get_units(repo_id, criteria=criteria)
-        for unit in units:
-            content.remap_fields_with_serializer(unit['metadata'])
-        return generate_json_response_with_pulp_encoder(units)
+            units = manager.get_units(repo_id, criteria=criteria, as_generator=True)
+        return generate_streaming_json_response_with_pulp_encoder(
+            search._started(_remap_units(units)))
 
 
 class RepoImportersView(View):
@@ -635,6 +748,7 @@ class RepoDistributorsSearchView(search.SearchView):
     """
 
     model = model.Distributor
+    secondary_reads = True
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
 
 
@@ -2,18 +2,26 @@
 This module contains the SearchView superclass. Your view code should subclass this to create a
 search view for a specific model.
 """
+import itertools
 import json
 
 from django.views import generic
+from mongoengine.queryset.base import BaseQuerySet
 from pymongo.errors import OperationFailure
 
+from pulp.plugins.util.misc import paginate
 from pulp.server import exceptions
 from pulp.server.auth import authorization
+from pulp.server.db import connection
 from pulp.server.db.model import criteria
-from pulp.server.webservices.views import util
+from pulp.server.webservices.views import serializers, util
 from pulp.server.webservices.views.decorators import auth_required
 
 
+# The number of search results serialized together when streaming a response.
+STREAM_BATCH_SIZE = 100
+
+
 class SearchView(generic.View):
     """
     This class is meant to be subclassed by views that need to provide search functionality on a
@@ -46,9 +54,28 @@ class SearchView(generic.View):
                                model instance, sane serializers are used by default, and this
                                method should not be defined.
     :vartype serializer:       staticmethod
+    :cvar    streaming:        If True, results are read from the cursor and serialized in
+                               batches while the response is written using
+                               stream_response_builder, rather than being collected into a
+                               list by get_results. Views that override get_results must also
+                               override iter_results before enabling this. A failure after the
+                               response has started is logged, and the client receives
+                               truncated, invalid JSON instead of an error response.
+    :vartype streaming:        bool
+    :cvar    stream_response_builder: The function that should be used to turn an iterable of
+                               serialized results into a streaming JSON Django Response object.
+    :vartype stream_response_builder: staticmethod
+    :cvar    secondary_reads:  If True, the search is routed to secondaries when the server is
+                               configured to read from them. It must not be set on views of
+                               data that callers need to see right after it is written.
+    :vartype secondary_reads:  bool
     """
 
     response_builder = staticmethod(util.generate_json_response_with_pulp_encoder)
+    stream_response_builder = staticmethod(
+        util.generate_streaming_json_response_with_pulp_encoder)
+    streaming = False
+    secondary_reads = False
     optional_string_fields = tuple()
     optional_bool_fields = tuple()
 
@@ -105,7 +132,7 @@ class SearchView(generic.View):
                 search_params[field] = value
 
         query, options = self._parse_args(search_params)
-        return self._generate_response(query, options, *args, **kwargs)
+        return self._routed_response(query, options, *args, **kwargs)
 
     @auth_required(authorization.READ)
     @util.parse_json_body(json_type=dict)
@@ -124,7 +151,27 @@ class SearchView(generic.View):
         query = search_params.get('criteria')
         if query is None:
             raise exceptions.MissingValue(['criteria'])
-        return self._generate_response(query, options, *args, **kwargs)
+        return self._routed_response(query, options, *args, **kwargs)
+
+    @classmethod
+    def _routed_response(cls, query, options, *args, **kwargs):
+        """
+        Generate the response, routing its queries to secondaries if the view allows it. The
+        queries made while a streaming response is written are routed as well.
+
+        :param query: The criteria that should be used to search for objects
+        :type  query: dict
+        :param options: Extra options that individual views can use to optionally modify the data.
+        :type  options: dict
+        :return:      The serialized search results in an HttpReponse
+        :rtype:       django.http.HttpResponse
+        """
+        with connection.secondary_reads(cls.secondary_reads):
+            response = cls._generate_response(query, options, *args, **kwargs)
+        if cls.secondary_reads and getattr(response, 'streaming', False):
+            response.streaming_content = connection.iter_secondary_reads(
+                response.streaming_content)
+        return response
 
     @classmethod
     def _serialize_results(cls, results, only=None):
@@ -153,6 +200,26 @@ class SearchView(generic.View):
                 _trim_results(cls.model, results, only)
         return results
 
+    @classmethod
+    def _search(cls, query, search_method):
+        """
+        Run a search. When the results are going to be serialized by the model's SERIALIZER,
+        they are read as raw documents so that a Document is not built for each result.
+
+        :param query: The criteria that should be used to search for objects
+        :type  query: dict
+        :param search_method: function that should be used to search
+        :type  search_method: func
+
+        :return: search results
+        :rtype:  iterable
+        """
+        results = search_method(query)
+        if isinstance(results, BaseQuerySet) and not hasattr(cls, 'serializer') and \
+                hasattr(cls, 'model') and hasattr(cls.model, 'SERIALIZER'):
+            results = serializers.from_pymongo(cls.model, results.as_pymongo())
+        return results
+
     @classmethod
     def _generate_response(cls, query, options, *args, **kwargs):
         """
@@ -191,6 +258,9 @@ class SearchView(generic.View):
         # We do not validate all aspects of the criteria object, so if pymongo has a problem we
         # raise an InvalidValue.
         try:
+            if cls.streaming:
+                results = cls.iter_results(query, search_method, options, *args, **kwargs)
+                return cls.stream_response_builder(_started(results))
             return cls.response_builder(cls.get_results(query, search_method, options,
                                                         *args, **kwargs))
         except OperationFailure, e:
@@ -215,9 +285,48 @@ class SearchView(generic.View):
         :rtype:  list
         """
         only = query.get('fields')
-        results = list(search_method(query))
+        results = list(cls._search(query, search_method))
         return cls._serialize_results(results, only=only)
 
+    @classmethod
+    def iter_results(cls, query, search_method, options, *args, **kwargs):
+        """
+        The streaming counterpart of get_results. Results are read from the search method's
+        cursor and serialized in batches of STREAM_BATCH_SIZE so that only one batch is held in
+        memory at a time.
+
+        :param query: The criteria that should be used to search for objects
+        :type  query: dict
+        :param search_method: function that should be used to search
+        :type  search_method: func
+        :param options: additional options for including extra data
+        :type  options: dict
+
+        :return: serialized search results
+        :rtype:  generator
+        """
+        only = query.get('fields')
+        for page in paginate(cls._search(query, search_method), STREAM_BATCH_SIZE):
+            for result in cls._serialize_results(list(page), only=only):
+                yield result
+
+
+def _started(results):
+    """
+    Advance an iterable of results to its first item so that the query is run, and any error
+    raised by the database, before the response is returned and starts being written.
+
+    :param results: search results
+    :type  results: iterable
+
+    :return: an iterator over all of the results
+    :rtype:  iterator
+    """
+    results = iter(results)
+    for first in results:
+        return itertools.chain((first,), results)
+    return iter(())
+
 
 def _trim_results(model, results, only):
     """
@@ -1,11 +1,98 @@
-import copy
-
 from bson.objectid import ObjectId
 from django.core.urlresolvers import reverse
+from mongoengine import (BooleanField, DictField, IntField, ListField, ObjectIdField,
+                         StringField)
+from mongoengine.base import BaseDocument
 
 from pulp.server import exceptions
 
 
+# Fields whose values, as stored in the database, are the values mongoengine would return.
+# Values of other fields are converted with the field's to_python() when read by from_pymongo().
+RAW_FIELD_TYPES = (BooleanField, DictField, IntField, ObjectIdField, StringField)
+
+# (field name, db_field, default, conversion) for each field of a model, by model.
+_document_plans = {}
+
+# (field name, external field name) for each field of a model, by (serializer class, model).
+_remapping_plans = {}
+
+
+class RawDocument(dict):
+    """
+    A document read with as_pymongo() and keyed by field name rather than db_field. Values can
+    also be read as attributes, so that a RawDocument can be serialized and linked to in place of
+    the Document it was read for, without the cost of building that Document.
+    """
+
+    __slots__ = ('_model',)
+
+    def __init__(self, model, *args, **kwargs):
+        """
+        :param model: the class that defines this document's fields
+        :type  model: subclass of mongoengine.Document
+        """
+        super(RawDocument, self).__init__(*args, **kwargs)
+        self._model = model
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def _document_plan(model):
+    """
+    Get, computing it only the first time for each model, how each field of a model is read
+    from a raw document.
+
+    :param model: the class that defines the document's fields
+    :type  model: subclass of mongoengine.Document
+
+    :return: (field name, db_field, default, conversion) for each field. The conversion is None
+             when the stored value can be used as-is.
+    :rtype:  tuple
+    """
+    plan = _document_plans.get(model)
+    if plan is None:
+        plan = []
+        for name, field in model._fields.iteritems():
+            raw = isinstance(field, RAW_FIELD_TYPES) or (
+                isinstance(field, ListField) and isinstance(field.field, RAW_FIELD_TYPES))
+            plan.append((name, field.db_field, field.default, None if raw else field.to_python))
+        plan = _document_plans[model] = tuple(plan)
+    return plan
+
+
+def from_pymongo(model, documents):
+    """
+    Turn documents read with as_pymongo() into RawDocuments that can be serialized by the model's
+    SERIALIZER. Fields missing from a document are given their default value and the values of
+    fields that mongoengine would convert are converted, as they would be for a Document.
+
+    :param model: the class that defines the documents' fields
+    :type  model: subclass of mongoengine.Document
+    :param documents: raw documents, as returned by a QuerySet's as_pymongo()
+    :type  documents: iterable of dict
+
+    :return: documents keyed by field name
+    :rtype:  generator of RawDocument
+    """
+    plan = _document_plan(model)
+    for document in documents:
+        values = {}
+        for name, db_field, default, convert in plan:
+            if db_field in document:
+                value = document[db_field]
+                if convert is not None and value is not None:
+                    value = convert(value)
+            else:
+                value = default() if callable(default) else default
+            values[name] = value
+        yield RawDocument(model, values)
+
+
 class BaseSerializer(object):
     """
     Base class to be used for creating serializers
@@ -36,6 +123,8 @@ class BaseSerializer(object):
                 self._mask_fields = meta.mask_fields
             if hasattr(meta, 'remapped_fields'):
                 self._remapped_fields = meta.remapped_fields
+        self._exclude_accessors = [field.split('__') for field in self._exclude_fields]
+        self._mask_accessors = [field.split('__') for field in self._mask_fields]
 
     def to_representation(self, instance):
         """
@@ -70,14 +159,10 @@ class BaseSerializer(object):
         :rtype: dict
         """
         representation = self.to_representation(instance)
-        if self._exclude_fields:
-            for blacklist_field in self._exclude_fields:
-                field_accessor = blacklist_field.split('__')
-                self._remove_excluded(field_accessor, representation)
-        if self._mask_fields:
-            for pwd_field in self._mask_fields:
-                field_accessor = pwd_field.split('__')
-                self._mask_field(field_accessor, representation)
+        for field_accessor in self._exclude_accessors:
+            self._remove_excluded(field_accessor, representation)
+        for field_accessor in self._mask_accessors:
+            self._mask_field(field_accessor, representation)
 
         href = self.get_href(instance)
         if href:
@@ -89,7 +174,8 @@ class BaseSerializer(object):
         """
         Internal method to remove excluded fields from the dictionary form of an instance.
 
-        This takes a single accessor and
+        Nested dictionaries are copied before they are modified, so that the instance being
+        serialized is not modified through its representation.
 
         :param accessor: The accessor to the particular field to be removed
         :type accessor: list of str
@@ -99,6 +185,7 @@ class BaseSerializer(object):
         root_key = accessor[0]
         if representation.get(root_key) is not None:
             if len(accessor) > 1:
+                representation[root_key] = dict(representation[root_key])
                 self._remove_excluded(accessor[1:], representation[root_key])
             else:
                 representation.pop(root_key, None)
@@ -106,7 +193,7 @@ class BaseSerializer(object):
     def _mask_field(self, accessor, representation):
         """
         Internal method to replace password values with a fixed number of asterisks
-        during serialization.
+        during serialization. Nested dictionaries are copied before they are modified.
 
         :param accessor: The accessor to the particular field to be removed
         :type accessor: list of str
@@ -116,6 +203,7 @@ class BaseSerializer(object):
         root_key = accessor[0]
         if representation.get(root_key) is not None:
             if len(accessor) > 1:
+                representation[root_key] = dict(representation[root_key])
                 self._mask_field(accessor[1:], representation[root_key])
             else:
                 representation[root_key] = '*****'
@@ -144,15 +232,15 @@ class DictSerializer(BaseSerializer):
         Method called to convert a single instance to it's dictionary form
 
         As we are converting a dict to a dict, copy the original so that it is not modified
-        as a side effect of using this serializer
+        as a side effect of using this serializer. Only the top level is copied here; nested
+        dictionaries are copied by _remove_excluded and _mask_field when they are modified.
 
         :param instance: The object to be converted
         :type instance: dict
         :return: serialized form of the object
         :rtype: dict
         """
-        representation = copy.deepcopy(instance)
-        return representation
+        return dict(instance)
 
 
 class ModelSerializer(BaseSerializer):
@@ -165,14 +253,35 @@ class ModelSerializer(BaseSerializer):
         Transforms a Mongoengine Document into a serialized dictionary.
 
         :param instance: document to serialize
-        :type  instance: mongoengine.Document
+        :type  instance: mongoengine.Document or RawDocument
 
         :return: external dictionary representation of the document
         """
-        document_dict = {}
-        for field in instance._fields:
-            document_dict[self.translate_field_reverse(field)] = getattr(instance, field)
-        return document_dict
+        if isinstance(instance, RawDocument):
+            remapping = self._remapping_plan(instance._model)
+            return dict((external, instance[field]) for field, external in remapping)
+        if isinstance(instance, BaseDocument):
+            remapping = self._remapping_plan(type(instance))
+        else:
+            remapping = [(field, self.translate_field_reverse(field)) for field in instance._fields]
+        return dict((external, getattr(instance, field)) for field, external in remapping)
+
+    def _remapping_plan(self, model):
+        """
+        Get, computing it only the first time for each model, the external name of each field.
+
+        :param model: the class that defines this document's fields
+        :type  model: sublcass of mongoengine.Document
+
+        :return: (field name, external field name) for each field
+        :rtype:  tuple
+        """
+        key = (type(self), model)
+        plan = _remapping_plans.get(key)
+        if plan is None:
+            plan = tuple((field, self.translate_field_reverse(field)) for field in model._fields)
+            _remapping_plans[key] = plan
+        return plan
 
     def translate_filters(self, model, filters):
         """
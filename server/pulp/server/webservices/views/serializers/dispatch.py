@@ -38,7 +38,7 @@ def task_status(task):
     task_dict = {}
     attributes = ['task_id', 'worker_name', 'tags', 'state', 'error', 'spawned_tasks',
                   'progress_report', 'task_type', 'start_time', 'finish_time', 'result',
-                  'exception', 'traceback', '_ns']
+                  'exception', 'traceback', 'metrics', '_ns']
     for attribute in attributes:
         task_dict[attribute] = task[attribute]
 
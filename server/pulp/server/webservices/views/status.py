@@ -15,7 +15,8 @@ class StatusView(View):
 
     def get(self, request):
         """
-        Show current status of pulp server.
+        Show current status of pulp server. When the 'task_metrics' query parameter is 'true', the
+        histograms of the metrics recorded by tasks are included as well.
 
         :param request: WSGI request object
         :type request: django.core.handlers.wsgi.WSGIRequest
@@ -41,4 +42,10 @@ class StatusView(View):
                        'messaging_connection': pulp_messaging_connection,
                        'known_workers': pulp_workers}
 
+        if request.GET.get('task_metrics', 'false').lower() == 'true':
+            if pulp_db_connection['connected']:
+                status_data['task_metrics'] = status_manager.get_task_metrics()
+            else:
+                status_data['task_metrics'] = {}
+
         return generate_json_response_with_pulp_encoder(status_data)
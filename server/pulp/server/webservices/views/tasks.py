@@ -15,9 +15,9 @@ from pulp.server.auth import authorization
 from pulp.server.db.model import Worker, TaskStatus
 from pulp.server.exceptions import MissingResource
 from pulp.server.webservices.views import search
-from pulp.server.webservices.views.decorators import auth_required
+from pulp.server.webservices.views.decorators import auth_required, conditional_get
 from pulp.server.webservices.views.serializers import dispatch as serial_dispatch
-from pulp.server.webservices.views.util import (generate_json_response,
+from pulp.server.webservices.views.util import (documents_etag, generate_json_response,
                                                 generate_json_response_with_pulp_encoder)
 
 
@@ -25,6 +25,28 @@ from pulp.server.webservices.views.util import (generate_json_response,
 VALID_STATES = set(filter(lambda state: state != CALL_CANCELED_STATE, CALL_COMPLETE_STATES))
 
 
+def _tasks_etag(request, task_id=None):
+    """
+    Compute the entity tag of one task, or of the tasks listed by TaskCollectionView.
+
+    :param request: WSGI request object
+    :type  request: django.core.handlers.wsgi.WSGIRequest
+    :param task_id: id of the requested task, None for the list of tasks
+    :type  task_id: basestring
+
+    :return: the entity tag, None if there are no tasks to tag
+    :rtype:  str
+    """
+    if task_id is not None:
+        spec = {'task_id': task_id}
+    else:
+        spec = {'group_id': None}
+        tags = request.GET.getlist('tag')
+        if tags:
+            spec['tags'] = {'$all': tags}
+    return documents_etag([(TaskStatus._get_collection(), spec)])
+
+
 def task_serializer(task):
     """
     Update the task representation in the database to match the model for the API
@@ -48,6 +70,7 @@ class TaskSearchView(search.SearchView):
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
     model = TaskStatus
     serializer = staticmethod(task_serializer)
+    streaming = True
 
 
 class TaskCollectionView(View):
@@ -55,6 +78,7 @@ class TaskCollectionView(View):
     View for all tasks.
     """
     @auth_required(authorization.READ)
+    @conditional_get(etag_func=_tasks_etag)
     def get(self, request):
         """
         Return a response containing a list of all tasks or a response containing
@@ -106,6 +130,7 @@ class TaskResourceView(View):
     """
 
     @auth_required(authorization.READ)
+    @conditional_get(etag_func=_tasks_etag)
     def get(self, request, task_id):
         """
         Return a response containing a single task.
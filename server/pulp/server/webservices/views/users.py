@@ -10,7 +10,7 @@ from pulp.server.controllers import user as user_controller
 from pulp.server.db import model
 from pulp.server.db.model.auth import Permission
 from pulp.server.managers import factory
-from pulp.server.webservices.views import search
+from pulp.server.webservices.views import search, serializers
 from pulp.server.webservices.views.decorators import auth_required
 from pulp.server.webservices.views.util import (generate_json_response,
                                                 generate_json_response_with_pulp_encoder,
@@ -42,7 +42,8 @@ class UsersView(View):
         :return: Response containing a list of users
         :rtype: django.http.HttpResponse
         """
-        users = model.User.SERIALIZER(model.User.objects(), multiple=True).data
+        users = serializers.from_pymongo(model.User, model.User.objects().as_pymongo())
+        users = model.User.SERIALIZER(users, multiple=True).data
         return generate_json_response_with_pulp_encoder(users)
 
     @auth_required(authorization.CREATE)
@@ -2,10 +2,13 @@ from datetime import datetime
 from functools import wraps
 
 import functools
+import hashlib
 import httplib
 import json
 import sys
 
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from django.http import HttpResponse
 from django.utils.encoding import iri_to_uri
 
@@ -15,6 +18,33 @@ from pulp.server.compat import json_util
 from pulp.server.exceptions import PulpCodedValidationException, InputEncodingError
 
 
+# Reads documents without decoding them.
+_RAW_DOCUMENTS = CodecOptions(document_class=RawBSONDocument)
+
+
+try:
+    from django.http import StreamingHttpResponse
+except ImportError:
+    class StreamingHttpResponse(HttpResponse):
+        """
+        Django < 1.5 has no StreamingHttpResponse, but an HttpResponse whose content is an
+        iterator is written to the client as the iterator is consumed. This gives it the
+        streaming attributes of the newer class.
+        """
+        streaming = True
+
+        def __init__(self, streaming_content=(), *args, **kwargs):
+            super(StreamingHttpResponse, self).__init__(iter(streaming_content), *args, **kwargs)
+
+        @property
+        def streaming_content(self):
+            return self._container
+
+        @streaming_content.setter
+        def streaming_content(self, value):
+            self._container = iter(value)
+
+
 def pulp_json_encoder(obj):
     """
     Specialized json encoding.
@@ -65,6 +95,91 @@ generate_json_response_with_pulp_encoder = functools.partial(
 )
 
 
+def _json_array_chunks(iterable, default=None):
+    """
+    Serialize each item of an iterable as it is consumed, producing the chunks of a JSON array.
+
+    :param iterable: items to be serialized
+    :type  iterable: iterable
+    :param default:  function used by json.dumps to serialize each item
+    :type  default:  function or None
+
+    :return: chunks of a JSON serialized array
+    :rtype:  generator of str
+    """
+    encoder = json.JSONEncoder(default=default)
+    yield '['
+    separator = ''
+    for item in iterable:
+        yield separator + encoder.encode(item)
+        separator = ', '
+    yield ']'
+
+
+def generate_streaming_json_response(iterable, default=None,
+                                     content_type='application/json; charset=utf-8'):
+    """
+    Serialize an iterable incrementally into a JSON array and return a django streaming response.
+
+    Items are consumed and serialized one at a time while the response is being written, so
+    the memory used does not depend on the number of items. The status and headers are sent
+    before the first item is read, so an exception raised while iterating cannot become an
+    error response: it is logged with the request by the ExceptionHandlerMiddleware, and the
+    client receives a truncated array that is not valid JSON.
+
+    :param iterable     : items to be serialized
+    :type  iterable     : iterable of anything that is serializable by json.dumps
+    :param default      : function used by json.dumps to serialize each item
+    :type  default      : function or None
+    :param content_type : type of returned content
+    :type  content_type : str
+
+    :return             : response that streams the serialized content
+    :rtype              : django.http.StreamingHttpResponse
+    """
+    return StreamingHttpResponse(_json_array_chunks(iterable, default=default),
+                                 content_type=content_type)
+
+
+"""
+Shortcut function to generate a streaming json response using the in house json_encoder.
+
+This function is equivalent to:
+generate_streaming_json_response(iterable, default=pulp_json_encoder)
+"""
+generate_streaming_json_response_with_pulp_encoder = functools.partial(
+    generate_streaming_json_response,
+    default=pulp_json_encoder,
+)
+
+
+def documents_etag(queries, variant=None):
+    """
+    Compute the entity tag of a resource from the raw BSON of the documents it is made of. The
+    documents are neither decoded nor serialized, so a conditional request for a resource that
+    has not changed can be answered cheaply.
+
+    :param queries: (collection, spec) pairs matching the documents of the resource
+    :type  queries: list of tuples
+    :param variant: values that select the representation of the resource, such as the query
+                    parameters that add related objects
+    :type  variant: tuple
+    :return: the entity tag, or None if the first query matches no document
+    :rtype:  str
+    """
+    digest = hashlib.sha1(repr(variant))
+    for index, (collection, spec) in enumerate(queries):
+        found = False
+        for document in collection.with_options(codec_options=_RAW_DOCUMENTS).find(spec):
+            digest.update(document.raw)
+            found = True
+        if index == 0 and not found:
+            return None
+        # keep the documents of different queries apart
+        digest.update('\0')
+    return digest.hexdigest()
+
+
 def generate_redirect_response(response, href):
     response['Location'] = iri_to_uri(href)
     response.status_code = httplib.CREATED
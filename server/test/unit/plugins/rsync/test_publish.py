@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import patch, Mock
+
+from pulp.plugins.rsync import publish
+from pulp.plugins.rsync.publish import Publisher, RSyncPublishStep
+from pulp.plugins.util.publish_step import PublishStep
+
+
+MODULE = 'pulp.plugins.rsync.publish'
+
+
+def make_publisher(working_dir):
+    """
+    Build a Publisher without looking up its distributor.
+    """
+    publisher = Publisher.__new__(Publisher)
+    PublishStep.__init__(publisher, 'publish', config=Mock(), working_dir=working_dir)
+    publisher._transport = None
+    return publisher
+
+
+@patch(MODULE + '.SSHTransport')
+class TestRSyncPublishStepTransport(TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_standalone(self, transport):
+        step = RSyncPublishStep('rsync', [], '/src', 'dest', config=Mock())
+
+        self.assertTrue(step.get_transport() is transport.from_config.return_value)
+        self.assertTrue(step.get_transport() is transport.from_config.return_value)
+        step.finalize()
+
+        transport.from_config.assert_called_once_with(step.get_config())
+        transport.from_config.return_value.open.assert_called_once_with()
+        transport.from_config.return_value.close.assert_called_once_with()
+
+    def test_shared(self, transport):
+        transport.from_config.return_value.mkdirs.return_value = (True, '')
+        publisher = make_publisher(self.working_dir)
+        child = PublishStep('child')
+        step_1 = RSyncPublishStep('rsync', [], '/src', 'a', config=Mock())
+        step_2 = RSyncPublishStep('rsync', [], '/src', 'b/c', config=Mock())
+        publisher.add_child(step_1)
+        publisher.add_child(child)
+        child.add_child(step_2)
+
+        self.assertTrue(step_1.get_transport() is step_2.get_transport())
+
+        _transport = transport.from_config.return_value
+        transport.from_config.assert_called_once_with(publisher.get_config())
+        _transport.open.assert_called_once_with()
+        # the destinations of all the steps are created at once
+        _transport.mkdirs.assert_called_once_with(['a', 'b/c'], self.working_dir)
+
+        # closed by the publisher
+        step_1.finalize()
+        self.assertFalse(_transport.close.called)
+        with patch.object(PublishStep, 'process_lifecycle'):
+            publisher.process_lifecycle()
+        _transport.close.assert_called_once_with()
+        self.assertTrue(publisher._transport is None)
+
+
+class TestRSyncPublishStepStreams(TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.transport = Mock(max_streams=4)
+        self.transport.mkdirs.return_value = (True, '')
+        self.transport.rsh.return_value = ['-e', 'ssh']
+        self.transport.run.return_value = (0, 'ok')
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def step(self, file_list, delete=False):
+        config = Mock()
+        config.flatten.return_value = {'remote': {'ssh_user': 'user', 'host': 'host',
+                                                  'root': '/root'}}
+        step = RSyncPublishStep('rsync', file_list, '/src', 'dest', config=config, delete=delete)
+        step.working_dir = self.working_dir
+        step._transport = self.transport
+        return step
+
+    def test_split_small(self):
+        step = self.step(['b', 'a'])
+
+        self.assertEqual(step.split_file_list(), [['a', 'b']])
+
+    def test_split(self):
+        files = ['%05d' % i for i in xrange(publish.MIN_FILES_PER_STREAM * 2 + 1)]
+        step = self.step(files)
+
+        streams = step.split_file_list()
+
+        self.assertEqual(len(streams), 2)
+        self.assertEqual(sum(streams, []), files)
+
+    def test_split_bounded(self):
+        files = ['%05d' % i for i in xrange(publish.MIN_FILES_PER_STREAM * 10)]
+        step = self.step(files)
+
+        self.assertEqual(len(step.split_file_list()), 4)
+
+    def test_split_delete(self):
+        files = ['%05d' % i for i in xrange(publish.MIN_FILES_PER_STREAM * 10)]
+        step = self.step(files, delete=True)
+
+        self.assertEqual(len(step.split_file_list()), 1)
+
+    def test_rsync_streams(self):
+        files = ['%05d' % i for i in xrange(publish.MIN_FILES_PER_STREAM * 3)]
+        step = self.step(files)
+
+        is_ok, output = step.rsync()
+
+        self.assertTrue(is_ok)
+        self.transport.mkdirs.assert_called_once_with(['dest'], self.working_dir)
+        self.assertEqual(self.transport.run.call_count, 3)
+        transferred = []
+        for call_args in self.transport.run.call_args_list:
+            args = call_args[0][0]
+            self.assertEqual(args[-1], 'user@host:/root/dest')
+            with open(args[args.index('--files-from') + 1]) as fp:
+                transferred.extend(fp.read().splitlines())
+        self.assertEqual(sorted(transferred), files)
+
+    def test_rsync_stream_failed(self):
+        files = ['%05d' % i for i in xrange(publish.MIN_FILES_PER_STREAM * 2)]
+        step = self.step(files)
+        self.transport.run.side_effect = [(0, 'ok'), (1, 'failed')]
+
+        is_ok, output = step.rsync()
+
+        self.assertFalse(is_ok)
+        self.assertTrue('failed' in output)
+
+    def test_remote_mkdir_failed(self):
+        step = self.step(['a'])
+        self.transport.mkdirs.return_value = (False, 'denied')
+
+        self.assertEqual(step.rsync(), (False, 'denied'))
+        self.assertFalse(self.transport.run.called)
+
+    def test_nothing_to_sync(self):
+        step = self.step([])
+
+        is_ok, output = step.rsync()
+
+        self.assertTrue(is_ok)
+        self.assertFalse(self.transport.run.called)
+        self.assertTrue(os.path.isdir(self.working_dir))
@@ -0,0 +1,187 @@
+import os
+import shutil
+import stat
+import tempfile
+from unittest import TestCase
+
+from mock import patch, Mock
+
+from pulp.plugins.rsync import transport
+from pulp.plugins.rsync.transport import SSHTransport
+
+
+MODULE = 'pulp.plugins.rsync.transport'
+
+STUB_SSH = """#!/bin/sh
+echo "$@" >> %(log)s
+exit %(rv)d
+"""
+
+
+class TestSSHTransport(TestCase):
+
+    def setUp(self):
+        self.transport = SSHTransport('user', 'host', '/key', '/root')
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_from_config(self):
+        config = Mock()
+        config.flatten.return_value = {'remote': {'ssh_user': 'user', 'host': 'host',
+                                                  'ssh_identity_file': '/key', 'root': '/root'}}
+
+        _transport = SSHTransport.from_config(config)
+
+        self.assertEqual(_transport.user, 'user')
+        self.assertEqual(_transport.host, 'host')
+        self.assertEqual(_transport.identity_file, '/key')
+        self.assertEqual(_transport.root, '/root')
+
+    def test_ssh_args(self):
+        args = self.transport.ssh_args(['-x'])
+
+        self.assertEqual(args[:5], ['ssh', '-l', 'user', '-i', '/key'])
+        self.assertEqual(args[-1], '-x')
+        control_path = args[args.index('-S') + 1]
+        # private to the transport
+        self.assertTrue(os.path.isdir(os.path.dirname(control_path)))
+        self.assertEqual(control_path, self.transport.control_path)
+
+    def test_rsh(self):
+        rsh = self.transport.rsh()
+
+        self.assertEqual(rsh[0], '-e')
+        self.assertTrue(rsh[1].startswith('ssh -l user -i /key -o "StrictHostKeyChecking no"'))
+
+    def test_destination(self):
+        self.assertEqual(self.transport.destination('a/b'), 'user@host:/root/a/b')
+        self.assertEqual(self.transport.destination(''), 'user@host:/root/')
+
+    @patch(MODULE + '.time.sleep')
+    @patch(MODULE + '.kobo.shortcuts.run')
+    def test_run_retries(self, run, sleep):
+        run.side_effect = [(255, 'ssh_exchange_identification: Connection closed'), (0, 'ok')]
+
+        rv, out = self.transport.run(['rsync'])
+
+        self.assertEqual((rv, out), (0, 'ok'))
+        self.assertEqual(run.call_count, 2)
+        sleep.assert_called_once_with(transport.RETRY_DELAY)
+
+    @patch(MODULE + '.kobo.shortcuts.run')
+    def test_open(self, run):
+        run.return_value = (0, '')
+
+        self.assertTrue(self.transport.open())
+        # only once
+        self.assertTrue(self.transport.open())
+
+        self.assertEqual(run.call_count, 1)
+        args = run.call_args[1]['cmd']
+        self.assertTrue('ControlMaster yes' in args)
+        self.assertEqual(args[-3:], ['-f', '-N', 'host'])
+
+    @patch(MODULE + '.kobo.shortcuts.run')
+    def test_open_failed(self, run):
+        run.return_value = (255, 'refused')
+
+        self.assertFalse(self.transport.open())
+
+    @patch(MODULE + '.kobo.shortcuts.run')
+    def test_close(self, run):
+        run.return_value = (0, '')
+        self.transport.open()
+        control_dir = os.path.dirname(self.transport.control_path)
+
+        self.transport.close()
+
+        args = run.call_args[1]['cmd']
+        self.assertEqual(args[-5:], ['-O', 'exit', '-l', 'user', 'host'])
+        self.assertFalse(os.path.exists(control_dir))
+
+    @patch(MODULE + '.kobo.shortcuts.run')
+    def test_mkdirs(self, run):
+        working_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, working_dir)
+        staged = []
+
+        def rsync(cmd, can_fail):
+            source = cmd[-2]
+            for path, dirs, files in os.walk(source):
+                staged.append(os.path.relpath(path, source))
+            return 0, ''
+        run.side_effect = rsync
+
+        is_ok, output = self.transport.mkdirs(['/a/b', 'a', 'c'], working_dir)
+
+        self.assertTrue(is_ok)
+        self.assertEqual(run.call_count, 1)
+        self.assertEqual(sorted(staged), ['.', 'a', 'a/b', 'c'])
+        self.assertEqual(run.call_args[1]['cmd'][-1], 'user@host:/root/')
+        self.assertEqual(os.listdir(working_dir), [])
+
+        # created directories are skipped
+        is_ok, output = self.transport.mkdirs(['a', 'c'], working_dir)
+
+        self.assertTrue(is_ok)
+        self.assertEqual(run.call_count, 1)
+
+    @patch(MODULE + '.kobo.shortcuts.run')
+    def test_mkdirs_failed(self, run):
+        working_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, working_dir)
+        run.return_value = (1, 'denied')
+
+        is_ok, output = self.transport.mkdirs(['a'], working_dir)
+
+        self.assertFalse(is_ok)
+        self.assertTrue('denied' in output)
+        self.assertEqual(self.transport.created, set())
+
+
+class TestSSHTransportStub(TestCase):
+    """
+    Run the transport against a stub ssh executable.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp_dir, 'ssh.log')
+        self.ssh = os.path.join(self.tmp_dir, 'ssh')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def stub(self, rv):
+        with open(self.ssh, 'w') as fp:
+            fp.write(STUB_SSH % {'log': self.log, 'rv': rv})
+        os.chmod(self.ssh, stat.S_IRWXU)
+
+    def invocations(self):
+        with open(self.log) as fp:
+            return fp.read().splitlines()
+
+    def test_master(self):
+        self.stub(0)
+        _transport = SSHTransport('user', 'host', '/key', '/root', ssh=self.ssh)
+
+        self.assertTrue(_transport.open())
+        _transport.run(_transport.ssh_args(['host', 'true']))
+        _transport.close()
+
+        invocations = self.invocations()
+        self.assertEqual(len(invocations), 3)
+        self.assertTrue('ControlMaster yes' in invocations[0])
+        self.assertTrue(invocations[1].endswith('host true'))
+        self.assertTrue('-O exit' in invocations[2])
+
+    def test_master_failed(self):
+        self.stub(255)
+        _transport = SSHTransport('user', 'host', '/key', '/root', ssh=self.ssh)
+
+        self.assertFalse(_transport.open())
+        _transport.close()
+
+        # the master is not stopped since it did not start
+        self.assertEqual(len(self.invocations()), 1)
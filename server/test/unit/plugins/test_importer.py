@@ -69,6 +69,17 @@ class TestBuildDownloader(TestCase):
         self.assertEqual(downloader.config.max_concurrent, 23)
 
 
+class TestCanCopyAssociations(TestCase):
+    """
+    This class contains tests for pulp.plugins.importer.Importer.can_copy_associations().
+    """
+    def test_default(self):
+        """
+        Importers must opt in to having Pulp associate copied units.
+        """
+        self.assertFalse(Importer().can_copy_associations(Mock(), Mock(), Mock()))
+
+
 class TestCancelSyncRepo(TestCase):
     """
     This class contains tests for pulp.plugins.importer.Importer.cancel_sync_repo().
@@ -1,3 +1,7 @@
+import unittest
+
+import mock
+
 from ... import base
 from pulp.plugins.types.model import TypeDefinition
 from pulp.server.db.model.content import ContentType
@@ -433,3 +437,87 @@ class TypesDatabaseTests(base.PulpServerTests):
         index_dict = collection.index_information()
 
         self.assertEqual(2, len(index_dict))  # default (_id) + new one
+
+
+@mock.patch('pulp.plugins.types.database.ContentType.get_collection')
+@mock.patch('pulp.plugins.types.database.ContentTypesVersion.get_version')
+class TestTypeRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = types_db.TypeRegistry(refresh_interval=10)
+        self.type_defs = [{'id': 'a', 'unit_key': ['name']}, {'id': 'b', 'unit_key': []}]
+
+    def test_definitions(self, get_version, get_collection):
+        get_collection.return_value.find.return_value = self.type_defs
+
+        definitions = self.registry.definitions()
+
+        self.assertEqual(definitions, {'a': self.type_defs[0], 'b': self.type_defs[1]})
+        get_version.assert_called_once_with()
+
+    @mock.patch('pulp.plugins.types.database.time.time')
+    def test_definitions_cached(self, mock_time, get_version, get_collection):
+        mock_time.return_value = 100
+        get_collection.return_value.find.return_value = self.type_defs
+        self.registry.definitions()
+        mock_time.return_value = 105
+
+        self.registry.definitions()
+
+        # the version is not checked again within the refresh interval
+        self.assertEqual(get_version.call_count, 1)
+        self.assertEqual(get_collection.return_value.find.call_count, 1)
+
+    @mock.patch('pulp.plugins.types.database.time.time')
+    def test_definitions_version_unchanged(self, mock_time, get_version, get_collection):
+        mock_time.return_value = 100
+        get_version.return_value = 'v1'
+        get_collection.return_value.find.return_value = self.type_defs
+        self.registry.definitions()
+        mock_time.return_value = 111
+
+        self.registry.definitions()
+
+        self.assertEqual(get_version.call_count, 2)
+        self.assertEqual(get_collection.return_value.find.call_count, 1)
+
+    @mock.patch('pulp.plugins.types.database.time.time')
+    def test_definitions_version_changed(self, mock_time, get_version, get_collection):
+        mock_time.return_value = 100
+        get_version.return_value = 'v1'
+        get_collection.return_value.find.return_value = self.type_defs
+        self.registry.definitions()
+        mock_time.return_value = 111
+        get_version.return_value = 'v2'
+        get_collection.return_value.find.return_value = self.type_defs[:1]
+
+        definitions = self.registry.definitions()
+
+        self.assertEqual(definitions, {'a': self.type_defs[0]})
+
+    def test_invalidate(self, get_version, get_collection):
+        get_collection.return_value.find.return_value = self.type_defs
+        self.registry.definitions()
+
+        self.registry.invalidate()
+        self.registry.definitions()
+
+        self.assertEqual(get_collection.return_value.find.call_count, 2)
+
+    @mock.patch('pulp.plugins.types.database.registry')
+    def test_type_definition_copied(self, registry, get_version, get_collection):
+        registry.definitions.return_value = {'a': self.type_defs[0]}
+
+        type_def = types_db.type_definition('a')
+        type_def['unit_key'].append('version')
+
+        self.assertEqual(self.type_defs[0]['unit_key'], ['name'])
+        self.assertTrue(types_db.type_definition('c') is None)
+
+    @mock.patch('pulp.plugins.types.database.registry')
+    def test_changed(self, registry, get_version, get_collection):
+        with mock.patch('pulp.plugins.types.database.ContentTypesVersion.change') as change:
+            types_db.changed()
+
+        change.assert_called_once_with()
+        registry.invalidate.assert_called_once_with()
@@ -463,6 +463,24 @@ class PluginStepTests(PluginBase):
         child_step.process.assert_called_once_with()
         step.report_progress.assert_called_once_with(force=True)
 
+    @patch('pulp.plugins.util.publish_step.metrics.add_step')
+    def test_process_records_step_duration(self, mock_add_step):
+        step = publish_step.PluginStep('parent', working_dir=self.working_dir, conduit=self.conduit)
+
+        step.process()
+
+        self.assertEqual(mock_add_step.call_count, 1)
+        self.assertEqual(mock_add_step.call_args[0][0], 'parent')
+
+    @patch('pulp.plugins.util.publish_step.metrics.add_step')
+    def test_process_records_step_duration_on_error(self, mock_add_step):
+        step = publish_step.PluginStep('parent', working_dir=self.working_dir, conduit=self.conduit)
+        step.initialize = Mock(side_effect=Exception('boo'))
+
+        self.assertRaises(Exception, step.process)
+
+        self.assertEqual(mock_add_step.call_args[0][0], 'parent')
+
     def test_process_lifecycle_reports_on_error(self):
         # set working_dir and conduit. This is required by process_lifecycle
         step = publish_step.PluginStep('parent', working_dir=self.working_dir, conduit=self.conduit)
@@ -1016,6 +1034,15 @@ class DownloadStepTests(unittest.TestCase):
         # assert report_progress was called with no args
         mock_report_progress.assert_called_once_with()
 
+    @patch('pulp.plugins.util.publish_step.metrics.add_bytes_downloaded')
+    def test_download_succeeded_records_bytes(self, mock_add_bytes_downloaded):
+        dlstep = publish_step.DownloadStep('fake-step')
+        dlstep.report_progress = Mock()
+
+        dlstep.download_succeeded(Mock(bytes_downloaded=1024))
+
+        mock_add_bytes_downloaded.assert_called_once_with(1024)
+
     def test_download_failed(self):
         dlstep = publish_step.DownloadStep('fake-step')
         mock_report = Mock()
@@ -1217,7 +1244,7 @@ class TestSaveUnitsStep(unittest.TestCase):
         repo.repo_obj = model.Repository(repo_id=repo.id)
         step = publish_step.SaveUnitsStep('foo_type', repo=repo)
         step.finalize()
-        mock_repo_controller.rebuild_content_unit_counts.assert_called_once_with(repo.repo_obj)
+        mock_repo_controller.update_content_unit_counts.assert_called_once_with(repo.repo_obj)
 
 
 class TestCreateManifestStep(unittest.TestCase):
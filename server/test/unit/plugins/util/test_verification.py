@@ -1,4 +1,7 @@
 from cStringIO import StringIO
+import os
+import shutil
+import tempfile
 import unittest
 
 from pulp.plugins.util import verification
@@ -57,3 +60,47 @@ class VerificationTests(unittest.TestCase):
     def test_checksum_invalid_checksum(self):
         self.assertRaises(util.InvalidChecksumType, verification.verify_checksum,
                           StringIO(), 'fake-type', 'irrelevant')
+
+
+class VerifyChecksumsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.sha1_sum = 'cae99c6102aa3596ff9b86c73881154e340c2ea8'
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as fp:
+            fp.write(data)
+        return path
+
+    def test_verify(self):
+        paths = [self.write(str(i), 'Test Data') for i in range(10)]
+        files = [(path, {util.TYPE_SHA1: self.sha1_sum}) for path in paths]
+
+        failures = verification.verify_checksums(files, workers=3)
+
+        self.assertEqual(failures, {})
+
+    def test_failures(self):
+        good = self.write('good', 'Test Data')
+        bad = self.write('bad', 'Other Data')
+        missing = os.path.join(self.tmp_dir, 'missing')
+        unknown = self.write('unknown', 'Test Data')
+        files = [(good, {util.TYPE_SHA1: self.sha1_sum, util.TYPE_MD5: 'b'}),
+                 (bad, {util.TYPE_SHA1: self.sha1_sum}),
+                 (missing, {util.TYPE_SHA1: self.sha1_sum}),
+                 (unknown, {'fake-type': 'irrelevant'})]
+
+        failures = verification.verify_checksums(files)
+
+        self.assertEqual(sorted(failures), sorted([good, bad, missing, unknown]))
+        self.assertTrue(isinstance(failures[good], verification.VerificationException))
+        # only the mismatched checksum is reported
+        self.assertEqual(failures[good].args[0].keys(), [util.TYPE_MD5])
+        self.assertTrue(isinstance(failures[bad], verification.VerificationException))
+        self.assertTrue(isinstance(failures[missing], IOError))
+        self.assertTrue(isinstance(failures[unknown], util.InvalidChecksumType))
@@ -36,9 +36,10 @@ class Context(Mock):
 
 class TestConsumerCapability(TestCase):
 
+    @patch('pulp.server.agent.direct.pulpagent.forget_queue')
     @patch('pulp.server.agent.direct.pulpagent.add_connector')
     @patch('pulp.server.agent.direct.pulpagent.Queue')
-    def test_delete_queue(self, queue, add_connector):
+    def test_delete_queue(self, queue, add_connector, forget_queue):
         url = 'test-url'
         name = 'test-queue'
 
@@ -51,6 +52,7 @@ class TestConsumerCapability(TestCase):
         queue.assert_called_once_with(name, url)
         queue.return_value.purge.assert_called_once_with()
         queue.return_value.delete.assert_called_once_with()
+        forget_queue.assert_called_once_with(name, url)
 
     @patch('pulp.server.agent.direct.pulpagent.add_connector')
     @patch('pulp.server.agent.direct.pulpagent.Queue')
@@ -3,10 +3,11 @@ from StringIO import StringIO
 from unittest import TestCase
 
 from M2Crypto import RSA, BIO
-from mock import patch, Mock
+from mock import call, patch, Mock
 from gofer.messaging.auth import ValidationFailed
 
-from pulp.server.agent.auth import Authenticator
+from pulp.server.agent.auth import Authenticator, KeyStore, key_store
+from pulp.server.exceptions import MissingResource
 
 
 RSA_KEY = """
@@ -68,6 +69,9 @@ PULP_CONF.readfp(StringIO(TEST_CONF))
 
 class TestAuthentication(TestCase):
 
+    def tearDown(self):
+        key_store.clear()
+
     @patch('__builtin__.open')
     @patch('pulp.server.agent.auth.pulp_conf', PULP_CONF)
     def test_load(self, mock_open):
@@ -158,9 +162,112 @@ class TestAuthentication(TestCase):
 
         authenticator = Authenticator()
         self.assertRaises(ValidationFailed, authenticator.validate, document, '', '')
-        mock_get.assert_called_with(consumer_id)
+        mock_get.assert_called_once_with(consumer_id)
 
     def test_validate_not_enabled(self):
         authenticator = Authenticator()
         authenticator.enabled = False
         authenticator.validate('', '', '')
+
+
+@patch('pulp.server.agent.auth.pulp_conf', PULP_CONF)
+@patch('pulp.server.agent.auth.BIO')
+@patch('pulp.server.agent.auth.RSA')
+class TestKeyStore(TestCase):
+
+    def setUp(self):
+        self.key_store = KeyStore()
+
+    @patch('pulp.server.agent.auth.os.stat')
+    @patch('__builtin__.open')
+    def test_server_key(self, mock_open, mock_stat, mock_rsa, mock_bio):
+        mock_stat.return_value.st_mtime = 10
+        mock_open.return_value.__enter__.return_value.read.return_value = RSA_KEY
+
+        # test
+
+        key = self.key_store.server_key()
+        cached = self.key_store.server_key()
+
+        # validation
+
+        mock_open.assert_called_once_with('/etc/pki/pulp/rsa.key')
+        mock_bio.MemoryBuffer.assert_called_once_with(RSA_KEY)
+        self.assertEqual(key, mock_rsa.load_key_bio.return_value)
+        self.assertEqual(cached, key)
+
+    @patch('pulp.server.agent.auth.os.stat')
+    @patch('__builtin__.open')
+    def test_server_key_changed(self, mock_open, mock_stat, mock_rsa, mock_bio):
+        mock_stat.side_effect = [Mock(st_mtime=10), Mock(st_mtime=20)]
+        mock_open.return_value.__enter__.return_value.read.return_value = RSA_KEY
+
+        # test
+
+        self.key_store.server_key()
+        self.key_store.server_key()
+
+        # validation
+
+        self.assertEqual(mock_open.call_count, 2)
+        self.assertEqual(mock_rsa.load_key_bio.call_count, 2)
+
+    @patch('pulp.server.managers.factory.consumer_manager')
+    def test_consumer_key(self, mock_factory, mock_rsa, mock_bio):
+        mock_manager = mock_factory.return_value
+        mock_manager.get_consumer.return_value = {'rsa_pub': RSA_PUB}
+
+        # test
+
+        key = self.key_store.consumer_key('test-consumer')
+        cached = self.key_store.consumer_key('test-consumer')
+
+        # validation
+
+        # the consumer is looked up each time, but the key is only parsed once
+        self.assertEqual(mock_manager.get_consumer.call_args_list,
+                         [call('test-consumer', fields=['rsa_pub'])] * 2)
+        mock_bio.MemoryBuffer.assert_called_once_with(RSA_PUB)
+        self.assertEqual(key, mock_rsa.load_pub_key_bio.return_value)
+        self.assertEqual(cached, key)
+
+    @patch('pulp.server.managers.factory.consumer_manager')
+    def test_consumer_key_changed(self, mock_factory, mock_rsa, mock_bio):
+        other_pub = RSA_PUB.replace('MIGf', 'MIGe')
+        mock_factory.return_value.get_consumer.side_effect = [
+            {'rsa_pub': RSA_PUB}, {'rsa_pub': other_pub}]
+
+        # test
+
+        self.key_store.consumer_key('test-consumer')
+        self.key_store.consumer_key('test-consumer')
+
+        # validation
+
+        self.assertEqual(mock_bio.MemoryBuffer.call_args_list,
+                         [call(RSA_PUB), call(other_pub)])
+        self.assertEqual(mock_rsa.load_pub_key_bio.call_count, 2)
+
+    @patch('pulp.server.managers.factory.consumer_manager')
+    def test_consumer_key_deleted(self, mock_factory, mock_rsa, mock_bio):
+        mock_factory.return_value.get_consumer.side_effect = [
+            {'rsa_pub': RSA_PUB}, MissingResource(consumer='test-consumer')]
+
+        # test
+
+        self.key_store.consumer_key('test-consumer')
+        self.assertRaises(MissingResource, self.key_store.consumer_key, 'test-consumer')
+
+    @patch('pulp.server.managers.factory.consumer_manager')
+    def test_invalidate(self, mock_factory, mock_rsa, mock_bio):
+        mock_factory.return_value.get_consumer.return_value = {'rsa_pub': RSA_PUB}
+
+        # test
+
+        self.key_store.consumer_key('test-consumer')
+        self.key_store.invalidate('test-consumer')
+        self.key_store.consumer_key('test-consumer')
+
+        # validation
+
+        self.assertEqual(mock_factory.return_value.get_consumer.call_count, 2)
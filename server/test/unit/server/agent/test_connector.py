@@ -2,7 +2,8 @@ from unittest import TestCase
 
 from mock import patch
 
-from pulp.server.agent.connector import get_url, add_connector
+from pulp.server.agent import connector
+from pulp.server.agent.connector import get_url, add_connector, declare_queue, forget_queue
 
 
 messaging = {
@@ -41,3 +42,41 @@ class TestConnector(TestCase):
         _connector.return_value.add.assert_called_with()
         self.assertEqual(_connector.return_value.ssl.ca_certificate, messaging['cacert'])
         self.assertEqual(_connector.return_value.ssl.client_certificate, messaging['clientcert'])
+
+
+@patch('pulp.server.agent.connector.Queue')
+@patch('pulp.server.agent.connector.add_connector')
+class TestDeclareQueue(TestCase):
+
+    def tearDown(self):
+        connector._declared.clear()
+
+    def test_declare(self, _add_connector, _queue):
+        declare_queue('test-queue', 'test-url')
+        _add_connector.assert_called_once_with()
+        _queue.assert_called_once_with('test-queue', 'test-url')
+        _queue.return_value.declare.assert_called_once_with()
+
+    def test_declared(self, _add_connector, _queue):
+        declare_queue('test-queue', 'test-url')
+        declare_queue('test-queue', 'test-url')
+        self.assertEqual(_add_connector.call_count, 1)
+        self.assertEqual(_queue.return_value.declare.call_count, 1)
+
+    @patch('pulp.server.agent.connector.time')
+    def test_expired(self, _time, _add_connector, _queue):
+        _time.side_effect = [100, 100 + connector.QUEUE_TTL]
+        declare_queue('test-queue', 'test-url')
+        declare_queue('test-queue', 'test-url')
+        self.assertEqual(_queue.return_value.declare.call_count, 2)
+
+    def test_forget(self, _add_connector, _queue):
+        declare_queue('test-queue', 'test-url')
+        forget_queue('test-queue', 'test-url')
+        declare_queue('test-queue', 'test-url')
+        self.assertEqual(_queue.return_value.declare.call_count, 2)
+
+    def test_other_queue(self, _add_connector, _queue):
+        declare_queue('test-queue', 'test-url')
+        declare_queue('other-queue', 'test-url')
+        self.assertEqual(_queue.return_value.declare.call_count, 2)
@@ -33,9 +33,8 @@ class TestContext(TestCase):
 
     @patch('pulp.server.agent.context.get_url')
     @patch('pulp.server.agent.context.Authenticator.load')
-    @patch('pulp.server.agent.context.add_connector')
-    @patch('pulp.server.agent.context.Queue')
-    def test_enter_exit(self, queue, add_connector, load, get_url):
+    @patch('pulp.server.agent.context.declare_queue')
+    def test_enter_exit(self, declare_queue, load, get_url):
         _id = 'test-db_id'
         consumer = {'_id': _id, 'id': 'test-consumer'}
         details = {'task_id': '3456'}
@@ -48,6 +47,4 @@ class TestContext(TestCase):
             pass
 
         # validation
-        add_connector.assert_called_once_with()
-        queue.assert_called_once_with(connector.address, connector.url)
-        queue.return_value.declare.assert_called_once_with()
+        declare_queue.assert_called_once_with(connector.address, connector.url)
@@ -2,12 +2,14 @@
 This module contains tests for the pulp.server.async.app module.
 """
 
+import datetime
 import mongoengine
 import platform
 import unittest
 
 import mock
 
+from pulp.common import dateutils
 from pulp.common.constants import RESOURCE_MANAGER_WORKER_NAME, PULP_PROCESS_HEARTBEAT_INTERVAL
 from pulp.server.async import app
 from pulp.server.managers.factory import initialize
@@ -87,3 +89,78 @@ class InitializeWorkerTestCase(unittest.TestCase):
 
         self.assertEquals(2, len(mock_rm_lock().save.mock_calls))
         mock_time.sleep.assert_called_once_with(PULP_PROCESS_HEARTBEAT_INTERVAL)
+
+    @mock.patch('pulp.server.async.app.time')
+    @mock.patch('pulp.server.async.app.Worker')
+    @mock.patch('pulp.server.async.app.ResourceManagerLock')
+    def test_get_resource_manager_lock_removes_stale(self, mock_rm_lock, mock_worker, mock_time):
+        """
+        Assert that the locks held by resource managers that stopped sending heartbeats are
+        removed.
+        """
+        sender = RESOURCE_MANAGER_WORKER_NAME + '@' + platform.node()
+        mock_worker.objects.return_value.distinct.return_value = [sender]
+        app.get_resource_manager_lock(sender)
+
+        kwargs = mock_worker.objects.call_args_list[0][1]
+        self.assertEqual(kwargs['name__startswith'], RESOURCE_MANAGER_WORKER_NAME)
+        self.assertTrue('last_heartbeat__gt' in kwargs)
+        mock_worker.objects.return_value.distinct.assert_called_once_with('name')
+        kwargs = mock_rm_lock.objects.call_args[1]
+        self.assertEqual(kwargs['name__nin'], [sender])
+        self.assertEqual(kwargs['timestamp__lte'], mock_worker.objects.call_args_list[0][1][
+            'last_heartbeat__gt'])
+        mock_rm_lock.objects.return_value.delete.assert_called_once_with()
+
+    @mock.patch('pulp.server.async.app.time')
+    @mock.patch('pulp.server.async.app.Worker')
+    @mock.patch('pulp.server.async.app.ResourceManagerLock')
+    def test_get_resource_manager_lock_keeps_new_lock(self, mock_rm_lock, mock_worker,
+                                                      mock_time):
+        """
+        Assert that a waiting resource manager does not remove the lock of a resource manager
+        that acquired it after the live resource managers were read.
+        """
+        sender = RESOURCE_MANAGER_WORKER_NAME + '-1@' + platform.node()
+        other = RESOURCE_MANAGER_WORKER_NAME + '-2@' + platform.node()
+        stale = RESOURCE_MANAGER_WORKER_NAME + '-3@' + platform.node()
+        locks = {stale: datetime.datetime(2000, 1, 1, tzinfo=dateutils.utc_tz())}
+
+        def distinct(field):
+            # the other resource manager starts and acquires the lock right after its worker
+            # record was looked for
+            locks[other] = dateutils.now_utc_datetime_with_tzinfo()
+            return []
+
+        def objects(name__nin, timestamp__lte):
+            matching = [n for n, t in locks.items() if n not in name__nin and t <= timestamp__lte]
+            return mock.Mock(delete=lambda: [locks.pop(n) for n in matching])
+
+        def save():
+            if locks:
+                raise mongoengine.NotUniqueError()
+            locks[sender] = dateutils.now_utc_datetime_with_tzinfo()
+
+        mock_worker.objects.return_value.distinct.side_effect = distinct
+        mock_rm_lock.objects.side_effect = objects
+        mock_rm_lock.return_value.save.side_effect = save
+        mock_time.sleep.side_effect = StopIteration()
+
+        self.assertRaises(StopIteration, app.get_resource_manager_lock, sender)
+
+        self.assertEqual(locks.keys(), [other])
+
+
+class TestHeartbeatStep(unittest.TestCase):
+
+    @mock.patch('pulp.server.async.app.ResourceManagerLock')
+    @mock.patch('pulp.server.async.app.worker_watcher')
+    def test_record_heartbeat_resource_manager(self, mock_worker_watcher, mock_rm_lock):
+        """
+        Assert that the heartbeat of a resource manager is a single write of its worker record.
+        """
+        worker = mock.Mock(hostname=RESOURCE_MANAGER_WORKER_NAME + '@' + platform.node())
+        app.HeartbeatStep(worker)._record_heartbeat(worker)
+
+        mock_worker_watcher.handle_worker_heartbeat.assert_called_once_with(worker.hostname)
+        self.assertFalse(mock_rm_lock.objects.called)
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+import copy
 import unittest
 import platform
 
@@ -219,18 +220,17 @@ class TestSchedulerScheduleChanged(unittest.TestCase):
     @mock.patch('threading.Thread', new=mock.MagicMock())
     @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
-    @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_count_changed(self, mock_updated_since, mock_get_enabled):
+    @mock.patch('pulp.server.async.scheduler.ScheduleVersion')
+    def test_version_changed(self, mock_version, mock_get_enabled):
         """
-        This test ensures that if the number of enabled schedules changes, the schedule_changed
+        This test ensures that if the schedule version changes, the schedule_changed
         property returns True.
         """
-        mock_updated_since.return_value.count.return_value = 0
-        mock_get_enabled.return_value = SCHEDULES
+        mock_version.get_version.return_value = 3
+        mock_get_enabled.return_value = copy.deepcopy(SCHEDULES)
         sched_instance = scheduler.Scheduler()
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        mock_get_enabled.return_value.count.return_value = sched_instance._loaded_from_db_count + 1
+        mock_version.get_version.return_value = 4
 
         self.assertTrue(sched_instance.schedule_changed is True)
 
@@ -238,30 +238,77 @@ class TestSchedulerScheduleChanged(unittest.TestCase):
     @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
     @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_new_updated(self, mock_updated_since, mock_get_enabled):
-        mock_get_enabled.return_value = SCHEDULES
+    @mock.patch('pulp.server.async.scheduler.ScheduleVersion')
+    def test_no_changes(self, mock_version, mock_updated_since, mock_get_enabled):
+        mock_version.get_version.return_value = 3
+        mock_get_enabled.return_value = copy.deepcopy(SCHEDULES)
         sched_instance = scheduler.Scheduler()
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        mock_get_enabled.return_value.count.return_value = sched_instance._loaded_from_db_count
-        mock_updated_since.return_value.count.return_value = 1
+        self.assertTrue(sched_instance.schedule_changed is False)
+        # only the version is read, the schedules are not queried
+        self.assertEqual(mock_get_enabled.call_count, 1)
+        self.assertFalse(mock_updated_since.called)
+
 
-        self.assertTrue(sched_instance.schedule_changed is True)
+class TestSchedulerUpdateSchedule(unittest.TestCase):
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
     @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
+    @mock.patch('pulp.server.async.scheduler.ScheduleVersion')
+    def setUp(self, mock_version, mock_get_enabled):
+        mock_version.get_version.return_value = 3
+        mock_get_enabled.return_value = copy.deepcopy(SCHEDULES)
+        self.sched_instance = scheduler.Scheduler()
+        self.entry = self.sched_instance._schedule['529f4bd93de3a31d0ec77338']
+
+    @mock.patch('pulp.server.managers.schedule.utils.get')
+    @mock.patch('pulp.server.managers.schedule.utils.get_updated_since', return_value=[])
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled_ids')
+    @mock.patch('pulp.server.async.scheduler.ScheduleVersion')
+    def test_removed(self, mock_version, mock_get_enabled_ids, mock_updated_since, mock_get):
+        mock_version.get_version.return_value = 4
+        mock_get_enabled_ids.return_value = set(['529f4bd93de3a31d0ec77338',
+                                                 '529f4bd93de3a31d0ec77340'])
+
+        self.sched_instance.update_schedule()
+
+        self.assertTrue('529f4bd93de3a31d0ec77339' not in self.sched_instance._schedule)
+        # untouched entries are kept as they are
+        self.assertTrue(self.sched_instance._schedule['529f4bd93de3a31d0ec77338'] is self.entry)
+        # the ignored schedule is not fetched again
+        self.assertFalse(mock_get.called)
+        self.assertEqual(self.sched_instance._loaded_from_db_count, 1)
+        self.assertEqual(self.sched_instance._schedule_version, 4)
+        self.assertFalse(self.sched_instance.schedule_changed)
+
+    @mock.patch('pulp.server.managers.schedule.utils.get')
     @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_no_changes(self, mock_updated_since, mock_get_enabled):
-        mock_updated_since.return_value.count.return_value = 0
-        mock_get_enabled.return_value = SCHEDULES
-        sched_instance = scheduler.Scheduler()
-
-        mock_get_enabled.return_value = mock.MagicMock()
-        # -1 because there is an ignored schedule that has 0 remaining runs
-        mock_get_enabled.return_value.count.return_value = len(SCHEDULES) - 1
-
-        self.assertTrue(sched_instance.schedule_changed is False)
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled_ids')
+    @mock.patch('pulp.server.async.scheduler.ScheduleVersion')
+    def test_updated(self, mock_version, mock_get_enabled_ids, mock_updated_since, mock_get):
+        updated = copy.deepcopy(SCHEDULES[1])
+        updated['last_updated'] = 1387218600.0
+        new = copy.deepcopy(SCHEDULES[1])
+        new['_id'] = '529f4bd93de3a31d0ec77341'
+        new['last_updated'] = 1.0
+        mock_version.get_version.return_value = 4
+        mock_get_enabled_ids.return_value = set(['529f4bd93de3a31d0ec77338',
+                                                 '529f4bd93de3a31d0ec77339',
+                                                 '529f4bd93de3a31d0ec77340',
+                                                 '529f4bd93de3a31d0ec77341'])
+        mock_updated_since.return_value = [updated]
+        mock_get.return_value = [dispatch.ScheduledCall.from_db(new)]
+
+        self.sched_instance.update_schedule()
+
+        mock_updated_since.assert_called_once_with(1387218569.811224)
+        # the schedule enabled with an older timestamp is fetched by ID
+        mock_get.assert_called_once_with(['529f4bd93de3a31d0ec77341'])
+        self.assertTrue('529f4bd93de3a31d0ec77341' in self.sched_instance._schedule)
+        self.assertTrue(self.sched_instance._schedule['529f4bd93de3a31d0ec77338'] is self.entry)
+        self.assertEqual(self.sched_instance._most_recent_timestamp, 1387218600.0)
+        self.assertEqual(self.sched_instance._loaded_from_db_count, 3)
 
 
 class TestSchedulerSchedule(unittest.TestCase):
@@ -279,14 +326,17 @@ class TestSchedulerSchedule(unittest.TestCase):
         mock_get_schedule.assert_called_once_with()
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch.object(scheduler.Scheduler, 'update_schedule')
     @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
     @mock.patch.object(scheduler.Scheduler, 'schedule_changed', new=True)
-    def test_schedule_changed(self, mock_setup_schedule):
+    def test_schedule_changed(self, mock_setup_schedule, mock_update_schedule):
         sched_instance = scheduler.Scheduler()
+        sched_instance._schedule = {}
 
         sched_instance.schedule
 
-        # make sure it called the setup_schedule() method
+        # make sure it applied the changes rather than rebuilding the schedule
+        mock_update_schedule.assert_called_once_with()
         mock_setup_schedule.assert_called_once_with()
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
@@ -329,6 +379,18 @@ class TestCeleryProcessTimeoutMonitorRun(unittest.TestCase):
         # verify the frequency
         mock_sleep.assert_called_once_with(constants.PULP_PROCESS_HEARTBEAT_INTERVAL)
 
+    @mock.patch.object(scheduler.CeleryProcessTimeoutMonitor, 'check_celery_processes',
+                       spec_set=True)
+    @mock.patch.object(scheduler.time, 'sleep', spec_set=True)
+    def test_sleeps_until_next_check(self, mock_sleep, mock_check_celery_processes):
+        mock_check_celery_processes.return_value = 2.5
+        mock_sleep.side_effect = [None, self.SleepException]
+
+        self.assertRaises(self.SleepException, scheduler.CeleryProcessTimeoutMonitor().run)
+
+        self.assertEqual(mock_sleep.call_args_list,
+                         [mock.call(constants.PULP_PROCESS_HEARTBEAT_INTERVAL), mock.call(2.5)])
+
     @mock.patch.object(scheduler._logger, 'error', spec_set=True)
     @mock.patch.object(scheduler.CeleryProcessTimeoutMonitor, 'check_celery_processes',
                        spec_set=True)
@@ -360,38 +422,77 @@ class TestCeleryProcessTimeoutMonitorRun(unittest.TestCase):
         self.assertEqual(mock_log_error.call_count, 1)
 
 
-class TestCeleryProcessTimeoutMonitorCheckCeleryProcesses(unittest.TestCase):
+def mock_workers(mock_worker, expiring, schedulers=1, resource_managers=1, workers=1):
+    """
+    Set up the Worker mock for the queries of check_celery_processes().
 
-    @mock.patch('pulp.server.async.scheduler.Worker', spec_set=True)
-    def test_queries_all_workers(self, mock_worker):
-        mock_worker.return_value = []
+    :param expiring: The workers returned by the query for the workers whose heartbeat is or
+                     will soon be too old.
+    :type  expiring: list
+    """
+    expiring_query = mock.MagicMock()
+    expiring_query.only.return_value = expiring
+    online_query = mock.MagicMock()
+    online_query.filter.return_value.count.side_effect = [schedulers, resource_managers]
+    online_query.count.return_value = schedulers + resource_managers + workers
+    mock_worker.objects.side_effect = [expiring_query, online_query]
+    return expiring_query, online_query
 
-        scheduler.CeleryProcessTimeoutMonitor().check_celery_processes()
 
-        mock_worker.objects.all.assert_called_once_with()
+class TestCeleryProcessTimeoutMonitorCheckCeleryProcesses(unittest.TestCase):
+
+    @mock.patch('pulp.server.async.scheduler.Worker', spec_set=True)
+    def test_queries_by_heartbeat(self, mock_worker):
+        expiring_query, online_query = mock_workers(mock_worker, [])
+
+        delay = scheduler.CeleryProcessTimeoutMonitor().check_celery_processes()
+
+        self.assertEqual(delay, constants.PULP_PROCESS_HEARTBEAT_INTERVAL)
+        self.assertFalse(mock_worker.objects.all.called)
+        expiring_kwargs = mock_worker.objects.call_args_list[0][1]
+        online_kwargs = mock_worker.objects.call_args_list[1][1]
+        self.assertEqual(
+            expiring_kwargs['last_heartbeat__lt'] - online_kwargs['last_heartbeat__gte'],
+            timedelta(seconds=constants.PULP_PROCESS_HEARTBEAT_INTERVAL))
+        expiring_query.only.assert_called_once_with('name', 'last_heartbeat')
+        online_query.filter.assert_has_calls([
+            mock.call(name__startswith=constants.SCHEDULER_WORKER_NAME),
+            mock.call(name__startswith=constants.RESOURCE_MANAGER_WORKER_NAME)], any_order=True)
 
     @mock.patch('pulp.server.async.scheduler._delete_worker', spec_set=True)
     @mock.patch('pulp.server.async.scheduler.Worker', spec_set=True)
     def test_deletes_workers(self, mock_worker, mock_delete_worker):
-        mock_worker.objects.all.return_value = [
+        mock_workers(mock_worker, [
             Worker(name='name1', last_heartbeat=datetime.utcnow() -
                    timedelta(seconds=constants.PULP_PROCESS_TIMEOUT_INTERVAL + 10)),
-            Worker(name='name2', last_heartbeat=datetime.utcnow()),
-        ]
+            Worker(name='name2', last_heartbeat=datetime.utcnow() -
+                   timedelta(seconds=constants.PULP_PROCESS_TIMEOUT_INTERVAL - 2)),
+        ])
 
         scheduler.CeleryProcessTimeoutMonitor().check_celery_processes()
 
         # make sure _delete_worker is only called for the old worker
-        mock_delete_worker.assert_has_calls([mock.call('name1')])
+        mock_delete_worker.assert_called_once_with('name1')
+
+    @mock.patch('pulp.server.async.scheduler._delete_worker', spec_set=True)
+    @mock.patch('pulp.server.async.scheduler.Worker', spec_set=True)
+    def test_next_check_when_heartbeat_expires(self, mock_worker, mock_delete_worker):
+        mock_workers(mock_worker, [
+            Worker(name='name2', last_heartbeat=datetime.utcnow() -
+                   timedelta(seconds=constants.PULP_PROCESS_TIMEOUT_INTERVAL - 2)),
+        ])
+
+        delay = scheduler.CeleryProcessTimeoutMonitor().check_celery_processes()
+
+        # the check follows the expiry of the heartbeat rather than the heartbeat interval
+        self.assertTrue(2 < delay <= 3)
+        self.assertFalse(mock_delete_worker.called)
 
     @mock.patch('pulp.server.async.scheduler._delete_worker', spec_set=True)
     @mock.patch('pulp.server.async.scheduler.Worker', spec_set=True)
     @mock.patch('pulp.server.async.scheduler._logger', spec_set=True)
     def test_logs_scheduler_missing(self, mock__logger, mock_worker, mock_delete_worker):
-        mock_worker.objects.all.return_value = [
-            Worker(name=constants.RESOURCE_MANAGER_WORKER_NAME, last_heartbeat=datetime.utcnow()),
-            Worker(name='name2', last_heartbeat=datetime.utcnow()),
-        ]
+        mock_workers(mock_worker, [], schedulers=0)
 
         scheduler.CeleryProcessTimeoutMonitor().check_celery_processes()
 
@@ -403,10 +504,7 @@ class TestCeleryProcessTimeoutMonitorCheckCeleryProcesses(unittest.TestCase):
     @mock.patch('pulp.server.async.scheduler.Worker', spec_set=True)
     @mock.patch('pulp.server.async.scheduler._logger', spec_set=True)
     def test_logs_resource_manager_missing(self, mock__logger, mock_worker, mock_delete_worker):
-        mock_worker.objects.all.return_value = [
-            Worker(name=constants.SCHEDULER_WORKER_NAME, last_heartbeat=datetime.utcnow()),
-            Worker(name='name2', last_heartbeat=datetime.utcnow()),
-        ]
+        mock_workers(mock_worker, [], resource_managers=0)
 
         scheduler.CeleryProcessTimeoutMonitor().check_celery_processes()
 
@@ -422,12 +520,9 @@ class TestCeleryProcessTimeoutMonitorCheckCeleryProcesses(unittest.TestCase):
             constants.PULP_PROCESS_HEARTBEAT_INTERVAL
         now = datetime.utcnow()
 
-        mock_worker.objects.all.return_value = [
+        mock_workers(mock_worker, [
             Worker(name='name1', last_heartbeat=now - timedelta(seconds=combined_delay)),
-            Worker(name='name2', last_heartbeat=now),
-            Worker(name=constants.RESOURCE_MANAGER_WORKER_NAME, last_heartbeat=now),
-            Worker(name=constants.SCHEDULER_WORKER_NAME, last_heartbeat=now),
-        ]
+        ])
 
         scheduler.CeleryProcessTimeoutMonitor().check_celery_processes()
         mock__logger.debug.assert_has_calls([
@@ -486,6 +486,20 @@ class TestTaskOnSuccessHandler(ResourceReservationTests):
         task.on_success(retval, task_id, args, kwargs)
         self.assertFalse(mock_reset_failure.called)
 
+    @mock.patch('pulp.server.async.tasks.metrics.stop')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_records_metrics(self, mock_request, mock_stop):
+        task_id = str(uuid.uuid4())
+        mock_request.called_directly = False
+        mock_stop.return_value = {'wall_time': 2.0, 'cpu_time': 1.0}
+        TaskStatus(task_id).save()
+
+        task = tasks.Task()
+        task.on_success('random_return_value', task_id, [], {})
+
+        new_task_status = TaskStatus.objects(task_id=task_id).first()
+        self.assertEqual(new_task_status['metrics'], {'wall_time': 2.0, 'cpu_time': 1.0})
+
 
 class TestTaskOnFailureHandler(ResourceReservationTests):
 
@@ -523,6 +537,20 @@ class TestTaskOnFailureHandler(ResourceReservationTests):
         dateutils.parse_iso8601_datetime(new_task_status['finish_time'])
         self.assertEqual(new_task_status['traceback'], einfo.traceback)
 
+    @mock.patch('pulp.server.async.tasks.metrics.stop')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_records_metrics(self, mock_request, mock_stop):
+        task_id = str(uuid.uuid4())
+        mock_request.called_directly = False
+        mock_stop.return_value = {'wall_time': 2.0, 'cpu_time': 1.0}
+        TaskStatus(task_id).save()
+
+        task = tasks.Task()
+        task.on_failure(Exception(), task_id, [], {}, mock.Mock(traceback='traceback'))
+
+        new_task_status = TaskStatus.objects(task_id=task_id).first()
+        self.assertEqual(new_task_status['metrics'], {'wall_time': 2.0, 'cpu_time': 1.0})
+
     @mock.patch('pulp.server.async.tasks.Task.request')
     @mock.patch('pulp.server.managers.schedule.utils.increment_failure_count')
     def test_with_scheduled_call(self, mock_increment_failure, mock_request):
@@ -734,6 +762,96 @@ class TestTaskApplyAsync(ResourceReservationTests):
         self.assertEqual(result.tags, ['test_tags'])
 
 
+class TestTaskApplyAsyncMany(unittest.TestCase):
+    """
+    Tests for Task.apply_async_many.
+    """
+
+    @mock.patch('pulp.server.async.tasks.BULK_DISPATCH_BATCH_SIZE', 2)
+    @mock.patch('pulp.server.async.tasks._producer')
+    @mock.patch('pulp.server.async.tasks.TaskStatus._get_collection')
+    @mock.patch('celery.Task.apply_async')
+    def test_apply_async_many(self, apply_async, get_collection, producer):
+        """
+        Ensure that task statuses are bulk inserted before the calls are published.
+        """
+        events = []
+        get_collection.return_value.insert_many.side_effect = \
+            lambda documents, **kwargs: events.append([d['task_id'] for d in documents])
+        apply_async.side_effect = \
+            lambda args, task_id, **kwargs: events.append(task_id) or AsyncResult(task_id)
+        group_id = uuid.uuid4()
+        task = tasks.Task()
+
+        results = task.apply_async_many(iter([(1,), (2,), (3,)]), tags=['test_tags'],
+                                        group_id=group_id, routing_key=WORKER_1)
+
+        task_ids = [result.id for result in results]
+        self.assertEqual(len(set(task_ids)), 3)
+        self.assertEqual(events, [task_ids[:2], task_ids[0], task_ids[1],
+                                  task_ids[2:], task_ids[2]])
+        self.assertEqual([result.tags for result in results], [['test_tags']] * 3)
+        producer.assert_called_once_with(task.app)
+        apply_async.assert_has_calls([
+            mock.call((1,), task_id=task_ids[0], routing_key=WORKER_1,
+                      producer=producer.return_value.__enter__.return_value),
+            mock.call((3,), task_id=task_ids[2], routing_key=WORKER_1,
+                      producer=producer.return_value.__enter__.return_value)], any_order=True)
+
+        documents = get_collection.return_value.insert_many.mock_calls[0][1][0]
+        self.assertEqual(documents[0]['task_id'], task_ids[0])
+        self.assertEqual(documents[0]['task_type'], 'pulp.server.async.tasks.Task')
+        self.assertEqual(documents[0]['state'], 'waiting')
+        self.assertEqual(documents[0]['worker_name'], WORKER_1)
+        self.assertEqual(documents[0]['tags'], ['test_tags'])
+        self.assertEqual(documents[0]['group_id'], group_id)
+
+    @mock.patch('pulp.server.async.tasks.TaskStatus._get_collection')
+    @mock.patch('celery.Task.apply_async')
+    def test_apply_async_many_bad_group_id(self, apply_async, get_collection):
+        """
+        Ensure that task statuses are validated and nothing is dispatched when they are invalid.
+        """
+        task = tasks.Task()
+
+        with mock.patch('pulp.server.async.tasks._producer'):
+            self.assertRaises(ValidationError, task.apply_async_many, [(1,)],
+                              group_id='string-id')
+
+        self.assertFalse(get_collection.return_value.insert_many.called)
+        self.assertFalse(apply_async.called)
+
+
+class TestProducer(unittest.TestCase):
+    """
+    Tests for the _producer context manager.
+    """
+
+    def test_eager(self):
+        """
+        Ensure that no producer is acquired when tasks are run eagerly.
+        """
+        app = mock.MagicMock()
+        app.conf.CELERY_ALWAYS_EAGER = True
+        app.conf.task_always_eager = True
+
+        with tasks._producer(app) as producer:
+            self.assertTrue(producer is None)
+        self.assertFalse(app.producer_or_acquire.called)
+
+    def test_not_eager(self):
+        """
+        Ensure that a producer is acquired when tasks are published.
+        """
+        app = mock.MagicMock()
+        app.conf.CELERY_ALWAYS_EAGER = False
+        app.conf.task_always_eager = False
+
+        with tasks._producer(app) as producer:
+            self.assertTrue(producer is app.producer_or_acquire.return_value.__enter__.return_value)
+        app.producer_or_acquire.assert_called_once_with()
+
+
 class TestTaskThrows(unittest.TestCase):
     """
     Exceptions listed in the "throws" collection will not have their stack
@@ -982,6 +1100,21 @@ class TestGetWorkerForReservation(ResourceReservationTests):
             self.fail("NoWorkers() Exception should have been raised.")
 
 
+class TestGetWorkerCount(unittest.TestCase):
+
+    @mock.patch('pulp.server.async.tasks.Worker.objects')
+    def test_get_worker_count(self, mock_worker_objects):
+        """
+        Ensure that the scheduler and resource manager are not counted.
+        """
+        mock_worker_objects.get_online.return_value = [
+            {'name': SCHEDULER_WORKER_NAME + '@host'},
+            {'name': RESOURCE_MANAGER_WORKER_NAME + '@host'},
+            {'name': 'reserved_resource_worker-0@host'},
+            {'name': 'reserved_resource_worker-1@host'}]
+        self.assertEqual(tasks.get_worker_count(), 2)
+
+
 class TestGetUnreservedWorker(ResourceReservationTests):
 
     @mock.patch('pulp.server.async.tasks.ReservedResource')
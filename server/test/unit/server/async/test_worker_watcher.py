@@ -14,11 +14,12 @@ class TestHandleWorkerHeartbeat(unittest.TestCase):
         """
         Ensure that we save a record and log when a new worker comes online.
         """
-        mock_worker.objects.return_value.first.return_value = None
+        modify = mock_worker.objects.return_value.only.return_value.modify
+        modify.return_value = None
         worker_watcher.handle_worker_heartbeat('fake-worker')
         mock_logger.info.assert_called_once_with('New worker \'fake-worker\' discovered')
-        mock_worker.objects.return_value.update_one.\
-            assert_called_once_with(set__last_heartbeat=mock_datetime.utcnow(), upsert=True)
+        mock_worker.objects.assert_called_once_with(name='fake-worker')
+        modify.assert_called_once_with(set__last_heartbeat=mock_datetime.utcnow(), upsert=True)
 
     @mock.patch('pulp.server.async.worker_watcher.datetime')
     @mock.patch('pulp.server.async.worker_watcher._logger')
@@ -27,11 +28,13 @@ class TestHandleWorkerHeartbeat(unittest.TestCase):
         """
         Ensure that we don't log when an existing worker is updated.
         """
-        mock_worker.objects.return_value.first.return_value = mock.Mock()
+        modify = mock_worker.objects.return_value.only.return_value.modify
+        modify.return_value = mock.Mock()
         worker_watcher.handle_worker_heartbeat('fake-worker')
         self.assertEquals(mock_logger.info.called, False)
-        mock_worker.objects.return_value.update_one.\
-            assert_called_once_with(set__last_heartbeat=mock_datetime.utcnow(), upsert=True)
+        # the worker is read and updated by the same write
+        self.assertFalse(mock_worker.objects.return_value.first.called)
+        modify.assert_called_once_with(set__last_heartbeat=mock_datetime.utcnow(), upsert=True)
 
 
 class TestHandleWorkerOffline(unittest.TestCase):
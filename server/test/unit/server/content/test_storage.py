@@ -181,6 +181,56 @@ class TestFileStorage(TestCase):
         shutil.copy.assert_called_once_with(path_in, temp_destination)
         rename.assert_called_once_with(temp_destination, destination)
 
+    @patch('os.rename')
+    @patch('os.remove')
+    @patch('os.close')
+    @patch('pulp.server.content.storage.copy_with_checksums')
+    @patch('pulp.server.content.storage.tempfile')
+    @patch('pulp.server.content.storage.shutil')
+    @patch('pulp.server.content.storage.mkdir')
+    def test_put_file_checksums(self, _mkdir, shutil, tempfile, copy_with_checksums, close,
+                                remove, rename):
+        path_in = '/tmp/test'
+        temp_destination = '/some/file/path'
+        unit = Mock(id='123', storage_path='/tmp/storage')
+        storage = FileStorage()
+        tempfile.mkstemp.return_value = ('fd', temp_destination)
+        copy_with_checksums.return_value = {'sha256': 'abc'}
+
+        # test
+        storage.put(unit, path_in, checksums={'sha256': 'abc'})
+
+        # validation
+        copy_with_checksums.assert_called_once_with(path_in, temp_destination, ['sha256'])
+        self.assertFalse(shutil.copy.called)
+        unit.verify_size.assert_called_once_with(temp_destination)
+        self.assertFalse(remove.called)
+        rename.assert_called_once_with(temp_destination, unit.storage_path)
+
+    @patch('os.rename')
+    @patch('os.remove')
+    @patch('os.close')
+    @patch('pulp.server.content.storage.copy_with_checksums')
+    @patch('pulp.server.content.storage.tempfile')
+    @patch('pulp.server.content.storage.shutil')
+    @patch('pulp.server.content.storage.mkdir')
+    def test_put_file_incorrect_checksum(self, _mkdir, shutil, tempfile, copy_with_checksums,
+                                         close, remove, rename):
+        path_in = '/tmp/test'
+        temp_destination = '/some/file/path'
+        unit = Mock(id='123', storage_path='/tmp/storage')
+        storage = FileStorage()
+        tempfile.mkstemp.return_value = ('fd', temp_destination)
+        copy_with_checksums.return_value = {'sha256': 'abc', 'md5': 'def'}
+
+        # test
+        self.assertRaises(verification.VerificationException, storage.put, unit, path_in,
+                          checksums={'sha256': 'abc', 'md5': 'xyz'})
+
+        # validation
+        remove.assert_called_once_with(temp_destination)
+        self.assertFalse(rename.called)
+
     def test_get(self):
         storage = FileStorage()
         storage.get(None)  # just for coverage
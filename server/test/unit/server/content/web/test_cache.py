@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from mock import patch
+
+from pulp.server.content.web import cache
+from pulp.server.content.web.cache import PathCache, PathMetadata
+
+
+MODULE = 'pulp.server.content.web.cache'
+
+
+class TestPublishMarker(TestCase):
+
+    def setUp(self):
+        self.storage_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.storage_dir)
+
+    @patch(MODULE + '.pulp_conf')
+    def test_publish_marker_path(self, pulp_conf):
+        pulp_conf.get.return_value = '/var/lib/pulp/'
+        self.assertEqual(cache.publish_marker_path(), '/var/lib/pulp/.last_publish')
+        pulp_conf.get.assert_called_once_with('server', 'storage_dir')
+
+    @patch(MODULE + '.publish_marker_path')
+    def test_touch_publish_marker(self, marker_path):
+        path = os.path.join(self.storage_dir, '.last_publish')
+        marker_path.return_value = path
+
+        # test
+        cache.touch_publish_marker()
+        os.utime(path, (1000, 1000))
+        cache.touch_publish_marker()
+
+        # validation
+        self.assertTrue(os.stat(path).st_mtime > 1000)
+
+    @patch(MODULE + '.logger')
+    @patch(MODULE + '.publish_marker_path')
+    def test_touch_publish_marker_failed(self, marker_path, logger):
+        marker_path.return_value = os.path.join(self.storage_dir, 'missing', '.last_publish')
+
+        # test
+        cache.touch_publish_marker()
+
+        # validation
+        self.assertTrue(logger.exception.called)
+
+
+class TestPathCache(TestCase):
+
+    def setUp(self):
+        self.storage_dir = tempfile.mkdtemp()
+        self.marker = os.path.join(self.storage_dir, '.last_publish')
+
+    def tearDown(self):
+        shutil.rmtree(self.storage_dir)
+
+    def test_get(self):
+        path_cache = PathCache(10, 30, self.marker)
+        metadata = PathMetadata('/var/lib/pulp/published/a')
+
+        # test
+        path_cache.set('/a', metadata)
+
+        # validation
+        self.assertEqual(path_cache.get('/a'), metadata)
+        self.assertEqual(path_cache.get('/b'), None)
+
+    def test_bounded(self):
+        path_cache = PathCache(2, 30, self.marker)
+        path_cache.set('/a', PathMetadata('a'))
+        path_cache.set('/b', PathMetadata('b'))
+        path_cache.get('/a')
+
+        # test
+        path_cache.set('/c', PathMetadata('c'))
+
+        # validation
+        self.assertEqual(path_cache.get('/b'), None)
+        self.assertEqual(path_cache.get('/a').path, 'a')
+        self.assertEqual(path_cache.get('/c').path, 'c')
+
+    @patch(MODULE + '.time')
+    def test_expired(self, time):
+        path_cache = PathCache(10, 30, self.marker)
+        time.return_value = 100
+        path_cache.set('/a', PathMetadata('a'))
+
+        # test
+        time.return_value = 129
+        before = path_cache.get('/a')
+        time.return_value = 130
+        after = path_cache.get('/a')
+
+        # validation
+        self.assertEqual(before.path, 'a')
+        self.assertEqual(after, None)
+
+    def test_publish_invalidates(self):
+        path_cache = PathCache(10, 30, self.marker)
+        path_cache.get('/a')
+        path_cache.set('/a', PathMetadata('a'))
+        self.assertEqual(path_cache.get('/a').path, 'a')
+
+        # test
+        with open(self.marker, 'w'):
+            pass
+
+        # validation
+        self.assertEqual(path_cache.get('/a'), None)
+        path_cache.set('/a', PathMetadata('a'))
+        self.assertEqual(path_cache.get('/a').path, 'a')
+        os.utime(self.marker, (1000, 1000))
+        self.assertEqual(path_cache.get('/a'), None)
+
+    def test_disabled(self):
+        path_cache = PathCache(0, 30, self.marker)
+
+        # test
+        path_cache.set('/a', PathMetadata('a'))
+
+        # validation
+        self.assertEqual(path_cache.get('/a'), None)
+
+    def test_clear(self):
+        path_cache = PathCache(10, 30, self.marker)
+        path_cache.set('/a', PathMetadata('a'))
+
+        # test
+        path_cache.clear()
+
+        # validation
+        self.assertEqual(path_cache.get('/a'), None)
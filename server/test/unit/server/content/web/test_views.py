@@ -2,9 +2,10 @@ import os
 
 from unittest import TestCase
 
-from mock import Mock, patch
+from mock import ANY, Mock, patch
 
 from pulp.server.content.web import views as content_views
+from pulp.server.content.web.cache import PathCache, PathMetadata
 from pulp.server.content.web.views import ContentView
 
 
@@ -43,6 +44,9 @@ class TestContentView(TestCase):
             'wsgi.multiprocess': True,
             'wsgi.run_once': False,
         }
+        patcher = patch.object(ContentView, '_path_cache', PathCache(10, 30, '/tmp/nonexistent'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     @patch(MODULE + '.pulp_conf')
     @patch(MODULE + '.Key.load')
@@ -51,6 +55,7 @@ class TestContentView(TestCase):
         conf = {
             'authentication': {'rsa_key': key_path},
             'server': {'storage_dir': '/var/lib/pulp'},
+            'lazy': {'shared_key': ''},
         }
 
         pulp_conf.get.side_effect = lambda s, p: conf.get(s).get(p)
@@ -61,6 +66,60 @@ class TestContentView(TestCase):
         # validation
         key_load.assert_called_once_with(key_path)
 
+    @patch(MODULE + '.pulp_conf')
+    @patch(MODULE + '.Key.load')
+    @patch(MODULE + '.SharedKey.load')
+    def test_init_shared_key(self, shared_key_load, key_load, pulp_conf):
+        key_path = '/tmp/shared.key'
+        conf = {
+            'authentication': {'rsa_key': '/tmp/rsa.key'},
+            'server': {'storage_dir': '/var/lib/pulp'},
+            'lazy': {'shared_key': key_path},
+        }
+
+        pulp_conf.get.side_effect = lambda s, p: conf.get(s).get(p)
+
+        # test
+        view = ContentView()
+
+        # validation
+        shared_key_load.assert_called_once_with(key_path)
+        self.assertFalse(key_load.called)
+        self.assertEqual(view.key, shared_key_load.return_value)
+
+    @patch(MODULE + '.pulp_conf')
+    @patch(MODULE + '.SignedURLCache')
+    @patch.object(ContentView, '_redirect_cache', None)
+    def test_redirect_cache(self, cache, pulp_conf):
+        pulp_conf.get.return_value = '100'
+
+        # test
+        first = ContentView.redirect_cache()
+        second = ContentView.redirect_cache()
+
+        # validation
+        pulp_conf.get.assert_called_once_with('lazy', 'redirect_cache_size')
+        cache.assert_called_once_with(100)
+        self.assertEqual(first, cache.return_value)
+        self.assertEqual(second, cache.return_value)
+
+    @patch(MODULE + '.pulp_conf')
+    @patch(MODULE + '.publish_marker_path', return_value='/var/lib/pulp/.last_publish')
+    @patch(MODULE + '.PathCache')
+    def test_path_cache(self, cache, marker_path, pulp_conf):
+        conf = {'content': {'path_cache_size': '100', 'path_cache_ttl': '20'}}
+        pulp_conf.get.side_effect = lambda s, p: conf.get(s).get(p)
+        ContentView._path_cache = None
+
+        # test
+        first = ContentView.path_cache()
+        second = ContentView.path_cache()
+
+        # validation
+        cache.assert_called_once_with(100, 20, '/var/lib/pulp/.last_publish')
+        self.assertEqual(first, cache.return_value)
+        self.assertEqual(second, cache.return_value)
+
     @patch(MODULE + '.Key.load', Mock())
     def test_urljoin(self):
         scheme = 'http'
@@ -111,10 +170,20 @@ class TestContentView(TestCase):
         forbidden.assert_called_once_with()
         self.assertEqual(reply, forbidden.return_value)
 
+    @patch('os.access')
+    def test_x_send_metadata(self, access):
+        path = '/my/path.rpm'
+        metadata = PathMetadata(path, readable=True, content_type='application/x-rpm')
+        reply = ContentView.x_send(path, metadata)
+        self.assertFalse(access.called)
+        self.assertEqual(reply['X-SENDFILE'], path)
+        self.assertEqual(reply['Content-Type'], 'application/x-rpm')
+
     @patch(MODULE + '.URL')
     @patch(MODULE + '.pulp_conf')
     @patch(MODULE + '.HttpResponseRedirect')
-    def test_redirect(self, redirect, pulp_conf, url):
+    @patch(MODULE + '.ContentView.redirect_cache')
+    def test_redirect(self, redirect_cache, redirect, pulp_conf, url):
         remote_ip = '172.10.08.20'
         scheme = 'https'
         host = 'localhost'
@@ -145,8 +214,9 @@ class TestContentView(TestCase):
         # validation
         url.assert_called_once_with(ContentView.urljoin(
             scheme, host, port, redirect_path, path, query))
-        url.return_value.sign.assert_called_once_with(key, remote_ip=remote_ip)
-        redirect.assert_called_once_with(str(url.return_value.sign.return_value))
+        sign = redirect_cache.return_value.sign
+        sign.assert_called_once_with(url.return_value, key, remote_ip=remote_ip)
+        redirect.assert_called_once_with(str(sign.return_value))
         self.assertEqual(reply, redirect.return_value)
 
     @patch('os.path.lexists', Mock(return_value=True))
@@ -173,9 +243,80 @@ class TestContentView(TestCase):
         # validation
         allow_access.assert_called_once_with(request.environ, host)
         realpath.assert_called_with(path)
-        x_send.assert_called_once_with('/var/lib/pulp/published/content')
+        x_send.assert_called_once_with('/var/lib/pulp/published/content', ANY)
         self.assertEqual(reply, x_send.return_value)
 
+    @patch('os.path.lexists', Mock(return_value=True))
+    @patch('os.access')
+    @patch('os.path.realpath')
+    @patch('os.path.isdir', Mock(return_value=False))
+    @patch('os.path.exists', Mock(return_value=True))
+    @patch(MODULE + '.allow_access')
+    @patch(MODULE + '.Key.load', Mock())
+    def test_get_x_send_cached(self, allow_access, realpath, access):
+        access.return_value = True
+        allow_access.return_value = True
+        realpath.side_effect = lambda p: '/var/lib/pulp/published/repodata/repomd.xml'
+
+        host = 'localhost'
+        path = '/pulp/repos/zoo/repodata/repomd.xml'
+
+        request = Mock(path_info=path, environ=self.environ)
+        request.get_host.return_value = host
+
+        # test
+        view = ContentView()
+        realpath.reset_mock()
+        first = view.get(request)
+        second = view.get(request)
+
+        # validation
+        realpath.assert_called_once_with(path)
+        access.assert_called_once_with('/var/lib/pulp/published/repodata/repomd.xml', os.R_OK)
+        self.assertEqual(allow_access.call_count, 2)
+        for reply in (first, second):
+            self.assertEqual(reply['X-SENDFILE'], '/var/lib/pulp/published/repodata/repomd.xml')
+            self.assertTrue(reply['Content-Type'] in ('text/xml', 'application/xml'))
+
+    @patch('os.path.lexists', Mock(return_value=True))
+    @patch('os.path.realpath', Mock(side_effect=lambda p: '/var/lib/pulp/published/zoo'))
+    @patch('os.path.isdir', Mock(return_value=True))
+    @patch(MODULE + '.allow_access', Mock(return_value=True))
+    @patch(MODULE + '.ContentView.directory_index')
+    @patch(MODULE + '.Key.load', Mock())
+    def test_get_directory_index_cached(self, directory_index):
+        directory_index.return_value = content_views.HttpResponse('<html>zoo</html>')
+        request = Mock(path_info='/pulp/repos/zoo/', environ=self.environ)
+        request.get_host.return_value = 'localhost'
+
+        # test
+        view = ContentView()
+        first = view.get(request)
+        second = view.get(request)
+
+        # validation
+        directory_index.assert_called_once_with('/var/lib/pulp/published/zoo')
+        self.assertEqual(first, directory_index.return_value)
+        self.assertEqual(second.content, '<html>zoo</html>')
+
+    @patch('os.path.lexists', Mock(return_value=True))
+    @patch('os.path.realpath', Mock(side_effect=lambda p: '/etc/pki/tls/private/my.key'))
+    @patch(MODULE + '.allow_access', Mock(return_value=True))
+    @patch(MODULE + '.HttpResponseForbidden')
+    @patch(MODULE + '.Key.load', Mock())
+    def test_get_cached_outside_pub(self, forbidden):
+        path = '/pulp/repos/zoo/my.key'
+        ContentView._path_cache.set(path, PathMetadata('/etc/pki/tls/private/my.key'))
+        request = Mock(path_info=path, environ=self.environ)
+        request.get_host.return_value = 'localhost'
+
+        # test
+        view = ContentView()
+        reply = view.get(request)
+
+        # validation
+        self.assertEqual(reply, forbidden.return_value)
+
     @patch('os.path.lexists', Mock(return_value=False))
     @patch(MODULE + '.Key.load', Mock())
     @patch(MODULE + '.allow_access')
@@ -202,6 +343,7 @@ class TestContentView(TestCase):
     @patch(MODULE + '.allow_access')
     @patch(MODULE + '.ContentView.redirect')
     @patch(MODULE + '.Key.load', Mock())
+    @patch(MODULE + '.SharedKey.load', Mock())
     def test_get_redirected(self, redirect, allow_access, mock_conf_get, exists, realpath):
         allow_access.return_value = True
         exists.return_value = False
@@ -237,7 +379,8 @@ class TestContentView(TestCase):
         request.get_host.return_value = host
         conf = {
             'authentication': {'rsa_key': '/tmp/key'},
-            'server': {'storage_dir': '/var/lib/pulp'}
+            'server': {'storage_dir': '/var/lib/pulp'},
+            'lazy': {'shared_key': ''}
         }
         pulp_conf.get.side_effect = lambda s, p: conf.get(s).get(p)
 
@@ -80,6 +80,38 @@ class TestUnbind(unittest.TestCase):
         self.assertEquals(result.spawned_tasks, [{'task_id': 'foo-request-id'}])
 
 
+@patch('pulp.server.controllers.consumer.managers')
+class TestUnbindMany(unittest.TestCase):
+
+    def test_unbind_many(self, mock_managers):
+        notified = {'consumer_id': 'c1', 'notify_agent': True}
+        silent = {'consumer_id': 'c2', 'notify_agent': False}
+        agent_options = {'bar': 'baz'}
+        mock_bind_manager = mock_managers.consumer_bind_manager.return_value
+        mock_agent_manager = mock_managers.consumer_agent_manager.return_value
+        mock_agent_manager.unbind_many.return_value = [{'task_id': 'foo-request-id'}]
+
+        result = consumer.unbind_many([notified, silent], agent_options)
+
+        mock_bind_manager.unbind_many.assert_called_once_with([notified])
+        mock_agent_manager.unbind_many.assert_called_once_with([notified], agent_options)
+        mock_bind_manager.delete_many.assert_called_once_with([silent])
+        self.assertTrue(isinstance(result, TaskResult))
+        self.assertEqual(result.return_value, [notified, silent])
+        self.assertEqual(result.spawned_tasks, [{'task_id': 'foo-request-id'}])
+
+    def test_unbind_many_no_agent_notification(self, mock_managers):
+        silent = {'consumer_id': 'c2', 'notify_agent': False}
+        mock_bind_manager = mock_managers.consumer_bind_manager.return_value
+
+        result = consumer.unbind_many([silent], {})
+
+        mock_bind_manager.delete_many.assert_called_once_with([silent])
+        self.assertFalse(mock_bind_manager.unbind_many.called)
+        self.assertFalse(mock_managers.consumer_agent_manager.called)
+        self.assertEqual(result.spawned_tasks, [])
+
+
 @patch('pulp.server.controllers.consumer.managers')
 class TestForceUnbind(unittest.TestCase):
 
@@ -6,8 +6,9 @@ from mock import call, Mock, MagicMock, patch
 import mock
 import mongoengine
 
-from pulp.common import dateutils, error_codes
+from pulp.common import constants, dateutils, error_codes
 from pulp.common.compat import unittest
+from pulp.common.plugins import reporting_constants
 from pulp.plugins.loader import exceptions as plugin_exceptions
 from pulp.plugins.model import PublishReport
 from pulp.server.controllers import repository as repo_controller
@@ -357,7 +358,36 @@ class AssociateSingleUnitTests(unittest.TestCase):
         mock_rcu_objects.return_value.update_one.assert_called_once_with(
             set_on_insert__created='foo_tstamp',
             set__updated='foo_tstamp',
-            upsert=True)
+            upsert=True,
+            full_result=True)
+
+    @patch('pulp.server.controllers.repository._record_unit_count_change')
+    @patch('pulp.server.controllers.repository.model.RepositoryContentUnit.objects')
+    def test_unit_association_records_new(self, mock_rcu_objects, mock_record):
+        mock_rcu_objects.return_value.update_one.return_value = {'updatedExisting': False}
+        test_unit = DemoModel(id='bar', key_field='baz')
+        repo = MagicMock(repo_id='foo')
+        repo_controller.associate_single_unit(repo, test_unit)
+        mock_record.assert_called_once_with('foo', DemoModel._content_type_id.default, 1,
+                                            added=True)
+
+    @patch('pulp.server.controllers.repository._record_unit_count_change')
+    @patch('pulp.server.controllers.repository.model.RepositoryContentUnit.objects')
+    def test_unit_association_existing(self, mock_rcu_objects, mock_record):
+        mock_rcu_objects.return_value.update_one.return_value = {'updatedExisting': True}
+        test_unit = DemoModel(id='bar', key_field='baz')
+        repo = MagicMock(repo_id='foo')
+        repo_controller.associate_single_unit(repo, test_unit)
+        self.assertFalse(mock_record.called)
+
+    @patch('pulp.server.controllers.repository._record_unit_count_change')
+    @patch('pulp.server.controllers.repository.model.RepositoryContentUnit.objects')
+    def test_unit_association_unacknowledged(self, mock_rcu_objects, mock_record):
+        mock_rcu_objects.return_value.update_one.return_value = None
+        test_unit = DemoModel(id='bar', key_field='baz')
+        repo = MagicMock(repo_id='foo')
+        repo_controller.associate_single_unit(repo, test_unit)
+        mock_record.assert_called_once_with('foo', untracked=True)
 
 
 class TestDisassociateUnits(unittest.TestCase):
@@ -371,20 +401,102 @@ class TestDisassociateUnits(unittest.TestCase):
         test_unit2 = DemoModel(id='baz', key_field='baz')
         repo = MagicMock(repo_id='foo')
         repo_controller.disassociate_units(repo, [test_unit1, test_unit2])
-        m_rcu_objects.assert_called_once_with(repo_id='foo', unit_id__in=['bar', 'baz'])
+        m_rcu_objects.assert_called_once_with(repo_id='foo',
+                                              unit_type_id=DemoModel._content_type_id.default,
+                                              unit_id__in=['bar', 'baz'])
         m_rcu_objects.return_value.delete.assert_called_once()
 
+    @patch('pulp.server.controllers.repository._record_unit_count_change')
+    @patch('pulp.server.controllers.repository.model.RepositoryContentUnit.objects')
+    def test_disaccociate_units_records_removed(self, m_rcu_objects, m_record):
+        """
+        Test that the number of deleted associations is recorded.
+        """
+        m_rcu_objects.return_value.delete.return_value = 2
+        test_unit1 = DemoModel(id='bar', key_field='baz')
+        test_unit2 = DemoModel(id='baz', key_field='baz')
+        repo = MagicMock(repo_id='foo')
+        repo_controller.disassociate_units(repo, [test_unit1, test_unit2])
+        m_record.assert_called_once_with('foo', DemoModel._content_type_id.default, -2,
+                                         removed=True)
+
+
+@patch('pulp.server.controllers.repository.dateutils.format_iso8601_utc_timestamp')
+@patch('pulp.server.controllers.repository._record_unit_count_change')
+@patch('pulp.server.controllers.repository.plugin_api.get_unit_model_by_id')
+@patch('pulp.server.controllers.repository.model.RepositoryContentUnit')
+class TestCopyRepoContentUnits(unittest.TestCase):
+
+    def test_copy(self, m_rcu, m_get_model, m_record, m_timestamp):
+        """
+        Test that the matching units are associated with bulk upserts.
+        """
+        m_timestamp.return_value = 'foo_tstamp'
+        m_rcu.objects.return_value.only.return_value.as_pymongo.return_value = [
+            {'unit_id': 'bar', 'unit_type_id': 'demo_model'},
+            {'unit_id': 'baz', 'unit_type_id': 'demo_model'}]
+        m_model = m_get_model.return_value
+        m_model.unit_key_fields = ('key_field',)
+        m_model._fields = {'key_field': Mock(db_field='key')}
+        m_units = m_model.objects.return_value.only.return_value.as_pymongo
+        m_units.return_value = [{'_id': 'bar', 'key': 'a'}, {'_id': 'baz', 'key': 'b'}]
+        m_collection = m_rcu._get_collection.return_value
+        m_collection.bulk_write.return_value.upserted_count = 1
+        source_repo = MagicMock(repo_id='source')
+        dest_repo = MagicMock(repo_id='dest')
+        units_q = mongoengine.Q(key_field='a')
+
+        unit_ids = repo_controller.copy_repo_content_units(source_repo, dest_repo,
+                                                           units_q=units_q)
+
+        self.assertEqual(unit_ids, [{'type_id': 'demo_model', 'unit_key': {'key_field': 'a'}},
+                                    {'type_id': 'demo_model', 'unit_key': {'key_field': 'b'}}])
+        m_rcu.objects.assert_called_once_with(q_obj=None, repo_id='source')
+        m_get_model.assert_called_once_with('demo_model')
+        m_model.objects.assert_called_once_with(q_obj=units_q,
+                                                __raw__={'_id': {'$in': ['bar', 'baz']}})
+        m_model.objects.return_value.only.assert_called_once_with('id', 'key_field')
+        requests = m_collection.bulk_write.call_args[0][0]
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0]._filter,
+                         {'repo_id': 'dest', 'unit_type_id': 'demo_model', 'unit_id': 'bar'})
+        self.assertEqual(requests[0]._doc,
+                         {'$setOnInsert': {'created': 'foo_tstamp', '_ns': 'repo_content_units'},
+                          '$set': {'updated': 'foo_tstamp'}})
+        self.assertEqual(m_collection.bulk_write.call_args[1], {'ordered': False})
+        m_record.assert_called_once_with('dest', 'demo_model', 1, added=True)
+
+    def test_copy_no_matches(self, m_rcu, m_get_model, m_record, m_timestamp):
+        """
+        Test that nothing is written if no units match.
+        """
+        m_rcu.objects.return_value.only.return_value.as_pymongo.return_value = [
+            {'unit_id': 'bar', 'unit_type_id': 'demo_model'}]
+        m_model = m_get_model.return_value
+        m_model.unit_key_fields = ('key_field',)
+        m_model._fields = {'key_field': Mock(db_field='key_field')}
+        m_model.objects.return_value.only.return_value.as_pymongo.return_value = []
+
+        unit_ids = repo_controller.copy_repo_content_units(MagicMock(repo_id='source'),
+                                                           MagicMock(repo_id='dest'))
+
+        self.assertEqual(unit_ids, [])
+        self.assertFalse(m_rcu._get_collection.return_value.bulk_write.called)
+        self.assertFalse(m_record.called)
+
 
 @mock.patch('pulp.server.controllers.repository.dist_controller')
 @mock.patch('pulp.server.controllers.repository.importer_controller')
 @mock.patch('pulp.server.controllers.repository.manager_factory')
 @mock.patch('pulp.server.controllers.repository.model.Repository')
+@mock.patch('pulp.server.controllers.repository.model.DeletedRepository',
+            **{'objects.return_value.first.return_value': None})
 class TestCreateRepo(unittest.TestCase):
     """
     Tests for repo creation.
     """
 
-    def test_invalid_repo_id(self, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
+    def test_invalid_repo_id(self, m_deleted, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
         """
         Test creating a repository with invalid characters.
         """
@@ -392,7 +504,7 @@ class TestCreateRepo(unittest.TestCase):
         self.assertRaises(pulp_exceptions.InvalidValue, repo_controller.create_repo,
                           'invalid_chars&')
 
-    def test_minimal_creation(self, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
+    def test_minimal_creation(self, m_deleted, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
         """
         Test creating a repository with only the required parameters.
         """
@@ -402,7 +514,7 @@ class TestCreateRepo(unittest.TestCase):
         repo.save.assert_called_once_with()
         self.assertTrue(repo is m_repo_model.return_value)
 
-    def test_duplicate_repo(self, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
+    def test_duplicate_repo(self, m_deleted, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
         """
         Test creation of a repository that already exists.
         """
@@ -410,14 +522,29 @@ class TestCreateRepo(unittest.TestCase):
         self.assertRaises(pulp_exceptions.DuplicateResource, repo_controller.create_repo,
                           'm_repo')
 
-    def test_invalid_notes(self, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
+    @mock.patch('pulp.server.controllers.repository.resume_deletions')
+    def test_deleted_repo_not_purged(self, m_resume, m_deleted, m_repo_model, m_factory,
+                                     m_imp_ctrl, m_dist_ctrl):
+        """
+        Test creation of a repository whose deleted namesake still has associations.
+        """
+        m_deleted.objects.return_value.first.return_value = mock.MagicMock()
+        self.assertRaises(pulp_exceptions.PulpCodedConflictException,
+                          repo_controller.create_repo, 'm_repo')
+        m_deleted.objects.assert_called_once_with(repo_id='m_repo')
+        self.assertEqual(m_repo_model.call_count, 0)
+        # an interrupted deletion is resumed so that the ID eventually becomes free
+        m_resume.assert_called_once_with('m_repo')
+
+    def test_invalid_notes(self, m_deleted, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
         """
         Test creation of a repository that has invalid notes.
         """
         m_repo_model.return_value.save.side_effect = mongoengine.ValidationError
         self.assertRaises(pulp_exceptions.InvalidValue, repo_controller.create_repo, 'm_repo')
 
-    def test_create_with_importer_config(self, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
+    def test_create_with_importer_config(self, m_deleted, m_repo_model, m_factory, m_imp_ctrl,
+                                         m_dist_ctrl):
         """
         Test creation of a repository with a specified importer configuration.
         """
@@ -427,8 +554,8 @@ class TestCreateRepo(unittest.TestCase):
         self.assertTrue(repo is m_repo_model.return_value)
         self.assertEqual(repo.delete.call_count, 0)
 
-    def test_create_with_importer_config_exception(self, m_repo_model, m_factory, m_imp_ctrl,
-                                                   m_dist_ctrl):
+    def test_create_with_importer_config_exception(self, m_deleted, m_repo_model, m_factory,
+                                                   m_imp_ctrl, m_dist_ctrl):
         """
         Test creation of a repository when the importer configuration fails.
         """
@@ -439,8 +566,8 @@ class TestCreateRepo(unittest.TestCase):
         m_imp_ctrl.set_importer.assert_called_once_with('m_repo', 'id', 'mock_config')
         self.assertEqual(repo_inst.delete.call_count, 1)
 
-    def test_create_with_distributor_list_not_list(self, m_repo_model, m_factory, m_imp_ctrl,
-                                                   m_dist_ctrl):
+    def test_create_with_distributor_list_not_list(self, m_deleted, m_repo_model, m_factory,
+                                                   m_imp_ctrl, m_dist_ctrl):
         """
         Test creation of a repository when distributor list is invalid.
         """
@@ -448,8 +575,8 @@ class TestCreateRepo(unittest.TestCase):
                           'm_repo', distributor_list='non-list')
         self.assertEqual(m_repo_model.call_count, 0)
 
-    def test_create_with_invalid_dists_in_dist_list(self, m_repo_model, m_factory, m_imp_ctrl,
-                                                    m_dist_ctrl):
+    def test_create_with_invalid_dists_in_dist_list(self, m_deleted, m_repo_model, m_factory,
+                                                    m_imp_ctrl, m_dist_ctrl):
         """
         Test creation of a repository when one of the distributors is invalid.
         """
@@ -457,7 +584,8 @@ class TestCreateRepo(unittest.TestCase):
                           'm_repo', distributor_list=['not_dict'])
         self.assertEqual(m_repo_model.call_count, 0)
 
-    def test_create_with_valid_distributors(self, m_repo_model, m_factory, m_imp_ctrl, m_dist_ctrl):
+    def test_create_with_valid_distributors(self, m_deleted, m_repo_model, m_factory, m_imp_ctrl,
+                                            m_dist_ctrl):
         """
         Test creation of a repository and the proper configuration of distributors.
         """
@@ -466,7 +594,7 @@ class TestCreateRepo(unittest.TestCase):
         self.assertEqual(repo.delete.call_count, 0)
         m_dist_ctrl.add_distributor.assert_called_once_with('repo', 'type', {}, False, 'dist')
 
-    def test_create_with_distributor_exception(self, m_repo_model, m_factory, m_imp_ctrl,
+    def test_create_with_distributor_exception(self, m_deleted, m_repo_model, m_factory, m_imp_ctrl,
                                                m_dist_ctrl):
         """
         Test creation of a repository when distributor configuration fails.
@@ -483,9 +611,10 @@ class TestQueueDelete(unittest.TestCase):
     Tests for dispatching repository delete tasks.
     """
 
+    @mock.patch('pulp.server.controllers.repository.model.DeletedRepository')
     @mock.patch('pulp.server.controllers.repository.delete')
     @mock.patch('pulp.server.controllers.repository.tags')
-    def test_dispatch(self, mock_tags, mock_delete):
+    def test_dispatch(self, mock_tags, mock_delete, m_deleted):
         """
         Test that the appropriate task is dispatched with the correct arguments.
         """
@@ -495,7 +624,105 @@ class TestQueueDelete(unittest.TestCase):
             mock_tags.RESOURCE_REPOSITORY_TYPE, 'm_repo', ['m_repo'], tags=mock_task_tags)
         self.assertTrue(async_result is mock_delete.apply_async_with_reservation())
 
+    @mock.patch('pulp.server.controllers.repository.model.DeletedRepository')
+    @mock.patch('pulp.server.controllers.repository.delete')
+    def test_marked_before_dispatch(self, mock_delete, m_deleted):
+        """
+        Test that the repository is marked as deleted before the task is dispatched.
+        """
+        calls = mock.MagicMock()
+        calls.attach_mock(m_deleted.return_value.save, 'save')
+        calls.attach_mock(mock_delete.apply_async_with_reservation, 'dispatch')
+
+        repo_controller.queue_delete('m_repo')
+
+        m_deleted.assert_called_once_with(repo_id='m_repo')
+        self.assertEqual([name for name, args, kwargs in calls.mock_calls], ['save', 'dispatch'])
+
+
+@mock.patch('pulp.server.controllers.repository.queue_delete')
+@mock.patch('pulp.server.controllers.repository.queue_purge_associations')
+@mock.patch('pulp.server.controllers.repository.model')
+class TestResumeDeletions(unittest.TestCase):
+    """
+    Tests for resuming interrupted repository deletions.
+    """
+
+    def test_purge_interrupted(self, m_model, m_purge, m_queue_delete):
+        """
+        The purge is dispatched again when the repository document is gone.
+        """
+        m_model.DeletedRepository.objects.return_value.__iter__.return_value = [
+            mock.MagicMock(repo_id='m_repo')]
+        m_model.TaskStatus.objects.return_value.only.return_value = []
+        m_model.Repository.objects.return_value.count.return_value = 0
+
+        result = repo_controller.resume_deletions()
+
+        self.assertEqual(result, [m_purge.return_value])
+        m_purge.assert_called_once_with('m_repo')
+        self.assertFalse(m_queue_delete.called)
+        marked_before = m_model.DeletedRepository.objects.call_args[1]['deleted__lte']
+        self.assertTrue(marked_before < dateutils.now_utc_datetime_with_tzinfo())
+
+    def test_delete_interrupted(self, m_model, m_purge, m_queue_delete):
+        """
+        The repository is deleted again when its document still exists.
+        """
+        m_model.DeletedRepository.objects.return_value.__iter__.return_value = [
+            mock.MagicMock(repo_id='m_repo')]
+        m_model.TaskStatus.objects.return_value.only.return_value = []
+        m_model.Repository.objects.return_value.count.return_value = 1
+
+        result = repo_controller.resume_deletions()
+
+        self.assertEqual(result, [m_queue_delete.return_value])
+        m_queue_delete.assert_called_once_with('m_repo')
+        self.assertFalse(m_purge.called)
+
+    def test_deletion_pending(self, m_model, m_purge, m_queue_delete):
+        """
+        Nothing is dispatched while a delete or purge task is waiting or running.
+        """
+        m_model.DeletedRepository.objects.return_value.__iter__.return_value = [
+            mock.MagicMock(repo_id='m_repo')]
+        m_model.TaskStatus.objects.return_value.only.return_value = [
+            mock.MagicMock(tags=['pulp:repository:m_repo', 'pulp:action:purge_associations'])]
+
+        self.assertEqual(repo_controller.resume_deletions(), [])
+
+        m_model.TaskStatus.objects.assert_called_once_with(
+            tags='pulp:repository:m_repo', state__in=constants.CALL_INCOMPLETE_STATES)
+        self.assertFalse(m_purge.called)
+        self.assertFalse(m_queue_delete.called)
+
+    def test_other_task_pending(self, m_model, m_purge, m_queue_delete):
+        """
+        Tasks other than deletes and purges do not keep the deletion from being resumed.
+        """
+        m_model.DeletedRepository.objects.return_value.__iter__.return_value = [
+            mock.MagicMock(repo_id='m_repo')]
+        m_model.TaskStatus.objects.return_value.only.return_value = [
+            mock.MagicMock(tags=['pulp:repository:m_repo', 'pulp:action:sync'])]
+        m_model.Repository.objects.return_value.count.return_value = 0
+
+        repo_controller.resume_deletions()
+
+        m_purge.assert_called_once_with('m_repo')
 
+    def test_one_repository(self, m_model, m_purge, m_queue_delete):
+        """
+        Only the marker of the given repository is considered.
+        """
+        markers = m_model.DeletedRepository.objects.return_value
+        markers.filter.return_value.__iter__.return_value = []
+
+        repo_controller.resume_deletions('m_repo')
+
+        markers.filter.assert_called_once_with(repo_id='m_repo')
+
+
+@mock.patch('pulp.server.controllers.repository.queue_purge_associations')
 @mock.patch('pulp.server.controllers.repository.dist_controller')
 @mock.patch('pulp.server.controllers.repository.importer_controller')
 @mock.patch('pulp.server.controllers.repository.TaskResult')
@@ -510,7 +737,8 @@ class TestDelete(unittest.TestCase):
     """
 
     def test_delete_no_importers_or_distributors(self, m_factory, m_model, m_content, m_publish,
-                                                 m_sync, m_task_result, m_imp_ctrl, m_dist_ctrl):
+                                                 m_sync, m_task_result, m_imp_ctrl, m_dist_ctrl,
+                                                 m_purge):
         """
         Test a simple repository delete when there are no importers or distributors.
         """
@@ -523,6 +751,10 @@ class TestDelete(unittest.TestCase):
 
         result = repo_controller.delete('foo-repo')
 
+        m_model.Repository.objects.get_repo_or_missing_resource.assert_called_once_with(
+            'foo-repo', include_deleted=True)
+        m_model.DeletedRepository.assert_called_once_with(repo_id='foo-repo')
+        m_model.DeletedRepository.return_value.save.assert_called_once_with()
         m_repo.delete.assert_called_once_with()
         pymongo_args = {'repo_id': 'foo-repo'}
         pymongo_kwargs = {}
@@ -530,15 +762,18 @@ class TestDelete(unittest.TestCase):
         m_model.Importer.objects.return_value.delete.assert_called_once_with()
         m_sync.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
         m_publish.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
-        m_content.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
+        # associations are removed in the background
+        self.assertFalse(m_content.get_collection().remove.called)
+        m_purge.assert_called_once_with('foo-repo')
         mock_group_manager.remove_repo_from_groups.assert_called_once_with('foo-repo')
-        m_task_result.assert_called_once_with(error=None, spawned_tasks=[])
+        m_task_result.assert_called_once_with(error=None, spawned_tasks=[m_purge.return_value])
         self.assertTrue(result is m_task_result.return_value)
 
+    @mock.patch('pulp.server.controllers.repository.UNBIND_BATCH_SIZE', 2)
     @mock.patch('pulp.server.controllers.repository.consumer_controller')
     def test_delete_imforms_other_collections(self, mock_consumer_ctrl, m_factory, m_model,
                                               m_content, m_publish, m_sync, m_task_result,
-                                              m_imp_ctrl, m_dist_ctrl):
+                                              m_imp_ctrl, m_dist_ctrl, m_purge):
         """
         Test that other collections are correctly informed when a repository is deleted.
         """
@@ -548,10 +783,12 @@ class TestDelete(unittest.TestCase):
         m_repo = m_model.Repository.objects.get_repo_or_missing_resource.return_value
         mock_group_manager = m_factory.repo_group_manager.return_value
         mock_consumer_bind_manager = m_factory.consumer_bind_manager.return_value
-        mock_consumer_bind_manager.find_by_repo.return_value = [{
-            'consumer_id': 'mock_con', 'repo_id': 'm_repo', 'distributor_id': 'm_dist'
-        }]
-        mock_consumer_ctrl.unbind.return_value.spawned_tasks = ['mock_task']
+        bindings = [
+            {'consumer_id': 'mock_con_%d' % n, 'repo_id': 'm_repo', 'distributor_id': 'm_dist'}
+            for n in range(3)
+        ]
+        mock_consumer_bind_manager.find_by_repo.return_value = bindings
+        mock_consumer_ctrl.unbind_many.return_value.spawned_tasks = ['mock_task']
 
         result = repo_controller.delete('foo-repo')
 
@@ -563,14 +800,17 @@ class TestDelete(unittest.TestCase):
         m_model.Importer.objects.return_value.delete.assert_called_once_with()
         m_sync.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
         m_publish.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
-        m_content.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
-        mock_consumer_ctrl.unbind.assert_called_once_with('mock_con', 'm_repo', 'm_dist', {})
+        m_purge.assert_called_once_with('foo-repo')
+        self.assertEqual(mock_consumer_ctrl.unbind_many.call_args_list, [
+            mock.call((bindings[0], bindings[1]), {}), mock.call((bindings[2],), {})])
         mock_group_manager.remove_repo_from_groups.assert_called_once_with('foo-repo')
-        m_task_result.assert_called_once_with(error=None, spawned_tasks=['mock_task'])
+        m_task_result.assert_called_once_with(
+            error=None, spawned_tasks=[m_purge.return_value, 'mock_task', 'mock_task'])
         self.assertTrue(result is m_task_result.return_value)
 
     def test_delete_with_dist_and_imp_errors(self, m_factory, m_model, m_content, m_publish,
-                                             m_sync, m_task_result, m_imp_ctrl, m_dist_ctrl):
+                                             m_sync, m_task_result, m_imp_ctrl, m_dist_ctrl,
+                                             m_purge):
         """
         Test repository delete when the other collections raise errors.
         """
@@ -604,7 +844,7 @@ class TestDelete(unittest.TestCase):
         m_model.Importer.objects.return_value.delete.assert_called_once_with()
         m_sync.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
         m_publish.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
-        m_content.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
+        m_purge.assert_called_once_with('foo-repo')
         mock_group_manager.remove_repo_from_groups.assert_called_once_with('foo-repo')
 
         # Consumers should not be unbound if there are distribur errors.
@@ -617,10 +857,10 @@ class TestDelete(unittest.TestCase):
         self.assertTrue(isinstance(e.child_exceptions[1], MockException))
         self.assertTrue(isinstance(e.child_exceptions[2], MockException))
 
-    def test_delete_content_errors(self, m_factory, m_model, m_content, m_publish,
-                                   m_sync, m_task_result, m_imp_ctrl, m_dist_ctrl):
+    def test_delete_collection_errors(self, m_factory, m_model, m_content, m_publish,
+                                      m_sync, m_task_result, m_imp_ctrl, m_dist_ctrl, m_purge):
         """
-        Test delete repository when the content collection raises errors.
+        Test delete repository when the result collections raise errors.
         """
 
         m_model.Importer.objects.return_value.first.return_value = None
@@ -629,14 +869,14 @@ class TestDelete(unittest.TestCase):
         mock_group_manager = m_factory.repo_group_manager.return_value
         mock_consumer_bind_manager = m_factory.consumer_bind_manager.return_value
         mock_consumer_bind_manager.find_by_repo.return_value = []
-        m_content.get_collection().remove.side_effect = MockException
+        m_publish.get_collection().remove.side_effect = MockException
 
         try:
             repo_controller.delete('foo-repo')
         except pulp_exceptions.PulpExecutionException, e:
             pass
         else:
-            raise AssertionError('Content errors should raise a PulpExecutionException.')
+            raise AssertionError('Collection errors should raise a PulpExecutionException.')
 
         m_repo.delete.assert_called_once_with()
         pymongo_args = {'repo_id': 'foo-repo'}
@@ -646,7 +886,8 @@ class TestDelete(unittest.TestCase):
         m_model.Importer.objects.return_value.delete.assert_called_once_with()
         m_sync.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
         m_publish.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
-        m_content.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
+        # the associations are still removed
+        m_purge.assert_called_once_with('foo-repo')
         mock_group_manager.remove_repo_from_groups.assert_called_once_with('foo-repo')
 
         # Consumers should not be unbound if there are distribur errors.
@@ -662,7 +903,8 @@ class TestDelete(unittest.TestCase):
     @mock.patch('pulp.server.controllers.repository.pulp_exceptions.PulpCodedException')
     def test_delete_consumer_bind_error(self, mock_coded_exception, mock_pulp_error,
                                         mock_consumer_ctrl, m_factory, m_model, m_content,
-                                        m_publish, m_sync, m_task_result, m_imp_ctrl, m_dist_ctrl):
+                                        m_publish, m_sync, m_task_result, m_imp_ctrl, m_dist_ctrl,
+                                        m_purge):
         """
         Test repository delete when consumer bind collection raises an error.
         """
@@ -671,10 +913,9 @@ class TestDelete(unittest.TestCase):
         m_repo = m_model.Repository.objects.get_repo_or_missing_resource.return_value
         mock_group_manager = m_factory.repo_group_manager.return_value
         mock_consumer_bind_manager = m_factory.consumer_bind_manager.return_value
-        mock_consumer_bind_manager.find_by_repo.return_value = [{
-            'consumer_id': 'mock_con', 'repo_id': 'm_repo', 'distributor_id': 'm_dist'
-        }]
-        mock_consumer_ctrl.unbind.side_effect = MockException
+        binding = {'consumer_id': 'mock_con', 'repo_id': 'm_repo', 'distributor_id': 'm_dist'}
+        mock_consumer_bind_manager.find_by_repo.return_value = [binding]
+        mock_consumer_ctrl.unbind_many.side_effect = MockException
 
         result = repo_controller.delete('foo-repo')
         m_repo.delete.assert_called_once_with()
@@ -685,18 +926,115 @@ class TestDelete(unittest.TestCase):
         m_model.Importer.objects.return_value.delete.assert_called_once_with()
         m_sync.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
         m_publish.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
-        m_content.get_collection().remove.assert_called_once_with(pymongo_args, **pymongo_kwargs)
         mock_group_manager.remove_repo_from_groups.assert_called_once_with('foo-repo')
-        mock_consumer_ctrl.unbind.assert_called_once_with('mock_con', 'm_repo', 'm_dist', {})
+        mock_consumer_ctrl.unbind_many.assert_called_once_with((binding,), {})
 
         expected_error = mock_coded_exception.return_value
         mock_coded_exception.assert_called_once_with(mock_pulp_error, repo_id='foo-repo')
         self.assertEqual(len(expected_error.child_exceptions), 1)
         self.assertTrue(isinstance(expected_error.child_exceptions[0], MockException))
-        m_task_result.assert_called_once_with(error=expected_error, spawned_tasks=[])
+        m_task_result.assert_called_once_with(
+            error=expected_error, spawned_tasks=[m_purge.return_value])
         self.assertTrue(result is m_task_result.return_value)
 
 
+class TestQueuePurgeAssociations(unittest.TestCase):
+    """
+    Tests for dispatching the removal of the associations of a deleted repository.
+    """
+
+    @mock.patch('pulp.server.controllers.repository.tags')
+    @mock.patch('pulp.server.controllers.repository.purge_associations')
+    def test_queue_purge_associations(self, mock_purge, mock_tags):
+        """
+        Test that the task is dispatched with a reservation on the repository.
+        """
+        mock_task_tags = [mock_tags.resource_tag.return_value, mock_tags.action_tag.return_value]
+        async_result = repo_controller.queue_purge_associations('m_repo')
+        mock_purge.apply_async_with_reservation.assert_called_once_with(
+            mock_tags.RESOURCE_REPOSITORY_TYPE, 'm_repo', ['m_repo'], tags=mock_task_tags)
+        self.assertTrue(async_result is mock_purge.apply_async_with_reservation())
+
+
+@mock.patch('pulp.server.controllers.repository.time')
+@mock.patch('pulp.server.controllers.repository.PURGE_BATCH_SIZE', 2)
+@mock.patch('pulp.server.controllers.repository.get_current_task_id')
+@mock.patch('pulp.server.controllers.repository.model')
+@mock.patch('pulp.server.controllers.repository.RepoContentUnit')
+class TestPurgeAssociations(unittest.TestCase):
+    """
+    Tests for removing the associations of a deleted repository.
+    """
+
+    def test_purge_associations(self, m_content, m_model, m_task_id, m_time):
+        """
+        Test that associations are removed in batches and progress is reported.
+        """
+        collection = m_content.get_collection.return_value
+        collection.find.return_value.count.return_value = 3
+        collection.find.return_value.limit.side_effect = [
+            [{'_id': 1}, {'_id': 2}], [{'_id': 3}], []]
+        m_task_id.return_value = 'task-1'
+
+        removed = repo_controller.purge_associations('foo-repo')
+
+        self.assertEqual(removed, 3)
+        collection.find.assert_called_with({'repo_id': 'foo-repo'}, projection={'_id': 1})
+        self.assertEqual(collection.remove.call_args_list, [
+            mock.call({'_id': {'$in': [1, 2]}}), mock.call({'_id': {'$in': [3]}})])
+        self.assertEqual(m_time.sleep.call_count, 2)
+        m_model.DeletedRepository.objects.assert_called_once_with(repo_id='foo-repo')
+        m_model.DeletedRepository.objects.return_value.delete.assert_called_once_with()
+        m_model.TaskStatus.objects.filter.assert_called_with(task_id='task-1')
+        qs = m_model.TaskStatus.objects.filter.return_value
+        self.assertEqual(qs.update_one.call_count, 4)
+        report = qs.update_one.call_args[1]['set__progress_report']
+        progress = report[repo_controller.PurgeProgress.STEP_ID][0]
+        self.assertEqual(progress['state'], reporting_constants.STATE_COMPLETE)
+        self.assertEqual(progress['num_processed'], 3)
+        self.assertEqual(progress['items_total'], 3)
+
+    def test_purge_associations_no_task(self, m_content, m_model, m_task_id, m_time):
+        """
+        Test that progress is not reported outside of a task.
+        """
+        collection = m_content.get_collection.return_value
+        collection.find.return_value.count.return_value = 0
+        collection.find.return_value.limit.return_value = []
+        m_task_id.return_value = None
+
+        removed = repo_controller.purge_associations('foo-repo')
+
+        self.assertEqual(removed, 0)
+        self.assertFalse(collection.remove.called)
+        self.assertFalse(m_model.TaskStatus.objects.filter.called)
+
+    @mock.patch('pulp.server.controllers.repository.queue_purge_associations')
+    def test_purge_associations_failed(self, m_queue_purge, m_content, m_model, m_task_id,
+                                       m_time):
+        """
+        Test that a failed purge keeps the marker, and that the purge is dispatched again.
+        """
+        collection = m_content.get_collection.return_value
+        collection.find.return_value.count.return_value = 3
+        collection.find.return_value.limit.return_value = [{'_id': 1}]
+        collection.remove.side_effect = MockException
+        m_task_id.return_value = None
+
+        self.assertRaises(MockException, repo_controller.purge_associations, 'foo-repo')
+        self.assertFalse(m_model.DeletedRepository.objects.return_value.delete.called)
+
+        # the failed purge task is no longer pending and the repository document is gone
+        m_model.DeletedRepository.objects.return_value.__iter__.return_value = [
+            mock.MagicMock(repo_id='foo-repo')]
+        m_model.TaskStatus.objects.return_value.only.return_value = []
+        m_model.Repository.objects.return_value.count.return_value = 0
+
+        repo_controller.resume_deletions()
+
+        m_queue_purge.assert_called_once_with('foo-repo')
+
+
 class TestUpdateRepoAndPlugins(unittest.TestCase):
     """
     Tests for updating a repository and its related collections.
@@ -781,10 +1119,33 @@ class TestUpdateLastUnitAdded(unittest.TestCase):
         """
         Ensure that the last_unit_added field is correctly updated.
         """
-        m_repo = m_repo_qs.get_repo_or_missing_resource.return_value
+        m_repo_qs.return_value.update_one.return_value = 1
         repo_controller.update_last_unit_added('m_repo')
-        self.assertEqual(m_repo.last_unit_added, mock_date.now_utc_datetime_with_tzinfo())
-        m_repo.save.assert_called_once_with()
+        m_repo_qs.assert_called_once_with(repo_id='m_repo')
+        m_repo_qs.return_value.update_one.assert_called_once_with(
+            set__last_unit_added=mock_date.now_utc_datetime_with_tzinfo.return_value)
+
+    @mock.patch('pulp.server.controllers.repository.model.Repository.objects')
+    def test_update_last_unit_added_missing(self, m_repo_qs):
+        """
+        Ensure that a missing repository is reported.
+        """
+        m_repo_qs.return_value.update_one.return_value = 0
+        self.assertRaises(pulp_exceptions.MissingResource,
+                          repo_controller.update_last_unit_added, 'm_repo')
+
+    @mock.patch('pulp.server.controllers.repository.model.Repository.objects')
+    def test_update_last_unit_added_tracking(self, m_repo_qs):
+        """
+        Ensure that the update is deferred while unit count changes are accumulated.
+        """
+        repo_controller.begin_unit_count_tracking()
+        try:
+            repo_controller.update_last_unit_added('m_repo')
+            self.assertFalse(m_repo_qs.called)
+            self.assertTrue(repo_controller._unit_count_deltas['m_repo']['added'])
+        finally:
+            repo_controller._unit_count_deltas = None
 
 
 class TestUpdateLastUnitRemoved(unittest.TestCase):
@@ -798,10 +1159,33 @@ class TestUpdateLastUnitRemoved(unittest.TestCase):
         """
         Ensure that the last_unit_removed field is correctly updated.
         """
-        m_repo = m_repo_qs.get_repo_or_missing_resource.return_value
+        m_repo_qs.return_value.update_one.return_value = 1
         repo_controller.update_last_unit_removed('m_repo')
-        self.assertEqual(m_repo.last_unit_removed, mock_date.now_utc_datetime_with_tzinfo())
-        m_repo.save.assert_called_once_with()
+        m_repo_qs.assert_called_once_with(repo_id='m_repo')
+        m_repo_qs.return_value.update_one.assert_called_once_with(
+            set__last_unit_removed=mock_date.now_utc_datetime_with_tzinfo.return_value)
+
+    @mock.patch('pulp.server.controllers.repository.model.Repository.objects')
+    def test_update_last_unit_removed_missing(self, m_repo_qs):
+        """
+        Ensure that a missing repository is reported.
+        """
+        m_repo_qs.return_value.update_one.return_value = 0
+        self.assertRaises(pulp_exceptions.MissingResource,
+                          repo_controller.update_last_unit_removed, 'm_repo')
+
+    @mock.patch('pulp.server.controllers.repository.model.Repository.objects')
+    def test_update_last_unit_removed_tracking(self, m_repo_qs):
+        """
+        Ensure that the update is deferred while unit count changes are accumulated.
+        """
+        repo_controller.begin_unit_count_tracking()
+        try:
+            repo_controller.update_last_unit_removed('m_repo')
+            self.assertFalse(m_repo_qs.called)
+            self.assertTrue(repo_controller._unit_count_deltas['m_repo']['removed'])
+        finally:
+            repo_controller._unit_count_deltas = None
 
 
 class TestCheckPerformFullSync(unittest.TestCase):
@@ -974,7 +1358,7 @@ class TestCheckPerformFullSync(unittest.TestCase):
         self.assertTrue(retval)
 
 
-@mock.patch('pulp.server.controllers.repository.rebuild_content_unit_counts')
+@mock.patch('pulp.server.controllers.repository.end_unit_count_tracking')
 @mock.patch('pulp.server.controllers.repository.sys')
 @mock.patch('pulp.server.controllers.repository.register_sigterm_handler')
 @mock.patch('pulp.server.controllers.repository._now_timestamp')
@@ -990,6 +1374,14 @@ class TestSync(unittest.TestCase):
     Tests for syncing a repository.
     """
 
+    def setUp(self):
+        patcher = mock.patch('pulp.server.controllers.repository._check_unit_counts')
+        self.m_check = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        repo_controller._unit_count_deltas = None
+
     def test_sync_no_importer_inst(self, m_model, mock_plugin_api, *unused):
         """
         Raise when importer is not associated with a plugin.
@@ -1020,7 +1412,7 @@ class TestSync(unittest.TestCase):
                                           mock_plug_conf())
 
         # It is now platform's responsiblity to update plugin content unit counts
-        self.assertTrue(mock_rebuild.called, "rebuild_content_unit_counts must be called")
+        mock_rebuild.assert_called_once_with(m_repo)
 
     @mock.patch('pulp.server.controllers.repository._queue_auto_publish_tasks')
     @mock.patch('pulp.server.controllers.repository.TaskResult')
@@ -1064,7 +1456,7 @@ class TestSync(unittest.TestCase):
         self.assertTrue(actual_result is m_task_result.return_value)
 
         # It is now platform's responsiblity to update plugin content unit counts
-        self.assertTrue(mock_rebuild.called, "rebuild_content_unit_counts must be called")
+        mock_rebuild.assert_called_once_with(m_repo)
 
     @mock.patch('pulp.server.controllers.repository._queue_auto_publish_tasks')
     @mock.patch('pulp.server.controllers.repository.TaskResult')
@@ -1111,7 +1503,50 @@ class TestSync(unittest.TestCase):
         self.assertTrue(actual_result is m_task_result.return_value)
 
         # It is now platform's responsiblity to update plugin content unit counts
-        self.assertTrue(mock_rebuild.called, "rebuild_content_unit_counts must be called")
+        mock_rebuild.assert_called_once_with(m_repo)
+
+    @mock.patch('pulp.server.controllers.repository._queue_auto_publish_tasks')
+    @mock.patch('pulp.server.controllers.repository.TaskResult')
+    def test_sync_checks_unit_counts(self, m_task_result, mock_spawn_auto_pub, m_model,
+                                     mock_plugin_api, mock_plug_conf, mock_wd, mock_conduit,
+                                     mock_result, m_factory, mock_now, mock_reg_sig, mock_sys,
+                                     mock_end):
+        """
+        The unit counts are checked against the number of units the sync result accounts for.
+        """
+        mock_spawn_auto_pub.return_value = []
+        m_repo = m_model.Repository.objects.get_repo_or_missing_resource.return_value
+        mock_plugin_api.get_importer_by_id.return_value = (mock.MagicMock(), 'mock_conf')
+        m_model.RepositoryContentUnit.objects.return_value.count.return_value = 10
+        mock_result.RESULT_ERROR = 'error'
+        sync_result = {'result': 'success', 'added_count': 3, 'removed_count': -1}
+        mock_result.expected_result.return_value.__getitem__.side_effect = sync_result.get
+
+        repo_controller.sync('mock_id')
+
+        mock_end.assert_called_once_with(m_repo)
+        self.m_check.assert_called_once_with(m_repo, 12)
+
+    @mock.patch('pulp.server.controllers.repository.begin_unit_count_tracking')
+    @mock.patch('pulp.server.controllers.repository.update_content_unit_counts')
+    @mock.patch('pulp.server.controllers.repository._queue_auto_publish_tasks')
+    @mock.patch('pulp.server.controllers.repository.TaskResult')
+    def test_sync_already_tracking(self, m_task_result, mock_spawn_auto_pub, m_update, m_begin,
+                                   m_model, mock_plugin_api, mock_plug_conf, mock_wd,
+                                   mock_conduit, mock_result, m_factory, mock_now, mock_reg_sig,
+                                   mock_sys, mock_end):
+        """
+        Only the changes to the repository are applied if the caller is accumulating changes.
+        """
+        mock_spawn_auto_pub.return_value = []
+        m_begin.return_value = False
+        m_repo = m_model.Repository.objects.get_repo_or_missing_resource.return_value
+        mock_plugin_api.get_importer_by_id.return_value = (mock.MagicMock(), 'mock_conf')
+
+        repo_controller.sync('mock_id')
+
+        m_update.assert_called_once_with(m_repo)
+        self.assertFalse(mock_end.called)
 
     @mock.patch('pulp.server.controllers.repository.TaskResult')
     def test_sync_failed(self, m_task_result, m_model, mock_plugin_api, mock_plug_conf,
@@ -1154,7 +1589,7 @@ class TestSync(unittest.TestCase):
         mock_fire_man.fire_repo_sync_finished.assert_called_once_with(mock_result.expected_result())
 
         # It is now platform's responsiblity to update plugin content unit counts
-        self.assertTrue(mock_rebuild.called, "rebuild_content_unit_counts must be called")
+        mock_rebuild.assert_called_once_with(m_repo)
 
     @mock.patch('pulp.server.controllers.repository._queue_auto_publish_tasks')
     @mock.patch('pulp.server.controllers.repository._')
@@ -1171,6 +1606,8 @@ class TestSync(unittest.TestCase):
         mock_fire_man = m_factory.event_fire_manager()
         m_repo = m_model.Repository.objects.get_repo_or_missing_resource.return_value
         mock_result.RESULT_ERROR = 'error'
+        mock_result.expected_result.return_value.__getitem__.side_effect = {
+            'result': 'error', 'added_count': -1, 'removed_count': -1}.get
 
         m_repo = m_model.Repository.objects.get_repo_or_missing_resource.return_value
         mock_imp = mock.MagicMock()
@@ -1189,7 +1626,9 @@ class TestSync(unittest.TestCase):
         self.assertTrue(result is m_task_result.return_value)
 
         # It is now platform's responsiblity to update plugin content unit counts
-        self.assertTrue(mock_rebuild.called, "rebuild_content_unit_counts must be called")
+        mock_rebuild.assert_called_once_with(m_repo)
+        # the result of an invalid report does not account for the units
+        self.assertFalse(self.m_check.called)
 
 
 @mock.patch('pulp.server.controllers.repository.model.Distributor.objects')
@@ -1561,6 +2000,187 @@ class TestUpdateUnitCount(unittest.TestCase):
         m_repo_qs().update_one.assert_called_once_with(**{expected_key: 2})
 
 
+class TestUnitCountTracking(unittest.TestCase):
+    """
+    Tests for accumulating the changes to repository unit counts.
+    """
+
+    def tearDown(self):
+        repo_controller._unit_count_deltas = None
+
+    @mock.patch('pulp.server.controllers.repository.model.Repository.objects')
+    def test_update_unit_count_tracking(self, m_repo_qs):
+        """
+        Changes are accumulated instead of being written while tracking.
+        """
+        self.assertTrue(repo_controller.begin_unit_count_tracking())
+        repo_controller.update_unit_count('m_repo', 'mock_type', 2)
+        repo_controller.update_unit_count('m_repo', 'mock_type', 3)
+        repo_controller.update_unit_count('m_repo', 'other_type', -1)
+
+        self.assertFalse(m_repo_qs.called)
+        self.assertEqual(repo_controller._unit_count_deltas['m_repo'],
+                         {'counts': {'mock_type': 5, 'other_type': -1},
+                          'added': False, 'removed': False, 'untracked': False})
+
+    def test_begin_already_tracking(self):
+        """
+        Tracking is not restarted, so that accumulated changes are kept.
+        """
+        repo_controller.begin_unit_count_tracking()
+        repo_controller._record_unit_count_change('m_repo', 'mock_type', 1)
+
+        self.assertFalse(repo_controller.begin_unit_count_tracking())
+        self.assertTrue('m_repo' in repo_controller._unit_count_deltas)
+
+    def test_record_not_tracking(self):
+        self.assertFalse(repo_controller._record_unit_count_change('m_repo', 'mock_type', 1))
+
+    @mock.patch('pulp.server.controllers.repository._apply_unit_count_delta')
+    def test_end(self, m_apply):
+        """
+        The changes to all repositories are applied and the repository object is refreshed.
+        """
+        repo = MagicMock(repo_id='m_repo')
+        repo_controller.begin_unit_count_tracking()
+        repo_controller._record_unit_count_change('m_repo', 'mock_type', 1, added=True)
+        repo_controller._record_unit_count_change('other_repo', 'mock_type', -1, removed=True)
+
+        repo_controller.end_unit_count_tracking(repo)
+
+        self.assertTrue(repo_controller._unit_count_deltas is None)
+        self.assertEqual(m_apply.call_count, 2)
+        m_apply.assert_any_call('m_repo', {'counts': {'mock_type': 1}, 'added': True,
+                                           'removed': False, 'untracked': False})
+        m_apply.assert_any_call('other_repo', {'counts': {'mock_type': -1}, 'added': False,
+                                               'removed': True, 'untracked': False})
+        updated = m_apply.return_value
+        self.assertEqual(repo.content_unit_counts, updated.content_unit_counts)
+        self.assertEqual(repo.last_unit_added, updated.last_unit_added)
+
+    @mock.patch('pulp.server.controllers.repository._apply_unit_count_delta')
+    @mock.patch('pulp.server.controllers.repository.rebuild_content_unit_counts')
+    def test_end_not_tracking(self, m_rebuild, m_apply):
+        """
+        The counts are rebuilt if changes were not being accumulated.
+        """
+        repo = MagicMock(repo_id='m_repo')
+        repo_controller.end_unit_count_tracking(repo)
+
+        m_rebuild.assert_called_once_with(repo)
+        self.assertFalse(m_apply.called)
+
+    @mock.patch('pulp.server.controllers.repository.end_unit_count_tracking')
+    @mock.patch('pulp.server.controllers.repository.update_content_unit_counts')
+    def test_track_unit_counts_nested(self, m_update, m_end):
+        """
+        Only the outermost context stops tracking.
+        """
+        repo = MagicMock(repo_id='m_repo')
+        with repo_controller.track_unit_counts(repo):
+            with repo_controller.track_unit_counts(repo):
+                pass
+            m_update.assert_called_once_with(repo)
+            self.assertFalse(m_end.called)
+        m_end.assert_called_once_with(repo)
+
+    @mock.patch('pulp.server.controllers.repository._update_unit_counts')
+    def test_update_content_unit_counts_tracking(self, m_update):
+        """
+        Only the changes to the given repository are applied.
+        """
+        repo = MagicMock(repo_id='m_repo')
+        repo_controller.begin_unit_count_tracking()
+        repo_controller._record_unit_count_change('m_repo', 'mock_type', 1)
+        repo_controller._record_unit_count_change('other_repo', 'mock_type', 1)
+
+        repo_controller.update_content_unit_counts(repo)
+
+        m_update.assert_called_once_with(repo, {'counts': {'mock_type': 1}, 'added': False,
+                                                'removed': False, 'untracked': False})
+        self.assertEqual(repo_controller._unit_count_deltas.keys(), ['other_repo'])
+
+    @mock.patch('pulp.server.controllers.repository.rebuild_content_unit_counts')
+    def test_update_content_unit_counts_not_tracking(self, m_rebuild):
+        repo = MagicMock(repo_id='m_repo')
+        repo_controller.update_content_unit_counts(repo)
+        m_rebuild.assert_called_once_with(repo)
+
+    @mock.patch('pulp.server.controllers.repository._count_units')
+    @mock.patch('pulp.server.controllers.repository.model')
+    @mock.patch('pulp.server.controllers.repository.dateutils')
+    def test_apply_delta(self, m_dateutils, m_model, m_count):
+        """
+        The changes are applied with a single update and the counts are not rebuilt.
+        """
+        m_qs = m_model.Repository.objects.return_value
+        updated = m_qs.only.return_value.first.return_value
+        updated.content_unit_counts = {'mock_type': 3, 'other_type': 1}
+        m_model.RepositoryContentUnit.objects.return_value.count.return_value = 4
+        delta = {'counts': {'mock_type': 2, 'other_type': 0}, 'added': True, 'removed': False,
+                 'untracked': False}
+
+        result = repo_controller._apply_unit_count_delta('m_repo', delta)
+
+        self.assertTrue(result is updated)
+        m_qs.update_one.assert_called_once_with(**{
+            'inc__content_unit_counts__mock_type': 2,
+            'set__last_unit_added': m_dateutils.now_utc_datetime_with_tzinfo.return_value})
+        self.assertFalse(m_model.RepositoryContentUnit.objects.called)
+        self.assertFalse(m_count.called)
+
+    @mock.patch('pulp.server.controllers.repository._count_units')
+    @mock.patch('pulp.server.controllers.repository.model')
+    def test_apply_delta_drift(self, m_model, m_count):
+        """
+        The counts are rebuilt if they do not match the number of associated units after an
+        untracked write.
+        """
+        m_qs = m_model.Repository.objects.return_value
+        updated = m_qs.only.return_value.first.return_value
+        updated.content_unit_counts = {'mock_type': 3}
+        m_model.RepositoryContentUnit.objects.return_value.count.return_value = 5
+        m_count.return_value = {'mock_type': 4, 'other_type': 1}
+        delta = {'counts': {}, 'added': False, 'removed': False, 'untracked': True}
+
+        result = repo_controller._apply_unit_count_delta('m_repo', delta)
+
+        self.assertEqual(result.content_unit_counts, {'mock_type': 4, 'other_type': 1})
+        m_qs.update_one.assert_called_once_with(
+            set__content_unit_counts={'mock_type': 4, 'other_type': 1})
+
+    @mock.patch('pulp.server.controllers.repository.model')
+    def test_apply_delta_missing_repo(self, m_model):
+        m_model.Repository.objects.return_value.only.return_value.first.return_value = None
+        delta = {'counts': {}, 'added': False, 'removed': False, 'untracked': True}
+
+        self.assertTrue(repo_controller._apply_unit_count_delta('m_repo', delta) is None)
+
+    @mock.patch('pulp.server.controllers.repository._count_units')
+    @mock.patch('pulp.server.controllers.repository.model')
+    def test_check_unit_counts_negative(self, m_model, m_count):
+        """
+        Negative counts are rebuilt even if the number of associated units is not known.
+        """
+        repo = MagicMock(repo_id='m_repo', content_unit_counts={'mock_type': -1})
+        m_count.return_value = {}
+
+        repo_controller._check_unit_counts(repo)
+
+        m_count.assert_called_once_with('m_repo')
+        self.assertEqual(repo.content_unit_counts, {})
+        m_model.Repository.objects.return_value.update_one.assert_called_once_with(
+            set__content_unit_counts={})
+
+    @mock.patch('pulp.server.controllers.repository._count_units')
+    def test_check_unit_counts_match(self, m_count):
+        repo = MagicMock(repo_id='m_repo', content_unit_counts={'mock_type': 2, 'other_type': 1})
+
+        repo_controller._check_unit_counts(repo, 3)
+
+        self.assertFalse(m_count.called)
+
+
 class TestGetImporterById(unittest.TestCase):
 
     @patch('pulp.server.controllers.repository.ObjectId')
@@ -1682,16 +2302,93 @@ class TestDownloadRepo(unittest.TestCase):
 
     @patch(MODULE + 'LazyUnitDownloadStep')
     @patch(MODULE + '_create_download_requests')
+    @patch(MODULE + '_find_units_failing_verification')
     @patch(MODULE + 'get_mongoengine_unit_querysets')
-    def test_download_repo_verify(self, mock_units_qs, mock_create_requests, mock_step):
-        """Assert the download step is initialized and called with all units."""
+    def test_download_repo_verify(self, mock_units_qs, mock_failing, mock_create_requests,
+                                  mock_step):
+        """Assert all units are verified and only the failing ones are downloaded."""
         mock_units_qs.return_value = [['some'], ['lists']]
         repo_controller.download_repo('fake-id', verify_all_units=True)
         mock_units_qs.assert_called_once_with('fake-id')
-        self.assertEqual(list(mock_create_requests.call_args[0][0]), ['some', 'lists'])
+        self.assertEqual(list(mock_failing.call_args[0][0]), ['some', 'lists'])
+        mock_create_requests.assert_called_once_with(mock_failing.return_value)
         mock_step.return_value.start.assert_called_once_with()
 
 
+@patch(MODULE + 'model.LazyCatalogEntry')
+@patch(MODULE + 'verification.verify_checksums')
+class TestFindUnitsFailingVerification(unittest.TestCase):
+
+    def setUp(self):
+        self.entries = {}
+        patcher = patch(MODULE + 'plugin_api.get_unit_model_by_id')
+        self.mock_get_model = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def unit(self, unit_id, entries):
+        """Make a unit with a file for each (path, checksum_algorithm, checksum) entry."""
+        unit = Mock(id=unit_id, type_id='abc')
+        unit.list_files.return_value = [entry[0] for entry in entries]
+        for path, algorithm, checksum in entries:
+            self.entries[(unit_id, path)] = Mock(path=path, checksum_algorithm=algorithm,
+                                                 checksum=checksum)
+        return unit
+
+    def catalog(self, mock_catalog):
+        def fake_filter(unit_id, unit_type_id, path):
+            qs = Mock()
+            qs.order_by.return_value.first.return_value = self.entries.get((unit_id, path))
+            return qs
+        mock_catalog.objects.filter.side_effect = fake_filter
+
+    def test_verify(self, mock_verify, mock_catalog):
+        """Assert the files are verified as a batch and only failing units are returned."""
+        self.catalog(mock_catalog)
+        good = self.unit('good', [('/a', 'sha256', '1'), ('/b', 'sha256', '2')])
+        bad = self.unit('bad', [('/c', 'sha256', '3'), ('/d', 'sha256', '4')])
+        uncataloged = Mock(id='uncataloged', type_id='abc')
+        uncataloged.list_files.return_value = ['/e']
+        mock_verify.return_value = {'/d': IOError()}
+
+        failed = repo_controller._find_units_failing_verification([good, bad, uncataloged])
+
+        self.assertEqual(failed, [bad])
+        mock_verify.assert_called_once_with([('/a', {'sha256': '1'}), ('/b', {'sha256': '2'}),
+                                             ('/c', {'sha256': '3'}), ('/d', {'sha256': '4'})])
+        self.mock_get_model.assert_called_once_with('abc')
+        unit_filter = self.mock_get_model.return_value.objects.filter
+        unit_filter.assert_called_once_with(id='good')
+        unit_filter.return_value.update_one.assert_called_once_with(set__downloaded=True)
+
+    @patch(MODULE + 'os.path.isfile')
+    def test_no_checksum(self, mock_isfile, mock_verify, mock_catalog):
+        """Assert files without a catalog checksum are only checked for existence."""
+        self.catalog(mock_catalog)
+        present = self.unit('present', [('/a', None, None)])
+        missing = self.unit('missing', [('/b', None, None)])
+        mock_isfile.side_effect = lambda path: path == '/a'
+        mock_verify.return_value = {}
+
+        failed = repo_controller._find_units_failing_verification([present, missing])
+
+        self.assertEqual(failed, [missing])
+        mock_verify.assert_called_once_with([])
+
+    @patch(MODULE + 'VERIFY_PAGE_SIZE', 2)
+    def test_pages(self, mock_verify, mock_catalog):
+        """Assert each page of units is verified as a separate batch."""
+        self.catalog(mock_catalog)
+        units = [self.unit(str(i), [('/%d' % i, 'sha256', str(i))]) for i in range(3)]
+        mock_verify.return_value = {}
+
+        failed = repo_controller._find_units_failing_verification(iter(units))
+
+        self.assertEqual(failed, [])
+        self.assertEqual(mock_verify.call_args_list,
+                         [call([('/0', {'sha256': '0'}), ('/1', {'sha256': '1'})]),
+                          call([('/2', {'sha256': '2'})])])
+
+
 class TestGetDeferredContentUnits(unittest.TestCase):
 
     @patch(MODULE + 'plugin_api.get_unit_model_by_id')
@@ -1861,7 +2558,8 @@ class TestLazyUnitDownloadStep(unittest.TestCase):
             repo_controller.REQUEST: Mock(canceled=False),
             repo_controller.UNIT_FILES: {
                 '/no/where': {
-                    repo_controller.CATALOG_ENTRY: Mock(),
+                    repo_controller.CATALOG_ENTRY: Mock(checksum_algorithm='sha256',
+                                                        checksum='abc'),
                     repo_controller.PATH_DOWNLOADED: None
                 }
             }
@@ -1913,7 +2611,10 @@ class TestLazyUnitDownloadStep(unittest.TestCase):
 
         # Test
         self.step.download_succeeded(self.report)
-        unit.import_content.assert_called_once_with(self.report.destination)
+        unit.import_content.assert_called_once_with(self.report.destination,
+                                                    checksums={'sha256': 'abc'})
+        # the checksum is verified as the file is imported
+        self.assertFalse(self.step.validate_file.called)
         self.assertEqual(1, self.step.progress_successes)
         self.assertEqual(0, self.step.progress_failures)
         self.assertEqual(
@@ -1938,7 +2639,8 @@ class TestLazyUnitDownloadStep(unittest.TestCase):
         self.assertEqual(0, unit.set_storage_path.call_count)
         unit.import_content.assert_called_once_with(
             self.report.destination,
-            location='a/filename'
+            location='a/filename',
+            checksums={'sha256': 'abc'}
         )
         self.assertEqual(1, self.step.progress_successes)
         self.assertEqual(0, self.step.progress_failures)
@@ -1961,7 +2663,8 @@ class TestLazyUnitDownloadStep(unittest.TestCase):
         self.assertEqual(0, unit.set_storage_path.call_count)
         unit.import_content.assert_called_once_with(
             self.report.destination,
-            location='a/filename'
+            location='a/filename',
+            checksums={'sha256': 'abc'}
         )
         self.assertEqual(1, self.step.progress_successes)
         self.assertEqual(0, self.step.progress_failures)
@@ -1973,13 +2676,33 @@ class TestLazyUnitDownloadStep(unittest.TestCase):
     def test_download_succeeded_corrupted_download(self, mock_get_model):
         """Assert corrupted downloads are not copied or marked as downloaded."""
         # Setup
-        self.step.validate_file = Mock(side_effect=repo_controller.VerificationException)
+        self.step.validate_file = Mock()
         model_qs = mock_get_model.return_value
         unit = model_qs.objects.filter.return_value.only.return_value.get.return_value
+        unit.import_content.side_effect = repo_controller.VerificationException
 
         # Test
         self.step.download_succeeded(self.report)
         self.assertEqual(0, unit.set_storage_path.call_count)
+        self.assertEqual(0, self.step.progress_successes)
+        self.assertEqual(1, self.step.progress_failures)
+        self.assertEqual(0, model_qs.objects.filter.return_value.update_one.call_count)
+
+    @patch(MODULE + 'plugin_api.get_unit_model_by_id')
+    def test_download_succeeded_no_checksum(self, mock_get_model):
+        """Assert downloads without a known checksum are only checked to exist."""
+        # Setup
+        self.step.validate_file = Mock(side_effect=IOError)
+        catalog_entry = self.data[repo_controller.UNIT_FILES]['/no/where'][
+            repo_controller.CATALOG_ENTRY]
+        catalog_entry.checksum_algorithm = None
+        catalog_entry.checksum = None
+        model_qs = mock_get_model.return_value
+        unit = model_qs.objects.filter.return_value.only.return_value.get.return_value
+
+        # Test
+        self.step.download_succeeded(self.report)
+        self.step.validate_file.assert_called_once_with(self.report.destination, None, None)
         self.assertEqual(0, unit.import_content.call_count)
         self.assertEqual(0, self.step.progress_successes)
         self.assertEqual(1, self.step.progress_failures)
@@ -1991,16 +2714,21 @@ class TestLazyUnitDownloadStep(unittest.TestCase):
         path_entry = self.report.data[repo_controller.UNIT_FILES]['/no/where']
         self.assertFalse(path_entry[repo_controller.PATH_DOWNLOADED])
 
-    @patch('__builtin__.open')
-    @patch(MODULE + 'verify_checksum')
-    def test_validate_file(self, mock_verify_checksum, mock_open):
+    @patch(MODULE + 'calculate_file_checksums')
+    def test_validate_file(self, mock_calculate):
+        mock_calculate.return_value = {'sha8': '7'}
         self.step.validate_file('/no/where', 'sha8', '7')
-        self.assertEqual(('sha8', '7'), mock_verify_checksum.call_args[0][1:])
-        mock_open.assert_called_once_with('/no/where')
+        mock_calculate.assert_called_once_with('/no/where', ['sha8'])
+
+    @patch(MODULE + 'calculate_file_checksums')
+    def test_validate_file_mismatch(self, mock_calculate):
+        mock_calculate.return_value = {'sha8': '8'}
+        self.assertRaises(repo_controller.VerificationException, self.step.validate_file,
+                          '/no/where', 'sha8', '7')
 
-    @patch(MODULE + 'verify_checksum')
-    def test_validate_file_fail(self, mock_verify_checksum):
-        mock_verify_checksum.side_effect = IOError
+    @patch(MODULE + 'calculate_file_checksums')
+    def test_validate_file_fail(self, mock_calculate):
+        mock_calculate.side_effect = IOError
         self.assertRaises(IOError, self.step.validate_file, '/no/where', 'sha8', '7')
 
     @patch(MODULE + 'os.path.isfile')
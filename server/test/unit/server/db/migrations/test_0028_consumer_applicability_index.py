@@ -0,0 +1,26 @@
+"""
+This module contains tests for pulp.server.db.migrations.0028_consumer_applicability_index.py
+"""
+import unittest
+
+import mock
+
+from pulp.server.db.migrate.models import _import_all_the_way
+
+migration = _import_all_the_way('pulp.server.db.migrations.0028_consumer_applicability_index')
+
+
+class TestMigrate(unittest.TestCase):
+    """
+    Test the migrate() function.
+    """
+    @mock.patch.object(migration, 'update_consumer_applicability_index')
+    @mock.patch.object(migration, 'get_collection')
+    def test_migrate(self, m_get_collection, m_update_index):
+        m_get_collection.return_value.find.return_value = [{'id': 'c_1'}, {'id': 'c_2'}]
+
+        migration.migrate()
+
+        m_get_collection.assert_called_once_with('consumers')
+        m_get_collection.return_value.find.assert_called_once_with(projection=['id'])
+        m_update_index.assert_called_once_with(['c_1', 'c_2'])
@@ -1,7 +1,9 @@
 import unittest
 
 from mock import call, patch, MagicMock, Mock
+from pymongo import MongoClient
 from pymongo.errors import AutoReconnect
+from pymongo.read_preferences import ReadPreference, SecondaryPreferred
 import unittest2
 
 from pulp.common import error_codes
@@ -908,3 +910,83 @@ class TestUnsafeRetry(unittest.TestCase):
         final_answer = mock_func()
         m_logger.error.assert_called_once_with('mock_func operation failed on mock_coll')
         self.assertTrue(final_answer is 'final')
+
+
+class TestSecondaryReads(unittest.TestCase):
+
+    @mock_config.patch({'database': {'secondary_reads': 'false'}})
+    def test_read_preference_disabled(self):
+        self.assertTrue(connection.secondary_read_preference() is None)
+
+    @mock_config.patch({'database': {'secondary_reads': 'true', 'max_staleness': '120'}})
+    def test_read_preference(self):
+        read_preference = connection.secondary_read_preference()
+
+        self.assertEqual(read_preference, SecondaryPreferred(max_staleness=120))
+
+    @mock_config.patch({'database': {'secondary_reads': 'true', 'max_staleness': '0'}})
+    def test_read_preference_no_staleness_limit(self):
+        read_preference = connection.secondary_read_preference()
+
+        self.assertEqual(read_preference, SecondaryPreferred())
+
+    @patch('pulp.server.db.connection.secondary_read_preference')
+    def test_secondary_reads(self, secondary_read_preference):
+        self.assertTrue(connection.routed_read_preference('repos') is None)
+
+        with connection.secondary_reads():
+            self.assertEqual(connection.routed_read_preference('repos'),
+                             secondary_read_preference.return_value)
+            # tasks, reservations and auth are always read from the primary
+            self.assertTrue(connection.routed_read_preference('task_status') is None)
+            self.assertTrue(connection.routed_read_preference('reserved_resources') is None)
+            self.assertTrue(connection.routed_read_preference('users') is None)
+
+        self.assertTrue(connection.routed_read_preference('repos') is None)
+
+    @patch('pulp.server.db.connection.secondary_read_preference')
+    def test_secondary_reads_not_enabled(self, secondary_read_preference):
+        with connection.secondary_reads(False):
+            self.assertTrue(connection.routed_read_preference('repos') is None)
+
+        self.assertFalse(secondary_read_preference.called)
+
+    @patch('pulp.server.db.connection.secondary_read_preference')
+    def test_secondary_reads_restored_on_error(self, secondary_read_preference):
+        try:
+            with connection.secondary_reads():
+                raise ValueError()
+        except ValueError:
+            pass
+
+        self.assertTrue(connection.routed_read_preference('repos') is None)
+
+    @patch('pulp.server.db.connection.secondary_read_preference')
+    def test_iter_secondary_reads(self, secondary_read_preference):
+        def results():
+            for i in range(2):
+                yield i, connection.routed_read_preference('repos')
+            yield None, connection.routed_read_preference('repos')
+
+        items = []
+        for item in connection.iter_secondary_reads(results()):
+            items.append(item)
+            # the routing only applies while the next item is produced
+            self.assertTrue(connection.routed_read_preference('repos') is None)
+
+        read_preference = secondary_read_preference.return_value
+        self.assertEqual(items, [(0, read_preference), (1, read_preference),
+                                 (None, read_preference)])
+
+    @patch('pulp.server.db.connection.secondary_read_preference')
+    def test_collection_read_preference(self, secondary_read_preference):
+        secondary_read_preference.return_value = SecondaryPreferred()
+        database = MongoClient(connect=False).pulp_database
+        collection = connection.PulpCollection(database, 'repos')
+        task_collection = connection.PulpCollection(database, 'task_status')
+
+        with connection.secondary_reads():
+            self.assertEqual(collection.read_preference, SecondaryPreferred())
+            self.assertEqual(task_collection.read_preference, ReadPreference.PRIMARY)
+
+        self.assertEqual(collection.read_preference, ReadPreference.PRIMARY)
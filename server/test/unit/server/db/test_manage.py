@@ -11,7 +11,7 @@ from mongoengine.queryset import DoesNotExist
 from ... import base
 from pulp.common.compat import all, json
 from pulp.server.db import manage
-from pulp.server.db.migrate import models
+from pulp.server.db.migrate import models, runner
 from pulp.server.db.model import MigrationTracker
 import pulp.plugins.types.database as types_db
 import migration_packages.a
@@ -127,6 +127,36 @@ class TestMigrateDatabase(MigrationTest):
 
         self.assertTrue(assertion.exception is e)
 
+    @patch('pulp.server.db.manage._logger', create=True)
+    @patch('pulp.server.db.migrate.models.get_migration_packages', auto_spec=True)
+    def test_dry_run_estimates(self, mock_get_packages, mock_logger):
+        """
+        Ensure that a dry run logs the estimates of the migrations that provide one.
+        """
+        mock_package = MagicMock()
+        mock_package.current_version = 5
+        mock_package.latest_available_version = 7
+        mock_package.name = 'foo'
+        mock_estimated = MagicMock()
+        mock_estimated.name = 'foo.0006_estimated'
+        mock_estimated.estimate.return_value = runner.Estimate(1000, 90.0)
+        mock_unknown = MagicMock()
+        mock_unknown.name = 'foo.0007_unknown'
+        mock_unknown.estimate.return_value = runner.Estimate(10, None)
+        mock_package.unapplied_migrations = [mock_estimated, mock_unknown]
+        mock_get_packages.return_value = [mock_package]
+        options = MagicMock()
+        options.dry_run = True
+
+        self.assertRaises(manage.UnperformedMigrationException, manage.migrate_database, options)
+
+        self.assertFalse(mock_package.apply_migration.called)
+        messages = [c[0][0] for c in mock_logger.info.call_args_list]
+        self.assertTrue('Migration foo.0006_estimated would process 1000 documents in about '
+                        '0:01:30.' in messages)
+        self.assertTrue('Migration foo.0007_unknown would process 10 documents.' in messages)
+        self.assertTrue('The migrations are estimated to take 0:01:30.' in messages)
+
 
 class TestManageDB(MigrationTest):
     def clean(self):
@@ -596,6 +626,8 @@ class TestMigrationModule(MigrationTest):
         self.assertEquals(mm.version, 2)
         # It should have a migrate attribute that is callable
         self.assertTrue(hasattr(mm.migrate, '__call__'))
+        # The module does not provide an estimate
+        self.assertTrue(mm.estimate is None)
 
     def test___repr__(self):
         mm = models.MigrationModule('unit.server.db.migration_packages.z.0003_test')
@@ -654,6 +686,17 @@ class TestMigrationPackage(MigrationTest):
         # Now the mp should be at v3
         self.assertEqual(mp.current_version, 3)
 
+    @patch('pulp.server.db.migrate.models.runner.remove_checkpoints')
+    @patch('pulp.server.db.migrate.models.MigrationTracker')
+    def test_apply_migration_removes_checkpoints(self, mock_tracker, mock_remove_checkpoints):
+        mp = models.MigrationPackage(migration_packages.z)
+        migration = MagicMock()
+
+        mp.apply_migration(migration, update_current_version=False)
+
+        migration.migrate.assert_called_once_with()
+        mock_remove_checkpoints.assert_called_once_with(migration.name)
+
     def test_available_versions(self):
         mp = models.MigrationPackage(migration_packages.z)
         self.assertEquals(mp.available_versions, [1, 2, 3])
@@ -0,0 +1,154 @@
+"""
+Test the pulp.server.db.migrate.runner module.
+"""
+import unittest
+
+from mock import call, MagicMock, patch
+from pymongo import ASCENDING
+
+from pulp.server.db.migrate import runner
+
+
+MODULE = 'pulp.server.db.migrate.runner'
+
+
+def batches(*pages):
+    """
+    Build a mock collection whose find() returns the pages in turn.
+    """
+    collection = MagicMock()
+    cursors = []
+    for page in pages:
+        cursor = MagicMock()
+        cursor.sort.return_value.limit.return_value = page
+        cursors.append(cursor)
+    collection.find.side_effect = cursors
+    return collection
+
+
+@patch(MODULE + '.MigrationCheckpoint')
+class TestBatchRunnerRun(unittest.TestCase):
+
+    def test_run(self, checkpoint):
+        checkpoint.objects.return_value.first.return_value = None
+        collection = batches([{'_id': 1}, {'_id': 2}], [{'_id': 3}], [])
+        process = MagicMock()
+        batch_runner = runner.BatchRunner('m', batch_size=2, workers=1)
+
+        processed = batch_runner.run(collection, process, spec={'a': 1}, projection=['a'])
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(process.call_args_list,
+                         [call({'_id': 1}), call({'_id': 2}), call({'_id': 3})])
+        self.assertEqual(collection.find.call_args_list, [
+            call({'a': 1}, projection=['a']),
+            call({'$and': [{'a': 1}, {'_id': {'$gt': 2}}]}, projection=['a']),
+            call({'$and': [{'a': 1}, {'_id': {'$gt': 3}}]}, projection=['a']),
+        ])
+        update_one = checkpoint.objects.return_value.update_one
+        self.assertEqual(update_one.call_count, 2)
+        self.assertEqual(update_one.call_args_list[0][1]['set__marker'], 2)
+        self.assertEqual(update_one.call_args_list[0][1]['inc__processed'], 2)
+        self.assertEqual(update_one.call_args_list[1][1]['set__marker'], 3)
+        self.assertEqual(update_one.call_args_list[1][1]['inc__processed'], 1)
+        self.assertTrue(update_one.call_args_list[1][1]['upsert'])
+        checkpoint.objects.assert_called_with(migration='m', step='')
+
+    def test_run_sorts_by_id(self, checkpoint):
+        checkpoint.objects.return_value.first.return_value = None
+        page = MagicMock()
+        page.sort.return_value.limit.return_value = []
+        collection = MagicMock()
+        collection.find.return_value = page
+        batch_runner = runner.BatchRunner('m', batch_size=10)
+
+        batch_runner.run(collection, MagicMock())
+
+        collection.find.assert_called_once_with({}, projection=None)
+        page.sort.assert_called_once_with('_id', ASCENDING)
+        page.sort.return_value.limit.assert_called_once_with(10)
+
+    def test_run_resumes(self, checkpoint):
+        checkpoint.objects.return_value.first.return_value = MagicMock(marker=7, processed=7)
+        collection = batches([{'_id': 8}], [])
+        process = MagicMock()
+        batch_runner = runner.BatchRunner('m', step='units', workers=1)
+
+        processed = batch_runner.run(collection, process)
+
+        self.assertEqual(processed, 1)
+        process.assert_called_once_with({'_id': 8})
+        self.assertEqual(collection.find.call_args_list[0],
+                         call({'$and': [{}, {'_id': {'$gt': 7}}]}, projection=None))
+        checkpoint.objects.assert_called_with(migration='m', step='units')
+
+    def test_run_parallel(self, checkpoint):
+        checkpoint.objects.return_value.first.return_value = None
+        documents = [{'_id': i} for i in range(20)]
+        collection = batches(documents, [])
+        processed = []
+        batch_runner = runner.BatchRunner('m', batch_size=20, workers=4)
+
+        batch_runner.run(collection, processed.append)
+
+        self.assertEqual(sorted(processed), documents)
+        update_one = checkpoint.objects.return_value.update_one
+        self.assertEqual(update_one.call_args[1]['set__marker'], 19)
+
+    def test_run_failed_batch_not_checkpointed(self, checkpoint):
+        checkpoint.objects.return_value.first.return_value = None
+        collection = batches([{'_id': 1}, {'_id': 2}], [{'_id': 3}], [])
+        process = MagicMock(side_effect=[None, None, ValueError()])
+        batch_runner = runner.BatchRunner('m', batch_size=2, workers=2)
+
+        self.assertRaises(ValueError, batch_runner.run, collection, process)
+
+        update_one = checkpoint.objects.return_value.update_one
+        self.assertEqual(update_one.call_count, 1)
+        self.assertEqual(update_one.call_args[1]['set__marker'], 2)
+
+
+@patch(MODULE + '.MigrationCheckpoint')
+class TestBatchRunnerEstimate(unittest.TestCase):
+
+    def test_estimate(self, checkpoint):
+        checkpoint.objects.return_value.first.return_value = None
+        collection = MagicMock()
+        collection.count.return_value = 100
+
+        estimate = runner.BatchRunner('m').estimate(collection, spec={'a': 1},
+                                                    seconds_per_document=0.5)
+
+        self.assertEqual(estimate, runner.Estimate(100, 50.0))
+        collection.count.assert_called_once_with({'a': 1})
+
+    def test_estimate_unknown_rate(self, checkpoint):
+        checkpoint.objects.return_value.first.return_value = None
+        collection = MagicMock()
+        collection.count.return_value = 100
+
+        estimate = runner.BatchRunner('m').estimate(collection)
+
+        self.assertEqual(estimate, runner.Estimate(100, None))
+
+    def test_estimate_resumed(self, checkpoint):
+        checkpoint.objects.return_value.first.return_value = MagicMock(
+            marker=7, processed=40, elapsed=10.0)
+        collection = MagicMock()
+        collection.count.return_value = 100
+
+        estimate = runner.BatchRunner('m').estimate(collection, seconds_per_document=1.0)
+
+        # the rate of the interrupted run is used
+        self.assertEqual(estimate, runner.Estimate(100, 25.0))
+        collection.count.assert_called_once_with({'$and': [{}, {'_id': {'$gt': 7}}]})
+
+
+class TestRemoveCheckpoints(unittest.TestCase):
+
+    @patch(MODULE + '.MigrationCheckpoint')
+    def test_remove(self, checkpoint):
+        runner.remove_checkpoints('m')
+
+        checkpoint.objects.assert_called_once_with(migration='m')
+        checkpoint.objects.return_value.delete.assert_called_once_with()
@@ -476,7 +476,7 @@ class TestFileContentUnit(unittest.TestCase):
         file_storage.assert_called_once_with()
         storage.__enter__.assert_called_once_with()
         storage.__exit__.assert_called_once_with(None, None, None)
-        storage.put.assert_called_once_with(unit, path, None)
+        storage.put.assert_called_once_with(unit, path, None, checksums=None)
 
     @patch('os.path.isfile')
     @patch('pulp.server.db.model.FileStorage')
@@ -498,7 +498,7 @@ class TestFileContentUnit(unittest.TestCase):
         file_storage.assert_called_once_with()
         storage.__enter__.assert_called_once_with()
         storage.__exit__.assert_called_once_with(None, None, None)
-        storage.put.assert_called_once_with(unit, path, location)
+        storage.put.assert_called_once_with(unit, path, location, checksums=None)
 
     def test_import_content_unit_not_saved(self):
         try:
@@ -1275,6 +1275,40 @@ class TestCeleryBeatLock(unittest.TestCase):
         self.assertEquals(model.CeleryBeatLock._meta['collection'], 'celery_beat_lock')
 
 
+class TestScheduleVersion(unittest.TestCase):
+    """
+    Test the ScheduleVersion class.
+    """
+    def test_attributes(self):
+        self.assertTrue(isinstance(model.ScheduleVersion.name, StringField))
+        self.assertTrue(model.ScheduleVersion.name.primary_key)
+        self.assertTrue(isinstance(model.ScheduleVersion.version, IntField))
+        self.assertEqual(model.ScheduleVersion.version.default, 0)
+        self.assertTrue('_ns' in model.ScheduleVersion._fields)
+
+    def test_meta_collection(self):
+        self.assertEquals(model.ScheduleVersion._meta['collection'], 'schedule_version')
+
+    @patch('pulp.server.db.model.ScheduleVersion._get_collection')
+    def test_increment(self, mock_get_collection):
+        model.ScheduleVersion.increment()
+
+        mock_get_collection.return_value.update.assert_called_once_with(
+            {'_id': 'scheduled_calls'}, {'$inc': {'version': 1}}, upsert=True)
+
+    @patch('pulp.server.db.model.ScheduleVersion._get_collection')
+    def test_get_version(self, mock_get_collection):
+        mock_get_collection.return_value.find_one.return_value = {'version': 12}
+
+        self.assertEqual(model.ScheduleVersion.get_version(), 12)
+
+    @patch('pulp.server.db.model.ScheduleVersion._get_collection')
+    def test_get_version_missing(self, mock_get_collection):
+        mock_get_collection.return_value.find_one.return_value = None
+
+        self.assertEqual(model.ScheduleVersion.get_version(), 0)
+
+
 class TestLazyCatalogEntry(unittest.TestCase):
     """
     Test the LazyCatalogEntry class.
@@ -124,3 +124,80 @@ class TestReqoQuerySet(unittest.TestCase):
         qs.get = mock_get
         self.assertRaises(pulp_exceptions.MissingResource, qs.get_repo_or_missing_resource, 'repo')
         mock_get.assert_called_once_with(repo_id='repo')
+
+    def test_get_deleted_repo(self):
+        """
+        Raise a MissingResource if the deletion of the repo has been dispatched.
+        """
+        document = mock.MagicMock()
+        markers = document._get_db.return_value.__getitem__.return_value
+        markers.find.return_value = [{'_id': 'repo'}]
+        qs = querysets.RepoQuerySet(document, mock.MagicMock())
+        qs.get = mock.MagicMock()
+
+        self.assertRaises(pulp_exceptions.MissingResource, qs.get_repo_or_missing_resource, 'repo')
+        document._get_db.return_value.__getitem__.assert_called_once_with('deleted_repos')
+        markers.find.assert_called_once_with({'_id': {'$in': ['repo']}}, projection={'_id': 1})
+        self.assertFalse(qs.get.called)
+
+    def test_get_deleted_repo_included(self):
+        """
+        A repo whose deletion has been dispatched is returned if deleted repos are included.
+        """
+        document = mock.MagicMock()
+        qs = querysets.RepoQuerySet(document, mock.MagicMock())
+        qs.get = mock.MagicMock()
+
+        result = qs.get_repo_or_missing_resource('repo', include_deleted=True)
+
+        self.assertTrue(result is qs.get.return_value)
+        self.assertFalse(document._get_db.called)
+
+    def test_exclude_deleted(self):
+        """
+        The repos whose deletion has been dispatched are filtered out.
+        """
+        document = mock.MagicMock()
+        markers = document._get_db.return_value.__getitem__.return_value
+        markers.find.return_value = [{'_id': 'repo'}]
+        qs = querysets.RepoQuerySet(document, mock.MagicMock())
+        qs.filter = mock.MagicMock()
+
+        result = qs.exclude_deleted()
+
+        markers.find.assert_called_once_with({}, projection={'_id': 1})
+        qs.filter.assert_called_once_with(repo_id__nin=['repo'])
+        self.assertTrue(result is qs.filter.return_value)
+
+    def test_exclude_deleted_none(self):
+        document = mock.MagicMock()
+        document._get_db.return_value.__getitem__.return_value.find.return_value = []
+        qs = querysets.RepoQuerySet(document, mock.MagicMock())
+        qs.filter = mock.MagicMock()
+
+        self.assertTrue(qs.exclude_deleted() is qs)
+        self.assertFalse(qs.filter.called)
+
+
+class TestRoutedQuerySetNoCache(unittest.TestCase):
+
+    @mock.patch('pulp.server.db.querysets.connection.routed_read_preference')
+    def test_routed(self, routed_read_preference):
+        qs = querysets.RoutedQuerySetNoCache(MockDocument, mock.MagicMock())
+
+        self.assertEqual(qs._read_preference, routed_read_preference.return_value)
+        routed_read_preference.assert_called_once_with('mock_document')
+
+    @mock.patch('pulp.server.db.querysets.connection.routed_read_preference')
+    def test_not_routed(self, routed_read_preference):
+        routed_read_preference.return_value = None
+
+        qs = querysets.RoutedQuerySetNoCache(MockDocument, mock.MagicMock())
+
+        self.assertTrue(qs._read_preference is None)
+
+    @mock.patch('pulp.server.db.querysets.connection.routed_read_preference')
+    def test_criteria_queryset_routed(self, routed_read_preference):
+        qs = MockDocument.objects.filter(name='a')
+
+        self.assertEqual(qs._read_preference, routed_read_preference.return_value)
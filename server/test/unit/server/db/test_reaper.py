@@ -12,7 +12,8 @@ from pulp.server.db import model
 from pulp.server.db import reaper
 from pulp.server.db.model import celery_result, consumer, repo_group, repository
 from pulp.server.db.model.consumer import ConsumerHistoryEvent
-from pulp.server.db.model.reaper_base import _create_expired_object_id, ReaperMixin
+from pulp.server.db.model.reaper_base import (_create_expired_object_id, _remove_in_batches,
+                                              ReaperMixin)
 
 
 class TestReaperCollectionConfig(unittest.TestCase):
@@ -70,6 +71,43 @@ class TestCreateExpiredObjectId(unittest.TestCase):
         self.assertTrue(isinstance(expired_oid, ObjectId))
 
 
+class TestRemoveInBatches(unittest.TestCase):
+    """
+    Assert correct behavior from _remove_in_batches().
+    """
+
+    @mock.patch('pulp.server.db.model.reaper_base.time.sleep')
+    def test_batches(self, sleep):
+        """
+        Make sure that the documents are removed in bounded ranges of _id, with pauses between.
+        """
+        collection = mock.MagicMock()
+        collection.find.return_value.sort.return_value = [{'_id': i} for i in range(5)]
+        collection.remove.side_effect = [{'n': 2}, {'n': 2}, {'n': 1}]
+        spec = {'_id': {'$lte': 10}}
+
+        removed = _remove_in_batches(collection, spec, 2, 0.5)
+
+        self.assertEqual(removed, 5)
+        collection.find.assert_called_once_with(spec, projection={'_id': True})
+        self.assertEqual(collection.remove.call_args_list, [
+            mock.call({'$and': [spec, {'_id': {'$gte': 0, '$lte': 1}}]}),
+            mock.call({'$and': [spec, {'_id': {'$gte': 2, '$lte': 3}}]}),
+            mock.call({'$and': [spec, {'_id': {'$gte': 4, '$lte': 4}}]})])
+        self.assertEqual(sleep.call_args_list, [mock.call(0.5), mock.call(0.5)])
+
+    @mock.patch('pulp.server.db.model.reaper_base.time.sleep')
+    def test_nothing_to_remove(self, sleep):
+        collection = mock.MagicMock()
+        collection.find.return_value.sort.return_value = []
+
+        removed = _remove_in_batches(collection, {}, 2, 0.5)
+
+        self.assertEqual(removed, 0)
+        self.assertFalse(collection.remove.called)
+        self.assertFalse(sleep.called)
+
+
 class TestReapInheritance(unittest.TestCase):
     """
     Check class inheritance related to ReaperMixin
@@ -90,6 +128,32 @@ class TestReapInheritance(unittest.TestCase):
             self.assertTrue(issubclass(model_class, ReaperMixin))
 
 
+class TestReapExpiredDocumentsBatches(unittest.TestCase):
+    """
+    Assert that reap_expired_documents() removes documents using the configured batches.
+    """
+
+    @mock.patch('pulp.server.db.reaper.repo_controller.resume_deletions')
+    @mock.patch('pulp.server.async.tasks.TaskStatus')
+    @mock.patch('pulp.server.db.reaper.pulp_config.config')
+    def test_batches(self, config, task_status, resume_deletions):
+        config.getint.return_value = 50
+        config.getfloat.side_effect = lambda section, name: {'reaper_batch_delay': 0.2}.get(name, 7)
+        model_class = mock.MagicMock()
+        model_class.reap_old_documents.return_value = 3
+
+        with mock.patch.dict(reaper._COLLECTION_TIMEDELTAS, {model_class: 'test_history'},
+                             clear=True):
+            removed = reaper.reap_expired_documents()
+
+        self.assertEqual(removed, {'test_history': 3})
+        config.getint.assert_called_once_with('data_reaping', 'reaper_batch_size')
+        model_class.reap_old_documents.assert_called_once_with(7, batch_size=50,
+                                                               batch_delay=0.2)
+        # interrupted repository deletions are resumed as well
+        resume_deletions.assert_called_once_with()
+
+
 class TestReapExpiredDocuments(base.PulpServerTests):
     """
     This test class asserts correct behavior from the reap_expired_documents() Task.
@@ -6,7 +6,8 @@ from M2Crypto import RSA
 
 from pulp.server.lazy.url import (
     NotValid, DecodingError, NotSigned, ResourceNotMatched, ExtensionNotMatched, PolicyMalformed,
-    PolicyNotAuthenticated, PolicyExpired, Base64, JSON, Policy, Query, Key, URL, SignedURL)
+    PolicyNotAuthenticated, PolicyExpired, Base64, JSON, Policy, Query, Key, SharedKey, URL,
+    SignedURL, SignedURLCache)
 
 
 MODULE = 'pulp.server.lazy.url'
@@ -328,6 +329,51 @@ class TestKey(TestCase):
         self.assertEqual(key, rsa.load_key_bio.return_value)
 
 
+class TestSharedKey(TestCase):
+
+    @patch('__builtin__.open')
+    def test_load(self, _open):
+        path = '/tmp/shared.key'
+        fp = Mock()
+        fp.__enter__ = Mock(return_value=fp)
+        fp.__exit__ = Mock()
+        fp.read.return_value = 'secret\n'
+        _open.return_value = fp
+
+        # test
+        key = SharedKey.load(path)
+
+        # validation
+        _open.assert_called_once_with(path)
+        self.assertEqual(key.secret, 'secret')
+
+    def test_sign_and_verify(self):
+        digest = Policy.digest('policy')
+        key = SharedKey('secret')
+
+        # test
+        signature = key.sign(digest)
+
+        # validation
+        self.assertTrue(key.verify(digest, signature))
+        self.assertFalse(key.verify(digest, signature[:-1]))
+        self.assertFalse(key.verify(digest, SharedKey('other').sign(digest)))
+        self.assertFalse(key.verify(Policy.digest('other'), signature))
+
+    def test_policy(self):
+        key = SharedKey('secret')
+        policy = Policy('/content/good/stuff', 4102444800)
+
+        # test
+        encoded, signature = policy.sign(key)
+
+        # validation
+        validated = Policy.validate(key, encoded, signature)
+        self.assertEqual(validated.resource, policy.resource)
+        self.assertRaises(
+            PolicyNotAuthenticated, Policy.validate, SharedKey('other'), encoded, signature)
+
+
 class TestURL(TestCase):
 
     @patch(MODULE + '.urlparse')
@@ -375,11 +421,111 @@ class TestURL(TestCase):
         self.assertEqual(signed.query, url.query)
         self.assertEqual(signed.bundle, (encoded_policy, signature))
 
+    @patch(MODULE + '.Policy')
+    def test_sign_until(self, policy):
+        url = URL('http://redhat.com:1234/path;p1;p2?age=10')
+        key = Mock()
+        policy.return_value.sign.return_value = ('p1234[', 's1234[')
+
+        # test
+        signed = url.sign_until(key, 1234, remote_ip='10.1.1.1')
+
+        # validation
+        policy.assert_called_once_with(url.resource, 1234)
+        policy.return_value.sign.assert_called_once_with(key)
+        self.assertEqual(policy.return_value.extensions, dict(remote_ip='10.1.1.1'))
+        self.assertEqual(signed.bundle, ('p1234[', 's1234['))
+
     def test_str(self):
         url = 'https://redhat.com:443/path;p1;p2?q1=1;q2=2'
         self.assertEqual(str(URL(url)), url)
 
 
+class TestSignedURLCache(TestCase):
+
+    @patch(MODULE + '.time')
+    def test_sign(self, time):
+        time.return_value = 100
+        url = Mock()
+        url.__str__ = Mock(return_value='http://redhat.com/path')
+        key = Mock()
+        cache = SignedURLCache(10, bucket=30, expiration=90)
+
+        # test
+        first = cache.sign(url, key, remote_ip='10.1.1.1')
+        second = cache.sign(url, key, remote_ip='10.1.1.1')
+
+        # validation
+        url.sign_until.assert_called_once_with(key, 210, remote_ip='10.1.1.1')
+        self.assertEqual(first, url.sign_until.return_value)
+        self.assertEqual(second, first)
+
+    @patch(MODULE + '.time')
+    def test_sign_keyed_by_extensions(self, time):
+        time.return_value = 100
+        url = Mock()
+        url.__str__ = Mock(return_value='http://redhat.com/path')
+        cache = SignedURLCache(10)
+
+        # test
+        cache.sign(url, Mock(), remote_ip='10.1.1.1')
+        cache.sign(url, Mock(), remote_ip='10.1.1.2')
+
+        # validation
+        self.assertEqual(url.sign_until.call_count, 2)
+
+    @patch(MODULE + '.time')
+    def test_sign_next_bucket(self, time):
+        time.return_value = 100
+        url = Mock()
+        url.__str__ = Mock(return_value='http://redhat.com/path')
+        key = Mock()
+        cache = SignedURLCache(10, bucket=30, expiration=90)
+
+        # test
+        cache.sign(url, key)
+        time.return_value = 120
+        cache.sign(url, key)
+
+        # validation
+        self.assertEqual(url.sign_until.call_count, 2)
+        url.sign_until.assert_called_with(key, 240)
+        self.assertEqual(len(cache._entries), 1)
+
+    @patch(MODULE + '.time')
+    def test_sign_bounded(self, time):
+        time.return_value = 100
+        cache = SignedURLCache(2)
+        urls = []
+        for n in range(3):
+            url = Mock()
+            url.__str__ = Mock(return_value='http://redhat.com/path/%d' % n)
+            urls.append(url)
+
+        # test
+        for url in urls:
+            cache.sign(url, Mock())
+
+        # validation
+        self.assertEqual(len(cache._entries), 2)
+        self.assertFalse(('http://redhat.com/path/0', ()) in cache._entries)
+
+    @patch(MODULE + '.time')
+    def test_sign_disabled(self, time):
+        time.return_value = 100
+        url = Mock()
+        url.__str__ = Mock(return_value='http://redhat.com/path')
+        cache = SignedURLCache(0)
+
+        # test
+        cache.sign(url, Mock())
+        cache.sign(url, Mock())
+
+        # validation
+        self.assertEqual(url.sign_until.call_count, 2)
+        self.assertEqual(len(cache._entries), 0)
+
+
 class TestSignedURL(TestCase):
 
     def test_query(self):
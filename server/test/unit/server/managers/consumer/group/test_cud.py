@@ -275,41 +275,77 @@ class ConsumerGroupMembershipTests(ConsumerGroupTests):
 
 class TestBind(PulpCeleryTaskTests):
 
-    @patch('pulp.server.managers.consumer.group.cud.bind_task')
+    @patch('pulp.server.managers.factory.consumer_agent_manager')
+    @patch('pulp.server.managers.factory.consumer_bind_manager')
     @patch('pulp.server.managers.factory.consumer_group_query_manager')
-    def test_bind_no_errors(self, mock_query_manager, mock_bind):
+    def test_bind_no_errors(self, mock_query_manager, mock_bind_manager, mock_agent_manager):
         mock_query_manager.return_value.get_group.return_value = {'consumer_ids': ['foo-consumer']}
         binding_config = {'binding': 'foo'}
         agent_options = {'bar': 'baz'}
-        mock_bind.return_value = TaskResult(spawned_tasks=[{'task_id': 'foo-request-id'}])
+        bindings = [{'consumer_id': 'foo-consumer'}]
+        mock_bind_manager.return_value.bind_many.return_value = (bindings, [])
+        mock_agent_manager.return_value.bind_many.return_value = (
+            [{'task_id': 'foo-request-id'}], [])
         result = cud.bind('foo_group_id', 'foo_repo_id', 'foo_distributor_id',
                           True, binding_config, agent_options)
-        mock_bind.assert_called_once_with('foo-consumer', 'foo_repo_id', 'foo_distributor_id',
-                                          True, binding_config, agent_options)
+        mock_bind_manager.return_value.bind_many.assert_called_once_with(
+            ['foo-consumer'], 'foo_repo_id', 'foo_distributor_id', True, binding_config)
+        mock_agent_manager.return_value.bind_many.assert_called_once_with(
+            bindings, agent_options)
         self.assertEquals(result.spawned_tasks[0], {'task_id': 'foo-request-id'})
+        self.assertEquals(result.error, None)
+
+    @patch('pulp.server.managers.factory.consumer_agent_manager')
+    @patch('pulp.server.managers.factory.consumer_bind_manager')
+    @patch('pulp.server.managers.factory.consumer_group_query_manager')
+    def test_bind_no_agent_notification(self, mock_query_manager, mock_bind_manager,
+                                        mock_agent_manager):
+        mock_query_manager.return_value.get_group.return_value = {'consumer_ids': ['foo-consumer']}
+        mock_bind_manager.return_value.bind_many.return_value = ([{}], [])
+        result = cud.bind('foo_group_id', 'foo_repo_id', 'foo_distributor_id',
+                          False, {}, {})
+        self.assertFalse(mock_agent_manager.return_value.bind_many.called)
+        self.assertEquals(result.spawned_tasks, [])
 
-    @patch('pulp.server.managers.consumer.group.cud.bind_task')
+    @patch('pulp.server.managers.factory.consumer_agent_manager')
+    @patch('pulp.server.managers.factory.consumer_bind_manager')
     @patch('pulp.server.managers.factory.consumer_group_query_manager')
-    def test_bind_with_missing_resource_errors(self, mock_query_manager, mock_bind):
+    def test_bind_with_missing_resource_errors(self, mock_query_manager, mock_bind_manager,
+                                               mock_agent_manager):
         mock_query_manager.return_value.get_group.return_value = {'consumer_ids': ['foo-consumer']}
         binding_config = {'binding': 'foo'}
         agent_options = {'bar': 'baz'}
         side_effect_exception = MissingResource()
-        mock_bind.side_effect = side_effect_exception
+        mock_bind_manager.return_value.bind_many.return_value = ([], [side_effect_exception])
+        mock_agent_manager.return_value.bind_many.return_value = ([], [])
 
         result = cud.bind('foo_group_id', 'foo_repo_id', 'foo_distributor_id',
                           True, binding_config, agent_options)
         self.assertTrue(result.error.error_code is error_codes.PLP0004)
         self.assertEquals(result.error.child_exceptions[0], side_effect_exception)
 
-    @patch('pulp.server.managers.consumer.group.cud.bind_task')
+    @patch('pulp.server.managers.factory.consumer_agent_manager')
+    @patch('pulp.server.managers.factory.consumer_bind_manager')
+    @patch('pulp.server.managers.factory.consumer_group_query_manager')
+    def test_bind_with_agent_errors(self, mock_query_manager, mock_bind_manager,
+                                    mock_agent_manager):
+        mock_query_manager.return_value.get_group.return_value = {'consumer_ids': ['foo-consumer']}
+        side_effect_exception = ValueError()
+        mock_bind_manager.return_value.bind_many.return_value = ([{}], [])
+        mock_agent_manager.return_value.bind_many.return_value = ([], [side_effect_exception])
+
+        result = cud.bind('foo_group_id', 'foo_repo_id', 'foo_distributor_id', True, {}, {})
+        self.assertEquals(result.error.error_code, error_codes.PLP0004)
+        self.assertEquals(result.error.child_exceptions, [side_effect_exception])
+
+    @patch('pulp.server.managers.factory.consumer_bind_manager')
     @patch('pulp.server.managers.factory.consumer_group_query_manager')
-    def test_bind_with_general_error(self, mock_query_manager, mock_bind):
+    def test_bind_with_general_error(self, mock_query_manager, mock_bind_manager):
         mock_query_manager.return_value.get_group.return_value = {'consumer_ids': ['foo-consumer']}
         binding_config = {'binding': 'foo'}
         agent_options = {'bar': 'baz'}
         side_effect_exception = ValueError()
-        mock_bind.side_effect = side_effect_exception
+        mock_bind_manager.return_value.bind_many.side_effect = side_effect_exception
 
         result = cud.bind('foo_group_id', 'foo_repo_id', 'foo_distributor_id',
                           True, binding_config, agent_options)
@@ -320,35 +356,48 @@ class TestBind(PulpCeleryTaskTests):
 
 class TestUnbind(PulpCeleryTaskTests):
 
-    @patch('pulp.server.managers.consumer.group.cud.unbind_task')
+    @patch('pulp.server.managers.consumer.group.cud.unbind_many')
+    @patch('pulp.server.managers.factory.consumer_bind_manager')
     @patch('pulp.server.managers.factory.consumer_group_query_manager')
-    def test_bind_no_errors(self, mock_query_manager, mock_unbind):
+    def test_bind_no_errors(self, mock_query_manager, mock_bind_manager, mock_unbind):
         mock_query_manager.return_value.get_group.return_value = {'consumer_ids': ['foo-consumer']}
         options = {'bar': 'baz'}
+        bindings = [{'consumer_id': 'foo-consumer'}]
+        mock_bind_manager.return_value.find_by_criteria.return_value = bindings
         mock_unbind.return_value = TaskResult(spawned_tasks=[{'task_id': 'foo-request-id'}])
         result = cud.unbind('foo_group_id', 'foo_repo_id', 'foo_distributor_id', options)
-        mock_unbind.assert_called_once_with('foo-consumer', 'foo_repo_id', 'foo_distributor_id',
-                                            options)
+        criteria = mock_bind_manager.return_value.find_by_criteria.call_args[0][0]
+        self.assertEquals(criteria.filters, {
+            'consumer_id': {'$in': ['foo-consumer']},
+            'repo_id': 'foo_repo_id',
+            'distributor_id': 'foo_distributor_id'})
+        mock_unbind.assert_called_once_with(bindings, options)
         self.assertEquals(result.spawned_tasks[0], {'task_id': 'foo-request-id'})
+        self.assertEquals(result.error, None)
 
-    @patch('pulp.server.managers.consumer.group.cud.unbind_task')
+    @patch('pulp.server.managers.consumer.group.cud.unbind_many')
+    @patch('pulp.server.managers.factory.consumer_bind_manager')
     @patch('pulp.server.managers.factory.consumer_group_query_manager')
-    def test_bind_with_missing_resource_errors(self, mock_query_manager, mock_unbind):
+    def test_bind_with_missing_resource_errors(self, mock_query_manager, mock_bind_manager,
+                                               mock_unbind):
         mock_query_manager.return_value.get_group.return_value = {'consumer_ids': ['foo-consumer']}
         options = {'bar': 'baz'}
-        side_effect_exception = MissingResource()
-        mock_unbind.side_effect = side_effect_exception
+        mock_bind_manager.return_value.find_by_criteria.return_value = []
+        mock_unbind.return_value = TaskResult()
 
         result = cud.unbind('foo_group_id', 'foo_repo_id', 'foo_distributor_id', options)
         self.assertTrue(isinstance(result.error, PulpException))
         self.assertEquals(result.error.error_code, error_codes.PLP0005)
-        self.assertEquals(result.error.child_exceptions[0], side_effect_exception)
+        self.assertTrue(isinstance(result.error.child_exceptions[0], MissingResource))
 
-    @patch('pulp.server.managers.consumer.group.cud.unbind_task')
+    @patch('pulp.server.managers.consumer.group.cud.unbind_many')
+    @patch('pulp.server.managers.factory.consumer_bind_manager')
     @patch('pulp.server.managers.factory.consumer_group_query_manager')
-    def test_bind_with_general_error(self, mock_query_manager, mock_unbind):
+    def test_bind_with_general_error(self, mock_query_manager, mock_bind_manager, mock_unbind):
         mock_query_manager.return_value.get_group.return_value = {'consumer_ids': ['foo-consumer']}
         options = {'bar': 'baz'}
+        mock_bind_manager.return_value.find_by_criteria.return_value = [
+            {'consumer_id': 'foo-consumer'}]
         side_effect_exception = ValueError()
         mock_unbind.side_effect = side_effect_exception
 
@@ -367,13 +416,14 @@ class TestInstallContent(unittest.TestCase):
         group_id = 'foo-group'
         units = ['foo', 'bar']
         agent_options = {'bar': 'baz'}
-        mock_task = mock_agent_manager.return_value.install_content
+        mock_task = mock_agent_manager.return_value.install_content_many
 
-        mock_task.return_value = {'task_id': 'foo-request-id'}
+        mock_task.return_value = ([{'task_id': 'foo-request-id'}], [])
         result = cud.ConsumerGroupManager.install_content(group_id, units, agent_options)
 
-        mock_task.assert_called_once_with('foo-consumer', units, agent_options)
+        mock_task.assert_called_once_with(['foo-consumer'], units, agent_options)
         self.assertEquals(result.spawned_tasks[0], {'task_id': 'foo-request-id'})
+        self.assertEquals(result.error, None)
 
     @patch('pulp.server.managers.factory.consumer_agent_manager')
     @patch('pulp.server.managers.factory.consumer_group_query_manager')
@@ -382,9 +432,9 @@ class TestInstallContent(unittest.TestCase):
         group_id = 'foo-group'
         units = ['foo', 'bar']
         agent_options = {'bar': 'baz'}
-        mock_task = mock_agent_manager.return_value.install_content
+        mock_task = mock_agent_manager.return_value.install_content_many
         side_effect_exception = MissingResource()
-        mock_task.side_effect = side_effect_exception
+        mock_task.return_value = ([], [side_effect_exception])
 
         result = cud.ConsumerGroupManager.install_content(group_id, units, agent_options)
 
@@ -399,7 +449,7 @@ class TestInstallContent(unittest.TestCase):
         group_id = 'foo-group'
         units = ['foo', 'bar']
         agent_options = {'bar': 'baz'}
-        mock_task = mock_agent_manager.return_value.install_content
+        mock_task = mock_agent_manager.return_value.install_content_many
         side_effect_exception = ValueError()
         mock_task.side_effect = side_effect_exception
 
@@ -419,13 +469,14 @@ class TestUnInstallContent(unittest.TestCase):
         group_id = 'foo-group'
         units = ['foo', 'bar']
         agent_options = {'bar': 'baz'}
-        mock_task = mock_agent_manager.return_value.uninstall_content
+        mock_task = mock_agent_manager.return_value.uninstall_content_many
 
-        mock_task.return_value = {'task_id': 'foo-request-id'}
+        mock_task.return_value = ([{'task_id': 'foo-request-id'}], [])
         result = cud.ConsumerGroupManager.uninstall_content(group_id, units, agent_options)
 
-        mock_task.assert_called_once_with('foo-consumer', units, agent_options)
+        mock_task.assert_called_once_with(['foo-consumer'], units, agent_options)
         self.assertEquals(result.spawned_tasks[0], {'task_id': 'foo-request-id'})
+        self.assertEquals(result.error, None)
 
     @patch('pulp.server.managers.factory.consumer_agent_manager')
     @patch('pulp.server.managers.factory.consumer_group_query_manager')
@@ -434,9 +485,9 @@ class TestUnInstallContent(unittest.TestCase):
         group_id = 'foo-group'
         units = ['foo', 'bar']
         agent_options = {'bar': 'baz'}
-        mock_task = mock_agent_manager.return_value.uninstall_content
+        mock_task = mock_agent_manager.return_value.uninstall_content_many
         side_effect_exception = MissingResource()
-        mock_task.side_effect = side_effect_exception
+        mock_task.return_value = ([], [side_effect_exception])
 
         result = cud.ConsumerGroupManager.uninstall_content(group_id, units, agent_options)
 
@@ -451,7 +502,7 @@ class TestUnInstallContent(unittest.TestCase):
         group_id = 'foo-group'
         units = ['foo', 'bar']
         agent_options = {'bar': 'baz'}
-        mock_task = mock_agent_manager.return_value.uninstall_content
+        mock_task = mock_agent_manager.return_value.uninstall_content_many
         side_effect_exception = ValueError()
         mock_task.side_effect = side_effect_exception
 
@@ -471,13 +522,14 @@ class TestUpdateContent(unittest.TestCase):
         group_id = 'foo-group'
         units = ['foo', 'bar']
         agent_options = {'bar': 'baz'}
-        mock_task = mock_agent_manager.return_value.update_content
+        mock_task = mock_agent_manager.return_value.update_content_many
 
-        mock_task.return_value = {'task_id': 'foo-request-id'}
+        mock_task.return_value = ([{'task_id': 'foo-request-id'}], [])
         result = cud.ConsumerGroupManager.update_content(group_id, units, agent_options)
 
-        mock_task.assert_called_once_with('foo-consumer', units, agent_options)
+        mock_task.assert_called_once_with(['foo-consumer'], units, agent_options)
         self.assertEquals(result.spawned_tasks[0], {'task_id': 'foo-request-id'})
+        self.assertEquals(result.error, None)
 
     @patch('pulp.server.managers.factory.consumer_agent_manager')
     @patch('pulp.server.managers.factory.consumer_group_query_manager')
@@ -486,9 +538,9 @@ class TestUpdateContent(unittest.TestCase):
         group_id = 'foo-group'
         units = ['foo', 'bar']
         agent_options = {'bar': 'baz'}
-        mock_task = mock_agent_manager.return_value.update_content
+        mock_task = mock_agent_manager.return_value.update_content_many
         side_effect_exception = MissingResource()
-        mock_task.side_effect = side_effect_exception
+        mock_task.return_value = ([], [side_effect_exception])
 
         result = cud.ConsumerGroupManager.update_content(group_id, units, agent_options)
 
@@ -503,7 +555,7 @@ class TestUpdateContent(unittest.TestCase):
         group_id = 'foo-group'
         units = ['foo', 'bar']
         agent_options = {'bar': 'baz'}
-        mock_task = mock_agent_manager.return_value.update_content
+        mock_task = mock_agent_manager.return_value.update_content_many
         side_effect_exception = ValueError()
         mock_task.side_effect = side_effect_exception
 
@@ -181,6 +181,64 @@ class TestAgentManager(TestCase):
         mock_bind_manager.action_pending.assert_called_with(
             consumer['id'], repo_id, distributor_id, Bind.Action.UNBIND, task_id)
 
+    @patch('pulp.server.managers.consumer.agent.uuid4')
+    @patch('pulp.server.managers.consumer.agent.TaskStatus')
+    @patch('pulp.server.managers.consumer.agent.AgentManager._unbindings')
+    @patch('pulp.server.managers.consumer.agent.managers')
+    @patch('pulp.server.managers.consumer.agent.Context')
+    @patch('pulp.server.agent.direct.pulpagent.Consumer')
+    def test_unbind_many(self, *mocks):
+        mock_agent = mocks[0]
+        mock_context = mocks[1]
+        mock_factory = mocks[2]
+        mock_unbindings = mocks[3]
+        mock_task_status = mocks[4]
+        mock_uuid = mocks[5]
+
+        consumers = [{'id': '1'}, {'id': '2'}]
+        mock_query_manager = mock_factory.consumer_query_manager.return_value
+        mock_query_manager.find_by_id_list.return_value = consumers
+
+        bindings = [
+            {'consumer_id': '1', 'repo_id': '100', 'distributor_id': '200'},
+            {'consumer_id': '2', 'repo_id': '100', 'distributor_id': '200'},
+            {'consumer_id': '3', 'repo_id': '100', 'distributor_id': '200'},
+        ]
+        mock_bind_manager = mock_factory.consumer_bind_manager.return_value
+        agent_bindings = []
+        mock_unbindings.return_value = agent_bindings
+        mock_uuid.side_effect = ['t1', 't2']
+        mock_context.return_value = {}
+
+        # test manager
+
+        options = {}
+        tasks = AgentManager.unbind_many(bindings, options)
+
+        # validations
+
+        self.assertEqual(len(tasks), 2)
+        self.assertEqual(mock_query_manager.find_by_id_list.call_count, 1)
+        consumer_ids = mock_query_manager.find_by_id_list.call_args[0][0]
+        self.assertEqual(sorted(consumer_ids), ['1', '2', '3'])
+        # the distributor type is only looked up once
+        mock_unbindings.assert_called_once_with([bindings[0]])
+        mock_context.assert_called_with(
+            consumers[1],
+            task_id='t2',
+            action='unbind',
+            consumer_id='2',
+            repo_id='100',
+            distributor_id='200')
+        self.assertEqual(mock_task_status.call_count, 2)
+        self.assertEqual(mock_agent.unbind.call_count, 2)
+        mock_agent.unbind.assert_called_with(mock_context.return_value, agent_bindings, options)
+        self.assertEqual(mock_bind_manager.action_pending.call_count, 2)
+        mock_bind_manager.action_pending.assert_called_with(
+            '2', '100', '200', Bind.Action.UNBIND, 't2')
+        # the binding of the missing consumer is deleted
+        mock_bind_manager.delete_many.assert_called_once_with([bindings[2]])
+
     @patch('pulp.server.managers.consumer.agent.uuid4')
     @patch('pulp.server.managers.consumer.agent.TaskStatus')
     @patch('pulp.server.managers.consumer.agent.AgentManager._profiled_consumer')
@@ -235,6 +293,149 @@ class TestAgentManager(TestCase):
         mock_factory.consumer_history_manager().record_event.assert_called_with(
             consumer['id'], 'content_unit_installed', {'units': [unit]})
 
+    @patch('pulp.server.managers.consumer.agent.BATCH_SIZE', 2)
+    @patch('pulp.server.managers.consumer.agent.uuid4')
+    @patch('pulp.server.managers.consumer.agent.TaskStatus')
+    @patch('pulp.server.managers.consumer.agent.AgentManager._profiler')
+    @patch('pulp.server.managers.consumer.agent.managers')
+    @patch('pulp.server.managers.consumer.agent.Context')
+    @patch('pulp.server.agent.direct.pulpagent.Content')
+    def test_install_content_many(self, *mocks):
+        mock_agent = mocks[0]
+        mock_context = mocks[1]
+        mock_factory = mocks[2]
+        mock_get_profiler = mocks[3]
+        mock_task_status = mocks[4]
+        mock_uuid = mocks[5]
+
+        unit = {'type_id': 'xyz', 'unit_key': {}}
+
+        consumers = [{'id': '1'}, {'id': '2'}, {'id': '3'}]
+        mock_query_manager = mock_factory.consumer_query_manager.return_value
+        mock_query_manager.find_by_id_list.side_effect = [consumers[:2], consumers[2:]]
+        mock_profile_manager = mock_factory.consumer_profile_manager.return_value
+        mock_profile_manager.find_by_criteria.side_effect = [
+            [{'consumer_id': '1', 'content_type': 'xyz', 'profile': {'a': 1}}], []]
+
+        mock_profiler = Mock()
+        mock_profiler.install_units = Mock(return_value=[unit])
+        mock_get_profiler.return_value = (mock_profiler, {})
+
+        mock_context.return_value = {}
+        mock_uuid.side_effect = ['t1', 't2', 't3']
+
+        # test manager
+
+        options = {'a': 1}
+        tasks, errors = AgentManager.install_content_many(['1', '2', '3', '4'], [unit], options)
+
+        # validations
+
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(isinstance(errors[0], MissingResource))
+        # the profiler is only resolved once
+        mock_get_profiler.assert_called_once_with('xyz')
+        # consumers and profiles are resolved once per batch
+        self.assertEqual(mock_query_manager.find_by_id_list.call_count, 2)
+        self.assertEqual(mock_profile_manager.find_by_criteria.call_count, 2)
+        profiled = mock_profiler.install_units.call_args_list[0][0][0]
+        self.assertEqual(profiled.id, '1')
+        self.assertEqual(profiled.profiles, {'xyz': {'a': 1}})
+        task_tags = [
+            tags.resource_tag(tags.RESOURCE_CONSUMER_TYPE, '3'),
+            tags.action_tag(tags.ACTION_AGENT_UNIT_INSTALL)
+        ]
+        mock_task_status.assert_called_with(task_id='t3', worker_name='agent', tags=task_tags)
+        mock_context.assert_called_with(consumers[2], task_id='t3', consumer_id='3')
+        self.assertEqual(mock_agent.install.call_count, 3)
+        mock_agent.install.assert_called_with(mock_context.return_value, [unit], options)
+        mock_factory.consumer_history_manager().record_event.assert_called_with(
+            '3', 'content_unit_installed', {'units': [unit]})
+
+    @patch('pulp.server.managers.consumer.agent.uuid4')
+    @patch('pulp.server.managers.consumer.agent.TaskStatus')
+    @patch('pulp.server.managers.consumer.agent.AgentManager._profiler')
+    @patch('pulp.server.managers.consumer.agent.managers')
+    @patch('pulp.server.managers.consumer.agent.Context')
+    @patch('pulp.server.agent.direct.pulpagent.Content')
+    def test_uninstall_content_many_plugin_error(self, *mocks):
+        mock_agent = mocks[0]
+        mock_factory = mocks[2]
+        mock_get_profiler = mocks[3]
+
+        unit = {'type_id': 'xyz', 'unit_key': {}}
+        consumers = [{'id': '1'}, {'id': '2'}]
+        mock_query_manager = mock_factory.consumer_query_manager.return_value
+        mock_query_manager.find_by_id_list.return_value = consumers
+        mock_factory.consumer_profile_manager.return_value.find_by_criteria.return_value = []
+
+        mock_profiler = Mock()
+        mock_profiler.uninstall_units.side_effect = [InvalidUnitsRequested([], ''), [unit]]
+        mock_get_profiler.return_value = (mock_profiler, {})
+
+        # test manager
+
+        tasks, errors = AgentManager.uninstall_content_many(['1', '2'], [unit], {})
+
+        # validations
+
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(isinstance(errors[0], PulpDataException))
+        self.assertEqual(mock_agent.uninstall.call_count, 1)
+
+    @patch('pulp.server.managers.consumer.agent.uuid4')
+    @patch('pulp.server.managers.consumer.agent.TaskStatus')
+    @patch('pulp.server.managers.consumer.agent.AgentManager._bindings')
+    @patch('pulp.server.managers.consumer.agent.managers')
+    @patch('pulp.server.managers.consumer.agent.Context')
+    @patch('pulp.server.agent.direct.pulpagent.Consumer')
+    def test_bind_many(self, *mocks):
+        mock_agent = mocks[0]
+        mock_context = mocks[1]
+        mock_factory = mocks[2]
+        mock_bindings = mocks[3]
+        mock_uuid = mocks[5]
+
+        consumers = [{'id': '1'}, {'id': '2'}]
+        mock_query_manager = mock_factory.consumer_query_manager.return_value
+        mock_query_manager.find_by_id_list.return_value = consumers
+        mock_bind_manager = mock_factory.consumer_bind_manager.return_value
+
+        bindings = [
+            {'consumer_id': c, 'repo_id': '100', 'distributor_id': '200', 'binding_config': {}}
+            for c in ('1', '2', '3')
+        ]
+        agent_bindings = [{'type_id': 'yum', 'repo_id': '100', 'details': {}}]
+        mock_bindings.return_value = agent_bindings
+        mock_uuid.side_effect = ['t1', 't2']
+        mock_context.return_value = {}
+
+        # test manager
+
+        options = {}
+        tasks, errors = AgentManager.bind_many(bindings, options)
+
+        # validations
+
+        self.assertEqual(len(tasks), 2)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(isinstance(errors[0], MissingResource))
+        # the payload is only created once
+        mock_bindings.assert_called_once_with([bindings[0]])
+        mock_context.assert_called_with(
+            consumers[1],
+            task_id='t2',
+            action='bind',
+            consumer_id='2',
+            repo_id='100',
+            distributor_id='200')
+        self.assertEqual(mock_agent.bind.call_count, 2)
+        mock_agent.bind.assert_called_with(mock_context.return_value, agent_bindings, options)
+        mock_bind_manager.action_pending.assert_called_with(
+            '2', '100', '200', Bind.Action.BIND, 't2')
+
     @patch('pulp.server.managers.consumer.agent.uuid4')
     @patch('pulp.server.managers.consumer.agent.TaskStatus')
     @patch('pulp.server.managers.consumer.agent.AgentManager._profiled_consumer')
@@ -1,20 +1,24 @@
 import mock
 
 from .... import base
+from pulp.common.compat import unittest
 from pulp.devel import mock_plugins
 from pulp.plugins.loader import api as plugins
 from pulp.server.controllers import distributor as dist_controller
 from pulp.server.db import model
-from pulp.server.db.model.consumer import (Bind, Consumer, RepoProfileApplicability,
-                                           UnitProfile)
+from pulp.server.db.model.consumer import (Bind, Consumer, ConsumerApplicability,
+                                           RepoProfileApplicability, UnitProfile)
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.db.model import Repository
 from pulp.server.managers import factory as factory
 from pulp.server.managers.consumer.applicability import (
-    _add_consumers_to_applicability_map, _add_profiles_to_consumer_map_and_get_hashes,
-    _add_repo_ids_to_consumer_map, _format_report, _get_applicability_map,
-    _get_consumer_applicability_map, DoesNotExist, MultipleObjectsReturned,
-    retrieve_consumer_applicability, ApplicabilityRegenerationManager)
+    _add_applicability_to_applicability_map, _add_consumers_to_applicability_map,
+    _add_profiles_to_consumer_map_and_get_hashes, _add_repo_ids_to_consumer_map, _format_report,
+    _get_applicability_map, _get_consumer_applicability_map, _get_content_types_map,
+    _get_indexed_applicability_map,
+    _index_applicability, _update_indexed_content_types, DoesNotExist, MultipleObjectsReturned,
+    retrieve_consumer_applicability, regeneration_batch_size, update_consumer_applicability_index,
+    ApplicabilityRegenerationManager)
 from pulp.server.managers.consumer.bind import BindManager
 from pulp.server.managers.consumer.cud import ConsumerManager
 from pulp.server.managers.consumer.profile import ProfileManager
@@ -447,6 +451,72 @@ class ApplicabilityRegenerationManagerTests(base.PulpServerTests):
         mock_get_collection.return_value.find.return_value.batch_size.assert_called_with(5)
 
 
+class TestQueueRegenerateApplicabilityForRepos(unittest.TestCase):
+    """
+    Tests for queueing the regeneration of applicability for repos.
+    """
+
+    @mock.patch('pulp.server.managers.consumer.applicability.MAX_REGENERATION_BATCH_SIZE', 2)
+    @mock.patch('pulp.server.managers.consumer.applicability.MIN_REGENERATION_BATCH_SIZE', 1)
+    @mock.patch('pulp.server.managers.consumer.applicability.batch_regenerate_applicability_task')
+    @mock.patch('pulp.server.managers.consumer.applicability.get_worker_count')
+    @mock.patch('pulp.server.db.model.consumer.RepoProfileApplicability.get_collection')
+    @mock.patch('pulp.server.managers.consumer.applicability.model.Repository.objects')
+    def test_bulk_dispatch(self, m_repo_qs, m_get_collection, m_worker_count, m_task):
+        """
+        Ensure that the batches of a repo are dispatched together and sized from the profile
+        count and the worker count.
+        """
+        m_repo_qs.find_by_criteria.return_value = [mock.MagicMock(repo_id='repo-1')]
+        hashes = [{'profile_hash': 'a'}, {'profile_hash': 'b'}, {'profile_hash': 'c'}]
+        m_get_collection.return_value.find.return_value.count.return_value = 3
+        m_get_collection.return_value.find.return_value.__iter__.return_value = iter(hashes)
+        m_worker_count.return_value = 1
+
+        group_id = ApplicabilityRegenerationManager.queue_regenerate_applicability_for_repos(
+            Criteria().as_dict())
+
+        m_get_collection.return_value.find.assert_called_once_with(
+            {'repo_id': 'repo-1'}, {'profile_hash': 1, '_id': 0})
+        self.assertEqual(m_task.apply_async_many.call_count, 1)
+        batches, = m_task.apply_async_many.mock_calls[0][1]
+        self.assertEqual(list(batches), [('repo-1', (hashes[0],)), ('repo-1', (hashes[1],)),
+                                         ('repo-1', (hashes[2],))])
+        self.assertEqual(m_task.apply_async_many.mock_calls[0][2], {'group_id': group_id})
+
+
+class TestRegenerationBatchSize(unittest.TestCase):
+    """
+    Tests for sizing applicability regeneration batches.
+    """
+
+    def test_spread_across_workers(self):
+        """
+        Ensure that each worker gets the same number of batches.
+        """
+        self.assertEqual(regeneration_batch_size(5000, 5), 250)
+        self.assertEqual(regeneration_batch_size(1001, 4), 63)
+
+    def test_minimum(self):
+        """
+        Ensure that small numbers of profiles are not split into tiny batches.
+        """
+        self.assertEqual(regeneration_batch_size(12, 8), 10)
+        self.assertEqual(regeneration_batch_size(0, 1), 10)
+
+    def test_maximum(self):
+        """
+        Ensure that batches are never so large that they use too much memory.
+        """
+        self.assertEqual(regeneration_batch_size(50000, 2), 250)
+
+    def test_no_workers(self):
+        """
+        Ensure that batches are sized as if there were one worker when none are online.
+        """
+        self.assertEqual(regeneration_batch_size(400, 0), 100)
+
+
 class TestRepoProfileApplicabilityManager(base.PulpServerTests):
     """
     Test the RepoProfileApplicabilityManager.
@@ -713,6 +783,7 @@ class TestRetrieveConsumerApplicability(base.PulpServerTests,
         UnitProfile.get_collection().remove()
         RepoProfileApplicability.get_collection().drop()
         Bind.get_collection().drop()
+        ConsumerApplicability.get_collection().drop()
 
     def test_consumers_with_same_applicability(self, m_validate_consumer_repo, *unused_mocks):
         """
@@ -1501,3 +1572,196 @@ class TestGetConsumerApplicabilityMap(base.PulpServerTests,
             frozenset(['c_1', 'c_2']): {'type_1': ['a_1', 'a_3'], 'type_2': ['a_4']},
             frozenset(['c_2', 'c_3']): {'type_1': ['a_2']}}
         self.assert_equal_ignoring_list_order(c_a_map, expected_c_a_map)
+
+
+class TestUpdateConsumerApplicabilityIndex(unittest.TestCase):
+    """
+    Test the update_consumer_applicability_index() function.
+    """
+    @mock.patch('pulp.server.managers.consumer.applicability._get_content_types_map')
+    @mock.patch('pulp.server.managers.consumer.applicability._add_repo_ids_to_consumer_map')
+    @mock.patch(
+        'pulp.server.managers.consumer.applicability._add_profiles_to_consumer_map_and_get_hashes')
+    @mock.patch.object(ConsumerApplicability, 'get_collection')
+    def test_rebuild(self, m_get_collection, m_add_profiles, m_add_repo_ids, m_get_map):
+        def add_profiles(consumer_ids, consumer_map):
+            consumer_map['c_1']['profiles'].append({'profile_hash': 'hash_1'})
+            return ['hash_1']
+
+        def add_repo_ids(consumer_ids, consumer_map, repo_ids):
+            consumer_map['c_1']['repo_ids'].extend(['repo_1', 'repo_3'])
+
+        m_add_profiles.side_effect = add_profiles
+        m_add_repo_ids.side_effect = add_repo_ids
+        m_get_map.return_value = {
+            ('hash_1', 'repo_1'): ['type_1'],
+            ('hash_1', 'repo_2'): ['type_1'],
+            ('hash_1', 'repo_3'): ['type_1', 'type_2']}
+        collection = m_get_collection.return_value
+        collection.find.return_value = [
+            # up to date
+            {'_id': 'e_1', 'consumer_id': 'c_1', 'profile_hash': 'hash_1', 'repo_id': 'repo_3',
+             'content_types': ['type_2', 'type_1']},
+            # no longer applies
+            {'_id': 'e_2', 'consumer_id': 'c_1', 'profile_hash': 'hash_0', 'repo_id': 'repo_1',
+             'content_types': ['type_1']},
+            {'_id': 'e_3', 'consumer_id': 'c_2', 'profile_hash': 'hash_2', 'repo_id': 'repo_1',
+             'content_types': ['type_1']}]
+
+        update_consumer_applicability_index(['c_1', 'c_2'])
+
+        m_add_repo_ids.assert_called_once_with(['c_1', 'c_2'], mock.ANY, None)
+        self.assertEqual(m_get_map.call_args[0][0], ['hash_1'])
+        self.assertEqual(sorted(m_get_map.call_args[0][1]), ['repo_1', 'repo_3'])
+        collection.find.assert_called_once_with(
+            {'consumer_id': {'$in': ['c_1', 'c_2']}},
+            projection=['consumer_id', 'profile_hash', 'repo_id', 'content_types'])
+        collection.update.assert_called_once_with(
+            {'consumer_id': 'c_1', 'profile_hash': 'hash_1', 'repo_id': 'repo_1'},
+            {'$set': {'content_types': ['type_1']}}, upsert=True)
+        collection.remove.assert_called_once_with({'_id': {'$in': ['e_2', 'e_3']}})
+
+    @mock.patch('pulp.server.managers.consumer.applicability._get_content_types_map')
+    @mock.patch('pulp.server.managers.consumer.applicability._add_repo_ids_to_consumer_map')
+    @mock.patch(
+        'pulp.server.managers.consumer.applicability._add_profiles_to_consumer_map_and_get_hashes')
+    @mock.patch.object(ConsumerApplicability, 'get_collection')
+    def test_rebuild_repos(self, m_get_collection, m_add_profiles, m_add_repo_ids, m_get_map):
+        m_add_profiles.return_value = []
+        m_get_map.return_value = {}
+        collection = m_get_collection.return_value
+        collection.find.return_value = [
+            {'_id': 'e_1', 'consumer_id': 'c_1', 'profile_hash': 'hash_1', 'repo_id': 'repo_1',
+             'content_types': ['type_1']}]
+
+        update_consumer_applicability_index(['c_1'], ['repo_1'])
+
+        m_add_repo_ids.assert_called_once_with(['c_1'], mock.ANY, ['repo_1'])
+        collection.find.assert_called_once_with(
+            {'consumer_id': {'$in': ['c_1']}, 'repo_id': {'$in': ['repo_1']}},
+            projection=['consumer_id', 'profile_hash', 'repo_id', 'content_types'])
+        self.assertFalse(collection.update.called)
+        collection.remove.assert_called_once_with({'_id': {'$in': ['e_1']}})
+
+    @mock.patch('pulp.server.managers.consumer.applicability.types_db')
+    @mock.patch.object(RepoProfileApplicability, 'get_collection')
+    def test_get_content_types_map(self, m_get_collection, m_types_db):
+        m_types_db.all_type_ids.return_value = ['type_1', 'type_2']
+        m_get_collection.return_value.find.return_value = [
+            {'profile_hash': 'hash_1', 'repo_id': 'repo_1', 'applicability': {'type_1': ['a']}},
+            {'profile_hash': 'hash_1', 'repo_id': 'repo_2'}]
+
+        content_types_map = _get_content_types_map(['hash_1'], ['repo_1', 'repo_2'])
+
+        self.assertEqual(content_types_map, {('hash_1', 'repo_1'): ['type_1'],
+                                             ('hash_1', 'repo_2'): []})
+        m_get_collection.return_value.find.assert_called_once_with(
+            {'profile_hash': {'$in': ['hash_1']}, 'repo_id': {'$in': ['repo_1', 'repo_2']}},
+            projection={'profile_hash': 1, 'repo_id': 1,
+                        'applicability.type_1': {'$slice': 1},
+                        'applicability.type_2': {'$slice': 1}})
+
+    @mock.patch.object(RepoProfileApplicability, 'get_collection')
+    def test_get_content_types_map_unbound(self, m_get_collection):
+        self.assertEqual(_get_content_types_map(['hash_1'], []), {})
+        self.assertFalse(m_get_collection.called)
+
+
+class TestIndexApplicability(unittest.TestCase):
+    """
+    Test the functions that maintain the index as applicability data changes.
+    """
+    @mock.patch.object(Bind, 'get_collection')
+    @mock.patch.object(UnitProfile, 'get_collection')
+    @mock.patch.object(ConsumerApplicability, 'get_collection')
+    def test_index_applicability(self, m_get_collection, m_profile_collection,
+                                 m_bind_collection):
+        m_profile_collection.return_value.find.return_value = [
+            {'consumer_id': 'c_1'}, {'consumer_id': 'c_2'}]
+        m_bind_collection.return_value.find.return_value = [{'consumer_id': 'c_2'}]
+
+        _index_applicability('hash_1', 'repo_1', {'type_1': []})
+
+        m_bind_collection.return_value.find.assert_called_once_with(
+            {'consumer_id': {'$in': ['c_1', 'c_2']}, 'repo_id': 'repo_1'},
+            projection=['consumer_id'])
+        m_get_collection.return_value.update.assert_called_once_with(
+            {'consumer_id': 'c_2', 'profile_hash': 'hash_1', 'repo_id': 'repo_1'},
+            {'$set': {'content_types': ['type_1']}}, upsert=True)
+
+    @mock.patch.object(ConsumerApplicability, 'get_collection')
+    def test_update_indexed_content_types(self, m_get_collection):
+        _update_indexed_content_types('hash_1', 'repo_1', {'type_2': ['a_1']})
+
+        m_get_collection.return_value.update.assert_called_once_with(
+            {'profile_hash': 'hash_1', 'repo_id': 'repo_1'},
+            {'$set': {'content_types': ['type_2']}}, multi=True)
+
+
+class TestGetIndexedApplicabilityMap(unittest.TestCase):
+    """
+    Test the _get_indexed_applicability_map() function.
+    """
+    @mock.patch.object(ConsumerApplicability, 'get_collection')
+    def test_map(self, m_get_collection):
+        m_get_collection.return_value.find.return_value = [
+            {'consumer_id': 'c_1', 'profile_hash': 'hash_1', 'repo_id': 'repo_1'},
+            {'consumer_id': 'c_2', 'profile_hash': 'hash_1', 'repo_id': 'repo_1'},
+            {'consumer_id': 'c_2', 'profile_hash': 'hash_2', 'repo_id': 'repo_1'}]
+
+        a_map = _get_indexed_applicability_map(['c_1', 'c_2'], ['type_1'])
+
+        m_get_collection.return_value.find.assert_called_once_with(
+            {'consumer_id': {'$in': ['c_1', 'c_2']}, 'content_types': {'$in': ['type_1']}},
+            projection=['consumer_id', 'profile_hash', 'repo_id'])
+        self.assertEqual(a_map, {
+            ('hash_1', 'repo_1'): {'applicability': None, 'consumers': ['c_1', 'c_2']},
+            ('hash_2', 'repo_1'): {'applicability': None, 'consumers': ['c_2']}})
+
+
+class TestAddApplicabilityToApplicabilityMap(unittest.TestCase):
+    """
+    Test the _add_applicability_to_applicability_map() function.
+    """
+    @mock.patch.object(RepoProfileApplicability, 'get_collection')
+    def test_content_types(self, m_get_collection):
+        a_map = {
+            ('hash_1', 'repo_1'): {'applicability': None, 'consumers': ['c_1']},
+            ('hash_2', 'repo_1'): {'applicability': None, 'consumers': ['c_2']},
+            # The applicability data no longer exists
+            ('hash_3', 'repo_1'): {'applicability': None, 'consumers': ['c_3']}}
+        m_get_collection.return_value.find.return_value = [
+            {'profile_hash': 'hash_1', 'repo_id': 'repo_1',
+             'applicability': {'type_1': ['a_1']}},
+            {'profile_hash': 'hash_2', 'repo_id': 'repo_1', 'applicability': {}}]
+
+        _add_applicability_to_applicability_map(a_map, ['type_1'])
+
+        query, = m_get_collection.return_value.find.call_args[0]
+        self.assertEqual(len(query['$or']), 1)
+        self.assertEqual(query['$or'][0]['repo_id'], 'repo_1')
+        self.assertEqual(sorted(query['$or'][0]['profile_hash']['$in']),
+                         ['hash_1', 'hash_2', 'hash_3'])
+        self.assertEqual(m_get_collection.return_value.find.call_args[1],
+                         {'projection': ['profile_hash', 'repo_id', 'applicability.type_1']})
+        self.assertEqual(a_map, {
+            ('hash_1', 'repo_1'): {'applicability': {'type_1': ['a_1']}, 'consumers': ['c_1']}})
+
+    @mock.patch.object(RepoProfileApplicability, 'get_collection')
+    def test_all_content_types(self, m_get_collection):
+        a_map = {('hash_1', 'repo_1'): {'applicability': None, 'consumers': ['c_1']}}
+        m_get_collection.return_value.find.return_value = [
+            {'profile_hash': 'hash_1', 'repo_id': 'repo_1', 'applicability': {}}]
+
+        _add_applicability_to_applicability_map(a_map, None)
+
+        self.assertEqual(m_get_collection.return_value.find.call_args[1],
+                         {'projection': ['profile_hash', 'repo_id', 'applicability']})
+        self.assertEqual(a_map, {
+            ('hash_1', 'repo_1'): {'applicability': {}, 'consumers': ['c_1']}})
+
+    @mock.patch.object(RepoProfileApplicability, 'get_collection')
+    def test_empty(self, m_get_collection):
+        _add_applicability_to_applicability_map({}, None)
+
+        self.assertFalse(m_get_collection.called)
@@ -78,6 +78,28 @@ class BindManagerTests(base.PulpServerTests):
         self.assertEqual(bind['notify_agent'], self.NOTIFY_AGENT)
         self.assertEqual(bind['binding_config'], self.BINDING_CONFIG)
 
+    def test_bind_many(self, mock_repo_qs):
+        self.populate()
+        manager = factory.consumer_bind_manager()
+        consumer_ids = [self.CONSUMER_ID, self.EXTRA_CONSUMER_1, 'missing']
+        bindings, errors = manager.bind_many(consumer_ids, self.REPO_ID, self.DISTRIBUTOR_ID,
+                                             self.NOTIFY_AGENT, self.BINDING_CONFIG)
+        # Verify
+        self.assertEqual(len(bindings), 2)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(isinstance(errors[0], MissingResource))
+        collection = Bind.get_collection()
+        for consumer_id in consumer_ids[:2]:
+            bind = collection.find_one({'consumer_id': consumer_id})
+            self.assertEqual(bind['repo_id'], self.REPO_ID)
+            self.assertEqual(bind['distributor_id'], self.DISTRIBUTOR_ID)
+            self.assertEqual(bind['binding_config'], self.BINDING_CONFIG)
+        # idempotent
+        bindings, errors = manager.bind_many(consumer_ids[:1], self.REPO_ID, self.DISTRIBUTOR_ID,
+                                             self.NOTIFY_AGENT, self.BINDING_CONFIG)
+        self.assertEqual(len(bindings), 1)
+        self.assertEqual(errors, [])
+
     def test_bind_consumer_history(self, mock_repo_qs):
         self.populate()
         manager = factory.consumer_bind_manager()
@@ -141,6 +163,37 @@ class BindManagerTests(base.PulpServerTests):
         self.assertEqual(history['originator'], 'SYSTEM')
         self.assertEqual(history['details'], self.DETAILS)
 
+    def test_unbind_many(self, mock_repo_qs):
+        # Setup
+        self.populate()
+        manager = factory.consumer_bind_manager()
+        manager.bind(self.CONSUMER_ID, self.REPO_ID, self.DISTRIBUTOR_ID,
+                     self.NOTIFY_AGENT, self.BINDING_CONFIG)
+        bindings = manager.find_by_repo(self.REPO_ID)
+        # Test
+        manager.unbind_many(bindings)
+        # Verify
+        collection = Bind.get_collection()
+        bind = collection.find_one(dict(consumer_id=self.CONSUMER_ID, repo_id=self.REPO_ID))
+        self.assertTrue(bind['deleted'])
+        collection = ConsumerHistoryEvent.get_collection()
+        history = collection.find_one(self.QUERY2)
+        self.assertEqual(history['type'], 'repo_unbound')
+        self.assertEqual(history['details'], self.DETAILS)
+
+    def test_delete_many(self, mock_repo_qs):
+        # Setup
+        self.populate()
+        manager = factory.consumer_bind_manager()
+        manager.bind(self.CONSUMER_ID, self.REPO_ID, self.DISTRIBUTOR_ID,
+                     self.NOTIFY_AGENT, self.BINDING_CONFIG)
+        bindings = manager.find_by_repo(self.REPO_ID)
+        # Test
+        manager.delete_many(bindings)
+        # Verify
+        collection = Bind.get_collection()
+        self.assertEqual(collection.find({'repo_id': self.REPO_ID}).count(), 0)
+
     def test_get_bind(self, mock_repo_qs):
         # Setup
         self.populate()
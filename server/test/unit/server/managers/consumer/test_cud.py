@@ -123,7 +123,8 @@ class ConsumerManagerTests(base.PulpServerTests):
             self.assertEqual(str(e), "Invalid properties: ['notes']")
 
     @patch('pulp.server.managers.consumer.agent.AgentManager.unregister')
-    def test_unregister_consumer(self, mock_unreg):
+    @patch('pulp.server.managers.consumer.cud.key_store')
+    def test_unregister_consumer(self, mock_key_store, mock_unreg):
         """
         Tests unregistering a consumer under normal circumstances.
         """
@@ -139,6 +140,7 @@ class ConsumerManagerTests(base.PulpServerTests):
         consumers = list(Consumer.get_collection().find({'id': consumer_id}))
         self.assertEqual(0, len(consumers))
         mock_unreg.assert_called_with(consumer_id)
+        mock_key_store.invalidate.assert_called_once_with(consumer_id)
 
     def test_delete_consumer_no_consumer(self):
         """
@@ -2,6 +2,7 @@ import mock
 import pymongo
 
 from .... import base
+from pulp.common import util
 from pulp.devel import mock_plugins
 from pulp.plugins.profiler import Profiler
 from pulp.server.db.model.consumer import Consumer, ConsumerHistoryEvent, UnitProfile
@@ -146,6 +147,48 @@ class ProfileManagerTests(base.PulpServerTests):
         self.assertEqual(history['originator'], 'SYSTEM')
         self.assertEqual(history['details'], {'profile_content_type': self.TYPE_1})
 
+    def test_update_stores_upload_hash(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        # Test
+        manager.update(self.CONSUMER_ID, self.TYPE_1, self.PROFILE_1)
+        # Verify
+        profile = UnitProfile.get_collection().find_one({'consumer_id': self.CONSUMER_ID})
+        self.assertEqual(profile['upload_hash'], util.profile_hash(self.PROFILE_1))
+
+    def test_update_unchanged(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        manager.update(self.CONSUMER_ID, self.TYPE_1, self.PROFILE_1)
+        mock_plugins.MOCK_PROFILER.update_profile.reset_mock()
+        ConsumerHistoryEvent.get_collection().remove()
+        # Test
+        # The profile is not examined when its hash matches the hash of the stored profile
+        profile = manager.update(self.CONSUMER_ID, self.TYPE_1, self.PROFILE_2,
+                                 util.profile_hash(self.PROFILE_1))
+        # Verify
+        self.assertEqual(profile['profile'], self.PROFILE_1)
+        stored = UnitProfile.get_collection().find_one({'consumer_id': self.CONSUMER_ID})
+        self.assertEqual(stored['profile'], self.PROFILE_1)
+        self.assertFalse(mock_plugins.MOCK_PROFILER.update_profile.called)
+        history = ConsumerHistoryEvent.get_collection().find_one({'consumer_id': self.CONSUMER_ID})
+        self.assertTrue(history is None)
+
+    def test_update_changed_upload_hash(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        manager.update(self.CONSUMER_ID, self.TYPE_1, self.PROFILE_1, 'hash-1')
+        # Test
+        manager.update(self.CONSUMER_ID, self.TYPE_1, self.PROFILE_2, 'hash-2')
+        # Verify
+        profile = UnitProfile.get_collection().find_one({'consumer_id': self.CONSUMER_ID})
+        self.assertEqual(profile['profile'], self.PROFILE_2)
+        self.assertEqual(profile['profile_hash'], UnitProfile.calculate_hash(self.PROFILE_2))
+        self.assertEqual(profile['upload_hash'], 'hash-2')
+
     def test_update_calls_profiler_update_profile(self):
         """
         Assert that the update() method calls the profiler update_profile() method.
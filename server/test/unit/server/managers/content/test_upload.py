@@ -6,7 +6,6 @@ import unittest
 import mock
 
 from .... import base
-from pulp.common import dateutils
 from pulp.devel import mock_plugins
 from pulp.plugins.conduits.upload import UploadConduit
 from pulp.server.controllers import importer as importer_controller
@@ -161,14 +160,13 @@ class ContentUploadManagerTests(base.PulpServerTests):
         self.assertRaises(PulpDataException, self.upload_manager.is_valid_upload, 'repo-u',
                           'fake-type')
 
-    @mock.patch('pulp.server.controllers.repository.rebuild_content_unit_counts')
+    @mock.patch('pulp.server.controllers.repository._update_unit_counts')
     @mock.patch('pulp.server.controllers.importer.model.Repository.objects')
-    def test_import_uploaded_unit(self, mock_repo_qs, mock_rebuild):
+    def test_import_uploaded_unit(self, mock_repo_qs, mock_update_counts):
         importer_controller.set_importer('repo-u', 'mock-importer', {})
 
         key = {'key': 'value'}
         metadata = {'k1': 'v1'}
-        timestamp_pre_upload = dateutils.now_utc_datetime_with_tzinfo()
 
         mock_repo = mock_repo_qs.get_repo_or_missing_resource.return_value
         importer_return_report = {'success_flag': True, 'summary': '', 'details': {}}
@@ -197,11 +195,10 @@ class ContentUploadManagerTests(base.PulpServerTests):
         self.assertTrue(isinstance(conduit, UploadConduit))
         self.assertEqual(call_args[5].repo_id, 'repo-u')
 
-        # It is now platform's responsibility to update plugin content unit counts
-        self.assertTrue(mock_rebuild.called, "rebuild_content_unit_counts must be called")
-
-        # Make sure that the last_unit_added timestamp was updated
-        self.assertTrue(mock_repo.last_unit_added > timestamp_pre_upload)
+        # It is now platform's responsibility to update plugin content unit counts, and the
+        # last_unit_added timestamp is updated along with them
+        mock_update_counts.assert_called_once_with(
+            mock_repo, {'counts': {}, 'added': True, 'removed': False, 'untracked': False})
 
         # Clean up
         mock_plugins.MOCK_IMPORTER.upload_unit.return_value = None
@@ -59,6 +59,72 @@ class TestUnitsFromCriteria(unittest.TestCase):
         self.assertTrue(found)
 
 
+@mock.patch('pulp.server.managers.repo.unit_association.units_controller')
+@mock.patch('pulp.server.managers.repo.unit_association.repo_controller')
+@mock.patch('pulp.server.managers.repo.unit_association.ImportUnitConduit')
+@mock.patch('pulp.server.managers.repo.unit_association.PluginCallConfiguration')
+@mock.patch('pulp.server.managers.repo.unit_association.plugin_api')
+@mock.patch('pulp.server.managers.repo.unit_association.model')
+class TestAssociateFromRepoCopy(unittest.TestCase):
+    """
+    Tests for copying units between repositories without calling the importer.
+    """
+
+    def setUp(self):
+        self.source_repo = mock.MagicMock(repo_id='source-repo',
+                                          content_unit_counts={'mock-type': 2})
+        self.dest_repo = mock.MagicMock(repo_id='dest-repo')
+        self.importer = mock.MagicMock()
+        self.criteria = UnitAssociationCriteria(type_ids=['mock-type']).to_dict()
+
+    def _setup(self, m_model, m_plugin_api):
+        m_model.Repository.objects.get_repo_or_missing_resource.side_effect = \
+            [self.source_repo, self.dest_repo]
+        m_plugin_api.list_importer_types.return_value = {'types': ['mock-type']}
+        m_plugin_api.list_unit_models.return_value = ['mock-type']
+        m_plugin_api.get_importer_by_id.return_value = (self.importer, {})
+
+    def test_copy(self, m_model, m_plugin_api, m_call_config, m_conduit, m_repo_ctrl,
+                  m_units_ctrl):
+        """
+        Ensure that the units are associated by Pulp if the importer allows it.
+        """
+        self._setup(m_model, m_plugin_api)
+        self.importer.can_copy_associations.return_value = True
+        unit_ids = [{'type_id': 'mock-type', 'unit_key': {'key-1': 'a'}}]
+        m_repo_ctrl.copy_repo_content_units.return_value = unit_ids
+
+        ret = association_manager.RepoUnitAssociationManager.associate_from_repo(
+            'source-repo', 'dest-repo', self.criteria)
+
+        self.assertEqual(ret, {'units_successful': unit_ids})
+        self.importer.can_copy_associations.assert_called_once_with(
+            self.source_repo.to_transfer_repo.return_value,
+            self.dest_repo.to_transfer_repo.return_value, m_call_config.return_value)
+        self.assertFalse(self.importer.import_units.called)
+        m_repo_ctrl.track_unit_counts.assert_called_once_with(self.dest_repo)
+        call = m_repo_ctrl.copy_repo_content_units.call_args
+        self.assertEqual(call[0], (self.source_repo, self.dest_repo))
+        self.assertTrue('repo_content_unit_q' in call[1])
+        self.assertTrue('units_q' in call[1])
+
+    def test_copy_not_supported(self, m_model, m_plugin_api, m_call_config, m_conduit,
+                                m_repo_ctrl, m_units_ctrl):
+        """
+        Ensure that the importer imports the units if it does not allow Pulp to associate them.
+        """
+        self._setup(m_model, m_plugin_api)
+        self.importer.can_copy_associations.return_value = False
+        self.importer.import_units.return_value = []
+
+        ret = association_manager.RepoUnitAssociationManager.associate_from_repo(
+            'source-repo', 'dest-repo', self.criteria)
+
+        self.assertEqual(ret, {'units_successful': []})
+        self.assertEqual(self.importer.import_units.call_count, 1)
+        self.assertFalse(m_repo_ctrl.copy_repo_content_units.called)
+
+
 @mock.patch('pulp.server.managers.repo.unit_association.model.Repository')
 class RepoUnitAssociationManagerTests(base.PulpServerTests):
 
@@ -209,13 +275,14 @@ class RepoUnitAssociationManagerTests(base.PulpServerTests):
         # Cleanup
         mock_plugins.MOCK_IMPORTER.import_units.side_effect = None
 
-    @mock.patch('pulp.server.controllers.repository.rebuild_content_unit_counts', spec_set=True)
+    @mock.patch('pulp.server.controllers.repository._update_unit_counts', spec_set=True)
     @mock.patch('pulp.server.managers.repo.unit_association.UnitAssociationCriteria')
     @mock.patch('pulp.server.managers.repo.unit_association.plugin_api')
     @mock.patch('pulp.server.managers.repo.unit_association.model.Importer')
     def test_associate_from_repo_no_matching_units(self, mock_importer, mock_plugin, mock_repo,
-                                                   mock_crit, mock_rebuild_count):
+                                                   mock_crit, mock_update_counts):
         mock_imp_inst = mock.MagicMock()
+        mock_imp_inst.can_copy_associations.return_value = False
         mock_plugin.get_importer_by_id.return_value = (mock_imp_inst, mock.MagicMock())
         source_repo = mock.MagicMock(repo_id='source-repo')
         dest_repo = mock.MagicMock(repo_id='dest-repo')
@@ -229,14 +296,16 @@ class RepoUnitAssociationManagerTests(base.PulpServerTests):
 
         self.assertEqual(1, mock_imp_inst.import_units.call_count)
         self.assertEqual(ret.get('units_successful'), [])
+        self.assertEqual(1, mock_update_counts.call_count)
 
-    @mock.patch('pulp.server.controllers.repository.rebuild_content_unit_counts', spec_set=True)
+    @mock.patch('pulp.server.controllers.repository._update_unit_counts', spec_set=True)
     @mock.patch('pulp.server.managers.repo.unit_association.UnitAssociationCriteria')
     @mock.patch('pulp.server.managers.repo.unit_association.plugin_api')
     @mock.patch('pulp.server.managers.repo.unit_association.model.Importer')
     def test_associate_from_repo_return_tuple(self, mock_importer, mock_plugin, mock_repo,
-                                              mock_crit, mock_rebuild_count):
+                                              mock_crit, mock_update_counts):
         mock_imp_inst = mock.MagicMock()
+        mock_imp_inst.can_copy_associations.return_value = False
         mock_plugin.get_importer_by_id.return_value = (mock_imp_inst, mock.MagicMock())
         source_repo = mock.MagicMock(repo_id='source-repo')
         dest_repo = mock.MagicMock(repo_id='dest-repo')
@@ -178,9 +178,39 @@ class TestGetEnabled(unittest.TestCase):
         mock_get_collection.assert_called_once_with()
 
 
+class TestGetEnabledIds(unittest.TestCase):
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_query(self, mock_get_collection):
+        mock_find = mock_get_collection.return_value.find
+        schedule_ids = ['529f4bd93de3a31d0ec77338', '529f4bd93de3a31d0ec77339']
+        mock_find.return_value = [{'_id': ObjectId(i)} for i in schedule_ids]
+
+        ret = utils.get_enabled_ids()
+
+        mock_find.assert_called_once_with({'enabled': True}, projection={'_id': 1})
+        self.assertEqual(ret, set(schedule_ids))
+
+
 class TestDelete(unittest.TestCase):
     schedule_id = str(ObjectId())
 
+    @mock.patch('pulp.server.managers.schedule.utils.ScheduleVersion')
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_delete_increments_version(self, mock_get_collection, mock_version):
+        mock_get_collection.return_value.find_and_modify.return_value = 'not none'
+
+        utils.delete(self.schedule_id)
+
+        mock_version.increment.assert_called_once_with()
+
+    @mock.patch('pulp.server.managers.schedule.utils.ScheduleVersion')
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_delete_missing_keeps_version(self, mock_get_collection, mock_version):
+        mock_get_collection.return_value.find_and_modify.return_value = None
+
+        self.assertRaises(exceptions.MissingResource, utils.delete, self.schedule_id)
+        self.assertFalse(mock_version.increment.called)
+
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_delete(self, mock_get_collection):
         mock_remove = mock_get_collection.return_value.find_and_modify
@@ -230,6 +260,13 @@ class TestDeleteByResource(unittest.TestCase):
 
         mock_remove.assert_called_once_with({'resource': 'resource1'})
 
+    @mock.patch('pulp.server.managers.schedule.utils.ScheduleVersion')
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_increments_version(self, mock_get_collection, mock_version):
+        utils.delete_by_resource('resource1')
+
+        mock_version.increment.assert_called_once_with()
+
 
 class TestUpdate(unittest.TestCase):
     schedule_id = str(ObjectId())
@@ -48,3 +48,35 @@ class StatusManagerTests(PulpServerTests):
         mock_get_database.side_effect = Exception("boom!")
 
         self.assertEquals(status_manager.get_mongo_conn_status(), {'connected': False})
+
+    @patch('pulp.server.managers.status.TaskStatus._get_collection')
+    def test_get_task_metrics(self, mock_get_collection):
+        aggregate = mock_get_collection.return_value.aggregate
+        aggregate.side_effect = [
+            [{'_id': {'key': 'sync', 'bucket': '1'}, 'count': 2, 'sum': 1.5},
+             {'_id': {'key': 'sync', 'bucket': '+Inf'}, 'count': 1, 'sum': 4000.0},
+             {'_id': {'key': 'publish', 'bucket': '0.1'}, 'count': 1, 'sum': 0.05}],
+            [], [],
+            [{'_id': {'key': 'sync_step_main', 'bucket': '5'}, 'count': 1, 'sum': 3.0}]]
+
+        task_metrics = status_manager.get_task_metrics()
+
+        self.assertEqual(task_metrics, {
+            'wall_time': {'sync': {'count': 3, 'sum': 4001.5, 'buckets': {'1': 2, '+Inf': 1}},
+                          'publish': {'count': 1, 'sum': 0.05, 'buckets': {'0.1': 1}}},
+            'cpu_time': {},
+            'mongo_time': {},
+            'steps': {'sync_step_main': {'count': 1, 'sum': 3.0, 'buckets': {'5': 1}}}})
+        steps_pipeline = aggregate.call_args_list[3][0][0]
+        self.assertEqual(steps_pipeline[1], {'$unwind': '$metrics.steps'})
+        self.assertEqual(steps_pipeline[2]['$group']['_id']['key'], '$metrics.steps.step_type')
+
+    def test_bucket_expression(self):
+        expression = status_manager._bucket_expression('$metrics.wall_time')
+
+        self.assertEqual(expression['$cond'][0], {'$lte': ['$metrics.wall_time', 0.1]})
+        self.assertEqual(expression['$cond'][1], '0.1')
+        for bound in status_manager.TASK_METRICS_BUCKETS[1:]:
+            expression = expression['$cond'][2]
+            self.assertEqual(expression['$cond'][1], '%g' % bound)
+        self.assertEqual(expression['$cond'][2], '+Inf')
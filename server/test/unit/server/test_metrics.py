@@ -0,0 +1,88 @@
+from mock import Mock, patch
+
+from pulp.common.compat import unittest
+from pulp.server import metrics
+
+
+class MetricsTests(unittest.TestCase):
+
+    def tearDown(self):
+        metrics.stop()
+
+    @patch('pulp.server.metrics._cpu_time')
+    @patch('pulp.server.metrics.time.time')
+    def test_start_stop(self, mock_time, mock_cpu_time):
+        mock_time.side_effect = [100.0, 112.5]
+        mock_cpu_time.side_effect = [3.0, 5.5]
+
+        metrics.start()
+        task_metrics = metrics.stop()
+
+        self.assertEqual(task_metrics, {'wall_time': 12.5, 'cpu_time': 2.5,
+                                        'mongo_operations': 0, 'mongo_time': 0.0,
+                                        'bytes_downloaded': 0, 'bytes_written': 0, 'steps': []})
+
+    def test_stop_not_started(self):
+        self.assertTrue(metrics.stop() is None)
+
+    def test_start_discards_previous(self):
+        metrics.start()
+        metrics.add_bytes_downloaded(10)
+        metrics.start()
+
+        self.assertEqual(metrics.stop()['bytes_downloaded'], 0)
+
+    def test_accumulate(self):
+        metrics.start()
+        metrics.add_mongo_operation(0.25)
+        metrics.add_mongo_operation(0.5)
+        metrics.add_bytes_downloaded(100)
+        metrics.add_bytes_downloaded(None)
+        metrics.add_bytes_downloaded(50)
+        metrics.add_step('sync', 2.0)
+        metrics.add_step('download', 1.0)
+        metrics.add_step('sync', 3.0)
+
+        task_metrics = metrics.stop()
+
+        self.assertEqual(task_metrics['mongo_operations'], 2)
+        self.assertEqual(task_metrics['mongo_time'], 0.75)
+        self.assertEqual(task_metrics['bytes_downloaded'], 150)
+        self.assertEqual(task_metrics['steps'], [{'step_type': 'download', 'duration': 1.0},
+                                                 {'step_type': 'sync', 'duration': 5.0}])
+
+    def test_not_collecting(self):
+        metrics.add_mongo_operation(0.25)
+        metrics.add_bytes_downloaded(100)
+        metrics.add_step('sync', 2.0)
+
+        metrics.start()
+        self.assertEqual(metrics.stop()['mongo_operations'], 0)
+
+    @patch('pulp.server.metrics.os.path.getsize')
+    def test_add_file_written(self, mock_getsize):
+        mock_getsize.return_value = 1024
+
+        metrics.start()
+        metrics.add_file_written('/tmp/a')
+        metrics.add_file_written('/tmp/b')
+
+        self.assertEqual(metrics.stop()['bytes_written'], 2048)
+
+    @patch('pulp.server.metrics.os.path.getsize')
+    def test_add_file_written_not_collecting(self, mock_getsize):
+        metrics.add_file_written('/tmp/a')
+
+        self.assertFalse(mock_getsize.called)
+
+    def test_command_listener(self):
+        listener = metrics.MongoCommandListener()
+
+        metrics.start()
+        listener.started(Mock())
+        listener.succeeded(Mock(duration_micros=1500))
+        listener.failed(Mock(duration_micros=500))
+        task_metrics = metrics.stop()
+
+        self.assertEqual(task_metrics['mongo_operations'], 2)
+        self.assertAlmostEqual(task_metrics['mongo_time'], 0.002)
@@ -1,6 +1,9 @@
 from cStringIO import StringIO
 import hashlib
+import os
 import shutil
+import stat
+import tempfile
 
 from mock import Mock, patch, call
 
@@ -255,3 +258,110 @@ class TestCalculateChecksums(unittest.TestCase):
 
         self.assertEqual(ret['sha256'], self.sha256_sum)
         self.assertTrue(len(ret), 1)
+
+
+class TestChecksumStream(unittest.TestCase):
+    def setUp(self):
+        super(TestChecksumStream, self).setUp()
+        self.sha1_sum = 'd22a158c8ead99dbd7eddb86104496f3ee087049'
+        self.sha256_sum = '5fb2054478353fd8d514056d1745b3a9eef066deadda4b90967af7ca65ce6505'
+
+    def test_invalid_type(self):
+        self.assertRaises(util.InvalidChecksumType, util.ChecksumStream, StringIO(), ['sha0'])
+
+    def test_write(self):
+        destination = StringIO()
+        stream = util.ChecksumStream(destination, ['sha1', 'sha256'])
+
+        stream.write('some')
+        stream.write('text')
+
+        self.assertEqual(destination.getvalue(), 'sometext')
+        self.assertEqual(stream.hexdigests(), {'sha1': self.sha1_sum, 'sha256': self.sha256_sum})
+
+    def test_read(self):
+        stream = util.ChecksumStream(StringIO('sometext'), ['sha256'])
+
+        self.assertEqual(stream.read(4), 'some')
+        self.assertEqual(stream.read(), 'text')
+
+        self.assertEqual(stream.hexdigests(), {'sha256': self.sha256_sum})
+
+    def test_wrapped_attributes(self):
+        source = StringIO('sometext')
+        stream = util.ChecksumStream(source, ['sha256'])
+
+        stream.close()
+
+        self.assertTrue(source.closed)
+
+
+class TestCalculateFileChecksums(unittest.TestCase):
+    def setUp(self):
+        super(TestCalculateFileChecksums, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'file')
+        self.sha1_sum = 'd22a158c8ead99dbd7eddb86104496f3ee087049'
+        self.sha256_sum = '5fb2054478353fd8d514056d1745b3a9eef066deadda4b90967af7ca65ce6505'
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, data):
+        with open(self.path, 'w') as fp:
+            fp.write(data)
+
+    def test_with_data(self):
+        self.write('sometext')
+
+        ret = util.calculate_file_checksums(self.path, ['sha1', 'sha256'])
+
+        self.assertEqual(ret, {'sha1': self.sha1_sum, 'sha256': self.sha256_sum})
+
+    @patch('pulp.server.util.CHECKSUM_CHUNK_SIZE', 3)
+    def test_chunks(self):
+        self.write('sometext')
+
+        ret = util.calculate_file_checksums(self.path, ['sha256'])
+
+        self.assertEqual(ret, {'sha256': self.sha256_sum})
+
+    def test_empty(self):
+        self.write('')
+
+        ret = util.calculate_file_checksums(self.path, ['sha256'])
+
+        self.assertEqual(ret, {'sha256': hashlib.sha256().hexdigest()})
+
+    def test_missing(self):
+        self.assertRaises(IOError, util.calculate_file_checksums, self.path, ['sha256'])
+
+    def test_invalid_type(self):
+        self.write('sometext')
+
+        self.assertRaises(util.InvalidChecksumType, util.calculate_file_checksums, self.path,
+                          ['sha0'])
+
+
+class TestCopyWithChecksums(unittest.TestCase):
+    def setUp(self):
+        super(TestCopyWithChecksums, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_copy(self):
+        source = os.path.join(self.tmp_dir, 'source')
+        destination = os.path.join(self.tmp_dir, 'destination')
+        with open(source, 'w') as fp:
+            fp.write('sometext')
+        os.chmod(source, stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR)
+
+        ret = util.copy_with_checksums(source, destination, ['sha256'])
+
+        self.assertEqual(
+            ret, {'sha256': '5fb2054478353fd8d514056d1745b3a9eef066deadda4b90967af7ca65ce6505'})
+        with open(destination) as fp:
+            self.assertEqual(fp.read(), 'sometext')
+        self.assertEqual(os.stat(destination).st_mode, os.stat(source).st_mode)
@@ -0,0 +1,58 @@
+import json
+import unittest
+
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+import mock
+
+from pulp.server.webservices.middleware import exception
+from pulp.server.webservices.views import util
+
+
+class TestExceptionHandlerMiddlewareStreaming(unittest.TestCase):
+    """
+    Tests for the handling of exceptions raised while a streaming response is written.
+    """
+
+    def setUp(self):
+        self.middleware = exception.ExceptionHandlerMiddleware()
+        self.request = RequestFactory().get('/v2/repositories/', {'details': 'true'})
+
+    def test_not_streaming(self):
+        """
+        Test that a non-streaming response is returned unchanged.
+        """
+        response = HttpResponse('body')
+        ret = self.middleware.process_response(self.request, response)
+        self.assertTrue(ret is response)
+        self.assertEqual(ret.content, 'body')
+
+    @mock.patch('pulp.server.webservices.middleware.exception.logger')
+    def test_streaming(self, mock_logger):
+        """
+        Test that a streaming response is passed through when nothing fails.
+        """
+        response = util.generate_streaming_json_response(iter(['foo', 'bar']))
+        ret = self.middleware.process_response(self.request, response)
+        self.assertTrue(ret is response)
+        self.assertEqual(json.loads(''.join(ret.streaming_content)), ['foo', 'bar'])
+        self.assertFalse(mock_logger.exception.called)
+
+    @mock.patch('pulp.server.webservices.middleware.exception.logger')
+    def test_streaming_failure(self, mock_logger):
+        """
+        Test that a failure part way through a streaming response is logged with the request,
+        and the client receives the truncated, invalid JSON written until then.
+        """
+        def items():
+            yield 'foo'
+            raise ValueError('cursor died')
+
+        response = util.generate_streaming_json_response(items())
+        ret = self.middleware.process_response(self.request, response)
+        content = ''.join(ret.streaming_content)
+
+        self.assertEqual(content, '["foo"')
+        self.assertRaises(ValueError, json.loads, content)
+        mock_logger.exception.assert_called_once_with(
+            'Streaming the response to GET /v2/repositories/?details=true failed.')
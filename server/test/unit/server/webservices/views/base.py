@@ -1,6 +1,14 @@
+import mock
+
 from pulp.server.auth import authorization
 
 
+# Patches the conditional_get decorator so that the views it wraps run unconditionally, for tests
+# of views that use mock requests. Conditional requests are covered by test_decorators.
+unconditional = mock.patch('pulp.server.webservices.views.decorators.condition',
+                           new=lambda **kwargs: lambda view: view)
+
+
 def _assert_auth_decorator_general(required_operation):
     """
     Returns a method that asserts a future call to the returned method uses
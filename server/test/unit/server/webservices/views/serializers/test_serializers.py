@@ -1,8 +1,12 @@
+from datetime import datetime
+
 from bson.objectid import ObjectId
 import mock
 
+from pulp.common import dateutils
 from pulp.common.compat import unittest
 from pulp.server import exceptions
+from pulp.server.db import model
 from pulp.server.webservices.views import serializers
 
 
@@ -257,6 +261,106 @@ class TestDictSerializer(unittest.TestCase):
 
         self.assertDictEqual(instance_value, result)
 
+    def test_nested_fields_not_modified(self):
+        """
+        Ensure that masking and excluding nested fields does not modify the original value.
+        """
+        class TestSerializer(serializers.DictSerializer):
+            class Meta:
+                mask_fields = ['config__password']
+                exclude_fields = ['config__secret']
+
+        instance_value = {'config': {'password': 'pear', 'secret': 'apple', 'color': 'red'}}
+
+        result = TestSerializer(instance_value).data
+
+        self.assertEqual(result, {'config': {'password': '*****', 'color': 'red'}})
+        self.assertEqual(instance_value,
+                         {'config': {'password': 'pear', 'secret': 'apple', 'color': 'red'}})
+
+
+class TestFromPymongo(unittest.TestCase):
+    """
+    Tests for reading raw documents with from_pymongo.
+    """
+
+    def test_values(self):
+        """
+        Ensure that fields are keyed by name, converted where needed and given their defaults.
+        """
+        _id = ObjectId()
+        last_unit_added = datetime(2016, 1, 1, 12)
+        raw = {'_id': _id, 'repo_id': 'zoo', 'notes': {'a': 'b'},
+               'last_unit_added': last_unit_added}
+
+        document, = serializers.from_pymongo(model.Repository, [raw])
+
+        self.assertTrue(isinstance(document, serializers.RawDocument))
+        self.assertEqual(document['id'], _id)
+        self.assertEqual(document.repo_id, 'zoo')
+        self.assertEqual(document['notes'], {'a': 'b'})
+        self.assertEqual(document['scratchpad'], {})
+        self.assertEqual(document['display_name'], None)
+        self.assertEqual(document['_ns'], 'repos')
+        self.assertEqual(document['last_unit_added'],
+                         last_unit_added.replace(tzinfo=dateutils.utc_tz()))
+        self.assertRaises(AttributeError, getattr, document, 'missing')
+
+    def test_callable_default(self):
+        """
+        Ensure that callable defaults are called for each document.
+        """
+        first, second = serializers.from_pymongo(model.LazyCatalogEntry, [{}, {}])
+        self.assertEqual(first['data'], {})
+        self.assertFalse(first['data'] is second['data'])
+
+
+class TestModelSerializerRawDocument(unittest.TestCase):
+    """
+    Tests for serializing RawDocuments with ModelSerializer.
+    """
+
+    @mock.patch('pulp.server.webservices.views.serializers.reverse')
+    def test_raw_document_same_as_document(self, m_reverse):
+        """
+        Ensure that a RawDocument is serialized the same way as the Document it was read for.
+        """
+        _id = ObjectId()
+        raw = {'_id': _id, 'repo_id': 'zoo', 'display_name': 'Zoo', 'notes': {'a': 'b'},
+               'content_unit_counts': {'rpm': 3}}
+        document = model.Repository(id=_id, repo_id='zoo', display_name='Zoo',
+                                    notes={'a': 'b'}, content_unit_counts={'rpm': 3})
+
+        raw_document, = serializers.from_pymongo(model.Repository, [raw])
+
+        self.assertEqual(model.Repository.SERIALIZER(raw_document).data,
+                         model.Repository.SERIALIZER(document).data)
+        m_reverse.assert_called_with('repo_resource', kwargs={'repo_id': 'zoo'})
+
+    def test_remapping_plan_cached(self):
+        """
+        Ensure that the remapping of fields is computed once for each serializer and model.
+        """
+        serializer = serializers.Distributor()
+        plan = serializer._remapping_plan(model.Distributor)
+        self.assertTrue(('distributor_id', 'id') in plan)
+        self.assertTrue(('id', '_id') in plan)
+        self.assertTrue(serializers.Distributor()._remapping_plan(model.Distributor) is plan)
+
+    def test_mask_nested_field_of_raw_document(self):
+        """
+        Ensure that masking a nested field does not modify the document being serialized.
+        """
+        raw = {'repo_id': 'zoo', 'importer_type_id': 'rpm', 'config': {'proxy_password': 'pear'}}
+        document, = serializers.from_pymongo(model.Importer, [raw])
+
+        with mock.patch('pulp.server.webservices.views.serializers.reverse'):
+            result = model.Importer.SERIALIZER(document).data
+
+        self.assertEqual(result['config'], {'proxy_password': '*****'})
+        self.assertEqual(result['id'], 'rpm')
+        self.assertEqual(document['config'], {'proxy_password': 'pear'})
+
 
 class TestImporterSerializer(unittest.TestCase):
 
@@ -4,7 +4,8 @@ import unittest
 import mock
 from django.http import HttpResponseBadRequest
 
-from base import assert_auth_CREATE, assert_auth_DELETE, assert_auth_READ, assert_auth_UPDATE
+from base import (assert_auth_CREATE, assert_auth_DELETE, assert_auth_READ, assert_auth_UPDATE,
+                  unconditional)
 from pulp.server.exceptions import (InvalidValue, MissingResource, MissingValue,
                                     OperationPostponed, UnsupportedValue)
 from pulp.server.managers.consumer import bind
@@ -52,6 +53,7 @@ class Test_expand_consumers(unittest.TestCase):
         self.assertEqual(cons, expected_cons)
 
 
+@unconditional
 class TestConsumersView(unittest.TestCase):
     """
     Test consumers view.
@@ -249,6 +251,7 @@ class TestConsumersView(unittest.TestCase):
         self.assertEqual(response.error_data['property_names'], ['id'])
 
 
+@unconditional
 class TestConsumerResourceView(unittest.TestCase):
     """
     Test consumer resource view.
@@ -1030,10 +1033,11 @@ class TestConsumerProfilesView(unittest.TestCase):
         mock_profile.return_value.create.return_value = resp
 
         request = mock.MagicMock()
-        request.body = json.dumps({'content_type': 'rpm', 'profile': []})
+        request.body = json.dumps({'content_type': 'rpm', 'profile': [], 'upload_hash': 'abc'})
         consumer_profiles = ConsumerProfilesView()
         response = consumer_profiles.post(request, 'test-consumer')
 
+        mock_profile.return_value.create.assert_called_once_with('test-consumer', 'rpm', [], 'abc')
         expected_cont = {'consumer_id': 'test-consumer', 'some_profile': [],
                          '_href': '/v2/consumers/test-consumer/profiles/rpm/',
                          'content_type': 'rpm'}
@@ -1122,6 +1126,8 @@ class TestConsumerProfileResourceView(unittest.TestCase):
         consumer_profile = ConsumerProfileResourceView()
         response = consumer_profile.put(request, 'test-consumer', 'rpm')
 
+        mock_profile.return_value.update.assert_called_once_with('test-consumer', 'rpm', None,
+                                                                 None)
         expected_cont = {'consumer_id': 'test-consumer', 'some_profile': ['new_info'],
                          '_href': '/v2/consumers/test-consumer/profiles/rpm/',
                          'content_type': 'rpm'}
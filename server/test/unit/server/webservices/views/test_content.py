@@ -5,7 +5,8 @@ import unittest
 
 from django.http import HttpResponseBadRequest, HttpResponseNotFound
 
-from base import assert_auth_CREATE, assert_auth_DELETE, assert_auth_READ, assert_auth_UPDATE
+from base import (assert_auth_CREATE, assert_auth_DELETE, assert_auth_READ, assert_auth_UPDATE,
+                  unconditional)
 from pulp.server import constants
 from pulp.server.exceptions import InvalidValue, MissingResource, OperationPostponed
 from pulp.server.webservices.views.content import (
@@ -393,6 +394,7 @@ class TestContentUnitSearch(unittest.TestCase):
         mock_add_repo.assert_called_once_with([mock_process(), mock_process()], 'mock_type')
 
 
+@unconditional
 class TestContentUnitResourceView(unittest.TestCase):
     """
     Tests for views of a single content unit.
@@ -484,6 +486,7 @@ class TestContentUnitsCollectionView(unittest.TestCase):
         self.assertTrue(response is mock_resp.return_value)
 
 
+@unconditional
 class TestContentUnitUserMetadataResourceView(unittest.TestCase):
     """
     Tests for ContentUnitUserMetadataResourceView.
@@ -1,11 +1,17 @@
 """
 This module contains tests for the pulp.server.webservices.views.decorators module.
 """
+from datetime import datetime
+import unittest
+
+from django.http import HttpResponse
+from django.test.client import RequestFactory
 import mock
 
 from .... import base
 from pulp.server.exceptions import PulpCodedAuthenticationException
 from pulp.server.webservices.views import decorators
+from pulp.server.webservices.views.util import StreamingHttpResponse
 
 
 class TestAuthenticationMethods(base.PulpServerTests):
@@ -144,3 +150,96 @@ class TestAuthenticationMethods(base.PulpServerTests):
         decorated_func = decorators.auth_required(0, False)(self.func)
         self.assertRaises(PulpCodedAuthenticationException, decorated_func, None)
         self.assertEqual(1, mock_is_authorized.call_count)
+
+
+class TestConditionalGet(unittest.TestCase):
+
+    def setUp(self):
+        self.view = mock.MagicMock(return_value=HttpResponse('body'))
+        self.etag_func = mock.MagicMock(return_value='tag')
+        self.last_modified_func = mock.MagicMock(return_value=datetime(2016, 1, 1, 12))
+        view = self.view
+
+        class FakeView(object):
+            @decorators.conditional_get(etag_func=self.etag_func,
+                                        last_modified_func=self.last_modified_func)
+            def get(self, request, resource_id):
+                return view(self, request, resource_id)
+
+        self.fake_view = FakeView()
+
+    def test_unconditional(self):
+        request = RequestFactory().get('/')
+
+        response = self.fake_view.get(request, 'a')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"tag"')
+        self.assertEqual(response['Last-Modified'], 'Fri, 01 Jan 2016 12:00:00 GMT')
+        self.view.assert_called_once_with(self.fake_view, request, 'a')
+        self.etag_func.assert_called_once_with(request, 'a')
+        self.last_modified_func.assert_called_once_with(request, 'a')
+
+    def test_unconditional_streamed(self):
+        self.view.return_value = StreamingHttpResponse(['body'])
+        request = RequestFactory().get('/')
+
+        response = self.fake_view.get(request, 'a')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"tag"')
+
+    def test_etag_matches(self):
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH='"tag"')
+
+        response = self.fake_view.get(request, 'a')
+
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(self.view.called)
+
+    def test_etag_differs(self):
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH='"other"')
+
+        response = self.fake_view.get(request, 'a')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.view.called)
+        self.assertEqual(response['ETag'], '"tag"')
+        self.etag_func.assert_called_once_with(request, 'a')
+
+    def test_unconditional_etag_matches(self):
+        unconditional = self.fake_view.get(RequestFactory().get('/'), 'a')
+        self.view.reset_mock()
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH=unconditional['ETag'])
+
+        response = self.fake_view.get(request, 'a')
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], unconditional['ETag'])
+        self.assertFalse(self.view.called)
+
+    def test_not_modified_since(self):
+        request = RequestFactory().get('/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2016 12:00:00 GMT')
+
+        response = self.fake_view.get(request, 'a')
+
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(self.view.called)
+
+    def test_modified_since(self):
+        request = RequestFactory().get('/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2016 11:59:59 GMT')
+
+        response = self.fake_view.get(request, 'a')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.view.called)
+
+    def test_missing_resource(self):
+        self.etag_func.return_value = None
+        self.last_modified_func.return_value = None
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH='*')
+
+        response = self.fake_view.get(request, 'a')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
@@ -6,7 +6,7 @@ import mock
 
 from base import (
     assert_auth_CREATE, assert_auth_DELETE, assert_auth_EXECUTE, assert_auth_READ,
-    assert_auth_UPDATE
+    assert_auth_UPDATE, unconditional
 )
 from pulp.common import constants, error_codes
 from pulp.common.compat import unittest
@@ -30,7 +30,9 @@ class TestMergeRelatedObjects(unittest.TestCase):
     Tests for merge related objects
     """
 
-    def test_merge_as_expected(self, m_model):
+    @mock.patch('pulp.server.webservices.views.repositories.serializers.from_pymongo',
+                side_effect=lambda model, documents: documents)
+    def test_merge_as_expected(self, m_from_pymongo, m_model):
         """
         Test that objects are included in the appropriate repositories.
         """
@@ -48,7 +50,7 @@ class TestMergeRelatedObjects(unittest.TestCase):
                           {'repo_id': 'mock1', 'id': 'mock_importer2'},
                           {'repo_id': 'mock2', 'id': 'mock_importer2'}]
 
-        m_model.Importer.objects.return_value = mock_importers
+        m_model.Importer.objects.return_value.as_pymongo.return_value = mock_importers
         m_model.Importer.SERIALIZER = mock_serializer
 
         # If this is available, it will be used. Removed after https://pulp.plan.io/issues/780
@@ -65,14 +67,16 @@ class TestMergeRelatedObjects(unittest.TestCase):
         self.assertEqual(mock1_importers, mock1_expected_importers)
         self.assertEqual(mock2_importers, mock2_expected_importers)
 
-    def test_no_objects(self, m_model):
+    @mock.patch('pulp.server.webservices.views.repositories.serializers.from_pymongo',
+                side_effect=lambda model, documents: documents)
+    def test_no_objects(self, m_from_pymongo, m_model):
         """
         Test that merge happens correctly when there are no objects to merge.
         """
 
         mock_repos = [{'id': 'mock1'}, {'id': 'mock2'}]
 
-        m_model.Importer.objects.return_value = []
+        m_model.Importer.objects.return_value.as_pymongo.return_value = []
         repositories._merge_related_objects('importers', m_model.Importer, mock_repos)
 
         self.assertTrue(len(mock_repos) == 2)
@@ -83,6 +87,30 @@ class TestMergeRelatedObjects(unittest.TestCase):
         self.assertEqual(mock2_importers, [])
 
 
+class TestReposEtag(unittest.TestCase):
+    """
+    Tests for the entity tag of repositories.
+    """
+
+    @mock.patch('pulp.server.webservices.views.repositories.documents_etag')
+    @mock.patch('pulp.server.webservices.views.repositories.model')
+    def test_deleted_repo_changes_tag(self, mock_model, mock_etag):
+        """
+        The markers of deleted repositories are part of the tag, so a repository is not served
+        from a client's cache once its deletion has been dispatched.
+        """
+        request = mock.MagicMock(GET={})
+
+        tag = repositories._repos_etag(request, 'm_repo')
+
+        self.assertTrue(tag is mock_etag.return_value)
+        queries = mock_etag.call_args[0][0]
+        self.assertEqual(queries, [
+            (mock_model.Repository._get_collection.return_value, {'repo_id': 'm_repo'}),
+            (mock_model.DeletedRepository._get_collection.return_value, {'_id': 'm_repo'})])
+
+
+@unconditional
 class TestReposView(unittest.TestCase):
     """
     Tests for ReposView.
@@ -120,41 +148,62 @@ class TestReposView(unittest.TestCase):
             mock.call('distributors', m_model.Distributor, mock_serial().data)
         ])
 
+    @mock.patch('pulp.server.webservices.views.repositories.search.STREAM_BATCH_SIZE', 2)
+    @mock.patch('pulp.server.webservices.views.repositories._process_repos')
+    def test__iter_process_repos(self, mock_process):
+        """
+        Test that _iter_process_repos processes the repos in batches.
+        """
+        mock_process.side_effect = lambda repos, *args: [r.upper() for r in repos]
+        processed = repositories._iter_process_repos(iter(['a', 'b', 'c']), True, False, True)
+        self.assertEqual(list(processed), ['A', 'B', 'C'])
+        self.assertEqual(mock_process.mock_calls, [mock.call(('a', 'b'), True, False, True),
+                                                   mock.call(('c',), True, False, True)])
+
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_READ())
     @mock.patch(
-        'pulp.server.webservices.views.repositories.generate_json_response_with_pulp_encoder')
+        'pulp.server.webservices.views.repositories.'
+        'generate_streaming_json_response_with_pulp_encoder')
     @mock.patch('pulp.server.webservices.views.repositories.serializers.Repository')
-    @mock.patch('pulp.server.webservices.views.repositories._process_repos')
+    @mock.patch('pulp.server.webservices.views.repositories._iter_process_repos')
     @mock.patch('pulp.server.webservices.views.repositories.model')
-    def test_get_repos_no_options(self, mock_model, mock_process, mock_serial, mock_resp):
+    @mock.patch('pulp.server.webservices.views.repositories.serializers.from_pymongo',
+                side_effect=lambda model, documents: documents)
+    def test_get_repos_no_options(self, m_from_pymongo, mock_model, mock_process, mock_serial,
+                                  mock_resp):
         """
         Get repos without passing options.
         """
 
         mock_repos = [{'mock_repo_1': 'somedata'}, {'mock_repo_2': 'moredata'}]
-        mock_model.Repository.objects.return_value = mock_repos
+        m_repo_qs = mock_model.Repository.objects.exclude_deleted.return_value
+        m_repo_qs.as_pymongo.return_value = mock_repos
         mock_request = mock.MagicMock()
         mock_request.GET = {}
         repos_view = ReposView()
         response = repos_view.get(mock_request)
-        mock_process.assert_called_once_with(mock_model.Repository.objects(), False, False, False)
+        m_from_pymongo.assert_called_once_with(mock_model.Repository, mock_repos)
+        mock_process.assert_called_once_with(mock_repos, False, False, False)
         mock_resp.assert_called_once_with(mock_process.return_value)
         self.assertTrue(response is mock_resp.return_value)
 
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_READ())
     @mock.patch(
-        'pulp.server.webservices.views.repositories.generate_json_response_with_pulp_encoder')
-    @mock.patch('pulp.server.webservices.views.repositories._process_repos')
+        'pulp.server.webservices.views.repositories.'
+        'generate_streaming_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.repositories._iter_process_repos')
     @mock.patch('pulp.server.webservices.views.repositories.model.Repository.objects')
-    def test_get_repos_with_details(self, mock_repo_qs, mock_process, mock_resp):
+    @mock.patch('pulp.server.webservices.views.repositories.serializers.from_pymongo',
+                side_effect=lambda model, documents: documents)
+    def test_get_repos_with_details(self, m_from_pymongo, mock_repo_qs, mock_process, mock_resp):
         """
         Get repos with the details shortcut.
         """
 
         mock_repos = [{'mock_repo_1': 'somedata'}, {'mock_repo_2': 'moredata'}]
-        mock_repo_qs.return_value = mock_repos
+        mock_repo_qs.exclude_deleted.return_value.as_pymongo.return_value = mock_repos
         mock_request = mock.MagicMock()
         mock_request.GET = http.QueryDict('details=True')
         repos_view = ReposView()
@@ -164,10 +213,13 @@ class TestReposView(unittest.TestCase):
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_READ())
     @mock.patch(
-        'pulp.server.webservices.views.repositories.generate_json_response_with_pulp_encoder')
-    @mock.patch('pulp.server.webservices.views.repositories._process_repos')
+        'pulp.server.webservices.views.repositories.'
+        'generate_streaming_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.repositories._iter_process_repos')
     @mock.patch('pulp.server.webservices.views.repositories.model.Repository.objects')
-    def test_get_repos_with_false(self, mock_repo_qs, mock_process, mock_resp):
+    @mock.patch('pulp.server.webservices.views.repositories.serializers.from_pymongo',
+                side_effect=lambda model, documents: documents)
+    def test_get_repos_with_false(self, m_from_pymongo, mock_repo_qs, mock_process, mock_resp):
         """
         Get repos with by passing an optional get parameter 'details=false'
 
@@ -176,7 +228,7 @@ class TestReposView(unittest.TestCase):
         """
 
         mock_repos = [{'mock_repo_1': 'somedata'}, {'mock_repo_2': 'moredata'}]
-        mock_repo_qs.return_value = mock_repos
+        mock_repo_qs.exclude_deleted.return_value.as_pymongo.return_value = mock_repos
         mock_request = mock.MagicMock()
         mock_request.GET = http.QueryDict('details=False')
         repos_view = ReposView()
@@ -187,16 +239,20 @@ class TestReposView(unittest.TestCase):
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_READ())
     @mock.patch(
-        'pulp.server.webservices.views.repositories.generate_json_response_with_pulp_encoder')
-    @mock.patch('pulp.server.webservices.views.repositories._process_repos')
+        'pulp.server.webservices.views.repositories.'
+        'generate_streaming_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.repositories._iter_process_repos')
     @mock.patch('pulp.server.webservices.views.repositories.model.Repository.objects')
-    def test_get_repos_with_lowercase_boolean(self, mock_repo_qs, mock_process, mock_resp):
+    @mock.patch('pulp.server.webservices.views.repositories.serializers.from_pymongo',
+                side_effect=lambda model, documents: documents)
+    def test_get_repos_with_lowercase_boolean(self, m_from_pymongo, mock_repo_qs,
+                                              mock_process, mock_resp):
         """
         Get repos with lowercase true as a get parameter.
         """
 
         mock_repos = [{'mock_repo_1': 'somedata'}, {'mock_repo_2': 'moredata'}]
-        mock_repo_qs.return_value = mock_repos
+        mock_repo_qs.exclude_deleted.return_value.as_pymongo.return_value = mock_repos
         mock_request = mock.MagicMock()
         mock_request.GET = http.QueryDict('details=true')
         repos_view = ReposView()
@@ -206,16 +262,20 @@ class TestReposView(unittest.TestCase):
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_READ())
     @mock.patch(
-        'pulp.server.webservices.views.repositories.generate_json_response_with_pulp_encoder')
-    @mock.patch('pulp.server.webservices.views.repositories._process_repos')
+        'pulp.server.webservices.views.repositories.'
+        'generate_streaming_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.repositories._iter_process_repos')
     @mock.patch('pulp.server.webservices.views.repositories.model.Repository.objects')
-    def test_get_repos_with_invalid_boolean(self, mock_repo_qs, mock_process, mock_resp):
+    @mock.patch('pulp.server.webservices.views.repositories.serializers.from_pymongo',
+                side_effect=lambda model, documents: documents)
+    def test_get_repos_with_invalid_boolean(self, m_from_pymongo, mock_repo_qs,
+                                            mock_process, mock_resp):
         """
         Get repos with invalid details get parameter, default to False
         """
 
         mock_repos = [{'mock_repo_1': 'somedata'}, {'mock_repo_2': 'moredata'}]
-        mock_repo_qs.return_value = mock_repos
+        mock_repo_qs.exclude_deleted.return_value.as_pymongo.return_value = mock_repos
         mock_request = mock.MagicMock()
         mock_request.GET = {'details': 'yes'}
         repos_view = ReposView()
@@ -226,16 +286,19 @@ class TestReposView(unittest.TestCase):
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_READ())
     @mock.patch(
-        'pulp.server.webservices.views.repositories.generate_json_response_with_pulp_encoder')
-    @mock.patch('pulp.server.webservices.views.repositories._process_repos')
+        'pulp.server.webservices.views.repositories.'
+        'generate_streaming_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.repositories._iter_process_repos')
     @mock.patch('pulp.server.webservices.views.repositories.model.Repository.objects')
-    def test_get_repos_with_importers(self, mock_repo_qs, mock_process, mock_resp):
+    @mock.patch('pulp.server.webservices.views.repositories.serializers.from_pymongo',
+                side_effect=lambda model, documents: documents)
+    def test_get_repos_with_importers(self, m_from_pymongo, mock_repo_qs, mock_process, mock_resp):
         """
         Get repos with importer information.
         """
 
         mock_repos = [{'mock_repo_1': 'somedata'}, {'mock_repo_2': 'moredata'}]
-        mock_repo_qs.return_value = mock_repos
+        mock_repo_qs.exclude_deleted.return_value.as_pymongo.return_value = mock_repos
         mock_request = mock.MagicMock()
         mock_request.GET = http.QueryDict('importers=True')
         repos_view = ReposView()
@@ -245,16 +308,20 @@ class TestReposView(unittest.TestCase):
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_READ())
     @mock.patch(
-        'pulp.server.webservices.views.repositories.generate_json_response_with_pulp_encoder')
-    @mock.patch('pulp.server.webservices.views.repositories._process_repos')
+        'pulp.server.webservices.views.repositories.'
+        'generate_streaming_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.repositories._iter_process_repos')
     @mock.patch('pulp.server.webservices.views.repositories.model.Repository.objects')
-    def test_get_repos_with_distributors(self, mock_repo_qs, mock_process, mock_resp):
+    @mock.patch('pulp.server.webservices.views.repositories.serializers.from_pymongo',
+                side_effect=lambda model, documents: documents)
+    def test_get_repos_with_distributors(self, m_from_pymongo, mock_repo_qs,
+                                         mock_process, mock_resp):
         """
         Get repos with distributor information.
         """
 
         mock_repos = [{'mock_repo_1': 'somedata'}, {'mock_repo_2': 'moredata'}]
-        mock_repo_qs.return_value = mock_repos
+        mock_repo_qs.exclude_deleted.return_value.as_pymongo.return_value = mock_repos
         mock_request = mock.MagicMock()
         mock_request.GET = http.QueryDict('distributors=True')
         repos_view = ReposView()
@@ -324,6 +391,7 @@ class TestReposView(unittest.TestCase):
         self.assertTrue(response is mock_redir.return_value)
 
 
+@unconditional
 class TestRepoResourceView(unittest.TestCase):
     """
     Tests for RepoResoureceView.
@@ -662,6 +730,25 @@ class TestRepoSearch(unittest.TestCase):
         self.assertEqual(content, mock_process.return_value)
         mock_process.assert_called_once_with([], 'mock_deets', 'mock_imp', 'mock_dist')
 
+    @mock.patch('pulp.server.webservices.views.repositories.search._trim_results')
+    @mock.patch('pulp.server.webservices.views.repositories._iter_process_repos')
+    def test_iter_results(self, mock_process, mock_trim):
+        """
+        Test that optional arguments and the data are properly passed to _iter_process_repos.
+        """
+        mock_process.return_value = iter([{'id': 'repo1'}, {'id': 'repo2'}])
+        mock_search = mock.MagicMock(return_value=[])
+        options = {'details': 'mock_deets', 'importers': 'mock_imp', 'distributors': 'mock_dist'}
+        query = {'fields': ['display_name']}
+        content = list(RepoSearch.iter_results(query, mock_search, options))
+        self.assertEqual(content, [{'id': 'repo1'}, {'id': 'repo2'}])
+        mock_process.assert_called_once_with([], 'mock_deets', 'mock_imp', 'mock_dist')
+        mock_trim.assert_has_calls([
+            mock.call(model.Repository, [{'id': 'repo1'}],
+                      ['display_name', 'importers', 'distributors']),
+            mock.call(model.Repository, [{'id': 'repo2'}],
+                      ['display_name', 'importers', 'distributors'])])
+
 
 class TestRepoUnitSearch(unittest.TestCase):
     """
@@ -669,7 +756,8 @@ class TestRepoUnitSearch(unittest.TestCase):
     """
 
     @mock.patch(
-        'pulp.server.webservices.views.repositories.generate_json_response_with_pulp_encoder')
+        'pulp.server.webservices.views.repositories.'
+        'generate_streaming_json_response_with_pulp_encoder')
     @mock.patch('pulp.server.webservices.views.repositories.manager_factory.'
                 'repo_unit_association_query_manager')
     @mock.patch('pulp.server.webservices.views.repositories.UnitAssociationCriteria')
@@ -685,11 +773,12 @@ class TestRepoUnitSearch(unittest.TestCase):
         repo_unit_search._generate_response('mock_q', {}, repo_id='mock_repo')
         mock_crit.from_client_input.assert_called_once_with('mock_q')
         mock_uqm().get_units_by_type.assert_called_once_with('mock_repo', 'one_type',
-                                                             criteria=criteria)
-        mock_resp.assert_called_once_with(mock_uqm().get_units_by_type.return_value)
+                                                             criteria=criteria, as_generator=True)
+        self.assertEqual(list(mock_resp.call_args[0][0]), [])
 
     @mock.patch(
-        'pulp.server.webservices.views.repositories.generate_json_response_with_pulp_encoder')
+        'pulp.server.webservices.views.repositories.'
+        'generate_streaming_json_response_with_pulp_encoder')
     @mock.patch('pulp.server.webservices.views.repositories.manager_factory.'
                 'repo_unit_association_query_manager')
     @mock.patch('pulp.server.webservices.views.repositories.UnitAssociationCriteria')
@@ -704,8 +793,19 @@ class TestRepoUnitSearch(unittest.TestCase):
         repo_unit_search = RepoUnitSearch()
         repo_unit_search._generate_response('mock_q', {}, repo_id='mock_repo')
         mock_crit.from_client_input.assert_called_once_with('mock_q')
-        mock_uqm().get_units.assert_called_once_with('mock_repo', criteria=criteria)
-        mock_resp.assert_called_once_with(mock_uqm().get_units.return_value)
+        mock_uqm().get_units.assert_called_once_with('mock_repo', criteria=criteria,
+                                                     as_generator=True)
+        self.assertEqual(list(mock_resp.call_args[0][0]), [])
+
+    @mock.patch('pulp.server.webservices.views.repositories.content')
+    def test__remap_units(self, mock_content):
+        """
+        Test that the metadata of each unit is remapped as the units are read.
+        """
+        units = [{'metadata': 'm1'}, {'metadata': 'm2'}]
+        self.assertEqual(list(repositories._remap_units(iter(units))), units)
+        self.assertEqual(mock_content.remap_fields_with_serializer.mock_calls,
+                         [mock.call('m1'), mock.call('m2')])
 
 
 class TestRepoImportersView(unittest.TestCase):
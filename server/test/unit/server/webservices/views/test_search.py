@@ -1,14 +1,17 @@
 """
 This module contains tests for the pulp.server.webservices.views.search module.
 """
+import json
+
 import mock
 from django import http
+from mongoengine.queryset.base import BaseQuerySet
 from pymongo.errors import OperationFailure
 
 from base import assert_auth_READ
 from pulp.common.compat import unittest
 from pulp.server import exceptions
-from pulp.server.webservices.views import search
+from pulp.server.webservices.views import search, util
 
 
 class TestSearchView(unittest.TestCase):
@@ -322,6 +325,93 @@ class TestSearchView(unittest.TestCase):
         FakeSearchView.model.objects.find_by_criteria.side_effect = OperationFailure('dang')
         self.assertRaises(exceptions.InvalidValue, FakeSearchView._generate_response, query, {})
 
+    def test__generate_response_streaming(self):
+        """
+        Test that a streaming SearchView streams the serialized results.
+        """
+        class FakeSearchView(search.SearchView):
+            model = mock.MagicMock()
+            serializer = mock.MagicMock(side_effect=['biggest money', 'unreal money'])
+            streaming = True
+
+        query = {'filters': {'money': {'$gt': 1000000}}}
+        FakeSearchView.model.objects.find_by_criteria.return_value = ['big money', 'bigger money']
+
+        results = FakeSearchView._generate_response(query, {})
+
+        self.assertEqual(type(results), util.StreamingHttpResponse)
+        self.assertEqual(''.join(results.streaming_content), '["biggest money", "unreal money"]')
+        self.assertEqual(results.status_code, 200)
+
+    def test__generate_response_streaming_with_invalid_criteria(self):
+        """
+        Test that a pymongo exception is raised before a streaming response is returned.
+        """
+        class FakeSearchView(search.SearchView):
+            model = mock.MagicMock()
+            streaming = True
+
+        def results(query):
+            raise OperationFailure('dang')
+            yield
+
+        query = {'filters': {'money': {'$gt': 1000000}}}
+        FakeSearchView.model.objects.find_by_criteria.side_effect = results
+        self.assertRaises(exceptions.InvalidValue, FakeSearchView._generate_response, query, {})
+
+    @mock.patch('pulp.server.webservices.views.search.STREAM_BATCH_SIZE', 2)
+    def test_iter_results_model_serializer(self):
+        """
+        Ensure that iter_results serializes the results in batches with the model serializer.
+        """
+        m_serial = mock.MagicMock()
+        m_serial.return_value.data = ['serialized']
+
+        class FakeSearchView(search.SearchView):
+            model = mock.MagicMock()
+            model.SERIALIZER = m_serial
+
+        m_method = mock.MagicMock(return_value=iter(['list', 'of', 'things']))
+
+        results = FakeSearchView.iter_results({'search': 'q'}, m_method, {})
+        self.assertEqual(list(results), ['serialized', 'serialized'])
+        self.assertEqual(m_serial.mock_calls[0], mock.call(['list', 'of'], multiple=True))
+        self.assertEqual(m_serial.mock_calls[1], mock.call(['things'], multiple=True))
+
+    @mock.patch('pulp.server.webservices.views.search.serializers.from_pymongo')
+    def test__search_raw_documents(self, m_from_pymongo):
+        """
+        Ensure that results to be serialized by the model's SERIALIZER are read as raw documents.
+        """
+        class FakeSearchView(search.SearchView):
+            model = mock.MagicMock()
+
+        queryset = mock.MagicMock(spec=BaseQuerySet)
+        m_method = mock.MagicMock(return_value=queryset)
+
+        results = FakeSearchView._search({'search': 'q'}, m_method)
+
+        self.assertTrue(results is m_from_pymongo.return_value)
+        m_from_pymongo.assert_called_once_with(FakeSearchView.model, queryset.as_pymongo())
+        m_method.assert_called_once_with({'search': 'q'})
+
+    @mock.patch('pulp.server.webservices.views.search.serializers.from_pymongo')
+    def test__search_custom_serializer(self, m_from_pymongo):
+        """
+        Ensure that results are not read as raw documents when there is a custom serializer.
+        """
+        class FakeSearchView(search.SearchView):
+            model = mock.MagicMock()
+            serializer = mock.MagicMock()
+
+        queryset = mock.MagicMock(spec=BaseQuerySet)
+        m_method = mock.MagicMock(return_value=queryset)
+
+        results = FakeSearchView._search({'search': 'q'}, m_method)
+
+        self.assertTrue(results is queryset)
+        self.assertFalse(m_from_pymongo.called)
+
     def test_get_results_serializer(self):
         """
         Ensure that if a class has an old style serializer, it is used.
@@ -373,6 +463,68 @@ class TestSearchView(unittest.TestCase):
         m_trim.assert_called_once_with(m_model, m_serial().data, ['f1', 'f2'])
 
 
+class TestRoutedResponse(unittest.TestCase):
+    """
+    Test the routing of the queries of search views to secondaries.
+    """
+
+    @mock.patch('pulp.server.webservices.views.search.connection.secondary_read_preference')
+    def test_routed(self, secondary_read_preference):
+        secondary_read_preference.return_value = 'secondary'
+
+        class FakeSearchView(search.SearchView):
+            model = mock.MagicMock()
+            del model.SERIALIZER
+            secondary_reads = True
+
+        def find_by_criteria(query):
+            return [search.connection.routed_read_preference('repos')]
+
+        FakeSearchView.model.objects.find_by_criteria.side_effect = find_by_criteria
+
+        response = FakeSearchView._routed_response({}, {})
+
+        self.assertEqual(response.content, '["secondary"]')
+        self.assertTrue(search.connection.routed_read_preference('repos') is None)
+
+    @mock.patch('pulp.server.webservices.views.search.connection.secondary_read_preference')
+    def test_not_routed(self, secondary_read_preference):
+        class FakeSearchView(search.SearchView):
+            model = mock.MagicMock()
+            del model.SERIALIZER
+
+        def find_by_criteria(query):
+            return [search.connection.routed_read_preference('repos')]
+
+        FakeSearchView.model.objects.find_by_criteria.side_effect = find_by_criteria
+
+        response = FakeSearchView._routed_response({}, {})
+
+        self.assertEqual(response.content, '[null]')
+
+    @mock.patch('pulp.server.webservices.views.search.connection.secondary_read_preference')
+    def test_routed_streaming(self, secondary_read_preference):
+        secondary_read_preference.return_value = 'secondary'
+
+        class FakeSearchView(search.SearchView):
+            model = mock.MagicMock()
+            del model.SERIALIZER
+            secondary_reads = True
+            streaming = True
+
+        def find_by_criteria(query):
+            # the queries made while the response is written are routed as well
+            for i in range(3):
+                yield search.connection.routed_read_preference('repos')
+
+        FakeSearchView.model.objects.find_by_criteria.side_effect = find_by_criteria
+
+        response = FakeSearchView._routed_response({}, {})
+
+        self.assertEqual(json.loads(''.join(response.streaming_content)),
+                         ['secondary', 'secondary', 'secondary'])
+
+
 class TestParseArgs(unittest.TestCase):
     class FakeSearchView(search.SearchView):
         optional_bool_fields = ('opt_bool',)
@@ -445,6 +597,33 @@ class TestParseArgs(unittest.TestCase):
         self.assertTrue(options['opt_bool'] is False)
 
 
+class TestStarted(unittest.TestCase):
+    """
+    Test the _started function.
+    """
+
+    def test_advances_to_first(self):
+        """
+        Ensure the first result is read immediately and that all results are returned.
+        """
+        consumed = []
+
+        def results():
+            for result in ('a', 'b', 'c'):
+                consumed.append(result)
+                yield result
+
+        started = search._started(results())
+        self.assertEqual(consumed, ['a'])
+        self.assertEqual(list(started), ['a', 'b', 'c'])
+
+    def test_empty(self):
+        """
+        Ensure that no results are handled.
+        """
+        self.assertEqual(list(search._started(iter([]))), [])
+
+
 class TestTrimResults(unittest.TestCase):
     """
     Tests the helper function for removing all non-required non-requested fields.
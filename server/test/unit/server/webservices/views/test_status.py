@@ -84,3 +84,40 @@ class TestStatusView(unittest.TestCase):
                          'versions': {"platform_version": '2.6.1'}}
         mock_resp.assert_called_once_with(expected_cont)
         self.assertTrue(response is mock_resp.return_value)
+
+    @mock.patch('pulp.server.webservices.views.status.generate_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.status.status_manager')
+    def test_get_server_status_task_metrics(self, mock_status, mock_resp):
+        """
+        Test server status with the task metrics histograms.
+        """
+        mock_status.get_version.return_value = {"platform_version": '2.6.1'}
+        mock_status.get_mongo_conn_status.return_value = {'connected': True}
+        mock_status.get_broker_conn_status.return_value = {'connected': True}
+        mock_status.get_workers.return_value = []
+
+        request = mock.MagicMock()
+        request.GET = {'task_metrics': 'true'}
+        status = StatusView()
+        status.get(request)
+
+        status_data = mock_resp.call_args[0][0]
+        self.assertTrue(status_data['task_metrics'] is mock_status.get_task_metrics.return_value)
+
+    @mock.patch('pulp.server.webservices.views.status.generate_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.status.status_manager')
+    def test_get_server_status_task_metrics_no_db_conn(self, mock_status, mock_resp):
+        """
+        Test that the task metrics are not aggregated without a connection to the db.
+        """
+        mock_status.get_version.return_value = {"platform_version": '2.6.1'}
+        mock_status.get_mongo_conn_status.return_value = {'connected': False}
+        mock_status.get_broker_conn_status.return_value = {'connected': True}
+
+        request = mock.MagicMock()
+        request.GET = {'task_metrics': 'true'}
+        status = StatusView()
+        status.get(request)
+
+        self.assertEqual(mock_resp.call_args[0][0]['task_metrics'], {})
+        self.assertFalse(mock_status.get_task_metrics.called)
@@ -5,7 +5,7 @@ import mock
 
 from mongoengine.queryset import DoesNotExist
 
-from .base import assert_auth_DELETE, assert_auth_READ
+from .base import assert_auth_DELETE, assert_auth_READ, unconditional
 from pulp.common.compat import unittest
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.db import model
@@ -50,6 +50,7 @@ class TestTaskSearchView(unittest.TestCase):
         self.assertEqual(TaskSearchView.serializer, task_serializer)
 
 
+@unconditional
 class TestTaskCollection(unittest.TestCase):
     """
     Tests for TaskCollectionView.
@@ -134,6 +135,7 @@ class TestTaskCollection(unittest.TestCase):
             task_collection.delete(mock_request)
 
 
+@unconditional
 class TestTaskResource(unittest.TestCase):
     """
     View for a single task.
@@ -36,14 +36,17 @@ class TestUsersView(unittest.TestCase):
                 new=assert_auth_READ())
     @mock.patch('pulp.server.webservices.views.users.generate_json_response_with_pulp_encoder')
     @mock.patch('pulp.server.webservices.views.users.model.User')
-    def test_get_users(self, mock_model, mock_resp):
+    @mock.patch('pulp.server.webservices.views.users.serializers.from_pymongo')
+    def test_get_users(self, m_from_pymongo, mock_model, mock_resp):
         """
         Test users retrieval.
         """
         request = mock.MagicMock()
         view = UsersView()
         response = view.get(request)
-        mock_model.SERIALIZER.assert_called_once_with(mock_model.objects.return_value,
+        m_from_pymongo.assert_called_once_with(mock_model,
+                                               mock_model.objects.return_value.as_pymongo())
+        mock_model.SERIALIZER.assert_called_once_with(m_from_pymongo.return_value,
                                                       multiple=True)
         mock_resp.assert_called_once_with(mock_model.SERIALIZER.return_value.data)
         self.assertTrue(response is mock_resp.return_value)
@@ -8,7 +8,7 @@ from pulp.common.compat import unittest
 from pulp.server.exceptions import InputEncodingError, PulpCodedValidationException
 from pulp.server.webservices.views import util
 from pulp.server.webservices.views.util import (parse_json_body, page_not_found,
-                                                pulp_json_encoder)
+                                                pulp_json_encoder, StreamingHttpResponse)
 
 
 class TestResponseGenerators(unittest.TestCase):
@@ -58,6 +58,47 @@ class TestResponseGenerators(unittest.TestCase):
         util.generate_json_response_with_pulp_encoder(test_content)
         mock_json.dumps.assert_called_once_with(test_content, default=pulp_json_encoder)
 
+    def test_generate_streaming_json_response(self):
+        """
+        Make sure that the streamed content is the same JSON array as a non-streaming response.
+        """
+        test_content = [{'foo': 'bar'}, {'baz': [1, 2]}, None]
+        response = util.generate_streaming_json_response(iter(test_content))
+        self.assertTrue(isinstance(response, StreamingHttpResponse))
+        self.assertEqual(response.status_code, httplib.OK)
+        self.assertEqual(response._headers.get('content-type'),
+                         ('Content-Type', 'application/json; charset=utf-8'))
+        self.assertEqual(''.join(response.streaming_content),
+                         util.generate_json_response(test_content).content)
+
+    def test_generate_streaming_json_response_empty(self):
+        """
+        Make sure that an empty iterable is streamed as an empty JSON array.
+        """
+        response = util.generate_streaming_json_response(iter([]))
+        self.assertEqual(json.loads(''.join(response.streaming_content)), [])
+
+    def test_generate_streaming_json_response_is_lazy(self):
+        """
+        Make sure that items are consumed only as the response is written.
+        """
+        items = mock.MagicMock()
+        items.__iter__.return_value = iter(['foo', 'bar'])
+        response = util.generate_streaming_json_response(items)
+        self.assertFalse(items.__iter__.called)
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), '[')
+        self.assertEqual(next(chunks), '"foo"')
+        self.assertEqual(list(chunks), [', "bar"', ']'])
+
+    def test_generate_streaming_json_response_with_pulp_encoder(self):
+        """
+        Ensure that the shortcut function uses the specified encoder.
+        """
+        encoder = util.generate_streaming_json_response_with_pulp_encoder
+        self.assertEqual(encoder.func, util.generate_streaming_json_response)
+        self.assertEqual(encoder.keywords, {'default': pulp_json_encoder})
+
     @mock.patch('pulp.server.webservices.views.util.iri_to_uri')
     def test_generate_redirect_response(self, mock_iri_to_uri):
         """
@@ -74,6 +115,51 @@ class TestResponseGenerators(unittest.TestCase):
         mock_iri_to_uri.assert_called_once_with(href)
 
 
+class TestDocumentsEtag(unittest.TestCase):
+
+    @staticmethod
+    def collection(*raw_documents):
+        collection = mock.MagicMock()
+        documents = [mock.MagicMock(raw=raw) for raw in raw_documents]
+        collection.with_options.return_value.find.return_value = documents
+        return collection
+
+    def test_etag(self):
+        queries = [(self.collection('a', 'b'), {'id': 1}), (self.collection('c'), {})]
+
+        etag = util.documents_etag(queries)
+
+        self.assertEqual(etag, util.documents_etag(queries))
+        collection = queries[0][0]
+        collection.with_options.return_value.find.assert_called_with({'id': 1})
+        codec_options = collection.with_options.call_args[1]['codec_options']
+        self.assertTrue(codec_options.document_class is util.RawBSONDocument)
+
+    def test_etag_changed(self):
+        etag = util.documents_etag([(self.collection('a', 'b'), {})])
+
+        self.assertNotEqual(etag, util.documents_etag([(self.collection('a', 'c'), {})]))
+        # documents that move between queries change the tag
+        self.assertNotEqual(etag, util.documents_etag([(self.collection('a'), {}),
+                                                       (self.collection('b'), {})]))
+
+    def test_variant(self):
+        queries = [(self.collection('a'), {})]
+
+        self.assertNotEqual(util.documents_etag(queries, (True,)),
+                            util.documents_etag(queries, (False,)))
+
+    def test_missing(self):
+        queries = [(self.collection(), {}), (self.collection('a'), {})]
+
+        self.assertTrue(util.documents_etag(queries) is None)
+
+    def test_related_missing(self):
+        queries = [(self.collection('a'), {}), (self.collection(), {})]
+
+        self.assertTrue(util.documents_etag(queries) is not None)
+
+
 class TestParseJsonBody(unittest.TestCase):
     """
     Tests for decorator which validates the request body.